@@ -2,7 +2,8 @@
 
 from setuptools import setup
 
-PACKAGE_NAMES = ['storm_climatologies', 'storm_climatologies.utils']
+PACKAGE_NAMES = ['storm_climatologies', 'storm_climatologies.utils',
+                 'storm_climatologies.scripts']
 KEYWORDS = ['weather', 'meteorology', 'thunderstorm', '40-Dbz', 'tornado',
             '900 seconds']
 SHORT_DESCRIPTION = (
@@ -11,8 +12,20 @@ LONG_DESCRIPTION = (
     'Storm Climatologies is a python package to help analyze storm tracks '
     'and observe there long term climatologies.')
 
+ENTRY_POINTS = {'console_scripts': [
+    'storm-climatologies=storm_climatologies.utils.command_line:run_main',
+    'storm-climatologies-write-partials='
+    'storm_climatologies.utils.command_line:write_partials_main',
+    'storm-climatologies-merge-partials='
+    'storm_climatologies.utils.command_line:merge_partials_main'
+]}
+
 CLASSIFIERS = ['Intended Audience :: Science/Research',
-               'Programming Language :: Python :: 2.7']
+               'Programming Language :: Python :: 3',
+               'Programming Language :: Python :: 3 :: Only']
+
+# Shapely 2 (used by the columnar cache and polygon areas) needs Python 3.7.
+PYTHON_REQUIREMENT = '>=3.7'
 
 PACKAGE_REQUIREMENTS = [
     'descartes', 'geopy', 'netCDF4', 'pyproj', 'scipy', 'sharppy', 'skewt',
@@ -32,4 +45,5 @@ if __name__ == '__main__':
           url='https://github.com/AodhanSweeney/Storm-Climatologies',
           packages=PACKAGE_NAMES, scripts=[], keywords=KEYWORDS,
           classifiers=CLASSIFIERS, include_package_data=True, zip_safe=False,
-          install_requires=PACKAGE_REQUIREMENTS)
+          python_requires=PYTHON_REQUIREMENT,
+          install_requires=PACKAGE_REQUIREMENTS, entry_points=ENTRY_POINTS)
@@ -0,0 +1,69 @@
+"""Unit tests for benchmarks.py."""
+import os
+import shutil
+import tempfile
+import unittest
+from storm_climatologies.utils import benchmarks
+
+BASELINE_DICT_BY_KEY = {
+    'speed_1000objects_2dates': {
+        'objects_per_second': 1000., 'rss_increase_mb': 20.},
+    'area_1000objects_2dates': {
+        'objects_per_second': 1000., 'rss_increase_mb': 20.}
+}
+
+
+class BenchmarksTests(unittest.TestCase):
+    """Each method is a unit test for benchmarks.py."""
+
+    def test_run_suite(self):
+        """ensures that every kind of case runs and counts all objects"""
+        this_result_dict_by_key = benchmarks.run_suite(
+            case_names=['temporal_passage', benchmarks.LOAD_CASE_NAME,
+                        benchmarks.BINNING_CASE_NAME],
+            objects_per_day_values=[500], num_dates_values=[2],
+            num_repeats=1, separate_processes=False)
+
+        self.assertEqual(
+            sorted(this_result_dict_by_key.keys()),
+            ['grid_binning_500objects_2dates',
+             'load_align_concat_500objects_2dates',
+             'temporal_passage_500objects_2dates'])
+        for this_result_dict in this_result_dict_by_key.values():
+            self.assertTrue(this_result_dict['num_storm_objects'] > 500)
+            self.assertTrue(this_result_dict['objects_per_second'] > 0)
+
+        with self.assertRaises(ValueError):
+            benchmarks.run_case('speeds', 500, 2)
+
+    def test_baseline_round_trip(self):
+        """ensures that baselines are written and read back unchanged"""
+        this_dir_name = tempfile.mkdtemp()
+        this_file_name = os.path.join(this_dir_name, 'baseline.json')
+        try:
+            benchmarks.write_baseline(BASELINE_DICT_BY_KEY, this_file_name)
+            self.assertEqual(benchmarks.read_baseline(this_file_name),
+                             BASELINE_DICT_BY_KEY)
+        finally:
+            shutil.rmtree(this_dir_name)
+
+    def test_find_regressions(self):
+        """ensures that only slowdowns and memory growth beyond the tolerance
+        are reported"""
+        this_result_dict_by_key = {
+            'speed_1000objects_2dates': {
+                'objects_per_second': 800., 'rss_increase_mb': 40.},
+            'area_1000objects_2dates': {
+                'objects_per_second': 700., 'rss_increase_mb': 24.},
+            'lifetime_1000objects_2dates': {
+                'objects_per_second': 1., 'rss_increase_mb': 1000.}
+        }
+
+        these_regression_strings = benchmarks.find_regressions(
+            this_result_dict_by_key, BASELINE_DICT_BY_KEY, tolerance=0.25)
+        self.assertEqual(len(these_regression_strings), 2)
+        self.assertTrue(these_regression_strings[0].startswith('area_'))
+        self.assertTrue('RSS' in these_regression_strings[1])
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,310 @@
+"""Unit tests for climatology_engine.py."""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import streaming_stats
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import storm_events
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import utils
+
+SPC_DATE_STRINGS = ['20110401', '20110402', '20110403', '20110404',
+                    '20110405', '20110406', '20110407']
+
+
+class _CountingReader(object):
+    """Makes a small storm-object table for each date and counts the reads."""
+
+    def __init__(self, failing_spc_date_string=None, read_function=None):
+        self.num_reads_by_date = {}
+        self.failing_spc_date_string = failing_spc_date_string
+        self.read_function = read_function
+
+    def __call__(self, spc_date_string):
+        if spc_date_string == self.failing_spc_date_string:
+            raise IOError('Cannot read date "{0:s}".'.format(spc_date_string))
+
+        self.num_reads_by_date[spc_date_string] = (
+            self.num_reads_by_date.get(spc_date_string, 0) + 1)
+        if self.read_function is None:
+            return _read_one_date(spc_date_string)
+        return self.read_function(spc_date_string)
+
+
+def _read_one_date(spc_date_string):
+    """Makes a storm-object table with a different size for each date."""
+    num_storm_objects = int(spc_date_string[-2:]) + 2
+    return pandas.DataFrame({
+        'storm_id': ['{0:s}_{1:d}'.format(spc_date_string, i // 2)
+                     for i in range(num_storm_objects)],
+        'unix_time_sec': 1301616000 + 3600 * numpy.arange(num_storm_objects),
+        'age_sec': 900 * (numpy.arange(num_storm_objects) % 2),
+        'hour': numpy.arange(num_storm_objects) % 24
+    })
+
+
+def _read_one_date_long_tracks(spc_date_string):
+    """Makes a storm-object table where storms cross date boundaries."""
+    these_object_indices = (
+        6 * SPC_DATE_STRINGS.index(spc_date_string) + numpy.arange(6))
+    return pandas.DataFrame({
+        'storm_id': ['storm{0:d}'.format(i // 5)
+                     for i in these_object_indices],
+        'unix_time_sec': 1301616000 + 900 * these_object_indices,
+        'age_sec': 900 * (these_object_indices % 5)
+    })
+
+
+class _HourAccumulator(climatology_engine.Accumulator):
+    """Counts storm objects by hour and keeps the storm IDs."""
+
+    column_names = ['storm_id', 'hour']
+    merge_type_dict = {
+        'num_objects_by_hour': parallel_driver.SUM_MERGE_TYPE,
+        'storm_ids': parallel_driver.CONCAT_MERGE_TYPE
+    }
+
+    def __init__(self, climatology_type):
+        self.climatology_type = climatology_type
+        super(_HourAccumulator, self).__init__()
+
+    def _init_result(self):
+        self.result_dict = {
+            'num_objects_by_hour': numpy.full(24, 0, dtype=int),
+            'storm_ids': numpy.array([], dtype=object)
+        }
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        self.result_dict['num_objects_by_hour'] += numpy.bincount(
+            multiday_storm_object_table['hour'].values, minlength=24)
+        self.result_dict['storm_ids'] = numpy.concatenate((
+            self.result_dict['storm_ids'],
+            multiday_storm_object_table['storm_id'].values))
+
+
+def _make_accumulators():
+    """Makes one accumulator for each window type, plus two real ones."""
+    return [_HourAccumulator(utils.BIRTH_CLIMATOLOGY_TYPE),
+            _HourAccumulator(utils.DEATH_CLIMATOLOGY_TYPE),
+            _HourAccumulator(utils.PASSAGE_CLIMATOLOGY_TYPE),
+            accumulators.LifetimeAccumulator(),
+            accumulators.TemporalPassageAccumulator()]
+
+
+def _make_compact_accumulators():
+    """Makes accumulators that work with compact tables (the last one cannot
+    be merged)."""
+    return [accumulators.LifetimeAccumulator(),
+            accumulators.TemporalPassageAccumulator(),
+            accumulators.StreamingTemporalAccumulator(
+                storm_events.DEATH_EVENT_TYPE)]
+
+
+def _assert_same_results(test_object, first_accumulator_objects,
+                         second_accumulator_objects):
+    """Ensures that two lists of accumulators have the same results."""
+    for i in range(len(first_accumulator_objects)):
+        this_first_dict = first_accumulator_objects[i].get_result()
+        this_second_dict = second_accumulator_objects[i].get_result()
+
+        for this_key in this_first_dict:
+            this_first_value = this_first_dict[this_key]
+            this_second_value = this_second_dict[this_key]
+
+            if isinstance(this_first_value, streaming_stats.SummaryStatistics):
+                test_object.assertEqual(
+                    this_first_value.count, this_second_value.count)
+                test_object.assertAlmostEqual(
+                    this_first_value.mean, this_second_value.mean)
+                this_first_value = this_first_value.histogram_counts
+                this_second_value = this_second_value.histogram_counts
+
+            test_object.assertEqual(
+                list(this_first_value), list(this_second_value))
+
+
+class ClimatologyEngineTests(unittest.TestCase):
+    """Each method is a unit test for climatology_engine.py."""
+
+    def test_each_date_read_once(self):
+        """ensures that all accumulators share one read of each date"""
+        this_reader = _CountingReader()
+        climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(), read_function=this_reader)
+
+        self.assertEqual(
+            this_reader.num_reads_by_date, dict.fromkeys(SPC_DATE_STRINGS, 1))
+
+    def test_column_names(self):
+        """ensures that the loader reads the union of needed columns"""
+        self.assertEqual(
+            climatology_engine._get_column_names(
+                [_HourAccumulator('birth'),
+                 accumulators.TemporalBirthAccumulator()]),
+            ['storm_id', 'hour', 'unix_time_sec', 'age_sec'])
+
+    def test_windows(self):
+        """ensures that each accumulator sees its own window"""
+        this_accumulator = _HourAccumulator(utils.DEATH_CLIMATOLOGY_TYPE)
+        climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS[:2], [this_accumulator],
+            read_function=_read_one_date)
+
+        these_storm_ids = this_accumulator.get_result()['storm_ids']
+        self.assertEqual(len(these_storm_ids), (3 + 4) + 4)
+
+    def test_parallel_matches_serial(self):
+        """ensures that parallel and serial runs give the same answer"""
+        these_serial_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(), num_processes=1,
+            read_function=_read_one_date)
+        these_parallel_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(), num_processes=3,
+            read_function=_read_one_date)
+
+        _assert_same_results(
+            self, these_serial_accumulators, these_parallel_accumulators)
+
+    def test_resume_after_failure(self):
+        """ensures that a killed run resumes from the last completed date"""
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(),
+            read_function=_read_one_date)
+
+        this_dir_name = tempfile.mkdtemp()
+        this_file_name = os.path.join(this_dir_name, 'checkpoint.p')
+        try:
+            with self.assertRaises(IOError):
+                climatology_engine.run_climatologies(
+                    SPC_DATE_STRINGS, _make_accumulators(),
+                    checkpoint_file_name=this_file_name,
+                    read_function=_CountingReader(SPC_DATE_STRINGS[4]))
+
+            this_reader = _CountingReader()
+            these_accumulators = climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS, _make_accumulators(),
+                checkpoint_file_name=this_file_name, read_function=this_reader)
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        self.assertEqual(this_reader.num_reads_by_date,
+                         dict.fromkeys(SPC_DATE_STRINGS[3:], 1))
+        _assert_same_results(
+            self, these_expected_accumulators, these_accumulators)
+
+    def test_extend_with_new_dates(self):
+        """ensures that a finished run is extended by reading new dates only"""
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(),
+            read_function=_read_one_date)
+
+        this_dir_name = tempfile.mkdtemp()
+        this_file_name = os.path.join(this_dir_name, 'checkpoint.p')
+        try:
+            climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS[:4], _make_accumulators(),
+                checkpoint_file_name=this_file_name,
+                read_function=_read_one_date)
+
+            this_reader = _CountingReader()
+            these_accumulators = climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS, _make_accumulators(),
+                checkpoint_file_name=this_file_name, read_function=this_reader)
+
+            with self.assertRaises(ValueError):
+                climatology_engine.run_climatologies(
+                    SPC_DATE_STRINGS[1:], _make_accumulators(),
+                    checkpoint_file_name=this_file_name,
+                    read_function=_read_one_date)
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        self.assertEqual(this_reader.num_reads_by_date,
+                         dict.fromkeys(SPC_DATE_STRINGS[4:], 1))
+        _assert_same_results(
+            self, these_expected_accumulators, these_accumulators)
+
+    def test_parallel_storm_id_encoder(self):
+        """ensures that parallel runs work with compact tables"""
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_compact_accumulators()[:-1],
+            read_function=_read_one_date_long_tracks)
+        these_parallel_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_compact_accumulators()[:-1],
+            num_processes=3, read_function=_read_one_date_long_tracks,
+            storm_id_encoder=storm_table.StormIdEncoder())
+
+        _assert_same_results(
+            self, these_expected_accumulators, these_parallel_accumulators)
+
+    def test_checkpoint_storm_id_encoder(self):
+        """ensures that checkpointed runs with compact tables resume with the
+        encoder of the checkpoint"""
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_compact_accumulators(),
+            read_function=_read_one_date_long_tracks)
+
+        this_dir_name = tempfile.mkdtemp()
+        this_file_name = os.path.join(this_dir_name, 'checkpoint.p')
+        try:
+            with self.assertRaises(IOError):
+                climatology_engine.run_climatologies(
+                    SPC_DATE_STRINGS, _make_compact_accumulators(),
+                    checkpoint_file_name=this_file_name,
+                    read_function=_CountingReader(
+                        SPC_DATE_STRINGS[4],
+                        read_function=_read_one_date_long_tracks),
+                    storm_id_encoder=storm_table.StormIdEncoder())
+
+            these_resumed_accumulators = climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS, _make_compact_accumulators(),
+                checkpoint_file_name=this_file_name,
+                read_function=_read_one_date_long_tracks,
+                storm_id_encoder=storm_table.StormIdEncoder())
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        _assert_same_results(
+            self, these_expected_accumulators, these_resumed_accumulators)
+
+    def test_parallel_rejects_streaming(self):
+        """ensures that a parallel run with accumulators that cannot be merged
+        fails before reading any date"""
+        this_reader = _CountingReader()
+        with self.assertRaises(ValueError):
+            climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS, _make_compact_accumulators(),
+                num_processes=2, read_function=this_reader)
+
+        self.assertEqual(this_reader.num_reads_by_date, {})
+
+    def test_batch_shares_dates(self):
+        """ensures that overlapping runs in a batch read each date once and
+        match separate runs"""
+        these_spc_date_strings_by_run = [
+            SPC_DATE_STRINGS[:4], SPC_DATE_STRINGS[2:], SPC_DATE_STRINGS[3:5]]
+        these_expected_accumulators_by_run = [
+            climatology_engine.run_climatologies(
+                d, _make_accumulators(), read_function=_read_one_date)
+            for d in these_spc_date_strings_by_run]
+
+        this_reader = _CountingReader()
+        these_accumulators_by_run = climatology_engine.run_batch(
+            these_spc_date_strings_by_run,
+            [_make_accumulators() for _ in these_spc_date_strings_by_run],
+            read_function=this_reader)
+
+        self.assertEqual(
+            this_reader.num_reads_by_date, dict.fromkeys(SPC_DATE_STRINGS, 1))
+        for i in range(len(these_spc_date_strings_by_run)):
+            _assert_same_results(
+                self, these_expected_accumulators_by_run[i],
+                these_accumulators_by_run[i])
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
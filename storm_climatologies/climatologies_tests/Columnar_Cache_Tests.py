@@ -0,0 +1,163 @@
+"""Unit tests for columnar_cache.py."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import columnar_cache
+from storm_climatologies.utils import polygon_areas
+
+SPC_DATE_STRING = '20110401'
+TRACKING_SCALE_METRES2 = 314159265
+
+STORM_OBJECT_TABLE = pandas.DataFrame({
+    'storm_id': ['0001_20110401', '0001_20110401', '0002_20110401'],
+    'unix_time_sec': [1301616000, 1301616300, 1301616300],
+    'age_sec': [0, 300, 1200],
+    'centroid_lat_deg': [35., 35.1, 40.],
+    'centroid_lng_deg': [260., 260.2, 270.],
+    'east_velocity_m_s01': [10., 11., -3.],
+    'north_velocity_m_s01': [1., 2., 3.]
+})
+
+SQUARE_COORDS = [(0., 0.), (0., 4.), (4., 4.), (4., 0.)]
+HOLE_COORDS = [(1., 1.), (2., 1.), (2., 2.), (1., 2.)]
+SMALL_SQUARE_COORDS = [(10., 10.), (10., 11.), (11., 11.), (11., 10.)]
+
+
+def _make_polygons():
+    """Makes a polygon, a polygon with a hole and a multi-polygon."""
+    from shapely.geometry import MultiPolygon, Polygon
+
+    return [
+        Polygon(SQUARE_COORDS),
+        Polygon(SQUARE_COORDS, [HOLE_COORDS]),
+        MultiPolygon([Polygon(SQUARE_COORDS, [HOLE_COORDS]),
+                      Polygon(SMALL_SQUARE_COORDS)])]
+
+
+class ColumnarCacheTests(unittest.TestCase):
+    """Each method is a unit test for columnar_cache.py."""
+
+    def setUp(self):
+        self.top_cache_dir_name = tempfile.mkdtemp()
+        columnar_cache.write_storm_object_table(
+            STORM_OBJECT_TABLE, SPC_DATE_STRING, self.top_cache_dir_name,
+            TRACKING_SCALE_METRES2)
+
+    def tearDown(self):
+        shutil.rmtree(self.top_cache_dir_name)
+
+    def test_round_trip(self):
+        """ensures that all columns come back unchanged"""
+        this_table = columnar_cache.read_storm_object_table(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2)
+
+        self.assertEqual(list(this_table['storm_id'].values),
+                         list(STORM_OBJECT_TABLE['storm_id'].values))
+        for this_column in list(STORM_OBJECT_TABLE):
+            self.assertTrue(numpy.array_equal(
+                this_table[this_column].values,
+                STORM_OBJECT_TABLE[this_column].values))
+
+    def test_column_projection(self):
+        """ensures that only the requested columns are read"""
+        this_table = columnar_cache.read_storm_object_table(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2,
+            column_names=['unix_time_sec', 'age_sec'])
+
+        self.assertEqual(list(this_table), ['unix_time_sec', 'age_sec'])
+        self.assertEqual(len(this_table.index), 3)
+
+    def test_polygons_only_by_name(self):
+        """ensures that polygons are read only when asked for by name, and
+        that areas come without them"""
+        this_table = STORM_OBJECT_TABLE.copy()
+        this_table['polygon_object_latlng'] = _make_polygons()
+        columnar_cache.write_storm_object_table(
+            this_table, SPC_DATE_STRING, self.top_cache_dir_name,
+            TRACKING_SCALE_METRES2)
+
+        this_table = columnar_cache.read_storm_object_table(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2)
+        self.assertEqual(list(this_table), list(STORM_OBJECT_TABLE))
+
+        this_table = columnar_cache.read_storm_object_table(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2,
+            column_names=['polygon_area_km2'])
+        self.assertTrue(numpy.allclose(
+            this_table['polygon_area_km2'].values,
+            polygon_areas.get_polygon_areas_km2(_make_polygons())))
+
+    def test_cache_keyed_on_scale(self):
+        """ensures that another tracking scale does not hit the cache"""
+        self.assertTrue(columnar_cache.cache_exists(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2))
+        self.assertFalse(columnar_cache.cache_exists(
+            SPC_DATE_STRING, self.top_cache_dir_name, 50000000))
+
+    def test_polygon_round_trip(self):
+        """ensures that holes and multi-polygons come back unchanged"""
+        this_table = STORM_OBJECT_TABLE.copy()
+        this_table['polygon_object_latlng'] = _make_polygons()
+        columnar_cache.write_storm_object_table(
+            this_table, SPC_DATE_STRING, self.top_cache_dir_name,
+            TRACKING_SCALE_METRES2)
+
+        these_polygon_objects = columnar_cache.read_storm_object_table(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2,
+            column_names=['polygon_object_latlng']
+        )['polygon_object_latlng'].values
+
+        self.assertEqual([p.area for p in these_polygon_objects],
+                         [16., 15., 16.])
+        self.assertEqual([p.geom_type for p in these_polygon_objects],
+                         ['Polygon', 'Polygon', 'MultiPolygon'])
+        for this_polygon_object, this_expected_object in zip(
+                these_polygon_objects, _make_polygons()):
+            self.assertTrue(this_polygon_object.equals(this_expected_object))
+
+    def test_polygon_vertices_from_cache(self):
+        """ensures that polygon vertices can be read without shapely"""
+        this_table = STORM_OBJECT_TABLE.copy()
+        this_table['polygon_object_latlng'] = _make_polygons()
+        columnar_cache.write_storm_object_table(
+            this_table, SPC_DATE_STRING, self.top_cache_dir_name,
+            TRACKING_SCALE_METRES2)
+
+        this_vertex_dict = columnar_cache.read_polygon_vertices(
+            columnar_cache.find_spc_date_dir_name(
+                SPC_DATE_STRING, self.top_cache_dir_name,
+                TRACKING_SCALE_METRES2))
+        self.assertEqual(list(this_vertex_dict['polygon_index_by_ring']),
+                         [0, 1, 1, 2, 2, 2])
+        self.assertEqual(list(this_vertex_dict['exterior_ring_flags']),
+                         [True, True, False, True, False, True])
+        self.assertEqual(list(this_vertex_dict['multipart_flags']),
+                         [False, False, True])
+        self.assertEqual(this_vertex_dict['num_polygons'], 3)
+
+    def test_older_format(self):
+        """ensures that dates cached in an older format are not used"""
+        this_metadata_file_name = os.path.join(
+            columnar_cache.find_spc_date_dir_name(
+                SPC_DATE_STRING, self.top_cache_dir_name,
+                TRACKING_SCALE_METRES2),
+            columnar_cache.METADATA_FILE_NAME)
+        with open(this_metadata_file_name) as f:
+            this_metadata_dict = json.load(f)
+        del this_metadata_dict['format_version']
+        with open(this_metadata_file_name, 'w') as f:
+            json.dump(this_metadata_dict, f)
+
+        self.assertFalse(columnar_cache.cache_exists(
+            SPC_DATE_STRING, self.top_cache_dir_name, TRACKING_SCALE_METRES2))
+        with self.assertRaises(ValueError):
+            columnar_cache.read_storm_object_table(
+                SPC_DATE_STRING, self.top_cache_dir_name,
+                TRACKING_SCALE_METRES2)
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,111 @@
+"""Unit tests for command_line.py."""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from storm_climatologies.climatologies_tests.Climatology_Engine_Tests import (
+    SPC_DATE_STRINGS, _CountingReader, _read_one_date)
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import command_line
+from storm_climatologies.utils import job_config
+
+PRODUCT_NAMES = ['lifetime', 'temporal_passage']
+
+
+class CommandLineTests(unittest.TestCase):
+    """Each method is a unit test for command_line.py."""
+
+    def setUp(self):
+        self.dir_name = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_name)
+
+    def _get_config(self, argv):
+        """Parses arguments into job config."""
+        return command_line._get_config(
+            command_line._get_arg_parser('').parse_args(argv))
+
+    def test_dates_replace_seasons(self):
+        """ensures that dates on the command line make one season"""
+        this_config_dict = self._get_config([
+            '--first_spc_date_string=20110401',
+            '--last_spc_date_string=20110407', '--season_name=April',
+            '--products', 'lifetime', 'speed', '--num_processes=2',
+            '--compact_tables=1'])
+
+        self.assertEqual(this_config_dict['seasons'], [job_config.make_season(
+            '20110401', '20110407', name='April')])
+        self.assertEqual(this_config_dict['products'], ['lifetime', 'speed'])
+        self.assertEqual(this_config_dict['num_processes'], 2)
+        self.assertTrue(this_config_dict['compact_tables'] is True)
+
+        with self.assertRaises(ValueError):
+            self._get_config(['--first_spc_date_string=20110401'])
+
+    def test_run_job(self):
+        """ensures that a batch of seasons reads each date once and matches
+        separate runs"""
+        this_config_dict = job_config.get_config(override_dict={
+            'output_dir_name': self.dir_name, 'products': PRODUCT_NAMES,
+            'write_raw_values': False,
+            'seasons': [
+                job_config.make_season(SPC_DATE_STRINGS[0],
+                                       SPC_DATE_STRINGS[4], name='first'),
+                job_config.make_season(SPC_DATE_STRINGS[2],
+                                       SPC_DATE_STRINGS[6], name='second')]})
+
+        this_reader = _CountingReader()
+        this_accumulator_dict_by_season = command_line.run_job(
+            this_config_dict, read_function=this_reader)
+        self.assertEqual(
+            this_reader.num_reads_by_date, dict.fromkeys(SPC_DATE_STRINGS, 1))
+
+        this_season_dict = this_config_dict['seasons'][1]
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            job_config.get_spc_date_strings(this_season_dict),
+            [job_config.make_accumulators(
+                this_config_dict, this_season_dict)[p]
+             for p in PRODUCT_NAMES], read_function=_read_one_date)
+        self.assertTrue(numpy.array_equal(
+            these_expected_accumulators[1].get_result()['num_storms_by_hour'],
+            this_accumulator_dict_by_season['second'][
+                'temporal_passage'].get_result()['num_storms_by_hour']))
+
+        these_file_names = job_config.write_results(
+            this_accumulator_dict_by_season['second'], this_config_dict,
+            this_season_dict)
+        self.assertEqual(
+            [os.path.basename(f) for f in these_file_names],
+            ['lifetime_storm_ages_sec.npz',
+             'temporal_passage_num_storms_by_hour.npy'])
+        self.assertEqual(
+            numpy.load(these_file_names[0])['count'],
+            this_accumulator_dict_by_season['second'][
+                'lifetime'].get_result()['storm_ages_sec'].count)
+
+    def test_compact_tables(self):
+        """ensures that compact tables give the same products"""
+        these_result_dicts = []
+        for this_flag in [False, True]:
+            this_config_dict = job_config.get_config(override_dict={
+                'products': PRODUCT_NAMES, 'write_raw_values': False,
+                'compact_tables': this_flag,
+                'seasons': [job_config.make_season(
+                    SPC_DATE_STRINGS[0], SPC_DATE_STRINGS[4])]})
+            self.assertEqual(
+                'storm_id_encoder' in command_line._get_loader_kwargs(
+                    this_config_dict), this_flag)
+
+            this_accumulator_dict = list(command_line.run_job(
+                this_config_dict, read_function=_read_one_date).values())[0]
+            these_result_dicts.append(
+                this_accumulator_dict['temporal_passage'].get_result())
+
+        self.assertTrue(numpy.array_equal(
+            these_result_dicts[0]['num_storms_by_hour'],
+            these_result_dicts[1]['num_storms_by_hour']))
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,187 @@
+"""Unit tests for count_grid.py."""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import count_grid
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import synthetic_tracks
+
+GRID_SHAPE = (2, 5, 6)
+FIRST_INDEX_ARRAYS = (
+    numpy.array([0, 0, 1, 0]), numpy.array([1, 1, 4, 2]),
+    numpy.array([3, 3, 0, 5]))
+SECOND_INDEX_ARRAYS = (
+    numpy.array([0, 1]), numpy.array([1, 0]), numpy.array([3, 0]))
+
+
+def _get_expected_matrix(index_arrays_list):
+    """Adds index arrays to a dense matrix, one item at a time.
+
+    :param index_arrays_list: 1-D list of index-array tuples.
+    :return: count_matrix: numpy array with shape `GRID_SHAPE`.
+    """
+
+    count_matrix = numpy.full(GRID_SHAPE, 0, dtype=int)
+    for this_index_arrays in index_arrays_list:
+        for this_cell in zip(*this_index_arrays):
+            count_matrix[this_cell] += 1
+
+    return count_matrix
+
+
+class CountGridTests(unittest.TestCase):
+    """Each method is a unit test for count_grid.py."""
+
+    def test_add_sparse_and_dense(self):
+        """ensures that sparse and dense storage give the same counts"""
+        this_sparse_object = count_grid.CountGrid(GRID_SHAPE)
+        this_dense_object = count_grid.CountGrid(
+            GRID_SHAPE, dense_fill_ratio=0.)
+
+        for this_object in [this_sparse_object, this_dense_object]:
+            this_object.add(FIRST_INDEX_ARRAYS)
+            this_object.add(SECOND_INDEX_ARRAYS)
+
+        self.assertTrue(this_sparse_object.is_sparse())
+        self.assertFalse(this_dense_object.is_sparse())
+        self.assertEqual(this_sparse_object.get_num_nonzero(), 4)
+
+        this_expected_matrix = _get_expected_matrix(
+            [FIRST_INDEX_ARRAYS, SECOND_INDEX_ARRAYS])
+        for this_object in [this_sparse_object, this_dense_object]:
+            self.assertTrue(numpy.array_equal(
+                this_object.to_dense(), this_expected_matrix))
+            self.assertEqual(this_object.to_dense().dtype, numpy.uint32)
+            self.assertEqual(this_object.to_masked().count(), 4)
+
+    def test_many_sparse_adds(self):
+        """ensures that counts merged into a sparse grid one add at a time
+        equal those added to a dense grid"""
+        this_sparse_object = count_grid.CountGrid(
+            GRID_SHAPE, dense_fill_ratio=1.)
+        this_dense_object = count_grid.CountGrid(
+            GRID_SHAPE, dense_fill_ratio=0.)
+        this_random_object = numpy.random.RandomState(6695)
+
+        for _ in range(50):
+            these_index_arrays = tuple([
+                this_random_object.randint(0, n, size=3) for n in GRID_SHAPE])
+            for this_object in [this_sparse_object, this_dense_object]:
+                this_object.add(these_index_arrays)
+
+            self.assertTrue(this_sparse_object.is_sparse())
+            self.assertTrue(numpy.all(
+                numpy.diff(this_sparse_object.flat_indices) > 0))
+            self.assertTrue(numpy.array_equal(
+                this_sparse_object.to_dense(), this_dense_object.to_dense()))
+
+    def test_switch_to_dense(self):
+        """ensures that storage becomes dense above the fill ratio"""
+        this_count_grid_object = count_grid.CountGrid(
+            GRID_SHAPE, dense_fill_ratio=0.05)
+        this_count_grid_object.add(FIRST_INDEX_ARRAYS)
+        self.assertTrue(this_count_grid_object.is_sparse())
+
+        this_count_grid_object.add(SECOND_INDEX_ARRAYS)
+        self.assertFalse(this_count_grid_object.is_sparse())
+        self.assertTrue(numpy.array_equal(
+            this_count_grid_object.to_dense(),
+            _get_expected_matrix([FIRST_INDEX_ARRAYS, SECOND_INDEX_ARRAYS])))
+
+    def test_merge(self):
+        """ensures that merging sparse and dense grids adds counts"""
+        this_expected_matrix = _get_expected_matrix(
+            [FIRST_INDEX_ARRAYS, SECOND_INDEX_ARRAYS])
+
+        for this_first_ratio, this_second_ratio in [
+                (1., 1.), (1., 0.), (0., 1.), (0., 0.)]:
+            this_first_object = count_grid.CountGrid(
+                GRID_SHAPE, dense_fill_ratio=this_first_ratio)
+            this_first_object.add(FIRST_INDEX_ARRAYS)
+            this_second_object = count_grid.CountGrid(
+                GRID_SHAPE, dense_fill_ratio=this_second_ratio)
+            this_second_object.add(SECOND_INDEX_ARRAYS)
+
+            this_merged_object = this_first_object.copy()
+            this_merged_object.merge(this_second_object)
+            self.assertTrue(numpy.array_equal(
+                this_merged_object.to_dense(), this_expected_matrix))
+            self.assertTrue(numpy.array_equal(
+                this_first_object.to_dense(),
+                _get_expected_matrix([FIRST_INDEX_ARRAYS])))
+
+        with self.assertRaises(ValueError):
+            this_first_object.merge(count_grid.CountGrid((5, 6)))
+
+    def test_dense_slice(self):
+        """ensures that one slice, or the sum over leading dimensions, is the
+        same as from the full dense array"""
+        this_expected_matrix = _get_expected_matrix([FIRST_INDEX_ARRAYS])
+
+        for this_ratio in [1., 0.]:
+            this_count_grid_object = count_grid.CountGrid(
+                GRID_SHAPE, dense_fill_ratio=this_ratio)
+            this_count_grid_object.add(FIRST_INDEX_ARRAYS)
+
+            self.assertTrue(numpy.array_equal(
+                this_count_grid_object.get_dense_slice(leading_indices=(1,)),
+                this_expected_matrix[1]))
+            self.assertTrue(numpy.array_equal(
+                this_count_grid_object.get_dense_slice(),
+                numpy.sum(this_expected_matrix, axis=0)))
+
+    def test_write_and_read(self):
+        """ensures that a grid written with numpy.savez is read back"""
+        this_count_grid_object = count_grid.CountGrid(
+            GRID_SHAPE, dense_fill_ratio=0.)
+        this_count_grid_object.add(FIRST_INDEX_ARRAYS)
+
+        this_dir_name = tempfile.mkdtemp()
+        this_file_name = os.path.join(this_dir_name, 'counts.npz')
+        try:
+            numpy.savez(this_file_name, **this_count_grid_object.to_dict())
+            this_new_object = count_grid.CountGrid.from_dict(
+                numpy.load(this_file_name))
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        self.assertEqual(this_new_object.shape, GRID_SHAPE)
+        self.assertTrue(this_new_object.is_sparse())
+        self.assertTrue(numpy.array_equal(
+            this_new_object.to_dense(), this_count_grid_object.to_dense()))
+
+    def test_stratified_accumulator(self):
+        """ensures that a spatial accumulator with month and hour bins gives,
+        summed over bins, the dense count matrix"""
+        this_grid_spec_object = grid_spec.GridSpec()
+        this_dense_object = accumulators.SpatialBirthAccumulator(
+            this_grid_spec_object)
+        this_stratified_object = accumulators.SpatialBirthAccumulator(
+            this_grid_spec_object, bin_types=['month', 'hour'])
+        climatology_engine.run_climatologies(
+            ['20110414', '20110415', '20110416'],
+            [this_dense_object, this_stratified_object],
+            read_function=synthetic_tracks.SyntheticTrackGenerator(
+                num_storms_per_day=100, include_polygons=False))
+
+        this_count_grid_object = this_stratified_object.get_result()[
+            accumulators.GRID_COUNT_KEY]
+        this_dense_matrix = this_dense_object.get_result()[
+            accumulators.GRID_COUNT_KEY]
+        self.assertTrue(this_count_grid_object.is_sparse())
+        self.assertEqual(this_count_grid_object.shape,
+                         (12, 24) + this_dense_matrix.shape)
+        self.assertTrue(numpy.array_equal(
+            numpy.sum(this_count_grid_object.to_dense(), axis=(0, 1)),
+            this_dense_matrix))
+        self.assertEqual(
+            this_stratified_object.get_masked_grid().count(),
+            this_count_grid_object.get_num_nonzero())
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,118 @@
+"""Unit tests for day_loader.py."""
+import unittest
+import pandas
+from storm_climatologies.utils import day_loader
+
+SPC_DATE_STRINGS = ['20110401', '20110402', '20110403', '20110404']
+
+
+class _CountingReader(object):
+    """Makes a small storm-object table for each date and counts the reads."""
+
+    def __init__(self, failing_spc_date_string=None):
+        self.num_reads_by_date = {}
+        self.failing_spc_date_string = failing_spc_date_string
+
+    def __call__(self, spc_date_string):
+        if spc_date_string == self.failing_spc_date_string:
+            raise IOError('Cannot read date "{0:s}".'.format(spc_date_string))
+
+        self.num_reads_by_date[spc_date_string] = (
+            self.num_reads_by_date.get(spc_date_string, 0) + 1)
+        return pandas.DataFrame({
+            'storm_id': ['{0:s}_a'.format(spc_date_string),
+                         '{0:s}_b'.format(spc_date_string)],
+            'age_sec': [0, 900]
+        })
+
+
+class DayLoaderTests(unittest.TestCase):
+    """Each method is a unit test for day_loader.DayLoader."""
+
+    def test_multiday_table(self):
+        """ensures that tables from all needed dates are concatenated"""
+        this_reader = _CountingReader()
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=SPC_DATE_STRINGS, read_function=this_reader)
+
+        this_table = this_loader.get_multiday_table([1, 2])
+        self.assertEqual(len(this_table), 4)
+        self.assertEqual(list(this_table.index), [0, 1, 2, 3])
+        self.assertEqual(this_table['storm_id'].values[0], '20110402_a')
+
+    def test_column_projection(self):
+        """ensures that only the requested columns are kept"""
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=SPC_DATE_STRINGS, read_function=_CountingReader(),
+            column_names=['age_sec'])
+
+        this_table = this_loader.get_multiday_table([0, 1])
+        self.assertEqual(list(this_table), ['age_sec'])
+        self.assertEqual(len(this_table), 4)
+
+    def test_area_columns(self):
+        """ensures that area columns are computed from polygons, which are
+        then dropped"""
+        from shapely.geometry import Polygon
+
+        this_table = pandas.DataFrame({
+            'age_sec': [0, 900],
+            'polygon_object_latlng': [
+                Polygon([(0., 0.), (0., 1.), (1., 1.)]),
+                Polygon([(0., 0.), (0., 2.), (2., 2.), (2., 0.)])]
+        })
+        this_table = day_loader.project_columns(
+            this_table, ['age_sec', 'polygon_area_km2'])
+
+        self.assertEqual(list(this_table), ['age_sec', 'polygon_area_km2'])
+        self.assertTrue(
+            this_table['polygon_area_km2'].values[1] >
+            3.9 * this_table['polygon_area_km2'].values[0])
+
+    def test_each_date_read_once(self):
+        """ensures that overlapping windows do not read a date twice"""
+        this_reader = _CountingReader()
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=SPC_DATE_STRINGS, read_function=this_reader)
+
+        this_loader.get_multiday_table([0, 1], prefetch_date_indices=[1, 2])
+        this_loader.get_multiday_table([1, 2], prefetch_date_indices=[2, 3])
+        this_loader.get_multiday_table([2, 3])
+        this_loader.clear()
+
+        self.assertEqual(
+            this_reader.num_reads_by_date, dict.fromkeys(SPC_DATE_STRINGS, 1))
+
+    def test_prefetch_errors(self):
+        """ensures that a failed background read is raised when its date is
+        asked for, and reported by clear otherwise"""
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=SPC_DATE_STRINGS,
+            read_function=_CountingReader(SPC_DATE_STRINGS[2]))
+
+        this_loader.get_multiday_table([0], prefetch_date_indices=[2])
+        with self.assertRaises(IOError):
+            this_loader.get_multiday_table([2])
+
+        this_loader.get_multiday_table([0], prefetch_date_indices=[2])
+        this_exception_dict = this_loader.clear()
+        self.assertEqual(list(this_exception_dict.keys()), [2])
+        self.assertTrue(isinstance(this_exception_dict[2], IOError))
+
+    def test_eviction(self):
+        """ensures that old dates are dropped once over the memory budget"""
+        this_reader = _CountingReader()
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=SPC_DATE_STRINGS, read_function=this_reader,
+            max_memory_bytes=1)
+
+        this_loader.get_multiday_table([0, 1])
+        this_loader.get_multiday_table([1, 2])
+        this_loader.get_multiday_table([0])
+
+        self.assertEqual(this_reader.num_reads_by_date['20110401'], 2)
+        self.assertEqual(this_reader.num_reads_by_date['20110402'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
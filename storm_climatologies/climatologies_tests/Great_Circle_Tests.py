@@ -0,0 +1,43 @@
+"""Unit tests for great_circle.py."""
+import unittest
+import numpy
+from storm_climatologies.utils import great_circle
+from storm_climatologies.utils import track_index
+
+# One degree of latitude on a sphere with radius 6371 km.
+KM_PER_DEGREE = 6371. * numpy.pi / 180
+
+STORM_IDS = numpy.array(['a', 'b', 'a', 'a', 'b', 'c'])
+UNIX_TIMES_SEC = numpy.array([0, 0, 600, 300, 300, 0])
+LATITUDES_DEG = numpy.array([30., 40., 30., 31., 41., 35.])
+LONGITUDES_DEG = numpy.array([260., 250., 260., 260., 250., 255.])
+
+
+class GreatCircleTests(unittest.TestCase):
+    """Each method is a unit test for great_circle.py."""
+
+    def test_distances(self):
+        """ensures correct distances along a meridian and the equator"""
+        these_distances_km = great_circle.get_distances_km(
+            numpy.array([30., 0., 10.]), numpy.array([260., 0., 20.]),
+            numpy.array([31., 0., 10.]), numpy.array([260., 2., 20.]))
+
+        self.assertTrue(numpy.allclose(
+            these_distances_km, [KM_PER_DEGREE, 2 * KM_PER_DEGREE, 0.]))
+
+    def test_displacement_and_path_length(self):
+        """ensures that tracks go out and back in time order"""
+        this_index = track_index.TrackIndex(STORM_IDS, UNIX_TIMES_SEC)
+
+        self.assertTrue(numpy.allclose(
+            great_circle.get_displacements_km(
+                this_index, LATITUDES_DEG, LONGITUDES_DEG),
+            [0., KM_PER_DEGREE, 0.]))
+        self.assertTrue(numpy.allclose(
+            great_circle.get_path_lengths_km(
+                this_index, LATITUDES_DEG, LONGITUDES_DEG),
+            [2 * KM_PER_DEGREE, KM_PER_DEGREE, 0.]))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,59 @@
+"""Unit tests for grid binning in utils.py."""
+import unittest
+import numpy
+from storm_climatologies.utils import utils
+
+GRID_POINTS_METRES = numpy.linspace(-50000., 50000., num=11)
+IRREGULAR_POINTS_METRES = numpy.array([-7., -1., 0., 2.5, 10., 11.])
+
+
+class GridBinningTests(unittest.TestCase):
+    """Each method is a unit test for grid binning in utils.py."""
+
+    def test_matches_find_nearest_value(self):
+        """ensures same nearest index as _find_nearest_value, incl. ties"""
+        numpy.random.seed(6695)
+        for these_grid_points in [GRID_POINTS_METRES, IRREGULAR_POINTS_METRES]:
+            these_test_values = numpy.concatenate((
+                numpy.random.uniform(
+                    these_grid_points[0] - 10, these_grid_points[-1] + 10,
+                    size=1000),
+                these_grid_points,
+                (these_grid_points[:-1] + these_grid_points[1:]) / 2))
+
+            these_expected_indices = [
+                utils._find_nearest_value(these_grid_points, v)[1]
+                for v in these_test_values]
+            self.assertEqual(
+                list(utils.find_nearest_indices(
+                    these_grid_points, these_test_values)),
+                these_expected_indices)
+
+    def test_count_mode(self):
+        """ensures that storm objects are counted in the right cells"""
+        this_matrix = numpy.full((11, 11), 0, dtype=int)
+        utils.bin_storm_objects(
+            numpy.array([0., 4000., 5000., 1e6]),
+            numpy.array([0., -4000., -5000., -1e6]),
+            GRID_POINTS_METRES, GRID_POINTS_METRES,
+            grid_cell_count_matrix=this_matrix)
+
+        self.assertEqual(this_matrix[5, 5], 2)
+        self.assertEqual(this_matrix[5, 6], 1)
+        self.assertEqual(this_matrix[0, 10], 1)
+        self.assertEqual(numpy.sum(this_matrix), 4)
+
+    def test_weighted_mode(self):
+        """ensures that weights are summed in each cell"""
+        this_matrix = utils.bin_storm_objects(
+            numpy.array([0., 1000., 20000.]), numpy.array([0., 0., 0.]),
+            GRID_POINTS_METRES, GRID_POINTS_METRES,
+            weights=numpy.array([1.5, 2., 4.]))
+
+        self.assertEqual(this_matrix[5, 5], 3.5)
+        self.assertEqual(this_matrix[5, 7], 4.)
+        self.assertEqual(numpy.sum(this_matrix), 7.5)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,66 @@
+"""Unit tests for grid_spec.py."""
+import shutil
+import tempfile
+import unittest
+import numpy
+from storm_climatologies.utils import grid_spec
+
+UNIQUE_X_METRES = numpy.linspace(-20000., 20000., num=5)
+UNIQUE_Y_METRES = numpy.linspace(-10000., 10000., num=3)
+
+
+class _CountingGridSpec(grid_spec.GridSpec):
+    """Grid spec that counts how many times the x-y grid is computed."""
+
+    num_computations = 0
+
+    def _compute_xy_grid(self):
+        _CountingGridSpec.num_computations += 1
+        return UNIQUE_X_METRES, UNIQUE_Y_METRES
+
+
+class GridSpecTests(unittest.TestCase):
+    """Each method is a unit test for grid_spec.GridSpec."""
+
+    def setUp(self):
+        grid_spec.clear_memory_cache()
+        _CountingGridSpec.num_computations = 0
+        self.cache_dir_name = tempfile.mkdtemp()
+
+    def tearDown(self):
+        grid_spec.clear_memory_cache()
+        shutil.rmtree(self.cache_dir_name)
+
+    def test_hashable(self):
+        """ensures that equal specs have equal hashes and keys"""
+        this_spec = grid_spec.GridSpec()
+        that_spec = grid_spec.GridSpec(
+            central_latitude_deg=37.5, central_longitude_deg=265)
+        other_spec = grid_spec.GridSpec(x_spacing_metres=5000.)
+
+        self.assertEqual(this_spec, that_spec)
+        self.assertEqual(hash(this_spec), hash(that_spec))
+        self.assertEqual(this_spec.get_key(), that_spec.get_key())
+        self.assertNotEqual(this_spec, other_spec)
+        self.assertEqual(len(set([this_spec, that_spec, other_spec])), 2)
+        self.assertEqual(this_spec.num_latlng_rows, 351)
+        self.assertEqual(this_spec.num_latlng_columns, 701)
+
+    def test_disk_cache(self):
+        """ensures that the x-y grid is computed once and then read"""
+        this_spec = _CountingGridSpec()
+        this_spec.get_xy_grid(cache_dir_name=self.cache_dir_name)
+        this_spec.get_xy_grid(cache_dir_name=self.cache_dir_name)
+        self.assertEqual(_CountingGridSpec.num_computations, 1)
+
+        grid_spec.clear_memory_cache()
+        these_x_metres, these_y_metres = this_spec.get_xy_grid(
+            cache_dir_name=self.cache_dir_name)
+
+        self.assertEqual(_CountingGridSpec.num_computations, 1)
+        self.assertTrue(numpy.array_equal(these_x_metres, UNIQUE_X_METRES))
+        self.assertTrue(numpy.array_equal(these_y_metres, UNIQUE_Y_METRES))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,75 @@
+"""Unit tests for job_config.py."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from storm_climatologies.utils import job_config
+
+SEASON_DICTS = [
+    {'name': 'April_2011', 'first_spc_date_string': '20110401',
+     'last_spc_date_string': '20110430'},
+    {'first_spc_date_string': '20110415', 'last_spc_date_string': '20110515'}
+]
+
+
+class JobConfigTests(unittest.TestCase):
+    """Each method is a unit test for job_config.py."""
+
+    def setUp(self):
+        self.dir_name = tempfile.mkdtemp()
+        self.config_file_name = os.path.join(self.dir_name, 'job.json')
+        with open(self.config_file_name, 'w') as this_file_handle:
+            json.dump({'seasons': SEASON_DICTS, 'products': ['speed'],
+                       'output_dir_name': self.dir_name}, this_file_handle)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_name)
+
+    def test_get_config(self):
+        """ensures that file values replace defaults and seasons get names"""
+        this_config_dict = job_config.get_config(
+            config_file_name=self.config_file_name)
+
+        self.assertEqual(this_config_dict['products'], ['speed'])
+        self.assertEqual(this_config_dict['num_processes'], 1)
+        self.assertEqual(
+            [s['name'] for s in this_config_dict['seasons']],
+            ['April_2011', '20110415_20110515'])
+
+    def test_override(self):
+        """ensures that overrides replace file values, except for None"""
+        this_config_dict = job_config.get_config(
+            config_file_name=self.config_file_name,
+            override_dict={'products': None, 'num_processes': 4})
+
+        self.assertEqual(this_config_dict['products'], ['speed'])
+        self.assertEqual(this_config_dict['num_processes'], 4)
+
+    def test_invalid_config(self):
+        """ensures that bad keys, products and seasons are rejected"""
+        for this_override_dict in [
+                {'first_spc_date_string': '20110401'},
+                {'grid': {'min_latitude': 20.}},
+                {'products': ['speeds']},
+                {'seasons': []},
+                {'seasons': [SEASON_DICTS[0], SEASON_DICTS[0]]},
+                {'seasons': [{'first_spc_date_string': '20110501',
+                              'last_spc_date_string': '20110401'}]},
+                {'checkpoint_dir_name': self.dir_name, 'num_processes': 2},
+                {'products': ['streaming_temporal_birth'],
+                 'num_processes': 2}]:
+            with self.assertRaises(ValueError):
+                job_config.get_config(
+                    config_file_name=self.config_file_name,
+                    override_dict=this_override_dict)
+
+    def test_get_spc_date_strings(self):
+        """ensures that seasons include both ends"""
+        these_spc_date_strings = job_config.get_spc_date_strings(
+            job_config.make_season('20110430', '20110502'))
+        self.assertEqual(these_spc_date_strings,
+                         ['20110430', '20110501', '20110502'])
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,111 @@
+"""Unit tests for latlng_lookup.py."""
+import pickle
+import shutil
+import tempfile
+import unittest
+import numpy
+from gewittergefahr.gg_utils import projections
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import latlng_lookup
+from storm_climatologies.utils import synthetic_tracks
+
+# Small domain, so that tables are quick to build.
+GRID_SPEC_OBJECT = grid_spec.GridSpec(
+    min_latitude_deg=30., max_latitude_deg=40., min_longitude_deg=260.,
+    max_longitude_deg=275.)
+LOOKUP_SPACING_DEG = 0.1
+
+
+class LatlngLookupTests(unittest.TestCase):
+    """Each method is a unit test for latlng_lookup.py."""
+
+    def setUp(self):
+        latlng_lookup.clear_memory_cache()
+        self.cache_dir_name = tempfile.mkdtemp()
+
+    def tearDown(self):
+        latlng_lookup.clear_memory_cache()
+        shutil.rmtree(self.cache_dir_name)
+
+    def test_error_bound(self):
+        """ensures that interpolated x-y is within the error bound of exact
+        projection, inside and outside the table"""
+        this_table_object = latlng_lookup.get_table(
+            GRID_SPEC_OBJECT, spacing_deg=LOOKUP_SPACING_DEG)
+        self.assertTrue(0. < this_table_object.max_error_metres < 100.)
+
+        these_latitudes_deg = numpy.concatenate((
+            numpy.random.RandomState(6).uniform(30., 40., size=1000),
+            numpy.array([25., 30., 40.])))
+        these_longitudes_deg = numpy.concatenate((
+            numpy.random.RandomState(7).uniform(260., 275., size=1000),
+            numpy.array([265., -100., 275.])))
+
+        these_x_metres, these_y_metres = this_table_object.project(
+            these_latitudes_deg, these_longitudes_deg)
+        these_exact_x_metres, these_exact_y_metres = (
+            projections.project_latlng_to_xy(
+                latitudes_deg=these_latitudes_deg,
+                longitudes_deg=these_longitudes_deg,
+                projection_object=GRID_SPEC_OBJECT.get_projection()))
+
+        these_errors_metres = numpy.sqrt(
+            (these_x_metres - these_exact_x_metres) ** 2 +
+            (these_y_metres - these_exact_y_metres) ** 2)
+        self.assertTrue(numpy.all(
+            these_errors_metres <= this_table_object.max_error_metres + 1e-6))
+        self.assertTrue(numpy.allclose(
+            these_errors_metres[-3:], 0., atol=1e-3))
+
+    def test_disk_cache(self):
+        """ensures that the table is built once, then memory-mapped, and that
+        it is not copied when pickled"""
+        this_table_object = latlng_lookup.get_table(
+            GRID_SPEC_OBJECT, cache_dir_name=self.cache_dir_name,
+            spacing_deg=LOOKUP_SPACING_DEG)
+        latlng_lookup.clear_memory_cache()
+
+        that_table_object = latlng_lookup.get_table(
+            GRID_SPEC_OBJECT, cache_dir_name=self.cache_dir_name,
+            spacing_deg=LOOKUP_SPACING_DEG)
+        self.assertTrue(isinstance(
+            that_table_object.xy_matrix_metres, numpy.memmap))
+        self.assertEqual(that_table_object.metadata_dict,
+                         this_table_object.metadata_dict)
+
+        this_pickle_string = pickle.dumps(that_table_object)
+        self.assertTrue(
+            len(this_pickle_string) <
+            that_table_object.xy_matrix_metres.nbytes / 10)
+        self.assertTrue(numpy.array_equal(
+            pickle.loads(this_pickle_string).xy_matrix_metres,
+            this_table_object.xy_matrix_metres))
+
+    def test_spatial_accumulator(self):
+        """ensures that binning with the table gives the same counts as exact
+        projection, up to centroids near cell edges"""
+        this_exact_object = accumulators.SpatialPassageAccumulator(
+            GRID_SPEC_OBJECT)
+        this_lookup_object = accumulators.SpatialPassageAccumulator(
+            GRID_SPEC_OBJECT, grid_cache_dir_name=self.cache_dir_name,
+            lookup_spacing_deg=LOOKUP_SPACING_DEG)
+        climatology_engine.run_climatologies(
+            ['20110414', '20110415'], [this_exact_object, this_lookup_object],
+            read_function=synthetic_tracks.SyntheticTrackGenerator(
+                num_storms_per_day=100, include_polygons=False))
+
+        this_exact_matrix = this_exact_object.get_result()[
+            accumulators.GRID_COUNT_KEY]
+        this_lookup_matrix = this_lookup_object.get_result()[
+            accumulators.GRID_COUNT_KEY]
+        self.assertEqual(numpy.sum(this_lookup_matrix),
+                         numpy.sum(this_exact_matrix))
+        self.assertTrue(
+            numpy.sum(numpy.absolute(this_lookup_matrix - this_exact_matrix))
+            <= 0.001 * numpy.sum(this_exact_matrix))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
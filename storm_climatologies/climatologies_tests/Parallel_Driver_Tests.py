@@ -0,0 +1,99 @@
+"""Unit tests for parallel_driver.py."""
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import parallel_driver
+
+SPC_DATE_STRINGS = ['20110401', '20110402', '20110403', '20110404',
+                    '20110405', '20110406', '20110407']
+MERGE_TYPE_DICT = {
+    'num_objects_by_hour': parallel_driver.SUM_MERGE_TYPE,
+    'storm_ids': parallel_driver.CONCAT_MERGE_TYPE
+}
+
+
+def _read_one_date(spc_date_string):
+    """Makes a storm-object table with a different size for each date."""
+    num_storm_objects = int(spc_date_string[-2:]) + 2
+    return pandas.DataFrame({
+        'storm_id': ['{0:s}_{1:d}'.format(spc_date_string, i)
+                     for i in range(num_storm_objects)],
+        'hour': numpy.arange(num_storm_objects) % 24
+    })
+
+
+def _process_one_date(multiday_storm_object_table, working_date_index):
+    """Counts storm objects by hour and keeps the storm IDs."""
+    return {
+        'num_objects_by_hour': numpy.bincount(
+            multiday_storm_object_table['hour'].values, minlength=24),
+        'storm_ids': multiday_storm_object_table['storm_id'].values
+    }
+
+
+def _square(argument_dict):
+    """Squares the number in an argument dictionary."""
+    return argument_dict['value'] ** 2
+
+
+class ParallelDriverTests(unittest.TestCase):
+    """Each method is a unit test for parallel_driver.py."""
+
+    def test_split_into_chunks(self):
+        """ensures that chunks are contiguous and cover all dates"""
+        these_chunks = parallel_driver.split_into_chunks(7, 3)
+        self.assertTrue(numpy.array_equal(
+            numpy.concatenate(these_chunks), numpy.arange(7)))
+        self.assertEqual(len(these_chunks), 3)
+        self.assertEqual(len(parallel_driver.split_into_chunks(2, 5)), 2)
+
+    def test_run_chunks(self):
+        """ensures that chunk results come back in order, with and without a
+        pool"""
+        these_argument_dicts = [{'value': v} for v in range(5)]
+        for this_num_processes in [1, 2]:
+            self.assertEqual(
+                parallel_driver.run_chunks(
+                    _square, these_argument_dicts, this_num_processes),
+                [0, 1, 4, 9, 16])
+
+    def test_parallel_matches_serial(self):
+        """ensures that parallel and serial runs give the same answer"""
+        for this_climatology_type in ['birth', 'death', 'passage']:
+            this_serial_dict = parallel_driver.run_climatology(
+                SPC_DATE_STRINGS, this_climatology_type, _process_one_date,
+                MERGE_TYPE_DICT, num_processes=1, num_chunks=1,
+                read_function=_read_one_date)
+            this_parallel_dict = parallel_driver.run_climatology(
+                SPC_DATE_STRINGS, this_climatology_type, _process_one_date,
+                MERGE_TYPE_DICT, num_processes=3,
+                read_function=_read_one_date)
+
+            self.assertTrue(numpy.array_equal(
+                this_serial_dict['num_objects_by_hour'],
+                this_parallel_dict['num_objects_by_hour']))
+            self.assertEqual(list(this_serial_dict['storm_ids']),
+                             list(this_parallel_dict['storm_ids']))
+
+    def test_merge_results(self):
+        """ensures that results are added or concatenated in order"""
+        this_merged_dict = parallel_driver.merge_results([
+            {'num_objects_by_hour': numpy.array([1, 2]),
+             'storm_ids': numpy.array(['a', 'b'])},
+            None,
+            {'num_objects_by_hour': numpy.array([3, 0]),
+             'storm_ids': numpy.array(['c'])}
+        ], MERGE_TYPE_DICT)
+
+        self.assertEqual(
+            list(this_merged_dict['num_objects_by_hour']), [4, 2])
+        self.assertEqual(
+            list(this_merged_dict['storm_ids']), ['a', 'b', 'c'])
+
+        with self.assertRaises(ValueError):
+            parallel_driver.merge_results(
+                [{'storm_ids': numpy.array(['a'])}], {'storm_ids': 'max'})
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
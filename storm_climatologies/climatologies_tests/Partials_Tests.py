@@ -0,0 +1,109 @@
+"""Unit tests for partials.py."""
+import shutil
+import tempfile
+import unittest
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import partials
+from storm_climatologies.utils import storm_events
+from storm_climatologies.utils import utils
+from storm_climatologies.climatologies_tests.Climatology_Engine_Tests import (
+    SPC_DATE_STRINGS, _CountingReader, _HourAccumulator,
+    _assert_same_results, _make_accumulators, _read_one_date)
+
+
+class PartialsTests(unittest.TestCase):
+    """Each method is a unit test for partials.py."""
+
+    def setUp(self):
+        self.top_partial_dir_name = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.top_partial_dir_name)
+
+    def test_merged_partials_match_run(self):
+        """ensures that partials written by 2 jobs merge into the full run"""
+        these_expected_accumulators = climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, _make_accumulators(),
+            read_function=_read_one_date)
+
+        for these_indices in parallel_driver.split_into_chunks(
+                len(SPC_DATE_STRINGS), 2):
+            partials.write_daily_partials(
+                SPC_DATE_STRINGS, _make_accumulators(),
+                self.top_partial_dir_name, working_date_indices=these_indices,
+                read_function=_read_one_date)
+
+        these_accumulators = partials.merge_daily_partials(
+            SPC_DATE_STRINGS, _make_accumulators(), self.top_partial_dir_name)
+        _assert_same_results(
+            self, these_expected_accumulators, these_accumulators)
+
+        this_reader = _CountingReader()
+        self.assertEqual(partials.write_daily_partials(
+            SPC_DATE_STRINGS, _make_accumulators(), self.top_partial_dir_name,
+            read_function=this_reader), [])
+        self.assertEqual(this_reader.num_reads_by_date, {})
+
+        with self.assertRaises(ValueError):
+            partials.merge_daily_partials(
+                SPC_DATE_STRINGS[:4], _make_accumulators(),
+                self.top_partial_dir_name)
+
+    def test_changed_input(self):
+        """ensures that only days whose windows changed are recomputed"""
+        this_fingerprint_dict = dict.fromkeys(SPC_DATE_STRINGS, 'a')
+        partials.write_daily_partials(
+            SPC_DATE_STRINGS, _make_accumulators(), self.top_partial_dir_name,
+            input_fingerprint_function=this_fingerprint_dict.get,
+            read_function=_read_one_date)
+
+        this_fingerprint_dict[SPC_DATE_STRINGS[3]] = 'b'
+        this_reader = _CountingReader()
+        these_file_names = partials.write_daily_partials(
+            SPC_DATE_STRINGS, _make_accumulators(), self.top_partial_dir_name,
+            input_fingerprint_function=this_fingerprint_dict.get,
+            read_function=this_reader)
+
+        self.assertEqual(this_reader.num_reads_by_date,
+                         dict.fromkeys(SPC_DATE_STRINGS[2:5], 1))
+        self.assertEqual(len(these_file_names), 1 + 5 + 2)
+
+    def test_error_names_bad_file(self):
+        """ensures that a partial file for another accumulator is named in the
+        error, whatever the order of files"""
+        these_accumulators = [_HourAccumulator(utils.BIRTH_CLIMATOLOGY_TYPE),
+                              _HourAccumulator(utils.DEATH_CLIMATOLOGY_TYPE)]
+        partials.write_daily_partials(
+            SPC_DATE_STRINGS, these_accumulators, self.top_partial_dir_name,
+            read_function=_read_one_date)
+
+        this_good_file_name = partials.find_partial_file(
+            self.top_partial_dir_name, these_accumulators[1],
+            SPC_DATE_STRINGS, 3)
+        this_bad_file_name = partials.find_partial_file(
+            self.top_partial_dir_name, these_accumulators[0],
+            SPC_DATE_STRINGS, 0)
+
+        with self.assertRaises(ValueError) as this_context:
+            partials.merge_partials(
+                these_accumulators[1].copy_empty(),
+                [this_good_file_name, this_bad_file_name])
+        self.assertTrue(this_bad_file_name in str(this_context.exception))
+
+    def test_rejects_streaming(self):
+        """ensures that accumulators that cannot be merged are rejected"""
+        this_accumulator = accumulators.StreamingTemporalAccumulator(
+            storm_events.BIRTH_EVENT_TYPE)
+
+        with self.assertRaises(ValueError):
+            partials.write_daily_partials(
+                SPC_DATE_STRINGS, [this_accumulator],
+                self.top_partial_dir_name, read_function=_read_one_date)
+        with self.assertRaises(ValueError):
+            partials.merge_partials(this_accumulator, [])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
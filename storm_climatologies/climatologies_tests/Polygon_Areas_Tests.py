@@ -0,0 +1,133 @@
+"""Unit tests for polygon_areas.py."""
+import unittest
+import numpy
+import pandas
+import pyproj
+import shapely.geometry
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import polygon_areas
+
+
+def _make_polygons(num_polygons=50):
+    """Makes random storm-sized polygons over the CONUS."""
+    numpy.random.seed(6695)
+    polygon_objects_latlng = []
+    for _ in range(num_polygons):
+        this_num_vertices = numpy.random.randint(5, 30)
+        these_angles_rad = numpy.sort(
+            numpy.random.uniform(0., 2 * numpy.pi, this_num_vertices))
+        these_radii_deg = numpy.random.uniform(0.05, 0.3, this_num_vertices)
+        this_center_lat = numpy.random.uniform(25., 50.)
+        this_center_lng = numpy.random.uniform(235., 295.)
+        polygon_objects_latlng.append(shapely.geometry.Polygon(zip(
+            this_center_lng + these_radii_deg * numpy.cos(these_angles_rad),
+            this_center_lat + these_radii_deg * numpy.sin(these_angles_rad))))
+
+    return polygon_objects_latlng
+
+
+def _get_albers_areas_km2(polygon_objects_latlng):
+    """Computes areas one polygon at a time, like Storm_Areas.py used to."""
+    areas_km2 = []
+    for this_polygon_object in polygon_objects_latlng:
+        this_transformer = pyproj.Transformer.from_proj(
+            pyproj.Proj('EPSG:4326'),
+            pyproj.Proj(proj='aea', lat_1=this_polygon_object.bounds[1],
+                        lat_2=this_polygon_object.bounds[3]),
+            always_xy=True)
+        these_x, these_y = this_transformer.transform(
+            *this_polygon_object.exterior.xy)
+        areas_km2.append(shapely.geometry.Polygon(
+            zip(these_x, these_y)).area / 1e6)
+
+    return numpy.array(areas_km2)
+
+
+class PolygonAreasTests(unittest.TestCase):
+    """Each method is a unit test for polygon_areas.py."""
+
+    def test_areas_match_albers(self):
+        """ensures that batched areas match per-polygon Albers areas"""
+        these_polygons = _make_polygons()
+        these_expected_areas_km2 = _get_albers_areas_km2(these_polygons)
+
+        for this_method in polygon_areas.VALID_METHODS:
+            these_areas_km2 = polygon_areas.get_polygon_areas_km2(
+                these_polygons, method=this_method)
+            self.assertTrue(numpy.allclose(
+                these_areas_km2, these_expected_areas_km2, rtol=1e-3))
+
+    def test_holes_and_multipolygons(self):
+        """ensures that holes are subtracted and parts are added"""
+        this_square = shapely.geometry.box(260., 35., 260.2, 35.2)
+        this_hole = shapely.geometry.box(260.05, 35.05, 260.15, 35.15)
+        this_other_square = shapely.geometry.box(270., 40., 270.1, 40.1)
+        these_areas_km2 = polygon_areas.get_polygon_areas_km2(
+            [this_square, this_hole, this_square.difference(this_hole),
+             shapely.geometry.MultiPolygon([this_square, this_other_square]),
+             this_other_square])
+
+        self.assertAlmostEqual(
+            these_areas_km2[2], these_areas_km2[0] - these_areas_km2[1])
+        self.assertAlmostEqual(
+            these_areas_km2[3], these_areas_km2[0] + these_areas_km2[4])
+        self.assertEqual(len(polygon_areas.get_polygon_areas_km2([])), 0)
+
+    def test_accumulator_max_area(self):
+        """ensures that the accumulator keeps the max area of each storm"""
+        these_polygons = _make_polygons(num_polygons=6)
+        this_table = pandas.DataFrame({
+            'storm_id': ['a', 'b', 'a', 'b', 'c', 'a'],
+            'unix_time_sec': numpy.array([0, 0, 300, 300, 0, 600]),
+            'age_sec': numpy.full(6, 1800),
+            'polygon_object_latlng': these_polygons
+        })
+        these_areas_km2 = _get_albers_areas_km2(these_polygons)
+
+        this_accumulator = accumulators.AreaAccumulator()
+        this_accumulator.process_window(this_table, 0)
+        this_summary = this_accumulator.get_result()['max_areas_km2']
+
+        these_expected_areas_km2 = [
+            numpy.max(these_areas_km2[[0, 2, 5]]),
+            numpy.max(these_areas_km2[[1, 3]]), these_areas_km2[4]]
+        self.assertEqual(this_summary.count, 3)
+        self.assertAlmostEqual(
+            this_summary.mean / numpy.mean(these_expected_areas_km2), 1.,
+            places=3)
+        self.assertAlmostEqual(
+            this_summary.max_value / numpy.max(these_expected_areas_km2), 1.,
+            places=3)
+
+    def test_accumulator_area_column(self):
+        """ensures that the accumulator asks for areas instead of polygons and
+        gives the same answer with either"""
+        this_table = pandas.DataFrame({
+            'storm_id': ['a', 'b', 'a', 'b', 'c', 'a'],
+            'unix_time_sec': numpy.array([0, 0, 300, 300, 0, 600]),
+            'age_sec': numpy.full(6, 1800),
+            'polygon_object_latlng': _make_polygons(num_polygons=6)
+        })
+
+        this_accumulator = accumulators.AreaAccumulator()
+        self.assertNotIn('polygon_object_latlng',
+                         this_accumulator.column_names)
+        this_accumulator.process_window(day_loader.project_columns(
+            this_table, this_accumulator.column_names), 0)
+        this_summary = this_accumulator.get_result()['max_areas_km2']
+
+        this_expected_accumulator = accumulators.AreaAccumulator()
+        this_expected_accumulator.process_window(this_table, 0)
+        this_expected_summary = (
+            this_expected_accumulator.get_result()['max_areas_km2'])
+
+        self.assertEqual(this_summary.count, 3)
+        self.assertAlmostEqual(this_summary.mean, this_expected_summary.mean)
+
+        with self.assertRaises(ValueError):
+            accumulators.AreaAccumulator(area_method='planar')
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,80 @@
+"""Unit tests for profiling.py."""
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import synthetic_tracks
+
+SPC_DATE_STRINGS = ['20110414', '20110415', '20110416']
+
+
+class ProfilingTests(unittest.TestCase):
+    """Each method is a unit test for profiling.py."""
+
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled(self):
+        """ensures that nothing is recorded while profiling is off"""
+        self.assertTrue(profiling.get_profiler() is None)
+        self.assertTrue(
+            profiling.stage(profiling.READ_STAGE) is profiling._NULL_STAGE)
+
+        with profiling.stage(profiling.READ_STAGE) as this_stage:
+            this_stage.set_num_objects(10)
+
+        self.assertTrue(profiling.disable() is None)
+
+    def test_run_with_profiling(self):
+        """ensures that a run records every stage of every date and writes
+        one JSON record per line"""
+        this_dir_name = tempfile.mkdtemp()
+        this_log_file_name = os.path.join(this_dir_name, 'profile.log')
+
+        try:
+            this_profiler_object = profiling.enable(
+                log_file_name=this_log_file_name)
+            climatology_engine.run_climatologies(
+                SPC_DATE_STRINGS,
+                [accumulators.TemporalDeathAccumulator(),
+                 accumulators.LifetimeAccumulator()],
+                read_function=synthetic_tracks.SyntheticTrackGenerator(
+                    num_storms_per_day=50, include_polygons=False))
+            profiling.disable()
+
+            with open(this_log_file_name) as this_file_handle:
+                these_record_dicts = [
+                    json.loads(l) for l in this_file_handle.readlines()]
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        self.assertEqual(len(these_record_dicts),
+                         len(this_profiler_object.records))
+
+        this_summary_dict = this_profiler_object.get_summary()
+        self.assertEqual(sorted(this_summary_dict['seconds_by_date'].keys()),
+                         SPC_DATE_STRINGS)
+        self.assertEqual(
+            sorted(this_summary_dict['num_objects_by_date'].keys()),
+            SPC_DATE_STRINGS)
+        for this_stage_name in [
+                profiling.READ_STAGE, profiling.ALIGN_STAGE,
+                profiling.CONCAT_STAGE, profiling.MATURITY_FILTER_STAGE,
+                profiling.EVENT_EXTRACTION_STAGE, profiling.BINNING_STAGE]:
+            self.assertTrue(
+                this_stage_name in this_summary_dict['seconds_by_stage'])
+
+        this_report_string = this_profiler_object.get_report(
+            num_slowest_dates=2)
+        self.assertTrue('objects/s' in this_report_string)
+        self.assertEqual(
+            len(this_report_string.split('Slowest dates:\n')[1].split('\n')),
+            2)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,100 @@
+"""Unit tests for accumulators.SpatialMotionAccumulator."""
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import grid_spec
+
+GRID_SPEC_OBJECT = grid_spec.GridSpec()
+MOTION_CLASS = accumulators.SpatialMotionAccumulator
+
+# All objects are in one cell, in April.  Objects 0 and 1 (17 UTC) and 2 (23
+# UTC) are mature; object 3 is not mature and object 4 has no velocity.
+STORM_OBJECT_TABLE = pandas.DataFrame({
+    'storm_id': ['a', 'a', 'b', 'c', 'd'],
+    'unix_time_sec': [1302800400, 1302800700, 1302822000, 1302800400,
+                      1302800400],
+    'age_sec': [900, 1200, 3600, 0, 1800],
+    'centroid_lat_deg': [35., 35., 35., 35., 35.],
+    'centroid_lng_deg': [260., 260., 260., 260., 260.],
+    'east_velocity_m_s01': [10., 20., -6., 100., numpy.nan],
+    'north_velocity_m_s01': [0., 0., 8., 100., numpy.nan]
+})
+
+
+def _read_one_date(spc_date_string):
+    """Returns the same table for every date.
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :return: storm_object_table: pandas DataFrame.
+    """
+
+    if spc_date_string == '20110414':
+        return STORM_OBJECT_TABLE.copy()
+    return STORM_OBJECT_TABLE.iloc[:0].copy()
+
+
+class SpatialMotionTests(unittest.TestCase):
+    """Each method is a unit test for SpatialMotionAccumulator."""
+
+    def _run(self, bin_types):
+        """Runs motion accumulator over two dates.
+
+        :param bin_types: See doc for `_SpatialAccumulator.__init__`.
+        :return: accumulator_object: Instance of `SpatialMotionAccumulator`.
+        """
+
+        accumulator_object = MOTION_CLASS(
+            GRID_SPEC_OBJECT, bin_types=bin_types)
+        climatology_engine.run_climatologies(
+            ['20110414', '20110415'], [accumulator_object],
+            read_function=_read_one_date)
+        return accumulator_object
+
+    def test_motion_fields(self):
+        """ensures correct mean, standard deviation and speed in the one cell
+        with storms, with and without temporal bins"""
+        for this_bin_types in [None, ['month', 'hour']]:
+            this_motion_dict = self._run(this_bin_types).get_motion_fields()
+            this_mean_u_matrix = this_motion_dict[
+                MOTION_CLASS.MEAN_EAST_VELOCITY_KEY]
+            self.assertEqual(this_mean_u_matrix.count(), 1)
+
+            this_cell = numpy.unravel_index(
+                numpy.argmax(numpy.invert(numpy.ma.getmaskarray(
+                    this_mean_u_matrix))), this_mean_u_matrix.shape)
+            self.assertAlmostEqual(this_mean_u_matrix[this_cell], 8.)
+            self.assertAlmostEqual(this_motion_dict[
+                MOTION_CLASS.MEAN_NORTH_VELOCITY_KEY][this_cell], 8. / 3)
+            self.assertAlmostEqual(this_motion_dict[
+                MOTION_CLASS.STDEV_EAST_VELOCITY_KEY][this_cell],
+                numpy.std([10., 20., -6.]))
+            self.assertAlmostEqual(this_motion_dict[
+                MOTION_CLASS.MEAN_SPEED_KEY][this_cell], 40. / 3)
+            self.assertAlmostEqual(
+                this_motion_dict[MOTION_CLASS.MEAN_VECTOR_SPEED_KEY][
+                    this_cell],
+                numpy.sqrt(64. + 64. / 9))
+
+    def test_one_temporal_bin(self):
+        """ensures that motion for one month and hour includes only the storm
+        objects in that bin"""
+        this_accumulator_object = self._run(['month', 'hour'])
+        this_count_grid_object = this_accumulator_object.get_result()[
+            accumulators.GRID_COUNT_KEY]
+        self.assertTrue(this_count_grid_object.is_sparse())
+        self.assertEqual(this_count_grid_object.get_num_nonzero(), 2)
+
+        this_motion_dict = this_accumulator_object.get_motion_fields(
+            bin_indices=(3, 17))
+        this_mean_u_matrix = this_motion_dict[
+            MOTION_CLASS.MEAN_EAST_VELOCITY_KEY]
+        self.assertEqual(this_mean_u_matrix.count(), 1)
+        self.assertAlmostEqual(numpy.ma.max(this_mean_u_matrix), 15.)
+        self.assertEqual(this_accumulator_object.get_motion_fields(
+            bin_indices=(3, 18))[MOTION_CLASS.MEAN_SPEED_KEY].count(), 0)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
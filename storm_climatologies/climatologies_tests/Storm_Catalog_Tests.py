@@ -0,0 +1,158 @@
+"""Unit tests for storm_catalog.py."""
+import os
+import shutil
+import tempfile
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import great_circle
+from storm_climatologies.utils import storm_catalog
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import synthetic_tracks
+from storm_climatologies.utils import track_index
+
+SPC_DATE_STRINGS = ['20110414', '20110415', '20110416']
+
+
+class StormCatalogTests(unittest.TestCase):
+    """Each method is a unit test for storm_catalog.py."""
+
+    def setUp(self):
+        self.generator_object = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=100, mean_lifetime_sec=30000, num_vertices=6)
+        self.catalog_dict = storm_catalog.build_catalog(
+            SPC_DATE_STRINGS, read_function=self.generator_object)
+        self.dir_name = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir_name)
+
+    def test_same_as_full_table(self):
+        """ensures that per-storm values equal those from all dates at once,
+        for storms crossing date boundaries"""
+        this_full_table = pandas.concat(
+            [self.generator_object(d) for d in SPC_DATE_STRINGS],
+            ignore_index=True)
+        this_track_index_object = track_index.TrackIndex.from_table(
+            this_full_table)
+        these_sort_indices = numpy.argsort(
+            self.catalog_dict[storm_catalog.STORM_ID_COLUMN])
+
+        self.assertTrue(numpy.array_equal(
+            self.catalog_dict[storm_catalog.STORM_ID_COLUMN][
+                these_sort_indices],
+            this_track_index_object.unique_storm_ids))
+        self.assertTrue(numpy.allclose(
+            self.catalog_dict[storm_catalog.PATH_LENGTH_COLUMN][
+                these_sort_indices],
+            great_circle.get_path_lengths_km(
+                this_track_index_object,
+                this_full_table['centroid_lat_deg'].values,
+                this_full_table['centroid_lng_deg'].values)))
+        self.assertTrue(numpy.allclose(
+            self.catalog_dict[storm_catalog.MEAN_NORTH_VELOCITY_COLUMN][
+                these_sort_indices],
+            this_track_index_object.mean(
+                this_full_table['north_velocity_m_s01'].values)))
+        self.assertTrue(numpy.array_equal(
+            self.catalog_dict[storm_catalog.DEATH_TIME_COLUMN][
+                these_sort_indices],
+            this_track_index_object.last(
+                this_full_table['unix_time_sec'].values)))
+
+        these_birth_times_unix_sec = self.catalog_dict[
+            storm_catalog.BIRTH_TIME_COLUMN]
+        self.assertTrue(numpy.all(numpy.diff(these_birth_times_unix_sec) >= 0))
+
+    def test_write_and_query(self):
+        """ensures that a written catalog is read back, queried by period and
+        searched by storm ID"""
+        this_catalog_dir_name = os.path.join(self.dir_name, 'catalog')
+        storm_catalog.write_catalog(
+            self.catalog_dict, this_catalog_dir_name,
+            metadata_dict={'tracking_scale_metres2': 314159265})
+        this_catalog_dict = storm_catalog.read_catalog(this_catalog_dir_name)
+
+        self.assertEqual(
+            storm_catalog.read_metadata(this_catalog_dir_name)['num_storms'],
+            len(self.catalog_dict[storm_catalog.STORM_ID_COLUMN]))
+
+        this_first_time_unix_sec, this_last_time_unix_sec = (
+            storm_catalog.get_time_range('20110415', '20110415'))
+        these_rows = storm_catalog.find_rows(
+            this_catalog_dict, this_first_time_unix_sec,
+            this_last_time_unix_sec, mature_storms_only=False)
+        these_birth_times_unix_sec = self.catalog_dict[
+            storm_catalog.BIRTH_TIME_COLUMN]
+        self.assertEqual(
+            list(these_rows),
+            list(numpy.where(numpy.logical_and(
+                these_birth_times_unix_sec >= this_first_time_unix_sec,
+                these_birth_times_unix_sec <= this_last_time_unix_sec))[0]))
+
+        this_result_dict = storm_catalog.get_product_result(
+            this_catalog_dict, 'distance', this_first_time_unix_sec,
+            this_last_time_unix_sec)
+        self.assertEqual(
+            len(this_result_dict[storm_catalog.PATH_LENGTH_COLUMN]),
+            numpy.sum(this_catalog_dict[storm_catalog.MATURE_TIME_COLUMN][
+                these_rows] >= 0))
+        self.assertNotIn(
+            accumulators.DistanceAccumulator.PATH_LENGTH_KEY, this_result_dict)
+
+        this_result_dict = storm_catalog.get_product_result(
+            this_catalog_dict, 'speed', this_first_time_unix_sec,
+            this_last_time_unix_sec)
+        self.assertTrue(numpy.isclose(
+            this_result_dict[storm_catalog.MEAN_SPEED_COLUMN].mean,
+            numpy.mean(this_catalog_dict[storm_catalog.MEAN_SPEED_COLUMN][
+                these_rows][this_catalog_dict[
+                    storm_catalog.MATURE_TIME_COLUMN][these_rows] >= 0])))
+
+        this_result_dict = storm_catalog.get_product_result(
+            this_catalog_dict, 'temporal_death')
+        self.assertEqual(
+            numpy.sum(this_result_dict[accumulators.HOURLY_COUNT_KEY]),
+            numpy.sum(
+                this_catalog_dict[storm_catalog.MATURE_TIME_COLUMN] >= 0))
+
+        this_storm_id = self.catalog_dict[storm_catalog.STORM_ID_COLUMN][5]
+        self.assertEqual(
+            storm_catalog.find_storm(this_catalog_dir_name, this_storm_id), 5)
+        self.assertEqual(
+            storm_catalog.find_storm(this_catalog_dir_name, 'foo'), -1)
+
+        with self.assertRaises(ValueError):
+            storm_catalog.get_product_result(this_catalog_dict, 'passage')
+
+    def test_storm_id_encoder(self):
+        """ensures that a catalog built from encoded storm IDs has the same
+        rows, with string IDs, and is written and searched"""
+        this_catalog_dict = storm_catalog.build_catalog(
+            SPC_DATE_STRINGS, read_function=self.generator_object,
+            storm_id_encoder=storm_table.StormIdEncoder())
+
+        self.assertEqual(
+            list(this_catalog_dict[storm_catalog.STORM_ID_COLUMN]),
+            list(self.catalog_dict[storm_catalog.STORM_ID_COLUMN]))
+        for this_column in storm_catalog.CATALOG_COLUMNS[1:]:
+            self.assertTrue(numpy.allclose(
+                this_catalog_dict[this_column], self.catalog_dict[this_column],
+                atol=0.01, equal_nan=True))
+
+        this_catalog_dir_name = os.path.join(self.dir_name, 'catalog')
+        storm_catalog.write_catalog(this_catalog_dict, this_catalog_dir_name)
+        self.assertEqual(
+            list(storm_catalog.read_catalog(
+                this_catalog_dir_name, [storm_catalog.STORM_ID_COLUMN])[
+                    storm_catalog.STORM_ID_COLUMN]),
+            list(self.catalog_dict[storm_catalog.STORM_ID_COLUMN]))
+
+        this_storm_id = self.catalog_dict[storm_catalog.STORM_ID_COLUMN][5]
+        self.assertEqual(
+            storm_catalog.find_storm(this_catalog_dir_name, this_storm_id), 5)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
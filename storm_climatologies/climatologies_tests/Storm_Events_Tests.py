@@ -0,0 +1,51 @@
+"""Unit tests for storm_events.py."""
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import storm_events
+
+STORM_OBJECT_TABLE = pandas.DataFrame({
+    'storm_id': ['a', 'b', 'a', 'c', 'b', 'a'],
+    'unix_time_sec': [0, 300, 300, 90000, 90300, 90600],
+    'age_sec': [0, 0, 300, 0, 90000, 90600],
+    'centroid_lat_deg': [30., 31., 32., 33., 34., 35.],
+    'centroid_lng_deg': [260., 261., 262., 263., 264., 265.]
+})
+
+
+class StormEventsTests(unittest.TestCase):
+    """Each method is a unit test for storm_events.py."""
+
+    def test_first_and_last_rows(self):
+        """ensures that first and last rows are found for each storm"""
+        these_storm_ids = STORM_OBJECT_TABLE['storm_id'].values
+        self.assertEqual(
+            list(storm_events.find_first_rows(these_storm_ids)), [0, 1, 3])
+        self.assertEqual(
+            list(storm_events.find_last_rows(these_storm_ids)), [5, 4, 3])
+
+    def test_births(self):
+        """ensures that births of mature storms are kept"""
+        this_event_dict = storm_events.get_events(
+            STORM_OBJECT_TABLE, storm_events.BIRTH_EVENT_TYPE,
+            mature_storms_only=True)
+
+        self.assertEqual(list(this_event_dict['row_indices']), [0, 1])
+        self.assertEqual(list(this_event_dict['centroid_lat_deg']), [30., 31.])
+
+    def test_deaths_in_last_day(self):
+        """ensures that only deaths in the last 24 hours are kept"""
+        this_event_dict = storm_events.select_last_day(storm_events.get_events(
+            STORM_OBJECT_TABLE.iloc[:5], storm_events.DEATH_EVENT_TYPE))
+
+        self.assertEqual(list(this_event_dict['storm_id']), ['b', 'c'])
+        self.assertEqual(list(this_event_dict['age_sec']), [90000, 0])
+
+    def test_bad_event_type(self):
+        """ensures that an unknown event type raises an error"""
+        with self.assertRaises(ValueError):
+            storm_events.get_events(STORM_OBJECT_TABLE, 'passage')
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
@@ -0,0 +1,141 @@
+"""Unit tests for storm_registry.py."""
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import storm_events
+from storm_climatologies.utils import storm_registry
+from storm_climatologies.utils import synthetic_tracks
+
+# Storm "a" crosses two date boundaries and matures on the second date; "b"
+# never matures; "c" dies on the first date.
+STORM_OBJECT_TABLES = [
+    pandas.DataFrame({
+        'storm_id': ['a', 'b', 'c', 'c'],
+        'unix_time_sec': [80000, 80000, 80000, 81200],
+        'age_sec': [0, 0, 600, 1800],
+        'centroid_lat_deg': [30., 31., 32., 33.],
+        'centroid_lng_deg': [260., 261., 262., 263.]
+    }),
+    pandas.DataFrame({
+        'storm_id': ['a', 'a', 'b'],
+        'unix_time_sec': [86400, 167000, 86400],
+        'age_sec': [6400, 87000, 600],
+        'centroid_lat_deg': [34., 35., 36.],
+        'centroid_lng_deg': [264., 265., 266.]
+    }),
+    pandas.DataFrame({
+        'storm_id': ['a'],
+        'unix_time_sec': [172800],
+        'age_sec': [92800],
+        'centroid_lat_deg': [37.],
+        'centroid_lng_deg': [267.]
+    })
+]
+
+SPC_DATE_STRINGS = ['20110414', '20110415', '20110416', '20110417']
+
+
+class StormRegistryTests(unittest.TestCase):
+    """Each method is a unit test for storm_registry.py."""
+
+    def test_events_crossing_dates(self):
+        """ensures that each mature storm has one birth and one death, at the
+        right objects, however many dates it crosses"""
+        this_registry_object = storm_registry.StormRegistry(
+            min_age_sec=900, max_gap_sec=3600)
+
+        these_birth_ids = []
+        these_death_ids = []
+        these_death_latitudes_deg = []
+        for this_table in STORM_OBJECT_TABLES:
+            this_birth_dict, this_death_dict = this_registry_object.update(
+                this_table)
+            these_birth_ids.append(list(this_birth_dict['storm_id']))
+            these_death_ids.append(list(this_death_dict['storm_id']))
+            these_death_latitudes_deg += list(
+                this_death_dict['centroid_lat_deg'])
+
+        self.assertEqual(these_birth_ids, [['c'], ['a'], []])
+        self.assertEqual(these_death_ids, [[], ['c'], []])
+        self.assertEqual(len(this_registry_object), 1)
+
+        this_death_dict = this_registry_object.close_all()
+        self.assertEqual(list(this_death_dict['storm_id']), ['a'])
+        self.assertEqual(list(this_death_dict['centroid_lat_deg']), [37.])
+        self.assertEqual(these_death_latitudes_deg, [33.])
+        self.assertEqual(len(this_registry_object), 0)
+
+    def test_same_as_full_table(self):
+        """ensures that streamed events equal those found in all dates at
+        once"""
+        this_generator_object = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=200, include_polygons=False,
+            mean_lifetime_sec=30000)
+        these_tables = [this_generator_object(d) for d in SPC_DATE_STRINGS]
+        this_full_table = pandas.concat(these_tables, ignore_index=True)
+        this_mature_table = this_full_table.loc[
+            this_full_table['age_sec'] >= 900]
+
+        this_registry_object = storm_registry.StormRegistry()
+        these_death_dicts = []
+        for this_table in these_tables:
+            these_death_dicts.append(
+                this_registry_object.update(this_table)[1])
+        these_death_dicts.append(this_registry_object.close_all())
+
+        this_expected_dict = storm_events.get_events(
+            this_mature_table, storm_events.DEATH_EVENT_TYPE)
+        these_sort_indices = numpy.argsort(numpy.concatenate(
+            [d['storm_id'] for d in these_death_dicts]))
+        for this_column in ['storm_id', 'unix_time_sec', 'centroid_lat_deg']:
+            self.assertTrue(numpy.array_equal(
+                numpy.concatenate(
+                    [d[this_column] for d in these_death_dicts]
+                )[these_sort_indices],
+                this_expected_dict[this_column]))
+
+    def test_state_round_trip(self):
+        """ensures that a registry restored from its state gives the same
+        events"""
+        this_registry_object = storm_registry.StormRegistry()
+        this_registry_object.update(STORM_OBJECT_TABLES[0])
+
+        this_new_registry_object = storm_registry.StormRegistry()
+        this_new_registry_object.set_state(this_registry_object.get_state())
+        this_registry_object.update(STORM_OBJECT_TABLES[1])
+
+        this_birth_dict = this_new_registry_object.update(
+            STORM_OBJECT_TABLES[1])[0]
+        self.assertEqual(list(this_birth_dict['storm_id']), ['a'])
+        self.assertEqual(len(this_new_registry_object),
+                         len(this_registry_object))
+
+    def test_streaming_accumulator(self):
+        """ensures that the streaming accumulator counts every mature storm
+        once and cannot be merged"""
+        this_generator_object = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=100, include_polygons=False)
+        this_accumulator_object = accumulators.StreamingTemporalAccumulator(
+            storm_events.BIRTH_EVENT_TYPE)
+        climatology_engine.run_climatologies(
+            SPC_DATE_STRINGS, [this_accumulator_object],
+            read_function=this_generator_object)
+
+        this_full_table = pandas.concat(
+            [this_generator_object(d) for d in SPC_DATE_STRINGS],
+            ignore_index=True)
+        self.assertEqual(
+            numpy.sum(this_accumulator_object.get_result()[
+                accumulators.HOURLY_COUNT_KEY]),
+            len(numpy.unique(this_full_table['storm_id'].values[
+                this_full_table['age_sec'].values >= 900])))
+
+        with self.assertRaises(ValueError):
+            this_accumulator_object.merge(
+                this_accumulator_object.copy_empty())
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
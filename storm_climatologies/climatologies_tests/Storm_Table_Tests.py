@@ -0,0 +1,98 @@
+"""Unit tests for storm_table.py."""
+import pickle
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import storm_table
+
+FIRST_TABLE = pandas.DataFrame({
+    'storm_id': ['0002_20110401', '0001_20110401', '0002_20110401'],
+    'unix_time_sec': [1301616000, 1301616300, 1301616300],
+    'age_sec': [0, 300, 1200],
+    'centroid_lat_deg': [35., 35.1, 40.]
+})
+SECOND_TABLE = pandas.DataFrame({
+    'storm_id': ['0003_20110402', '0002_20110401'],
+    'unix_time_sec': [1301702400, 1301702400],
+    'age_sec': [0, 86400],
+    'centroid_lat_deg': [41., 42.]
+})
+
+
+class StormTableTests(unittest.TestCase):
+    """Each method is a unit test for storm_table.py."""
+
+    def test_codes_stable_across_dates(self):
+        """ensures that a storm gets the same code on every date"""
+        this_encoder = storm_table.StormIdEncoder()
+        this_first_table = storm_table.StormTable.from_data_frame(
+            FIRST_TABLE, this_encoder)
+        this_second_table = storm_table.StormTable.from_data_frame(
+            SECOND_TABLE, this_encoder)
+
+        self.assertEqual(this_first_table['storm_id'][0],
+                         this_second_table['storm_id'][1])
+        self.assertEqual(this_first_table['storm_id'].dtype, numpy.int32)
+        self.assertEqual(len(this_encoder), 3)
+
+    def test_encoder_pickles(self):
+        """ensures that a pickled encoder keeps its codes and still works"""
+        this_encoder = storm_table.StormIdEncoder()
+        these_codes = this_encoder.encode(FIRST_TABLE['storm_id'].values)
+        this_encoder = pickle.loads(pickle.dumps(this_encoder))
+
+        self.assertEqual(
+            list(this_encoder.encode(FIRST_TABLE['storm_id'].values)),
+            list(these_codes))
+        self.assertEqual(
+            list(this_encoder.encode(SECOND_TABLE['storm_id'].values)),
+            [2, these_codes[0]])
+
+    def test_narrowed_dtypes(self):
+        """ensures that numeric columns are narrowed"""
+        this_table = storm_table.StormTable.from_data_frame(
+            FIRST_TABLE, storm_table.StormIdEncoder())
+
+        self.assertEqual(this_table['unix_time_sec'].dtype, numpy.int64)
+        self.assertEqual(this_table['age_sec'].dtype, numpy.int32)
+        self.assertEqual(this_table['centroid_lat_deg'].dtype, numpy.float32)
+
+    def test_round_trip(self):
+        """ensures that conversion back to pandas gives the same storm IDs"""
+        this_table = storm_table.StormTable.from_data_frame(
+            FIRST_TABLE, storm_table.StormIdEncoder())
+        this_data_frame = this_table.to_data_frame()
+
+        self.assertEqual(list(this_data_frame), list(FIRST_TABLE))
+        self.assertEqual(list(this_data_frame['storm_id'].values),
+                         list(FIRST_TABLE['storm_id'].values))
+
+    def test_select_and_row(self):
+        """ensures that row selection and row views agree"""
+        this_table = storm_table.StormTable.from_data_frame(
+            FIRST_TABLE, storm_table.StormIdEncoder())
+        this_table = storm_table.select_rows(
+            this_table, storm_table.get_column(this_table, 'age_sec') >= 300)
+
+        self.assertEqual(len(this_table), 2)
+        self.assertEqual(this_table.row(1).age_sec, 1200)
+        self.assertEqual(this_table.row(0)['unix_time_sec'], 1301616300)
+
+    def test_loader_returns_compact_table(self):
+        """ensures that a loader with an encoder concatenates compact tables"""
+        these_tables = {'20110401': FIRST_TABLE, '20110402': SECOND_TABLE}
+        this_loader = day_loader.DayLoader(
+            spc_date_strings=['20110401', '20110402'],
+            read_function=these_tables.get,
+            storm_id_encoder=storm_table.StormIdEncoder())
+
+        this_table = this_loader.get_multiday_table([0, 1])
+        self.assertTrue(isinstance(this_table, storm_table.StormTable))
+        self.assertEqual(len(this_table), 5)
+        self.assertEqual(
+            len(numpy.unique(this_table['storm_id'])), 3)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
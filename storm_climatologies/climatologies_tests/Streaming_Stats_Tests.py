@@ -0,0 +1,62 @@
+"""Unit tests for streaming_stats.py."""
+import shutil
+import tempfile
+import unittest
+import numpy
+from storm_climatologies.utils import streaming_stats
+
+BIN_EDGES = numpy.array([0., 10., 20., 30.])
+
+
+class StreamingStatsTests(unittest.TestCase):
+    """Each method is a unit test for streaming_stats.py."""
+
+    def test_merged_summary_matches_batch(self):
+        """ensures that merged summaries equal one summary of all values"""
+        numpy.random.seed(6695)
+        these_values = numpy.random.normal(15., 8., size=1000)
+
+        this_summary = streaming_stats.SummaryStatistics(BIN_EDGES)
+        that_summary = streaming_stats.SummaryStatistics(BIN_EDGES)
+        this_summary.update(these_values[:300])
+        that_summary.update(these_values[300:650])
+        that_summary.update(these_values[650:])
+        this_summary.merge(that_summary)
+
+        self.assertEqual(this_summary.count, 1000)
+        self.assertAlmostEqual(this_summary.mean, numpy.mean(these_values))
+        self.assertAlmostEqual(
+            this_summary.variance, numpy.var(these_values, ddof=1))
+        self.assertEqual(this_summary.min_value, numpy.min(these_values))
+        self.assertEqual(this_summary.max_value, numpy.max(these_values))
+        self.assertEqual(
+            list(this_summary.histogram_counts),
+            list(numpy.histogram(these_values, bins=BIN_EDGES)[0]))
+        self.assertEqual(
+            this_summary.num_below_histogram +
+            this_summary.num_above_histogram +
+            numpy.sum(this_summary.histogram_counts), 1000)
+
+    def test_chunked_array(self):
+        """ensures that chunks are read back in key order"""
+        this_dir_name = tempfile.mkdtemp()
+        try:
+            this_writer = streaming_stats.ChunkedArrayWriter(
+                this_dir_name, chunk_size=3)
+            that_writer = streaming_stats.ChunkedArrayWriter(
+                this_dir_name, chunk_size=3)
+
+            that_writer.append(numpy.array([7., 8.]), chunk_key='20110403')
+            this_writer.append(numpy.array([1., 2.]), chunk_key='20110401')
+            this_writer.append(numpy.array([3., 4.]), chunk_key='20110402')
+            that_writer.flush()
+
+            self.assertEqual(
+                list(streaming_stats.read_chunked_array(this_dir_name)),
+                [1., 2., 3., 4., 7., 8.])
+        finally:
+            shutil.rmtree(this_dir_name)
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
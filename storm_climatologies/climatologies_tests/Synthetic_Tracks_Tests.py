@@ -0,0 +1,110 @@
+"""Unit tests for synthetic_tracks.py and local_tracking_io.py."""
+import shutil
+import tempfile
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import local_tracking_io
+from storm_climatologies.utils import synthetic_tracks
+
+TRACKING_SCALE_METRES2 = 314159265
+
+
+class SyntheticTracksTests(unittest.TestCase):
+    """Each method is a unit test for synthetic_tracks.py."""
+
+    def setUp(self):
+        self.generator_object = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=200, seed=3)
+
+    def test_spc_date_boundaries(self):
+        """ensures that SPC dates start at 1200 UTC and wrap across months"""
+        self.assertEqual(
+            synthetic_tracks.get_spc_date_start_time('20110415'), 1302868800)
+        self.assertEqual(
+            synthetic_tracks._get_previous_spc_date('20110301'), '20110228')
+
+    def test_same_table_every_time(self):
+        """ensures that a date always comes out the same"""
+        this_first_table = self.generator_object('20110415')
+        this_second_table = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=200, seed=3)('20110415')
+
+        self.assertTrue(this_first_table.drop(
+            columns=synthetic_tracks.POLYGON_COLUMN).equals(
+                this_second_table.drop(
+                    columns=synthetic_tracks.POLYGON_COLUMN)))
+
+    def test_tracks_cross_dates(self):
+        """ensures that storms continue, without gaps, into the next date"""
+        this_first_table = self.generator_object('20110415')
+        this_second_table = self.generator_object('20110416')
+        start_time_unix_sec = synthetic_tracks.get_spc_date_start_time(
+            '20110415')
+
+        self.assertTrue(numpy.all(
+            this_first_table['unix_time_sec'].values >= start_time_unix_sec))
+        self.assertTrue(numpy.all(
+            this_first_table['unix_time_sec'].values <
+            start_time_unix_sec + synthetic_tracks.SECONDS_PER_DAY))
+
+        crossing_storm_ids = set(this_first_table['storm_id']).intersection(
+            this_second_table['storm_id'])
+        self.assertTrue(len(crossing_storm_ids) > 0)
+
+        this_table = pandas.concat([this_first_table, this_second_table])
+        for this_storm_id, this_storm_table in this_table.groupby('storm_id'):
+            these_times_unix_sec = this_storm_table['unix_time_sec'].values
+            self.assertTrue(numpy.all(numpy.diff(these_times_unix_sec) == 300))
+            self.assertEqual(len(numpy.unique(
+                these_times_unix_sec - this_storm_table['age_sec'].values)), 1)
+
+    def test_polygons(self):
+        """ensures that each polygon surrounds its centroid"""
+        this_table = self.generator_object('20110415').iloc[:50]
+        for i in range(len(this_table.index)):
+            this_centroid_object = this_table[
+                synthetic_tracks.POLYGON_COLUMN].values[i].centroid
+            self.assertAlmostEqual(this_centroid_object.x,
+                                   this_table['centroid_lng_deg'].values[i])
+            self.assertAlmostEqual(this_centroid_object.y,
+                                   this_table['centroid_lat_deg'].values[i])
+
+
+class LocalTrackingIoTests(unittest.TestCase):
+    """Each method is a unit test for local_tracking_io.py."""
+
+    def test_write_and_read(self):
+        """ensures that DayLoader reads back what the generator wrote"""
+        generator_object = synthetic_tracks.SyntheticTrackGenerator(
+            num_storms_per_day=50, include_polygons=False)
+        this_dir_name = tempfile.mkdtemp()
+
+        try:
+            these_file_names = generator_object.write_spc_date(
+                '20110415', this_dir_name, TRACKING_SCALE_METRES2)
+            self.assertEqual(
+                these_file_names,
+                local_tracking_io.find_processed_files_one_spc_date(
+                    spc_date_string='20110415', data_source='segmotion',
+                    top_processed_dir_name=this_dir_name,
+                    tracking_scale_metres2=TRACKING_SCALE_METRES2))
+
+            this_table = day_loader.DayLoader(
+                ['20110415'], top_processed_dir_name=this_dir_name,
+                tracking_scale_metres2=TRACKING_SCALE_METRES2,
+                tracking_io_module=local_tracking_io).get_table(0)
+
+            with self.assertRaises(ValueError):
+                local_tracking_io.find_processed_files_one_spc_date(
+                    spc_date_string='20110416', data_source='segmotion',
+                    top_processed_dir_name=this_dir_name,
+                    tracking_scale_metres2=TRACKING_SCALE_METRES2)
+        finally:
+            shutil.rmtree(this_dir_name)
+
+        self.assertTrue(this_table.equals(generator_object('20110415')))
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
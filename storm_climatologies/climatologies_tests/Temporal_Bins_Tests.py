@@ -0,0 +1,85 @@
+"""Unit tests for temporal_bins.py."""
+import time
+import unittest
+import numpy
+from storm_climatologies.utils import temporal_bins
+
+# 1999-12-31 23:59:59, 2000-02-29 12:14:59, 2000-03-01 00:15:00,
+# 2011-04-01 06:45:00, 2016-12-31 18:30:00, 1969-12-31 23:00:00
+UNIX_TIMES_SEC = numpy.array([946684799, 951826499, 951869700, 1301640300,
+                              1483209000, -3600])
+
+
+def _get_struct_times(unix_times_sec):
+    """Converts times with the standard library (the slow, exact way)."""
+    return [time.gmtime(t) for t in unix_times_sec]
+
+
+class TemporalBinsTests(unittest.TestCase):
+    """Each method is a unit test for temporal_bins.py."""
+
+    def test_bins_match_gmtime(self):
+        """ensures that arithmetic bins match the standard library"""
+        numpy.random.seed(6695)
+        these_times_sec = numpy.concatenate((
+            UNIX_TIMES_SEC, numpy.random.randint(0, 2 ** 31 - 1, size=2000)))
+        these_struct_times = _get_struct_times(these_times_sec)
+
+        self.assertEqual(
+            list(temporal_bins.get_bin_indices(
+                these_times_sec, temporal_bins.HOUR_BIN)),
+            [t.tm_hour for t in these_struct_times])
+        self.assertEqual(
+            list(temporal_bins.get_bin_indices(
+                these_times_sec, temporal_bins.QUARTER_HOUR_BIN)),
+            [4 * t.tm_hour + t.tm_min // 15 for t in these_struct_times])
+        self.assertEqual(
+            list(temporal_bins.get_bin_indices(
+                these_times_sec, temporal_bins.DAY_OF_YEAR_BIN)),
+            [t.tm_yday - 1 for t in these_struct_times])
+        self.assertEqual(
+            list(temporal_bins.get_bin_indices(
+                these_times_sec, temporal_bins.MONTH_BIN)),
+            [t.tm_mon - 1 for t in these_struct_times])
+        self.assertEqual(
+            list(temporal_bins.get_bin_indices(
+                these_times_sec, temporal_bins.YEAR_BIN)),
+            [t.tm_year for t in these_struct_times])
+
+    def test_histogram(self):
+        """ensures correct 2-D histogram, with and without storm IDs"""
+        these_times_sec = numpy.array([0, 600, 3600, 3600, 2678400])
+        these_storm_ids = numpy.array(['a', 'a', 'a', 'b', 'a'])
+
+        this_histogram = temporal_bins.get_histogram(
+            these_times_sec,
+            [temporal_bins.HOUR_BIN, temporal_bins.MONTH_BIN])
+        self.assertEqual(this_histogram.shape, (24, 12))
+        self.assertEqual(this_histogram[0, 0], 2)
+        self.assertEqual(this_histogram[1, 0], 2)
+        self.assertEqual(this_histogram[0, 1], 1)
+        self.assertEqual(numpy.sum(this_histogram), 5)
+
+        this_histogram = temporal_bins.get_histogram(
+            these_times_sec,
+            [temporal_bins.HOUR_BIN, temporal_bins.MONTH_BIN],
+            storm_ids=these_storm_ids)
+        self.assertEqual(this_histogram[0, 0], 1)
+        self.assertEqual(this_histogram[1, 0], 2)
+        self.assertEqual(numpy.sum(this_histogram), 4)
+
+    def test_year_bins(self):
+        """ensures that times outside the year range are dropped"""
+        this_histogram = temporal_bins.get_histogram(
+            UNIX_TIMES_SEC, [temporal_bins.YEAR_BIN], first_year=2000,
+            num_years=12)
+        self.assertEqual(list(numpy.nonzero(this_histogram)[0]), [0, 11])
+        self.assertEqual(numpy.sum(this_histogram), 3)
+
+        with self.assertRaises(ValueError):
+            temporal_bins.get_histogram(
+                UNIX_TIMES_SEC, [temporal_bins.YEAR_BIN])
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
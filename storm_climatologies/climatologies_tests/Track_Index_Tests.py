@@ -0,0 +1,112 @@
+"""Unit tests for track_index.py."""
+import gc
+import unittest
+import numpy
+import pandas
+from storm_climatologies.utils import track_index
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import storm_table
+
+STORM_IDS = numpy.array(['b', 'a', 'b', 'c', 'a', 'b'])
+UNIX_TIMES_SEC = numpy.array([600, 0, 0, 300, 300, 300])
+VALUES = numpy.array([1., 2., 3., 4., 5., 6.])
+
+
+def _make_table(num_storms=40, num_objects=400):
+    """Makes a random storm-object table."""
+    numpy.random.seed(6695)
+    return pandas.DataFrame({
+        'storm_id': numpy.array(['storm{0:d}'.format(i) for i in
+                                 numpy.random.randint(0, num_storms,
+                                                      num_objects)]),
+        'unix_time_sec': numpy.random.randint(0, 86400, num_objects),
+        'age_sec': numpy.random.randint(0, 1800, num_objects),
+        'centroid_lat_deg': numpy.random.uniform(25., 50., num_objects),
+        'centroid_lng_deg': numpy.random.uniform(240., 290., num_objects),
+        'east_velocity_m_s01': numpy.random.normal(10., 5., num_objects),
+        'north_velocity_m_s01': numpy.random.normal(2., 5., num_objects)
+    })
+
+
+class TrackIndexTests(unittest.TestCase):
+    """Each method is a unit test for track_index.TrackIndex."""
+
+    def test_tracks(self):
+        """ensures that each track holds its storm's rows in time order"""
+        this_index = track_index.TrackIndex(STORM_IDS, UNIX_TIMES_SEC)
+
+        self.assertEqual(list(this_index.unique_storm_ids), ['a', 'b', 'c'])
+        self.assertEqual(list(this_index.track_offsets), [0, 2, 5, 6])
+        self.assertEqual(list(this_index.get_track_rows(1)), [2, 5, 0])
+        self.assertEqual(this_index.find_storm_index('c'), 2)
+        self.assertEqual(this_index.find_storm_index('d'), -1)
+
+    def test_reductions(self):
+        """ensures correct per-storm reductions"""
+        this_index = track_index.TrackIndex(STORM_IDS, UNIX_TIMES_SEC)
+
+        self.assertEqual(list(this_index.mean(VALUES)), [3.5, 10. / 3, 4.])
+        self.assertEqual(
+            list(this_index.reduce(VALUES, numpy.maximum)), [5., 6., 4.])
+        self.assertEqual(
+            list(this_index.reduce(VALUES, numpy.minimum)), [2., 1., 4.])
+        self.assertEqual(list(this_index.first(VALUES)), [2., 3., 4.])
+        self.assertEqual(list(this_index.last(VALUES)), [5., 1., 4.])
+        self.assertEqual(list(this_index.broadcast([7, 8, 9])),
+                         [8, 7, 8, 9, 7, 8])
+
+    def test_empty(self):
+        """ensures that an empty table gives an empty index"""
+        this_index = track_index.TrackIndex(numpy.array([], dtype=str))
+        self.assertEqual(len(this_index), 0)
+        self.assertEqual(len(this_index.mean(numpy.array([]))), 0)
+
+    def test_cache(self):
+        """ensures that the same table gets the same index, and that the cache
+        does not keep the table alive"""
+        this_table = _make_table()
+        self.assertIs(track_index.get_track_index(this_table),
+                      track_index.get_track_index(this_table))
+
+        this_num_cached = len(track_index._track_index_cache)
+        del this_table
+        gc.collect()
+        self.assertEqual(
+            len(track_index._track_index_cache), this_num_cached - 1)
+
+    def test_accumulators_match_mask_loops(self):
+        """ensures that speeds and velocities match the boolean-mask loops"""
+        this_table = _make_table()
+        these_storm_ids = this_table['storm_id'].values
+        these_ev = this_table['east_velocity_m_s01'].values
+        these_nv = this_table['north_velocity_m_s01'].values
+        these_mature_ids = these_storm_ids[this_table['age_sec'].values >= 900]
+
+        these_speeds = [numpy.mean(numpy.sqrt(
+            these_ev[these_storm_ids == x] ** 2 +
+            these_nv[these_storm_ids == x] ** 2)) for x in these_mature_ids]
+        these_ev_means = [numpy.mean(these_ev[these_storm_ids == x])
+                          for x in these_storm_ids if x in these_mature_ids]
+
+        for this_input_table in [this_table, storm_table.StormTable(
+                dict([(c, this_table[c].values) for c in this_table]),
+                None)]:
+            this_accumulator = accumulators.SpeedAccumulator()
+            this_accumulator.process_window(this_input_table, 0)
+            this_summary = this_accumulator.get_result()['speeds_m_s01']
+            self.assertEqual(this_summary.count, len(these_speeds))
+            self.assertAlmostEqual(this_summary.mean, numpy.mean(these_speeds))
+
+            this_accumulator = accumulators.VelocityAccumulator()
+            this_accumulator.process_window(this_input_table, 0)
+            this_summary = this_accumulator.get_result()[
+                'mean_east_velocities_m_s01']
+            self.assertEqual(this_summary.count, len(these_ev_means))
+            self.assertAlmostEqual(
+                this_summary.mean, numpy.mean(these_ev_means))
+            self.assertAlmostEqual(
+                this_summary.variance, numpy.var(these_ev_means, ddof=1))
+
+
+if __name__ == '__main__':
+    unittest.main(argv=['first-arg-is-ignored'], exit=False)
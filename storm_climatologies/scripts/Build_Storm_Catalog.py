@@ -0,0 +1,39 @@
+"""One-time build of the per-storm catalog (see storm_catalog.py) from
+processed segmotion tracking files.  Each SPC date is read once, in order."""
+
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import storm_catalog
+
+SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+
+FIRST_SPC_DATE_STRING = '20000101'
+LAST_SPC_DATE_STRING = '20111231'
+TOP_PROCESSED_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'final_tracks/reanalyzed/')
+CATALOG_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'storm_catalog/')
+TRACKING_SCALE_METRES2 = 314159265
+INCLUDE_AREAS = True
+
+
+if __name__ == '__main__':
+    spc_date_strings = time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=FIRST_SPC_DATE_STRING,
+        last_spc_date_string=LAST_SPC_DATE_STRING)
+
+    catalog_dict = storm_catalog.build_catalog(
+        spc_date_strings, include_areas=INCLUDE_AREAS,
+        top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+        tracking_scale_metres2=TRACKING_SCALE_METRES2)
+
+    print(SEPARATOR_STRING)
+    print('Writing {0:d} storms to "{1:s}"...'.format(
+        len(catalog_dict[storm_catalog.STORM_ID_COLUMN]), CATALOG_DIR_NAME))
+    storm_catalog.write_catalog(
+        catalog_dict, CATALOG_DIR_NAME, metadata_dict={
+            'first_spc_date_string': FIRST_SPC_DATE_STRING,
+            'last_spc_date_string': LAST_SPC_DATE_STRING,
+            'tracking_scale_metres2': TRACKING_SCALE_METRES2
+        })
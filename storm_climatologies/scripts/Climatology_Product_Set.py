@@ -0,0 +1,98 @@
+"""Makes every climatology (spatial and temporal births, deaths and passages,
+lifetimes, areas, distances, speeds and velocities) in one pass over the
+tracking files, so that each SPC date is read only once."""
+
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import streaming_stats
+
+FIRST_SPC_DATE_STRING = '20110401'
+LAST_SPC_DATE_STRING = '20110430'
+TOP_PROCESSED_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'final_tracks/reanalyzed/')
+TRACKING_SCALE_METRES2 = 314159265
+NUM_PROCESSES = 1
+OUTPUT_DIR_NAME = '/home/aodhan/MATRIX/'
+
+MIN_LAT_DEG = 20.
+MAX_LAT_DEG = 55.
+MIN_LONG_DEG = 230.
+MAX_LONG_DEG = 300.
+LATITUDE_SPACING_DEG = .10 
+LONGITUDE_SPACING_DEG = .10
+#Center point of MYRORRS Grid = 37.5 deg N and 265.0 deg E
+CENTRAL_MAP_POINT_LAT= 37.5
+CENTRAL_MAP_POINT_LONG= 265.0
+
+X_SPACING_METRES = 10000.
+Y_SPACING_METRES = 10000.
+#x-y grid points are cached here after the first run (None to keep them in
+#memory only)
+GRID_CACHE_DIR_NAME = None
+#state is saved here after every SPC date, so that a rerun resumes (or extends
+#to a later LAST_SPC_DATE_STRING) instead of starting over (None for no
+#checkpoint; needs NUM_PROCESSES = 1)
+CHECKPOINT_FILE_NAME = None
+#dates are kept in memory as compact tables with integer storm IDs (uses less
+#memory)
+COMPACT_TABLES = False
+
+
+def _get_output_name(product_name):
+    """Returns output path (without extension) for one product."""
+    return '{0:s}{1:s}_{2:s}_{3:s}'.format(
+        OUTPUT_DIR_NAME, product_name, FIRST_SPC_DATE_STRING,
+        LAST_SPC_DATE_STRING)
+
+
+if __name__ == '__main__':
+    spc_date_strings = time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=FIRST_SPC_DATE_STRING,
+        last_spc_date_string=LAST_SPC_DATE_STRING)
+
+    grid_spec_object = grid_spec.GridSpec(
+        min_latitude_deg=MIN_LAT_DEG, max_latitude_deg=MAX_LAT_DEG,
+        min_longitude_deg=MIN_LONG_DEG, max_longitude_deg=MAX_LONG_DEG,
+        lat_spacing_deg=LATITUDE_SPACING_DEG,
+        lng_spacing_deg=LONGITUDE_SPACING_DEG,
+        central_latitude_deg=CENTRAL_MAP_POINT_LAT,
+        central_longitude_deg=CENTRAL_MAP_POINT_LONG,
+        x_spacing_metres=X_SPACING_METRES, y_spacing_metres=Y_SPACING_METRES)
+
+    accumulator_dict = accumulators.make_product_set(
+        grid_spec_object, grid_cache_dir_name=GRID_CACHE_DIR_NAME,
+        raw_output_dir_name_by_product=dict([
+            (p, _get_output_name(p))
+            for p in accumulators.PER_STORM_PRODUCT_NAMES]))
+    product_names = sorted(accumulator_dict.keys())
+    if COMPACT_TABLES:
+        storm_id_encoder = storm_table.StormIdEncoder()
+    else:
+        storm_id_encoder = None
+
+    climatology_engine.run_climatologies(
+        spc_date_strings, [accumulator_dict[p] for p in product_names],
+        num_processes=NUM_PROCESSES, checkpoint_file_name=CHECKPOINT_FILE_NAME,
+        top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+        tracking_scale_metres2=TRACKING_SCALE_METRES2,
+        storm_id_encoder=storm_id_encoder)
+
+    for this_product_name in product_names:
+        this_result_dict = accumulator_dict[this_product_name].get_result()
+        for this_key in this_result_dict:
+            if isinstance(this_result_dict[this_key],
+                          streaming_stats.SummaryStatistics):
+                print('{0:s} {1:s}: {2:s}'.format(
+                    this_product_name, this_key,
+                    str(this_result_dict[this_key])))
+                continue
+
+            this_file_name = '{0:s}_{1:s}'.format(
+                _get_output_name(this_product_name), this_key)
+            print('Writing "{0:s}"...'.format(this_file_name))
+            numpy.save(this_file_name, this_result_dict[this_key])
@@ -0,0 +1,41 @@
+"""One-time conversion of processed segmotion tracking files to the columnar
+cache read by columnar_cache.py.  Dates that are already cached are skipped."""
+
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import columnar_cache
+
+SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+
+FIRST_SPC_DATE_STRING = '20000101'
+LAST_SPC_DATE_STRING = '20111231'
+TOP_PROCESSED_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'final_tracks/reanalyzed/')
+TOP_CACHE_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'columnar_cache/')
+TRACKING_SCALE_METRES2 = 314159265
+DATA_SOURCE = 'segmotion'
+INCLUDE_POLYGONS = True
+
+
+if __name__ == '__main__':
+    spc_date_strings = time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=FIRST_SPC_DATE_STRING,
+        last_spc_date_string=LAST_SPC_DATE_STRING)
+
+    for this_spc_date_string in spc_date_strings:
+        if columnar_cache.cache_exists(
+                this_spc_date_string, TOP_CACHE_DIR_NAME,
+                TRACKING_SCALE_METRES2, DATA_SOURCE):
+            continue
+
+        print('Caching SPC date "{0:s}"...'.format(this_spc_date_string))
+        columnar_cache.convert_spc_date(
+            spc_date_string=this_spc_date_string,
+            top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+            top_cache_dir_name=TOP_CACHE_DIR_NAME,
+            tracking_scale_metres2=TRACKING_SCALE_METRES2,
+            data_source=DATA_SOURCE, include_polygons=INCLUDE_POLYGONS)
+
+    print(SEPARATOR_STRING)
@@ -0,0 +1,71 @@
+"""Benchmarks every climatology on synthetic storm tracks (see benchmarks.py)
+and compares throughput and peak RSS with a JSON baseline.  With
+--update_baseline, the results become the new baseline.  Exits with status 1
+if any case regresses, e.g.:
+
+python Run_Benchmarks.py --objects_per_day 10000 100000 --num_dates 3 7
+    --baseline_file=benchmark_baseline.json"""
+
+import argparse
+import os
+import sys
+from storm_climatologies.utils import benchmarks
+
+CASES_ARG_NAME = 'cases'
+OBJECTS_PER_DAY_ARG_NAME = 'objects_per_day'
+NUM_DATES_ARG_NAME = 'num_dates'
+NUM_REPEATS_ARG_NAME = 'num_repeats'
+BASELINE_FILE_ARG_NAME = 'baseline_file'
+UPDATE_BASELINE_ARG_NAME = 'update_baseline'
+TOLERANCE_ARG_NAME = 'tolerance'
+
+INPUT_ARG_PARSER = argparse.ArgumentParser()
+INPUT_ARG_PARSER.add_argument(
+    '--' + CASES_ARG_NAME, type=str, nargs='+', required=False,
+    default=benchmarks.CASE_NAMES, help='Cases to run.')
+INPUT_ARG_PARSER.add_argument(
+    '--' + OBJECTS_PER_DAY_ARG_NAME, type=int, nargs='+', required=False,
+    default=[10000, 100000], help='Storm objects per day.')
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_DATES_ARG_NAME, type=int, nargs='+', required=False,
+    default=[3], help='Number of SPC dates.')
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_REPEATS_ARG_NAME, type=int, required=False,
+    default=benchmarks.DEFAULT_NUM_REPEATS,
+    help='Timed runs per case (the fastest is kept).')
+INPUT_ARG_PARSER.add_argument(
+    '--' + BASELINE_FILE_ARG_NAME, type=str, required=False,
+    default='benchmark_baseline.json', help='Path to JSON baseline.')
+INPUT_ARG_PARSER.add_argument(
+    '--' + UPDATE_BASELINE_ARG_NAME, action='store_true',
+    help='Write results to the baseline file instead of comparing.')
+INPUT_ARG_PARSER.add_argument(
+    '--' + TOLERANCE_ARG_NAME, type=float, required=False,
+    default=benchmarks.DEFAULT_TOLERANCE,
+    help='Fractional slowdown (or memory growth) allowed.')
+
+
+if __name__ == '__main__':
+    INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
+    BASELINE_FILE_NAME = getattr(INPUT_ARG_OBJECT, BASELINE_FILE_ARG_NAME)
+
+    RESULT_DICT_BY_KEY = benchmarks.run_suite(
+        case_names=getattr(INPUT_ARG_OBJECT, CASES_ARG_NAME),
+        objects_per_day_values=getattr(
+            INPUT_ARG_OBJECT, OBJECTS_PER_DAY_ARG_NAME),
+        num_dates_values=getattr(INPUT_ARG_OBJECT, NUM_DATES_ARG_NAME),
+        num_repeats=getattr(INPUT_ARG_OBJECT, NUM_REPEATS_ARG_NAME))
+
+    if (getattr(INPUT_ARG_OBJECT, UPDATE_BASELINE_ARG_NAME) or
+            not os.path.isfile(BASELINE_FILE_NAME)):
+        print('Writing baseline to "{0:s}"...'.format(BASELINE_FILE_NAME))
+        benchmarks.write_baseline(RESULT_DICT_BY_KEY, BASELINE_FILE_NAME)
+        sys.exit(0)
+
+    REGRESSION_STRINGS = benchmarks.find_regressions(
+        RESULT_DICT_BY_KEY, benchmarks.read_baseline(BASELINE_FILE_NAME),
+        tolerance=getattr(INPUT_ARG_OBJECT, TOLERANCE_ARG_NAME))
+    for this_string in REGRESSION_STRINGS:
+        print('REGRESSION: ' + this_string)
+
+    sys.exit(1 if len(REGRESSION_STRINGS) > 0 else 0)
@@ -0,0 +1,74 @@
+import os
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+
+FIRST_SPC_DATE_STRING = '20000101'
+LAST_SPC_DATE_STRING = '20111231'
+TOP_PROCESSED_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'final_tracks/reanalyzed/')
+TRACKING_SCALE_METRES2 = 314159265
+
+MIN_LAT_DEG = 20.
+MAX_LAT_DEG = 55.
+MIN_LONG_DEG = 230.
+MAX_LONG_DEG = 300.
+LATITUDE_SPACING_DEG = .10
+LONGITUDE_SPACING_DEG = .10
+#Center point of MYRORRS Grid = 37.5 deg N and 265.0 deg E
+CENTRAL_MAP_POINT_LAT= 37.5
+CENTRAL_MAP_POINT_LONG= 265.0
+
+X_SPACING_METRES = 10000.
+Y_SPACING_METRES = 10000.
+#x-y grid points are cached here after the first run (None to keep them in
+#memory only)
+GRID_CACHE_DIR_NAME = None
+
+#motion is stratified by month and hour of the day (None for one grid over all
+#times)
+BIN_TYPES = ['month', 'hour']
+#sums and counts for each grid cell are written here, one sparse .npz file per
+#grid (see count_grid.CountGrid.from_dict)
+OUTPUT_DIR_NAME = '/home/aodhan/MATRIX/Spatial_Motion_2000_2011'
+
+
+if __name__ == '__main__':
+    spc_date_strings = time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=FIRST_SPC_DATE_STRING,
+        last_spc_date_string=LAST_SPC_DATE_STRING)
+
+    grid_spec_object = grid_spec.GridSpec(
+        min_latitude_deg=MIN_LAT_DEG, max_latitude_deg=MAX_LAT_DEG,
+        min_longitude_deg=MIN_LONG_DEG, max_longitude_deg=MAX_LONG_DEG,
+        lat_spacing_deg=LATITUDE_SPACING_DEG,
+        lng_spacing_deg=LONGITUDE_SPACING_DEG,
+        central_latitude_deg=CENTRAL_MAP_POINT_LAT,
+        central_longitude_deg=CENTRAL_MAP_POINT_LONG,
+        x_spacing_metres=X_SPACING_METRES, y_spacing_metres=Y_SPACING_METRES)
+
+    motion_accumulator = accumulators.SpatialMotionAccumulator(
+        grid_spec_object, grid_cache_dir_name=GRID_CACHE_DIR_NAME,
+        bin_types=BIN_TYPES)
+    climatology_engine.run_climatologies(
+        spc_date_strings, [motion_accumulator],
+        top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+        tracking_scale_metres2=TRACKING_SCALE_METRES2)
+
+    if not os.path.isdir(OUTPUT_DIR_NAME):
+        os.makedirs(OUTPUT_DIR_NAME)
+
+    for this_key, this_grid in motion_accumulator.get_result().items():
+        this_file_name = os.path.join(OUTPUT_DIR_NAME, this_key)
+        if BIN_TYPES is None:
+            numpy.save(this_file_name + '.npy', this_grid)
+        else:
+            numpy.savez(this_file_name + '.npz', **this_grid.to_dict())
+
+    motion_dict = motion_accumulator.get_motion_fields()
+    print('Mean storm speed over all cells = {0:.2f} m/s'.format(
+        numpy.ma.mean(motion_dict[
+            accumulators.SpatialMotionAccumulator.MEAN_SPEED_KEY])))
@@ -1,96 +1,28 @@
-import numpy
-import pandas
-from gewittergefahr.gg_io import storm_tracking_io as tracking_io
 from gewittergefahr.gg_utils import time_conversion
-import utils
-
-SEPARATOR_STRING = '\n\n' + '*' * 50 + '\n\n'
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
 
 FIRST_SPC_DATE_STRING = '20090901'
 LAST_SPC_DATE_STRING = '20091130'
 TOP_PROCESSED_DIR_NAME = '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/final_tracks/reanalyzed/'
 TRACKING_SCALE_METRES2 = 314159265
 
-HOUR_FORMAT = '%H'
-NUM_HOURS_PER_DAY = 24
-
-BIRTH_CLIMATOLOGY_TYPE = 'birth'
-DEATH_CLIMATOLOGY_TYPE = 'death'
-PASSAGE_CLIMATOLOGY_TYPE = 'passage'
-
-
-def _get_dates_needed(working_date_index, num_dates):
-    """Gets dates needed for the given working date.
-
-    :param working_date_index: Array index for the day currently being worked
-        on.
-    :param num_dates: Number of dates total.
-    :return: date_needed_indices: 1-D numpy array with indices of dates needed.
-    """
-    date_needed_indices = []
-    if working_date_index == 0:
-        date_needed_indices.append(working_date_index)
-    if working_date_index != 0:
-        date_needed_indices.append(working_date_index - 1)
-        date_needed_indices.append(working_date_index)
-
-        
-    return numpy.array(date_needed_indices, dtype=int)
+#raw per-storm values are written here in chunks (read them with
+#streaming_stats.read_chunked_array)
+RAW_OUTPUT_DIR_NAME = '/home/aodhan/MATRIX/Storm_Lifetime_Fall_2009'
 
 
 if __name__ == '__main__':
     spc_date_strings = time_conversion.get_spc_dates_in_range(
         first_spc_date_string=FIRST_SPC_DATE_STRING,
         last_spc_date_string=LAST_SPC_DATE_STRING)
-    num_spc_dates = len(spc_date_strings)
-
-    storm_object_table_by_spc_date = [None] * num_spc_dates
-    storm_ages = []
-
-    for working_date_index in range(num_spc_dates):
-        date_in_memory_indices = utils._get_dates_needed(working_date_index=working_date_index, num_dates=num_spc_dates)
-        for i in range(num_spc_dates):
-            if i in date_in_memory_indices:
-                if storm_object_table_by_spc_date[i] is None:
-
-                    these_tracking_file_names = (tracking_io.find_processed_files_one_spc_date(
-                                                    spc_date_string=spc_date_strings[i],
-                                                    data_source='segmotion',
-                                                    top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
-                                                    tracking_scale_metres2=TRACKING_SCALE_METRES2))
-
-                    storm_object_table_by_spc_date[i] = (tracking_io.read_many_processed_files(
-                                                        these_tracking_file_names))
-
-            else:
-                print 'Clearing data for SPC date "{0:s}"...'.format(spc_date_strings[i])
-                storm_object_table_by_spc_date[i] = None
-        
-        print SEPARATOR_STRING
-
-        for j in date_in_memory_indices[1:]:
-            storm_object_table_by_spc_date[j], _ = (storm_object_table_by_spc_date[j].align(
-                                                    storm_object_table_by_spc_date[date_in_memory_indices[0]], axis=1))
-
-        storm_object_tables_to_concat = [storm_object_table_by_spc_date[j] for j in date_in_memory_indices]
-        multiday_storm_object_table = pandas.concat(storm_object_tables_to_concat, axis=0, ignore_index=True)
-        multiday_storm_object_table = multiday_storm_object_table[multiday_storm_object_table['age_sec'] >= 900]
-        multiday_storm_object_table= multiday_storm_object_table.reset_index()
-        del multiday_storm_object_table['index']        
-
-        storm_switch = multiday_storm_object_table.reindex(index=multiday_storm_object_table.index[::-1])
-
-        deaths_table = storm_switch['storm_id'].values
 
-        last_table, lastplace_holder= numpy.unique(deaths_table, return_index = True)
-        addresses_of_unique_storms = []
-        for x in lastplace_holder:
-            if ((max(multiday_storm_object_table['unix_time_sec']) - 86400)<= 
-                multiday_storm_object_table.loc[x]['unix_time_sec']
-                <= max(multiday_storm_object_table['unix_time_sec'])):
-                addresses_of_unique_storms.append(x)
+    lifetime_accumulator = accumulators.LifetimeAccumulator(
+        raw_output_dir_name=RAW_OUTPUT_DIR_NAME)
+    climatology_engine.run_climatologies(
+        spc_date_strings, [lifetime_accumulator],
+        top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+        tracking_scale_metres2=TRACKING_SCALE_METRES2)
 
-        for x in addresses_of_unique_storms:
-            storm_ages.append(multiday_storm_object_table.loc[x]['age_sec'])
-                
-    numpy.save('/home/aodhan/MATRIX/Storm_Lifetime_Fall_2009', storm_ages)
+    for this_key, this_summary in lifetime_accumulator.get_result().items():
+        print('{0:s}: {1:s}'.format(this_key, str(this_summary)))
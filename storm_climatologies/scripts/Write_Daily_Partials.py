@@ -0,0 +1,74 @@
+"""Writes the contribution of each SPC date to every climatology as a small
+partial file (see partials.py).  Run one copy per job, e.g. with
+--job_index=$SLURM_ARRAY_TASK_ID --num_jobs=N, then merge with
+Merge_Partials.py.  Days whose partial files already exist are skipped."""
+
+import argparse
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import partials
+
+FIRST_SPC_DATE_STRING = '20110401'
+LAST_SPC_DATE_STRING = '20110430'
+TOP_PROCESSED_DIR_NAME = (
+    '/condo/swatwork/ralager/myrorss_40dbz_echo_tops/'
+    'final_tracks/reanalyzed/')
+TRACKING_SCALE_METRES2 = 314159265
+TOP_PARTIAL_DIR_NAME = '/home/aodhan/MATRIX/partials/'
+
+MIN_LAT_DEG = 20.
+MAX_LAT_DEG = 55.
+MIN_LONG_DEG = 230.
+MAX_LONG_DEG = 300.
+LATITUDE_SPACING_DEG = .10 
+LONGITUDE_SPACING_DEG = .10
+#Center point of MYRORRS Grid = 37.5 deg N and 265.0 deg E
+CENTRAL_MAP_POINT_LAT= 37.5
+CENTRAL_MAP_POINT_LONG= 265.0
+
+X_SPACING_METRES = 10000.
+Y_SPACING_METRES = 10000.
+GRID_CACHE_DIR_NAME = None
+
+JOB_INDEX_ARG_NAME = 'job_index'
+NUM_JOBS_ARG_NAME = 'num_jobs'
+
+INPUT_ARG_PARSER = argparse.ArgumentParser()
+INPUT_ARG_PARSER.add_argument(
+    '--' + JOB_INDEX_ARG_NAME, type=int, required=False, default=0,
+    help='Index of this job (0...[num_jobs - 1]).')
+INPUT_ARG_PARSER.add_argument(
+    '--' + NUM_JOBS_ARG_NAME, type=int, required=False, default=1,
+    help='Number of jobs.  Each job does one contiguous chunk of dates.')
+
+
+if __name__ == '__main__':
+    INPUT_ARG_OBJECT = INPUT_ARG_PARSER.parse_args()
+    spc_date_strings = time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=FIRST_SPC_DATE_STRING,
+        last_spc_date_string=LAST_SPC_DATE_STRING)
+
+    grid_spec_object = grid_spec.GridSpec(
+        min_latitude_deg=MIN_LAT_DEG, max_latitude_deg=MAX_LAT_DEG,
+        min_longitude_deg=MIN_LONG_DEG, max_longitude_deg=MAX_LONG_DEG,
+        lat_spacing_deg=LATITUDE_SPACING_DEG,
+        lng_spacing_deg=LONGITUDE_SPACING_DEG,
+        central_latitude_deg=CENTRAL_MAP_POINT_LAT,
+        central_longitude_deg=CENTRAL_MAP_POINT_LONG,
+        x_spacing_metres=X_SPACING_METRES, y_spacing_metres=Y_SPACING_METRES)
+    accumulator_dict = accumulators.make_product_set(
+        grid_spec_object, grid_cache_dir_name=GRID_CACHE_DIR_NAME)
+
+    working_date_indices = parallel_driver.split_into_chunks(
+        len(spc_date_strings), getattr(INPUT_ARG_OBJECT, NUM_JOBS_ARG_NAME))[
+            getattr(INPUT_ARG_OBJECT, JOB_INDEX_ARG_NAME)]
+
+    partial_file_names = partials.write_daily_partials(
+        spc_date_strings,
+        [accumulator_dict[p] for p in sorted(accumulator_dict.keys())],
+        TOP_PARTIAL_DIR_NAME, working_date_indices=working_date_indices,
+        top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+        tracking_scale_metres2=TRACKING_SCALE_METRES2)
+    print('Wrote {0:d} partial files.'.format(len(partial_file_names)))
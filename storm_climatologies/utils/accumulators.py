@@ -0,0 +1,1096 @@
+"""Accumulators for `climatology_engine`, one per script in `scripts/`.
+
+Each accumulator does, for one working date, what the loop body of the matching
+script used to do, and keeps its running result in `result_dict`.
+"""
+
+import os
+import numpy
+from gewittergefahr.gg_utils import projections
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import count_grid
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import great_circle
+from storm_climatologies.utils import latlng_lookup
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import polygon_areas
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import storm_events
+from storm_climatologies.utils import storm_registry
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import streaming_stats
+from storm_climatologies.utils import temporal_bins
+from storm_climatologies.utils import track_index
+from storm_climatologies.utils import utils
+
+MIN_AGE_SEC = 900
+SECONDS_PER_DAY = 86400
+
+STORM_ID_COLUMN = storm_table.STORM_ID_COLUMN
+TIME_COLUMN = storm_table.TIME_COLUMN
+AGE_COLUMN = storm_table.AGE_COLUMN
+CENTROID_LAT_COLUMN = storm_table.CENTROID_LAT_COLUMN
+CENTROID_LNG_COLUMN = storm_table.CENTROID_LNG_COLUMN
+EAST_VELOCITY_COLUMN = storm_table.EAST_VELOCITY_COLUMN
+NORTH_VELOCITY_COLUMN = storm_table.NORTH_VELOCITY_COLUMN
+POLYGON_COLUMN = 'polygon_object_latlng'
+
+GRID_COUNT_KEY = 'grid_cell_count_matrix'
+HOURLY_COUNT_KEY = 'num_storms_by_hour'
+TEMPORAL_COUNT_KEY = 'num_storms_by_bin'
+
+PER_STORM_PRODUCT_NAMES = ['lifetime', 'area', 'distance', 'speed', 'velocity']
+PRODUCT_NAMES = [
+    'spatial_birth', 'spatial_death', 'spatial_passage', 'spatial_motion',
+    'temporal_birth', 'temporal_death', 'temporal_passage'
+] + PER_STORM_PRODUCT_NAMES
+STREAMING_PRODUCT_NAMES = [
+    'streaming_spatial_birth', 'streaming_spatial_death',
+    'streaming_temporal_birth', 'streaming_temporal_death'
+]
+VALID_PRODUCT_NAMES = PRODUCT_NAMES + STREAMING_PRODUCT_NAMES
+
+
+class _SpatialAccumulator(climatology_engine.Accumulator):
+    """Base class for climatologies binned on the projected x-y grid.
+
+    Each key in `grid_keys` is one grid: `GRID_COUNT_KEY` counts storm objects
+    or events, and any others hold weighted sums (see `_bin`).
+    """
+
+    column_names = [STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN,
+                    CENTROID_LAT_COLUMN, CENTROID_LNG_COLUMN]
+    grid_keys = [GRID_COUNT_KEY]
+    merge_type_dict = {GRID_COUNT_KEY: parallel_driver.SUM_MERGE_TYPE}
+
+    def __init__(self, grid_spec_object, grid_cache_dir_name=None,
+                 bin_types=None, first_year=None, num_years=None,
+                 lookup_spacing_deg=None):
+        """Creates new accumulator.
+
+        :param grid_spec_object: Instance of `grid_spec.GridSpec`.
+        :param grid_cache_dir_name: Directory with cached x-y grid points (see
+            `grid_spec.GridSpec.get_xy_grid`).
+        :param bin_types: 1-D list of temporal bin types (see
+            `temporal_bins`), each of which adds a dimension ahead of y and x.
+            If None, grids are dense numpy arrays, as in the scripts;
+            otherwise (even if empty) they are compact `count_grid.CountGrid`
+            objects.
+        :param first_year: See doc for `temporal_bins.get_flat_bin_indices`.
+        :param num_years: Same.
+        :param lookup_spacing_deg: Spacing of lat-long lookup table (see
+            `latlng_lookup`), which is cached with the x-y grid and replaces
+            exact projection of centroids.  If None, centroids are projected
+            exactly.
+        """
+
+        self.grid_spec_object = grid_spec_object
+        self.unique_grid_point_x_metres, self.unique_grid_point_y_metres = (
+            grid_spec_object.get_xy_grid(cache_dir_name=grid_cache_dir_name))
+
+        self.lookup_spacing_deg = lookup_spacing_deg
+        self.lookup_table_object = None
+        if lookup_spacing_deg is not None:
+            self.lookup_table_object = latlng_lookup.get_table(
+                grid_spec_object, cache_dir_name=grid_cache_dir_name,
+                spacing_deg=lookup_spacing_deg)
+
+        self.bin_types = None if bin_types is None else list(bin_types)
+        self.first_year = first_year
+        self.num_years = num_years
+        if self.bin_types is None:
+            self.merge_type_dict = dict([
+                (k, parallel_driver.SUM_MERGE_TYPE) for k in self.grid_keys])
+        else:
+            self.merge_type_dict = dict([
+                (k, parallel_driver.COUNT_GRID_MERGE_TYPE)
+                for k in self.grid_keys])
+
+        super(_SpatialAccumulator, self).__init__()
+
+    def get_config(self):
+        config_dict = {'grid_spec_key': self.grid_spec_object.get_key()}
+        if self.bin_types is not None:
+            config_dict['bin_types'] = self.bin_types
+            config_dict['first_year'] = self.first_year
+            config_dict['num_years'] = self.num_years
+        if self.lookup_spacing_deg is not None:
+            config_dict['lookup_spacing_deg'] = self.lookup_spacing_deg
+
+        return config_dict
+
+    def _get_temporal_bins(self, unix_times_sec):
+        """Finds temporal bin of each time.
+
+        :param unix_times_sec: 1-D numpy array of valid times.
+        :return: bin_index_arrays: Tuple of 1-D numpy arrays, one per bin type,
+            with -1 for times outside the year range (see
+            `temporal_bins.get_flat_bin_indices`).
+        :return: histogram_shape: Tuple with number of bins in each dimension.
+        """
+
+        if len(self.bin_types) == 0:
+            return (), ()
+
+        flat_bin_indices, histogram_shape = (
+            temporal_bins.get_flat_bin_indices(
+                numpy.asarray(unix_times_sec, dtype=numpy.int64),
+                self.bin_types, first_year=self.first_year,
+                num_years=self.num_years))
+
+        bin_index_arrays = numpy.unravel_index(
+            numpy.maximum(flat_bin_indices, 0), histogram_shape)
+        return tuple([
+            numpy.where(flat_bin_indices >= 0, a, -1)
+            for a in bin_index_arrays]), histogram_shape
+
+    def _init_result(self):
+        grid_shape = (len(self.unique_grid_point_y_metres),
+                      len(self.unique_grid_point_x_metres))
+
+        if self.bin_types is not None:
+            histogram_shape = self._get_temporal_bins(
+                numpy.array([], dtype=int))[1]
+
+        self.result_dict = {}
+        for this_key in self.grid_keys:
+            if self.bin_types is None:
+                self.result_dict[this_key] = numpy.full(
+                    grid_shape, 0,
+                    dtype=int if this_key == GRID_COUNT_KEY else float)
+            else:
+                self.result_dict[this_key] = count_grid.CountGrid(
+                    histogram_shape + grid_shape,
+                    dtype=count_grid.COUNT_DTYPE if this_key == GRID_COUNT_KEY
+                    else float)
+
+    def _bin(self, centroid_latitudes_deg, centroid_longitudes_deg,
+             unix_times_sec=None, weights_by_key=None):
+        """Projects centroids to x-y and adds them to the grids.
+
+        N = number of centroids
+
+        :param centroid_latitudes_deg: length-N numpy array of latitudes.
+        :param centroid_longitudes_deg: length-N numpy array of longitudes.
+        :param unix_times_sec: length-N numpy array of valid times (needed
+            only with temporal bins).
+        :param weights_by_key: Dictionary, where each key is in `grid_keys`
+            and each value is a length-N numpy array of weights, added to the
+            grid in weighted-sum mode.  `GRID_COUNT_KEY` is always counted.
+        """
+
+        if weights_by_key is None:
+            weights_by_key = {}
+        weights_by_key = dict(weights_by_key)
+        weights_by_key[GRID_COUNT_KEY] = None
+
+        with profiling.stage(profiling.PROJECTION_STAGE):
+            if self.lookup_table_object is None:
+                projection_object = self.grid_spec_object.get_projection()
+                centroids_x_metres, centroids_y_metres = (
+                    projections.project_latlng_to_xy(
+                        latitudes_deg=centroid_latitudes_deg,
+                        longitudes_deg=centroid_longitudes_deg,
+                        projection_object=projection_object))
+            else:
+                centroids_x_metres, centroids_y_metres = (
+                    self.lookup_table_object.project(
+                        centroid_latitudes_deg, centroid_longitudes_deg))
+
+        with profiling.stage(profiling.BINNING_STAGE):
+            if self.bin_types is None:
+                for this_key, these_weights in weights_by_key.items():
+                    utils.bin_storm_objects(
+                        centroids_x_metres, centroids_y_metres,
+                        self.unique_grid_point_x_metres,
+                        self.unique_grid_point_y_metres,
+                        grid_cell_count_matrix=self.result_dict[this_key],
+                        weights=these_weights)
+                return
+
+            bin_index_arrays = self._get_temporal_bins(unix_times_sec)[0]
+            index_arrays = bin_index_arrays + (
+                utils.find_nearest_indices(
+                    self.unique_grid_point_y_metres, centroids_y_metres),
+                utils.find_nearest_indices(
+                    self.unique_grid_point_x_metres, centroids_x_metres))
+
+            valid_flags = numpy.full(len(centroids_x_metres), True, dtype=bool)
+            for this_array in bin_index_arrays:
+                valid_flags = numpy.logical_and(valid_flags, this_array >= 0)
+
+            index_arrays = tuple([a[valid_flags] for a in index_arrays])
+            for this_key, these_weights in weights_by_key.items():
+                if these_weights is not None:
+                    these_weights = numpy.asarray(these_weights)[valid_flags]
+                self.result_dict[this_key].add(
+                    index_arrays, counts=these_weights)
+
+    def _bin_events(self, event_dict):
+        """Adds events (created by `storm_events.get_events`) to the grid.
+
+        :param event_dict: Dictionary created by `storm_events.get_events`.
+        """
+
+        self._bin(event_dict[CENTROID_LAT_COLUMN],
+                  event_dict[CENTROID_LNG_COLUMN],
+                  unix_times_sec=event_dict[TIME_COLUMN])
+
+    def get_masked_grid(self):
+        """Returns count grid with empty cells masked.
+
+        :return: grid_cell_count_matrix: numpy masked array (with temporal
+            dimensions first, if any).
+        """
+
+        grid_cell_count_matrix = self.result_dict[GRID_COUNT_KEY]
+        if self.bin_types is not None:
+            return grid_cell_count_matrix.to_masked()
+
+        return numpy.ma.masked_where(
+            grid_cell_count_matrix == 0, grid_cell_count_matrix)
+
+
+class SpatialBirthAccumulator(_SpatialAccumulator):
+    """Spatial climatology of storm births (Spatial_Birth_Climatology.py).
+
+    A birth is the first object of a storm that is ever >= 900 seconds old,
+    and is counted if it is in the last 24 hours of the window.
+    """
+
+    climatology_type = utils.BIRTH_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        unix_times_sec = storm_table.get_column(
+            multiday_storm_object_table, TIME_COLUMN)
+        if len(unix_times_sec) == 0:
+            return
+
+        with profiling.stage(profiling.EVENT_EXTRACTION_STAGE):
+            event_dict = storm_events.select_last_day(
+                storm_events.get_events(
+                    multiday_storm_object_table, storm_events.BIRTH_EVENT_TYPE,
+                    mature_storms_only=True),
+                max_time_unix_sec=numpy.max(unix_times_sec))
+
+        self._bin_events(event_dict)
+
+
+class SpatialDeathAccumulator(_SpatialAccumulator):
+    """Spatial climatology of storm deaths (Spatial_Death_Climatology.py).
+
+    A death is the last object >= 900 seconds old of a storm, and is counted
+    if it is in the last 24 hours of the window.
+    """
+
+    climatology_type = utils.DEATH_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            multiday_storm_object_table = storm_table.select_rows(
+                multiday_storm_object_table, storm_table.get_column(
+                    multiday_storm_object_table, AGE_COLUMN) >= MIN_AGE_SEC)
+
+        unix_times_sec = storm_table.get_column(
+            multiday_storm_object_table, TIME_COLUMN)
+        if len(unix_times_sec) == 0:
+            return
+
+        with profiling.stage(profiling.EVENT_EXTRACTION_STAGE):
+            event_dict = storm_events.select_last_day(
+                storm_events.get_events(multiday_storm_object_table,
+                                        storm_events.DEATH_EVENT_TYPE),
+                max_time_unix_sec=numpy.max(unix_times_sec))
+
+        self._bin_events(event_dict)
+
+
+class SpatialPassageAccumulator(_SpatialAccumulator):
+    """Spatial climatology of storm objects.
+
+    Same as Spatial_Passage_Climatology.py.
+    """
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            mature_flags = storm_table.get_column(
+                multiday_storm_object_table, AGE_COLUMN) >= MIN_AGE_SEC
+            centroid_latitudes_deg = storm_table.get_column(
+                multiday_storm_object_table, CENTROID_LAT_COLUMN)[mature_flags]
+            centroid_longitudes_deg = storm_table.get_column(
+                multiday_storm_object_table, CENTROID_LNG_COLUMN)[mature_flags]
+            unix_times_sec = storm_table.get_column(
+                multiday_storm_object_table, TIME_COLUMN)[mature_flags]
+
+        self._bin(centroid_latitudes_deg, centroid_longitudes_deg,
+                  unix_times_sec=unix_times_sec)
+
+
+class SpatialMotionAccumulator(_SpatialAccumulator):
+    """Storm motion on the x-y grid (Spatial_Motion_Climatology.py).
+
+    Every storm object >= 900 seconds old (the objects counted by
+    `SpatialPassageAccumulator`) adds its velocity to the grid cell of its
+    centroid.  Each cell keeps the count and the sums of u, v, u^2, v^2 and
+    speed, which merge by addition; means and standard deviations are found by
+    `get_motion_fields`.  Objects without a finite velocity are skipped.
+    """
+
+    EAST_VELOCITY_SUM_KEY = 'east_velocity_sum_matrix_m_s01'
+    NORTH_VELOCITY_SUM_KEY = 'north_velocity_sum_matrix_m_s01'
+    EAST_VELOCITY_SQUARE_SUM_KEY = 'east_velocity_square_sum_matrix_m2_s02'
+    NORTH_VELOCITY_SQUARE_SUM_KEY = 'north_velocity_square_sum_matrix_m2_s02'
+    SPEED_SUM_KEY = 'speed_sum_matrix_m_s01'
+
+    MEAN_EAST_VELOCITY_KEY = 'mean_east_velocity_m_s01'
+    MEAN_NORTH_VELOCITY_KEY = 'mean_north_velocity_m_s01'
+    STDEV_EAST_VELOCITY_KEY = 'stdev_east_velocity_m_s01'
+    STDEV_NORTH_VELOCITY_KEY = 'stdev_north_velocity_m_s01'
+    MEAN_SPEED_KEY = 'mean_speed_m_s01'
+    MEAN_VECTOR_SPEED_KEY = 'mean_vector_speed_m_s01'
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+    column_names = _SpatialAccumulator.column_names + [
+        EAST_VELOCITY_COLUMN, NORTH_VELOCITY_COLUMN]
+    grid_keys = [
+        GRID_COUNT_KEY, EAST_VELOCITY_SUM_KEY, NORTH_VELOCITY_SUM_KEY,
+        EAST_VELOCITY_SQUARE_SUM_KEY, NORTH_VELOCITY_SQUARE_SUM_KEY,
+        SPEED_SUM_KEY
+    ]
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            east_velocities_m_s01 = storm_table.get_column(
+                multiday_storm_object_table, EAST_VELOCITY_COLUMN
+            ).astype(float)
+            north_velocities_m_s01 = storm_table.get_column(
+                multiday_storm_object_table, NORTH_VELOCITY_COLUMN
+            ).astype(float)
+
+            good_flags = numpy.logical_and(
+                storm_table.get_column(
+                    multiday_storm_object_table, AGE_COLUMN) >= MIN_AGE_SEC,
+                numpy.isfinite(east_velocities_m_s01 + north_velocities_m_s01))
+            east_velocities_m_s01 = east_velocities_m_s01[good_flags]
+            north_velocities_m_s01 = north_velocities_m_s01[good_flags]
+
+        self._bin(
+            storm_table.get_column(
+                multiday_storm_object_table, CENTROID_LAT_COLUMN)[good_flags],
+            storm_table.get_column(
+                multiday_storm_object_table, CENTROID_LNG_COLUMN)[good_flags],
+            unix_times_sec=storm_table.get_column(
+                multiday_storm_object_table, TIME_COLUMN)[good_flags],
+            weights_by_key={
+                self.EAST_VELOCITY_SUM_KEY: east_velocities_m_s01,
+                self.NORTH_VELOCITY_SUM_KEY: north_velocities_m_s01,
+                self.EAST_VELOCITY_SQUARE_SUM_KEY: east_velocities_m_s01 ** 2,
+                self.NORTH_VELOCITY_SQUARE_SUM_KEY:
+                    north_velocities_m_s01 ** 2,
+                self.SPEED_SUM_KEY: numpy.sqrt(
+                    east_velocities_m_s01 ** 2 + north_velocities_m_s01 ** 2)
+            })
+
+    def get_motion_fields(self, bin_indices=None):
+        """Returns mean motion in each grid cell, with empty cells masked.
+
+        :param bin_indices: Tuple with one temporal bin index for each bin
+            type (e.g., month and hour), selecting one grid.  If None (or
+            without temporal bins), motion is over all times.
+        :return: motion_dict: Dictionary with the following keys, where each
+            value is a 2-D numpy masked array (rows = y, columns = x).
+        motion_dict['mean_east_velocity_m_s01']: Mean u.
+        motion_dict['mean_north_velocity_m_s01']: Mean v.
+        motion_dict['stdev_east_velocity_m_s01']: Standard deviation of u.
+        motion_dict['stdev_north_velocity_m_s01']: Standard deviation of v.
+        motion_dict['mean_speed_m_s01']: Mean speed of storm objects.
+        motion_dict['mean_vector_speed_m_s01']: Magnitude of mean velocity.
+        """
+
+        matrix_by_key = {}
+        for this_key in self.grid_keys:
+            if self.bin_types is None:
+                matrix_by_key[this_key] = self.result_dict[this_key].astype(
+                    float)
+            else:
+                matrix_by_key[this_key] = self.result_dict[
+                    this_key].get_dense_slice(
+                        leading_indices=bin_indices, dtype=float)
+
+        num_objects_matrix = numpy.ma.masked_equal(
+            matrix_by_key[GRID_COUNT_KEY], 0.)
+        motion_dict = {}
+        for this_mean_key, this_stdev_key, this_sum_key, this_square_key in [
+                (self.MEAN_EAST_VELOCITY_KEY, self.STDEV_EAST_VELOCITY_KEY,
+                 self.EAST_VELOCITY_SUM_KEY,
+                 self.EAST_VELOCITY_SQUARE_SUM_KEY),
+                (self.MEAN_NORTH_VELOCITY_KEY, self.STDEV_NORTH_VELOCITY_KEY,
+                 self.NORTH_VELOCITY_SUM_KEY,
+                 self.NORTH_VELOCITY_SQUARE_SUM_KEY)]:
+            motion_dict[this_mean_key] = (
+                matrix_by_key[this_sum_key] / num_objects_matrix)
+            motion_dict[this_stdev_key] = numpy.ma.sqrt(numpy.ma.maximum(
+                matrix_by_key[this_square_key] / num_objects_matrix -
+                motion_dict[this_mean_key] ** 2, 0.))
+
+        motion_dict[self.MEAN_SPEED_KEY] = (
+            matrix_by_key[self.SPEED_SUM_KEY] / num_objects_matrix)
+        motion_dict[self.MEAN_VECTOR_SPEED_KEY] = numpy.ma.sqrt(
+            motion_dict[self.MEAN_EAST_VELOCITY_KEY] ** 2 +
+            motion_dict[self.MEAN_NORTH_VELOCITY_KEY] ** 2)
+        return motion_dict
+
+
+class _TemporalAccumulator(climatology_engine.Accumulator):
+    """Base class for climatologies counted in temporal bins.
+
+    By default, storms are counted by hour of the day, in
+    `result_dict[HOURLY_COUNT_KEY]` (length-24 array).  With other bins (see
+    `temporal_bins`), counts are in `result_dict[TEMPORAL_COUNT_KEY]`, with one
+    dimension per bin type.
+    """
+
+    column_names = [STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN]
+
+    def __init__(self, bin_types=None, first_year=None, num_years=None):
+        """Creates new accumulator.
+
+        :param bin_types: 1-D list of bin types (see
+            `temporal_bins.get_histogram`).  Default is hour of the day.
+        :param first_year: See doc for `temporal_bins.get_histogram`.
+        :param num_years: Same.
+        """
+
+        if bin_types is None:
+            bin_types = [temporal_bins.HOUR_BIN]
+
+        self.bin_types = list(bin_types)
+        self.first_year = first_year
+        self.num_years = num_years
+
+        if self.bin_types == [temporal_bins.HOUR_BIN]:
+            self.count_key = HOURLY_COUNT_KEY
+        else:
+            self.count_key = TEMPORAL_COUNT_KEY
+
+        self.merge_type_dict = {
+            self.count_key: parallel_driver.SUM_MERGE_TYPE}
+        super(_TemporalAccumulator, self).__init__()
+
+    def get_config(self):
+        return {'bin_types': self.bin_types, 'first_year': self.first_year,
+                'num_years': self.num_years}
+
+    def _init_result(self):
+        self.result_dict = {self.count_key: self._get_histogram(
+            numpy.array([], dtype=int))}
+
+    def _get_histogram(self, unix_times_sec, storm_ids=None):
+        """Counts times (or storms, if IDs are given) in each bin.
+
+        :param unix_times_sec: 1-D numpy array of valid times.
+        :param storm_ids: 1-D numpy array of storm IDs.
+        :return: histogram_matrix: See doc for `temporal_bins.get_histogram`.
+        """
+
+        with profiling.stage(profiling.BINNING_STAGE):
+            return temporal_bins.get_histogram(
+                unix_times_sec, self.bin_types, storm_ids=storm_ids,
+                first_year=self.first_year, num_years=self.num_years)
+
+    @staticmethod
+    def _get_mature_table(multiday_storm_object_table):
+        """Keeps storm objects >= 900 seconds old.
+
+        :param multiday_storm_object_table: See doc for `process_window`.
+        :return: mature_storm_object_table: Same but with fewer rows.
+        """
+
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            return storm_table.select_rows(
+                multiday_storm_object_table, storm_table.get_column(
+                    multiday_storm_object_table, AGE_COLUMN) >= MIN_AGE_SEC)
+
+    def _count_events(self, multiday_storm_object_table, event_type):
+        """Counts births or deaths in the last 24 hours by hour of the day.
+
+        :param multiday_storm_object_table: See doc for `process_window`.
+        :param event_type: Event type (see `storm_events.get_events`).
+        """
+
+        mature_storm_object_table = self._get_mature_table(
+            multiday_storm_object_table)
+        with profiling.stage(profiling.EVENT_EXTRACTION_STAGE):
+            event_dict = storm_events.select_last_day(storm_events.get_events(
+                mature_storm_object_table, event_type))
+
+        self.result_dict[self.count_key] += self._get_histogram(
+            event_dict[TIME_COLUMN])
+
+
+class TemporalBirthAccumulator(_TemporalAccumulator):
+    """Storm births by hour (Temporal_Birth_Climatology_15.py)."""
+
+    climatology_type = utils.BIRTH_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        self._count_events(
+            multiday_storm_object_table, storm_events.BIRTH_EVENT_TYPE)
+
+
+class TemporalDeathAccumulator(_TemporalAccumulator):
+    """Storm deaths by hour (Temporal_Death_Climatology_15.py)."""
+
+    climatology_type = utils.DEATH_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        self._count_events(
+            multiday_storm_object_table, storm_events.DEATH_EVENT_TYPE)
+
+
+class TemporalPassageAccumulator(_TemporalAccumulator):
+    """Storms by hour (Temporal_Passage_Climatology_15.py).
+
+    Each storm is counted once in every bin (e.g., hour) that it exists.
+    """
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        mature_storm_object_table = self._get_mature_table(
+            multiday_storm_object_table)
+        storm_ids = storm_table.get_column(
+            mature_storm_object_table, STORM_ID_COLUMN)
+        unix_times_sec = storm_table.get_column(
+            mature_storm_object_table, TIME_COLUMN)
+
+        self.result_dict[self.count_key] += self._get_histogram(
+            unix_times_sec, storm_ids=storm_ids)
+
+
+class _PerStormAccumulator(climatology_engine.Accumulator):
+    """Base class for climatologies with one or more values per storm.
+
+    Each entry of `result_dict` is a `streaming_stats.SummaryStatistics`, with
+    histogram bins from `histogram_bin_edges_by_key`.  Raw values are also
+    written, as chunks in one subdirectory per key, if `raw_output_dir_name` is
+    given.
+    """
+
+    histogram_bin_edges_by_key = {}
+
+    def __init__(self, raw_output_dir_name=None,
+                 raw_chunk_size=streaming_stats.DEFAULT_CHUNK_SIZE):
+        """Creates new accumulator.
+
+        :param raw_output_dir_name: Directory for raw values (see
+            `streaming_stats.ChunkedArrayWriter`).  If None, only summaries
+            are kept.
+        :param raw_chunk_size: Number of values per chunk.
+        """
+
+        self.raw_output_dir_name = raw_output_dir_name
+        self.raw_chunk_size = raw_chunk_size
+        self._writer_by_key = {}
+        super(_PerStormAccumulator, self).__init__()
+
+    def get_config(self):
+        return dict([
+            (k, numpy.asarray(v).tolist())
+            for k, v in self.histogram_bin_edges_by_key.items()])
+
+    def _init_result(self):
+        self.result_dict = dict([
+            (k, streaming_stats.SummaryStatistics(
+                self.histogram_bin_edges_by_key.get(k)))
+            for k in self.merge_type_dict])
+        self._writer_by_key = {}
+
+    def _append(self, key, values, working_date_index):
+        """Adds values to one entry of the result.
+
+        :param key: Key in `result_dict`.
+        :param values: 1-D list or numpy array.
+        :param working_date_index: Array index for the day currently being
+            worked on.
+        """
+
+        values = numpy.asarray(values, dtype=float)
+        with profiling.stage(profiling.BINNING_STAGE):
+            self.result_dict[key].update(values)
+        if self.raw_output_dir_name is None:
+            return
+
+        if key not in self._writer_by_key:
+            self._writer_by_key[key] = streaming_stats.ChunkedArrayWriter(
+                os.path.join(self.raw_output_dir_name, key),
+                chunk_size=self.raw_chunk_size)
+
+        if self.spc_date_strings is None:
+            this_chunk_key = '{0:06d}'.format(working_date_index)
+        else:
+            this_chunk_key = self.spc_date_strings[working_date_index]
+
+        with profiling.stage(profiling.OUTPUT_STAGE):
+            self._writer_by_key[key].append(values, chunk_key=this_chunk_key)
+
+    def flush(self):
+        with profiling.stage(profiling.OUTPUT_STAGE):
+            for this_writer in self._writer_by_key.values():
+                this_writer.flush()
+
+
+class LifetimeAccumulator(_PerStormAccumulator):
+    """Storm lifetimes in seconds (Temporal_Lifetime.py)."""
+
+    LIFETIME_KEY = 'storm_ages_sec'
+
+    climatology_type = utils.BIRTH_CLIMATOLOGY_TYPE
+    column_names = [STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN]
+    merge_type_dict = {LIFETIME_KEY: parallel_driver.SUMMARY_MERGE_TYPE}
+    histogram_bin_edges_by_key = {
+        LIFETIME_KEY: numpy.linspace(0., SECONDS_PER_DAY, num=97)
+    }
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            multiday_storm_object_table = storm_table.select_rows(
+                multiday_storm_object_table, storm_table.get_column(
+                    multiday_storm_object_table, AGE_COLUMN) >= MIN_AGE_SEC)
+
+        unix_times_sec = storm_table.get_column(
+            multiday_storm_object_table, TIME_COLUMN)
+        if len(unix_times_sec) == 0:
+            return
+
+        with profiling.stage(profiling.EVENT_EXTRACTION_STAGE):
+            event_dict = storm_events.select_last_day(
+                storm_events.get_events(multiday_storm_object_table,
+                                        storm_events.DEATH_EVENT_TYPE),
+                max_time_unix_sec=numpy.max(unix_times_sec))
+
+        self._append(self.LIFETIME_KEY, event_dict[AGE_COLUMN],
+                     working_date_index)
+
+
+class AreaAccumulator(_PerStormAccumulator):
+    """Maximum area of each storm in km^2 (Storm_Areas.py).
+
+    Only the area column of `area_method` is read (see
+    `day_loader.AREA_COLUMN_BY_METHOD`), so polygons are never rebuilt from the
+    columnar cache.  Tables given directly, with polygons but no area column,
+    also work.
+    """
+
+    AREA_KEY = 'max_areas_km2'
+
+    climatology_type = utils.BIRTH_CLIMATOLOGY_TYPE
+    column_names = [
+        STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN,
+        day_loader.AREA_COLUMN_BY_METHOD[polygon_areas.EQUAL_AREA_METHOD]]
+    merge_type_dict = {AREA_KEY: parallel_driver.SUMMARY_MERGE_TYPE}
+    histogram_bin_edges_by_key = {AREA_KEY: numpy.linspace(0., 5000., num=201)}
+
+    def __init__(self, area_method=polygon_areas.EQUAL_AREA_METHOD, **kwargs):
+        """Creates new accumulator.
+
+        :param area_method: See doc for `polygon_areas.get_areas_m2`.
+        :param kwargs: See doc for `_PerStormAccumulator.__init__`.
+        :raises: ValueError: if `area_method` is not recognized.
+        """
+
+        if area_method not in day_loader.AREA_COLUMN_BY_METHOD:
+            raise ValueError(
+                'Method ("{0:s}") must be in the following list:\n{1:s}'
+                .format(area_method, str(polygon_areas.VALID_METHODS)))
+
+        self.area_method = area_method
+        self.area_column = day_loader.AREA_COLUMN_BY_METHOD[area_method]
+        self.column_names = [
+            STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN, self.area_column]
+        super(AreaAccumulator, self).__init__(**kwargs)
+
+    def get_config(self):
+        config_dict = super(AreaAccumulator, self).get_config()
+        config_dict['area_method'] = self.area_method
+        return config_dict
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.MATURITY_FILTER_STAGE):
+            multiday_storm_object_table = storm_table.select_rows(
+                multiday_storm_object_table, storm_table.get_column(
+                    multiday_storm_object_table, AGE_COLUMN) > MIN_AGE_SEC)
+
+        unix_times_sec = storm_table.get_column(
+            multiday_storm_object_table, TIME_COLUMN)
+        if len(unix_times_sec) == 0:
+            return
+
+        new_storms = storm_table.select_rows(
+            multiday_storm_object_table,
+            unix_times_sec >= numpy.max(unix_times_sec) - SECONDS_PER_DAY)
+        if self.area_column in new_storms:
+            areas_km2 = storm_table.get_column(new_storms, self.area_column)
+        else:
+            areas_km2 = polygon_areas.get_polygon_areas_km2(
+                storm_table.get_column(new_storms, POLYGON_COLUMN),
+                method=self.area_method)
+
+        track_index_object = track_index.TrackIndex.from_table(new_storms)
+        self._append(self.AREA_KEY, track_index_object.reduce(
+            areas_km2, numpy.maximum), working_date_index)
+
+
+class DistanceAccumulator(_PerStormAccumulator):
+    """Distance travelled by each storm in km (Storm_Distance_Traveled.py).
+
+    For each storm ever > 900 seconds old, both the first-to-last centroid
+    displacement (the value the script saves) and the path length along the
+    track are kept.
+    """
+
+    DISTANCE_KEY = 'distances_km'
+    PATH_LENGTH_KEY = 'path_lengths_km'
+
+    climatology_type = utils.BIRTH_CLIMATOLOGY_TYPE
+    column_names = [STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN,
+                    CENTROID_LAT_COLUMN, CENTROID_LNG_COLUMN]
+    merge_type_dict = {
+        DISTANCE_KEY: parallel_driver.SUMMARY_MERGE_TYPE,
+        PATH_LENGTH_KEY: parallel_driver.SUMMARY_MERGE_TYPE
+    }
+    histogram_bin_edges_by_key = {
+        DISTANCE_KEY: numpy.linspace(0., 1000., num=201),
+        PATH_LENGTH_KEY: numpy.linspace(0., 1000., num=201)
+    }
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        ages_sec = storm_table.get_column(
+            multiday_storm_object_table, AGE_COLUMN)
+        if len(ages_sec) == 0:
+            return
+
+        track_index_object = track_index.get_track_index(
+            multiday_storm_object_table)
+        centroid_lats = storm_table.get_column(
+            multiday_storm_object_table, CENTROID_LAT_COLUMN)
+        centroid_longs = storm_table.get_column(
+            multiday_storm_object_table, CENTROID_LNG_COLUMN)
+        mature_flags = track_index_object.reduce(
+            ages_sec > MIN_AGE_SEC, numpy.logical_or)
+
+        self._append(self.DISTANCE_KEY, great_circle.get_displacements_km(
+            track_index_object, centroid_lats, centroid_longs)[mature_flags],
+                     working_date_index)
+        self._append(self.PATH_LENGTH_KEY, great_circle.get_path_lengths_km(
+            track_index_object, centroid_lats, centroid_longs)[mature_flags],
+                     working_date_index)
+
+
+class SpeedAccumulator(_PerStormAccumulator):
+    """Mean speed of storms in m/s (Storm_Speeds.py).
+
+    As in the script, the mean speed of a storm is added once for every mature
+    storm object.
+    """
+
+    SPEED_KEY = 'speeds_m_s01'
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+    column_names = [STORM_ID_COLUMN, AGE_COLUMN, EAST_VELOCITY_COLUMN,
+                    NORTH_VELOCITY_COLUMN]
+    merge_type_dict = {SPEED_KEY: parallel_driver.SUMMARY_MERGE_TYPE}
+    histogram_bin_edges_by_key = {SPEED_KEY: numpy.linspace(0., 50., num=101)}
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        track_index_object = track_index.get_track_index(
+            multiday_storm_object_table)
+        ages_sec = storm_table.get_column(
+            multiday_storm_object_table, AGE_COLUMN)
+        east_velocities_m_s01 = storm_table.get_column(
+            multiday_storm_object_table, EAST_VELOCITY_COLUMN).astype(float)
+        north_velocities_m_s01 = storm_table.get_column(
+            multiday_storm_object_table, NORTH_VELOCITY_COLUMN).astype(float)
+        if len(ages_sec) == 0:
+            return
+
+        mean_speed_by_storm = track_index_object.mean(numpy.sqrt(
+            east_velocities_m_s01 ** 2 + north_velocities_m_s01 ** 2))
+        self._append(self.SPEED_KEY, mean_speed_by_storm[
+            track_index_object.storm_index_by_row[ages_sec >= MIN_AGE_SEC]],
+                     working_date_index)
+
+
+class VelocityAccumulator(_PerStormAccumulator):
+    """Mean east and north velocity of storms in m/s
+    (Velocities_East_North.py).
+
+    As in the script, the means of a storm are added once for every storm
+    object of a storm that is ever mature.
+    """
+
+    EAST_VELOCITY_KEY = 'mean_east_velocities_m_s01'
+    NORTH_VELOCITY_KEY = 'mean_north_velocities_m_s01'
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+    column_names = [STORM_ID_COLUMN, AGE_COLUMN, EAST_VELOCITY_COLUMN,
+                    NORTH_VELOCITY_COLUMN]
+    merge_type_dict = {
+        EAST_VELOCITY_KEY: parallel_driver.SUMMARY_MERGE_TYPE,
+        NORTH_VELOCITY_KEY: parallel_driver.SUMMARY_MERGE_TYPE
+    }
+    histogram_bin_edges_by_key = {
+        EAST_VELOCITY_KEY: numpy.linspace(-50., 50., num=201),
+        NORTH_VELOCITY_KEY: numpy.linspace(-50., 50., num=201)
+    }
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        track_index_object = track_index.get_track_index(
+            multiday_storm_object_table)
+        ages_sec = storm_table.get_column(
+            multiday_storm_object_table, AGE_COLUMN)
+        if len(ages_sec) == 0:
+            return
+
+        mature_flags = track_index_object.reduce(
+            ages_sec >= MIN_AGE_SEC, numpy.logical_or)
+        storm_indices = track_index_object.storm_index_by_row[
+            mature_flags[track_index_object.storm_index_by_row]]
+
+        for this_key, this_column in [
+                (self.EAST_VELOCITY_KEY, EAST_VELOCITY_COLUMN),
+                (self.NORTH_VELOCITY_KEY, NORTH_VELOCITY_COLUMN)]:
+            these_values = storm_table.get_column(
+                multiday_storm_object_table, this_column)
+            this_mean_by_storm = track_index_object.mean(these_values)
+            self._append(this_key, this_mean_by_storm[storm_indices],
+                         working_date_index)
+
+
+class _StreamingEventMixin(object):
+    """Births or deaths from a `storm_registry.StormRegistry`.
+
+    Mixed into a spatial or temporal accumulator, ahead of it in the bases.
+    The window is one date (passage type), so each date is read once, and
+    every storm is seen whole, however many dates it crosses.  Events are
+    added as the registry emits them; deaths of storms still open after the
+    last date are added by `finish`.  Dates must be fed in order, so results
+    cannot be merged across chunks (use one process).
+    """
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+    mergeable = False
+
+    def _set_registry_options(self, event_type, max_gap_sec):
+        """Sets options of the registry.
+
+        :param event_type: Event type (see `storm_events.get_events`).
+        :param max_gap_sec: See doc for `storm_registry.StormRegistry`.
+        :raises: ValueError: if `event_type` is not valid.
+        """
+
+        if event_type not in storm_events.VALID_EVENT_TYPES:
+            raise ValueError(
+                'Event type ("{0:s}") must be in the following list:\n{1:s}'
+                .format(event_type, str(storm_events.VALID_EVENT_TYPES)))
+
+        self.event_type = event_type
+        self.max_gap_sec = max_gap_sec
+
+    def _init_result(self):
+        self.registry_object = storm_registry.StormRegistry(
+            min_age_sec=MIN_AGE_SEC, max_gap_sec=self.max_gap_sec,
+            birth_at_first_mature_object=self.birth_at_first_mature_object)
+        super(_StreamingEventMixin, self)._init_result()
+
+    def _add_events(self, event_dict):
+        """Adds events to the result.
+
+        :param event_dict: Dictionary created by
+            `storm_registry.StormRegistry.update`.
+        """
+
+        raise NotImplementedError
+
+    def get_config(self):
+        config_dict = super(_StreamingEventMixin, self).get_config()
+        config_dict['event_type'] = self.event_type
+        config_dict['max_gap_sec'] = self.max_gap_sec
+        return config_dict
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        with profiling.stage(profiling.EVENT_EXTRACTION_STAGE):
+            birth_event_dict, death_event_dict = self.registry_object.update(
+                multiday_storm_object_table)
+
+        if self.event_type == storm_events.BIRTH_EVENT_TYPE:
+            self._add_events(birth_event_dict)
+        else:
+            self._add_events(death_event_dict)
+
+    def finish(self):
+        death_event_dict = self.registry_object.close_all()
+        if self.event_type == storm_events.DEATH_EVENT_TYPE:
+            self._add_events(death_event_dict)
+
+        super(_StreamingEventMixin, self).finish()
+
+    def get_state(self):
+        return {
+            'result_dict': super(_StreamingEventMixin, self).get_state(),
+            'registry_state_dict': self.registry_object.get_state()
+        }
+
+    def set_state(self, state):
+        super(_StreamingEventMixin, self).set_state(state['result_dict'])
+        self.registry_object.set_state(state['registry_state_dict'])
+
+    def merge(self, other_accumulator_object):
+        raise ValueError(
+            'Streaming accumulators cannot be merged, because storms that '
+            'cross a chunk boundary would be split.  Use one process.')
+
+
+class StreamingSpatialAccumulator(_StreamingEventMixin, _SpatialAccumulator):
+    """Spatial climatology of births or deaths, streamed one date at a time.
+
+    Counts the same events as `SpatialBirthAccumulator` or
+    `SpatialDeathAccumulator`, but each storm is seen whole.
+    """
+
+    birth_at_first_mature_object = False
+
+    def __init__(self, grid_spec_object, event_type,
+                 grid_cache_dir_name=None,
+                 max_gap_sec=storm_registry.DEFAULT_MAX_GAP_SEC, **kwargs):
+        """Creates new accumulator.
+
+        :param grid_spec_object: See doc for `_SpatialAccumulator.__init__`.
+        :param event_type: See doc for `_set_registry_options`.
+        :param grid_cache_dir_name: See doc for `_SpatialAccumulator.__init__`.
+        :param max_gap_sec: See doc for `_set_registry_options`.
+        :param kwargs: Temporal bins and lookup spacing (see doc for
+            `_SpatialAccumulator.__init__`).
+        """
+
+        self._set_registry_options(event_type, max_gap_sec)
+        super(StreamingSpatialAccumulator, self).__init__(
+            grid_spec_object, grid_cache_dir_name=grid_cache_dir_name,
+            **kwargs)
+
+    def _add_events(self, event_dict):
+        if len(event_dict[TIME_COLUMN]) == 0:
+            return
+        self._bin_events(event_dict)
+
+
+class StreamingTemporalAccumulator(_StreamingEventMixin, _TemporalAccumulator):
+    """Births or deaths in temporal bins, streamed one date at a time.
+
+    Counts the same events as `TemporalBirthAccumulator` or
+    `TemporalDeathAccumulator` (the birth of a storm is its first object >= 900
+    seconds old), but each storm is seen whole.
+    """
+
+    birth_at_first_mature_object = True
+
+    def __init__(self, event_type,
+                 max_gap_sec=storm_registry.DEFAULT_MAX_GAP_SEC, **kwargs):
+        """Creates new accumulator.
+
+        :param event_type: See doc for `_set_registry_options`.
+        :param max_gap_sec: Same.
+        :param kwargs: See doc for `_TemporalAccumulator.__init__`.
+        """
+
+        self._set_registry_options(event_type, max_gap_sec)
+        super(StreamingTemporalAccumulator, self).__init__(**kwargs)
+
+    def _add_events(self, event_dict):
+        self.result_dict[self.count_key] += self._get_histogram(
+            event_dict[TIME_COLUMN])
+
+
+def make_product_set(grid_spec_object, grid_cache_dir_name=None,
+                     raw_output_dir_name_by_product=None, product_names=None,
+                     spatial_bin_types=None, lookup_spacing_deg=None):
+    """Creates one accumulator for each product in the full product set.
+
+    :param grid_spec_object: See doc for `_SpatialAccumulator.__init__`.
+    :param grid_cache_dir_name: Same.
+    :param raw_output_dir_name_by_product: Dictionary, where each key is the
+        name of a per-storm product (in `PER_STORM_PRODUCT_NAMES`) and each
+        value is passed to `_PerStormAccumulator.__init__` as
+        `raw_output_dir_name`.  Missing products write no raw values.
+    :param product_names: 1-D list of products to create (subset of
+        `VALID_PRODUCT_NAMES`).  If None, will create all in `PRODUCT_NAMES`
+        (streaming products must be asked for).
+    :param spatial_bin_types: Temporal bins of spatial products (see doc for
+        `_SpatialAccumulator.__init__`).  If None, spatial products keep dense
+        count matrices.
+    :param lookup_spacing_deg: Spacing of lat-long lookup table for spatial
+        products (see doc for `_SpatialAccumulator.__init__`).
+    :return: accumulator_dict: Dictionary, where each key is a product name and
+        each value is an accumulator.
+    :raises: ValueError: if a product name is not in `VALID_PRODUCT_NAMES`.
+    """
+
+    if raw_output_dir_name_by_product is None:
+        raw_output_dir_name_by_product = {}
+    if product_names is None:
+        product_names = PRODUCT_NAMES
+
+    for this_product_name in product_names:
+        if this_product_name not in VALID_PRODUCT_NAMES:
+            raise ValueError(
+                'Product ("{0:s}") must be in the following list:\n{1:s}'
+                .format(this_product_name, str(VALID_PRODUCT_NAMES)))
+
+    spatial_class_by_product = {
+        'spatial_birth': SpatialBirthAccumulator,
+        'spatial_death': SpatialDeathAccumulator,
+        'spatial_passage': SpatialPassageAccumulator,
+        'spatial_motion': SpatialMotionAccumulator
+    }
+    temporal_class_by_product = {
+        'temporal_birth': TemporalBirthAccumulator,
+        'temporal_death': TemporalDeathAccumulator,
+        'temporal_passage': TemporalPassageAccumulator
+    }
+    per_storm_class_by_product = dict(zip(
+        PER_STORM_PRODUCT_NAMES,
+        [LifetimeAccumulator, AreaAccumulator, DistanceAccumulator,
+         SpeedAccumulator, VelocityAccumulator]))
+
+    accumulator_dict = {}
+    for this_product_name in product_names:
+        if this_product_name in spatial_class_by_product:
+            accumulator_dict[this_product_name] = spatial_class_by_product[
+                this_product_name](grid_spec_object,
+                                   grid_cache_dir_name=grid_cache_dir_name,
+                                   bin_types=spatial_bin_types,
+                                   lookup_spacing_deg=lookup_spacing_deg)
+        elif this_product_name in temporal_class_by_product:
+            accumulator_dict[this_product_name] = temporal_class_by_product[
+                this_product_name]()
+        elif this_product_name in STREAMING_PRODUCT_NAMES:
+            this_event_type = this_product_name.split('_')[-1]
+            if 'spatial' in this_product_name:
+                accumulator_dict[this_product_name] = (
+                    StreamingSpatialAccumulator(
+                        grid_spec_object, this_event_type,
+                        grid_cache_dir_name=grid_cache_dir_name,
+                        bin_types=spatial_bin_types,
+                        lookup_spacing_deg=lookup_spacing_deg))
+            else:
+                accumulator_dict[this_product_name] = (
+                    StreamingTemporalAccumulator(this_event_type))
+        else:
+            accumulator_dict[this_product_name] = per_storm_class_by_product[
+                this_product_name](
+                    raw_output_dir_name=raw_output_dir_name_by_product.get(
+                        this_product_name))
+
+    return accumulator_dict
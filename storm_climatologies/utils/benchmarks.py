@@ -0,0 +1,341 @@
+"""Speed and memory benchmarks for every climatology.
+
+There is one case per script in `scripts/` (one per product in
+`accumulators.PRODUCT_NAMES`), plus two cases for the shared hot paths:
+
+- "load_align_concat": builds the two-day birth windows from cached
+  tables (`day_loader.DayLoader.get_multiday_table`), i.e., align and concat;
+- "grid_binning": adds projected centroids to the count grid
+  (`utils.bin_storm_objects`, which replaced
+  `_bin_storm_objects_one_for_loop`).
+
+Each case runs on synthetic tables (see `synthetic_tracks`) for a given number
+of storm objects per day and number of SPC dates.  Tables are made before the
+timer starts and served from memory, so only the climatology is timed.  Every
+case runs in its own process, so that its peak resident set size (RSS) is not
+inflated by earlier cases.
+
+Results are dictionaries (see `run_case`), which can be written as a JSON
+baseline and compared with a later run (see `find_regressions`).
+"""
+
+import json
+import multiprocessing
+import time
+import numpy
+from gewittergefahr.gg_utils import projections
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import synthetic_tracks
+from storm_climatologies.utils import utils
+
+LOAD_CASE_NAME = 'load_align_concat'
+BINNING_CASE_NAME = 'grid_binning'
+CASE_NAMES = accumulators.PRODUCT_NAMES + [LOAD_CASE_NAME, BINNING_CASE_NAME]
+POLYGON_CASE_NAMES = ['area']
+
+FIRST_SPC_DATE_STRING = '20110401'
+SECONDS_PER_DAY = 86400
+DEFAULT_NUM_REPEATS = 3
+DEFAULT_TOLERANCE = 0.25
+
+CASE_NAME_KEY = 'case_name'
+OBJECTS_PER_DAY_KEY = 'objects_per_day'
+NUM_DATES_KEY = 'num_dates'
+NUM_OBJECTS_KEY = 'num_storm_objects'
+SECONDS_KEY = 'seconds'
+THROUGHPUT_KEY = 'objects_per_second'
+PEAK_RSS_KEY = 'peak_rss_mb'
+RSS_INCREASE_KEY = 'rss_increase_mb'
+
+
+def get_case_key(case_name, objects_per_day, num_dates):
+    """Returns key for one case and size (used in baselines).
+
+    :param case_name: Case name (in `CASE_NAMES`).
+    :param objects_per_day: Number of storm objects per day.
+    :param num_dates: Number of SPC dates.
+    :return: case_key: String.
+    """
+
+    return '{0:s}_{1:d}objects_{2:d}dates'.format(
+        case_name, objects_per_day, num_dates)
+
+
+def _make_tables(objects_per_day, num_dates, include_polygons):
+    """Makes synthetic storm-object tables.
+
+    :param objects_per_day: Approximate number of storm objects per day.
+    :param num_dates: Number of SPC dates.
+    :param include_polygons: See doc for
+        `synthetic_tracks.SyntheticTrackGenerator.__init__`.
+    :return: spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    :return: table_by_date: Dictionary, where each key is an SPC date and each
+        value is a storm-object table.
+    """
+
+    num_objects_per_storm = (
+        synthetic_tracks.DEFAULT_MEAN_LIFETIME_SEC /
+        float(synthetic_tracks.DEFAULT_TIME_STEP_SEC) + 1)
+    generator_object = synthetic_tracks.SyntheticTrackGenerator(
+        num_storms_per_day=max(
+            [1, int(numpy.round(objects_per_day / num_objects_per_storm))]),
+        include_polygons=include_polygons)
+
+    first_time_unix_sec = synthetic_tracks.get_spc_date_start_time(
+        FIRST_SPC_DATE_STRING)
+    spc_date_strings = [
+        time.strftime('%Y%m%d', time.gmtime(
+            first_time_unix_sec + i * SECONDS_PER_DAY))
+        for i in range(num_dates)]
+
+    return spc_date_strings, dict([
+        (d, generator_object(d)) for d in spc_date_strings])
+
+
+def _get_case_function(case_name, spc_date_strings, table_by_date):
+    """Returns function that runs one case once.
+
+    Setup that the scripts do only once (e.g., x-y grid and centroid
+    projection for "grid_binning") is done here, outside the timer.
+
+    :param case_name: Case name (in `CASE_NAMES`).
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    :param table_by_date: Dictionary created by `_make_tables`.
+    :return: case_function: Function with no arguments.
+    """
+
+    grid_spec_object = grid_spec.GridSpec()
+
+    if case_name == LOAD_CASE_NAME:
+        def case_function():
+            this_loader_object = day_loader.DayLoader(
+                spc_date_strings, read_function=table_by_date.__getitem__)
+            for i in range(len(spc_date_strings)):
+                this_loader_object.get_multiday_table(utils._get_dates_needed(
+                    i, len(spc_date_strings), utils.BIRTH_CLIMATOLOGY_TYPE))
+            this_loader_object.clear()
+
+        return case_function
+
+    if case_name == BINNING_CASE_NAME:
+        unique_grid_point_x_metres, unique_grid_point_y_metres = (
+            grid_spec_object.get_xy_grid())
+        xy_tuples = [projections.project_latlng_to_xy(
+            latitudes_deg=table_by_date[d]['centroid_lat_deg'].values,
+            longitudes_deg=table_by_date[d]['centroid_lng_deg'].values,
+            projection_object=grid_spec_object.get_projection())
+                     for d in spc_date_strings]
+
+        def case_function():
+            this_count_matrix = None
+            for this_x_array, this_y_array in xy_tuples:
+                this_count_matrix = utils.bin_storm_objects(
+                    this_x_array, this_y_array, unique_grid_point_x_metres,
+                    unique_grid_point_y_metres,
+                    grid_cell_count_matrix=this_count_matrix)
+
+        return case_function
+
+    grid_spec_object.get_xy_grid()
+
+    def case_function():
+        this_accumulator_object = accumulators.make_product_set(
+            grid_spec_object, product_names=[case_name])[case_name]
+        climatology_engine.ClimatologyEngine(
+            spc_date_strings, [this_accumulator_object],
+            read_function=table_by_date.__getitem__).run()
+
+    return case_function
+
+
+def run_case(case_name, objects_per_day, num_dates,
+             num_repeats=DEFAULT_NUM_REPEATS):
+    """Runs one case in this process.
+
+    :param case_name: Case name (in `CASE_NAMES`).
+    :param objects_per_day: Approximate number of storm objects per day.
+    :param num_dates: Number of SPC dates.
+    :param num_repeats: Number of timed runs (the fastest is kept).
+    :return: result_dict: Dictionary with the following keys.
+    result_dict['case_name']: Case name.
+    result_dict['objects_per_day']: Same as input.
+    result_dict['num_dates']: Same as input.
+    result_dict['num_storm_objects']: Total number of storm objects.
+    result_dict['seconds']: Time for fastest run.
+    result_dict['objects_per_second']: Throughput of fastest run.
+    result_dict['peak_rss_mb']: Peak RSS of the process (megabytes).
+    result_dict['rss_increase_mb']: Increase in peak RSS while running the
+        case (excludes making the tables).
+    :raises: ValueError: if `case_name not in CASE_NAMES`.
+    """
+
+    if case_name not in CASE_NAMES:
+        raise ValueError(
+            'Case ("{0:s}") must be in the following list:\n{1:s}'.format(
+                case_name, str(CASE_NAMES)))
+
+    spc_date_strings, table_by_date = _make_tables(
+        objects_per_day, num_dates,
+        include_polygons=case_name in POLYGON_CASE_NAMES)
+    case_function = _get_case_function(
+        case_name, spc_date_strings, table_by_date)
+    num_storm_objects = sum([len(t.index) for t in table_by_date.values()])
+
+    start_rss_mb = profiling.get_peak_rss_mb()
+    run_times_sec = []
+    for _ in range(num_repeats):
+        this_start_time_sec = time.time()
+        case_function()
+        run_times_sec.append(time.time() - this_start_time_sec)
+
+    peak_rss_mb = profiling.get_peak_rss_mb()
+    min_time_sec = max([min(run_times_sec), 1e-9])
+
+    return {
+        CASE_NAME_KEY: case_name,
+        OBJECTS_PER_DAY_KEY: objects_per_day,
+        NUM_DATES_KEY: num_dates,
+        NUM_OBJECTS_KEY: num_storm_objects,
+        SECONDS_KEY: min_time_sec,
+        THROUGHPUT_KEY: num_storm_objects / min_time_sec,
+        PEAK_RSS_KEY: peak_rss_mb,
+        RSS_INCREASE_KEY: peak_rss_mb - start_rss_mb
+    }
+
+
+def _run_case_one_process(argument_dict):
+    """Runs one case; used by `run_suite` in a child process.
+
+    :param argument_dict: Dictionary of keyword arguments for `run_case`.
+    :return: result_dict: See doc for `run_case`.
+    """
+
+    return run_case(**argument_dict)
+
+
+def run_suite(case_names=None, objects_per_day_values=(10000,),
+              num_dates_values=(3,), num_repeats=DEFAULT_NUM_REPEATS,
+              separate_processes=True):
+    """Runs every case at every size.
+
+    :param case_names: 1-D list of case names.  If None, will use
+        `CASE_NAMES`.
+    :param objects_per_day_values: 1-D list of sizes (storm objects per day).
+    :param num_dates_values: 1-D list of date-range lengths.
+    :param num_repeats: See doc for `run_case`.
+    :param separate_processes: Boolean flag.  If True, each case runs in a new
+        process, so that peak RSS is per case.
+    :return: result_dict_by_key: Dictionary, where each key is from
+        `get_case_key` and each value is from `run_case`.
+    """
+
+    if case_names is None:
+        case_names = CASE_NAMES
+
+    result_dict_by_key = {}
+    for this_case_name in case_names:
+        for this_objects_per_day in objects_per_day_values:
+            for this_num_dates in num_dates_values:
+                this_argument_dict = {
+                    'case_name': this_case_name,
+                    'objects_per_day': this_objects_per_day,
+                    'num_dates': this_num_dates,
+                    'num_repeats': num_repeats
+                }
+
+                if separate_processes:
+                    this_pool_object = multiprocessing.Pool(processes=1)
+                    try:
+                        this_result_dict = this_pool_object.apply(
+                            _run_case_one_process, (this_argument_dict,))
+                    finally:
+                        this_pool_object.close()
+                        this_pool_object.join()
+                else:
+                    this_result_dict = run_case(**this_argument_dict)
+
+                print(
+                    '{0:s}: {1:.0f} objects/s, {2:.3f} s, peak RSS '
+                    '{3:.0f} MB (+{4:.0f} MB)'.format(
+                        get_case_key(this_case_name, this_objects_per_day,
+                                     this_num_dates),
+                        this_result_dict[THROUGHPUT_KEY],
+                        this_result_dict[SECONDS_KEY],
+                        this_result_dict[PEAK_RSS_KEY],
+                        this_result_dict[RSS_INCREASE_KEY]))
+
+                result_dict_by_key[get_case_key(
+                    this_case_name, this_objects_per_day, this_num_dates)
+                ] = this_result_dict
+
+    return result_dict_by_key
+
+
+def write_baseline(result_dict_by_key, json_file_name):
+    """Writes benchmark results to JSON file.
+
+    :param result_dict_by_key: Dictionary created by `run_suite`.
+    :param json_file_name: Path to output file.
+    """
+
+    with open(json_file_name, 'w') as this_file_handle:
+        json.dump(result_dict_by_key, this_file_handle, indent=2,
+                  sort_keys=True)
+
+
+def read_baseline(json_file_name):
+    """Reads benchmark results from JSON file.
+
+    :param json_file_name: Path to input file.
+    :return: result_dict_by_key: See doc for `run_suite`.
+    """
+
+    with open(json_file_name, 'r') as this_file_handle:
+        return json.load(this_file_handle)
+
+
+def find_regressions(result_dict_by_key, baseline_dict_by_key,
+                     tolerance=DEFAULT_TOLERANCE):
+    """Compares benchmark results with a baseline.
+
+    A case regresses if its throughput is lower than the baseline's by more
+    than `tolerance` (as a fraction), or if its RSS increase is higher by more
+    than `tolerance` and by at least 10 MB.  Cases missing from the baseline
+    are skipped.
+
+    :param result_dict_by_key: Dictionary created by `run_suite`.
+    :param baseline_dict_by_key: Same, from an earlier run.
+    :param tolerance: Fractional tolerance.
+    :return: regression_strings: 1-D list of messages, one per regression.
+    """
+
+    regression_strings = []
+
+    for this_key in sorted(result_dict_by_key.keys()):
+        if this_key not in baseline_dict_by_key:
+            continue
+
+        this_result_dict = result_dict_by_key[this_key]
+        this_baseline_dict = baseline_dict_by_key[this_key]
+
+        if (this_result_dict[THROUGHPUT_KEY] <
+                (1. - tolerance) * this_baseline_dict[THROUGHPUT_KEY]):
+            regression_strings.append(
+                '{0:s}: {1:.0f} objects/s (baseline {2:.0f})'.format(
+                    this_key, this_result_dict[THROUGHPUT_KEY],
+                    this_baseline_dict[THROUGHPUT_KEY]))
+
+        this_increase_mb = (this_result_dict[RSS_INCREASE_KEY] -
+                            this_baseline_dict[RSS_INCREASE_KEY])
+        if (this_increase_mb >= 10 and this_increase_mb >
+                tolerance * this_baseline_dict[RSS_INCREASE_KEY]):
+            regression_strings.append(
+                '{0:s}: RSS increase of {1:.0f} MB (baseline {2:.0f})'.format(
+                    this_key, this_result_dict[RSS_INCREASE_KEY],
+                    this_baseline_dict[RSS_INCREASE_KEY]))
+
+    return regression_strings
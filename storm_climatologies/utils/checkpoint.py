@@ -0,0 +1,97 @@
+"""Checkpoint files for resumable climatology runs.
+
+After each working date, `climatology_engine.ClimatologyEngine` can write the
+state of every accumulator to one pickle file.  The file is written to a
+temporary name and then renamed, so that it always holds the last completed
+date, even if the run is killed while writing.
+
+A checkpoint also holds the carry-over state needed by the birth and death
+windows (see `utils._get_dates_needed`):
+
+- the storm-object table for the last completed date, so that the next
+  working date does not reread it;
+- for death climatologies, the state before the last date of the run.  The
+  last date has no following date, so its death window is cut short and its
+  contribution is provisional.  When new dates are appended, that date is
+  redone from the saved state.
+"""
+
+import os
+import pickle
+import tempfile
+
+CHECKPOINT_VERSION = 1
+
+VERSION_KEY = 'version'
+SPC_DATES_KEY = 'spc_date_strings'
+ACCUMULATOR_CLASSES_KEY = 'accumulator_class_names'
+ACCUMULATOR_STATES_KEY = 'accumulator_states'
+PROVISIONAL_STATES_KEY = 'provisional_state_by_accumulator'
+CARRY_OVER_TABLE_KEY = 'carry_over_table'
+
+
+def write_checkpoint(checkpoint_dict, pickle_file_name):
+    """Writes checkpoint to Pickle file, atomically.
+
+    :param checkpoint_dict: Dictionary with the following keys.
+    checkpoint_dict['spc_date_strings']: 1-D list of completed SPC dates
+        (format "yyyymmdd"), in order.
+    checkpoint_dict['accumulator_class_names']: 1-D list with class name of
+        each accumulator.
+    checkpoint_dict['accumulator_states']: 1-D list with state of each
+        accumulator (see `climatology_engine.Accumulator.get_state`).
+    checkpoint_dict['provisional_state_by_accumulator']: Dictionary, where each
+        key is an index into the list of accumulators and each value is the
+        state before the last date (used only for death climatologies, if the
+        last date was the end of the run).
+    checkpoint_dict['carry_over_table']: Storm-object table for the last
+        completed date (may be None).
+
+    :param pickle_file_name: Path to output file.
+    """
+
+    checkpoint_dict = checkpoint_dict.copy()
+    checkpoint_dict[VERSION_KEY] = CHECKPOINT_VERSION
+
+    directory_name = os.path.dirname(os.path.abspath(pickle_file_name))
+    if not os.path.isdir(directory_name):
+        os.makedirs(directory_name)
+
+    file_handle, temp_file_name = tempfile.mkstemp(
+        dir=directory_name, suffix='.tmp')
+    renamed = False
+    try:
+        with os.fdopen(file_handle, 'wb') as this_file_handle:
+            pickle.dump(checkpoint_dict, this_file_handle,
+                        pickle.HIGHEST_PROTOCOL)
+
+        os.rename(temp_file_name, pickle_file_name)
+        renamed = True
+    finally:
+        if not renamed and os.path.isfile(temp_file_name):
+            os.remove(temp_file_name)
+
+
+def read_checkpoint(pickle_file_name):
+    """Reads checkpoint from Pickle file.
+
+    :param pickle_file_name: Path to input file.
+    :return: checkpoint_dict: See doc for `write_checkpoint`, or None if the
+        file does not exist.
+    :raises: ValueError: if the file was written by another version.
+    """
+
+    if not os.path.isfile(pickle_file_name):
+        return None
+
+    with open(pickle_file_name, 'rb') as this_file_handle:
+        checkpoint_dict = pickle.load(this_file_handle)
+
+    if checkpoint_dict.get(VERSION_KEY) != CHECKPOINT_VERSION:
+        raise ValueError(
+            'Checkpoint file "{0:s}" has version {1:s} (expected {2:d}).'
+            .format(
+                pickle_file_name, str(checkpoint_dict.get(VERSION_KEY)),
+                CHECKPOINT_VERSION))
+
+    return checkpoint_dict
@@ -0,0 +1,641 @@
+"""Runs many climatologies in one pass over the archive.
+
+Each climatology is an `Accumulator`.  For every working date, the engine loads
+each distinct window of dates (birth, death or passage; see
+`utils._get_dates_needed`) once, through one shared `day_loader.DayLoader`, and
+feeds it to every accumulator that uses that window.  Reading is therefore paid
+once for the whole product set instead of once per climatology.
+
+Serial runs can be checkpointed after every working date (see `checkpoint`),
+so that a killed run resumes from the last completed date and a finished run
+can be extended with new dates.  Several runs over overlapping dates (e.g., a
+batch of seasons) can share one loader (see `run_batch`).
+"""
+
+import copy
+import multiprocessing
+from storm_climatologies.utils import checkpoint
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import utils
+
+
+class Accumulator(object):
+    """Base class for one climatology.
+
+    Subclasses set `climatology_type`, `column_names` and `merge_type_dict`,
+    and implement `_init_result` and `process_window`.  All state that makes up
+    the result lives in `result_dict`, whose keys are those of
+    `merge_type_dict`.  The engine calls `start` before the first working date,
+    `flush` before each checkpoint and `finish` after the last date.
+    Accumulators whose results cannot be merged across chunks of dates set
+    `mergeable` to False.
+    """
+
+    climatology_type = utils.PASSAGE_CLIMATOLOGY_TYPE
+    column_names = None
+    merge_type_dict = {}
+    mergeable = True
+
+    def __init__(self):
+        self.result_dict = None
+        self.spc_date_strings = None
+        self._init_result()
+
+    def _init_result(self):
+        """Sets `result_dict` to the empty result."""
+        raise NotImplementedError
+
+    def start(self, spc_date_strings):
+        """Prepares for a run.
+
+        :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd") in
+            the run.  Working-date indices refer to this list.
+        """
+
+        self.spc_date_strings = spc_date_strings
+
+    def flush(self):
+        """Writes buffered output, so that it agrees with `get_state`."""
+        pass
+
+    def finish(self):
+        """Cleans up after a run."""
+        self.flush()
+
+    def get_config(self):
+        """Returns settings that change the result (besides the class).
+
+        Used to name partial results (see `partials`).
+
+        :return: config_dict: JSON-serializable dictionary.
+        """
+
+        return {}
+
+    def get_state(self):
+        """Returns copy of the state needed to resume a run.
+
+        :return: state: Picklable object.
+        """
+
+        return copy.deepcopy(self.result_dict)
+
+    def set_state(self, state):
+        """Restores state created by `get_state`.
+
+        :param state: Picklable object.
+        """
+
+        self.result_dict = copy.deepcopy(state)
+
+    def process_window(self, multiday_storm_object_table, working_date_index):
+        """Adds contribution of one working date to the result.
+
+        :param multiday_storm_object_table: Table with storm objects from all
+            dates in the window (pandas DataFrame or `storm_table.StormTable`).
+        :param working_date_index: Array index for the day currently being
+            worked on.
+        """
+        raise NotImplementedError
+
+    def copy_empty(self):
+        """Returns accumulator with the same settings and an empty result.
+
+        :return: accumulator_object: New instance of the same class.
+        """
+
+        accumulator_object = copy.copy(self)
+        accumulator_object._init_result()
+        return accumulator_object
+
+    def merge(self, other_accumulator_object):
+        """Adds the result of another accumulator to this one.
+
+        The other accumulator must cover later dates, so that per-storm values
+        stay in date order.
+
+        :param other_accumulator_object: Instance of the same class.
+        """
+
+        self.result_dict = parallel_driver.merge_results(
+            [self.result_dict, other_accumulator_object.result_dict],
+            self.merge_type_dict)
+
+    def get_result(self):
+        """Returns the result.
+
+        :return: result_dict: Dictionary (see `merge_type_dict` for keys).
+        """
+
+        return self.result_dict
+
+
+def _get_column_names(accumulator_objects):
+    """Finds all columns needed by the given accumulators.
+
+    :param accumulator_objects: 1-D list of `Accumulator` objects.
+    :return: column_names: 1-D list of column names, or None if any
+        accumulator needs all columns.
+    """
+
+    column_names = []
+    for this_accumulator_object in accumulator_objects:
+        if this_accumulator_object.column_names is None:
+            return None
+
+        column_names += [c for c in this_accumulator_object.column_names
+                         if c not in column_names]
+
+    return column_names
+
+
+def check_mergeable(accumulator_objects):
+    """Ensures that results of separate chunks of dates can be merged.
+
+    :param accumulator_objects: 1-D list of `Accumulator` objects.
+    :raises: ValueError: if any accumulator cannot be merged.
+    """
+
+    class_names = [
+        type(a).__name__ for a in accumulator_objects if not a.mergeable]
+    if len(class_names) > 0:
+        raise ValueError(
+            'Results of {0:s} cannot be merged across chunks of dates (e.g., '
+            'from several processes).'.format(str(class_names)))
+
+
+class ClimatologyEngine(object):
+    """Feeds every working date to a set of accumulators."""
+
+    def __init__(self, spc_date_strings, accumulator_objects, **loader_kwargs):
+        """Creates new engine.
+
+        :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+        :param accumulator_objects: 1-D list of `Accumulator` objects.
+        :param loader_kwargs: Keyword arguments passed to
+            `day_loader.DayLoader` (e.g., top_processed_dir_name,
+            tracking_scale_metres2, read_function, storm_id_encoder).  Columns
+            are set to those needed by the accumulators.
+        """
+
+        self.spc_date_strings = list(spc_date_strings)
+        self.accumulator_objects = list(accumulator_objects)
+        self.loader_kwargs = loader_kwargs
+
+        self.climatology_types = []
+        for this_accumulator_object in self.accumulator_objects:
+            if (this_accumulator_object.climatology_type not in
+                    self.climatology_types):
+                self.climatology_types.append(
+                    this_accumulator_object.climatology_type)
+
+        self.day_loader_object = day_loader.DayLoader(
+            spc_date_strings=self.spc_date_strings,
+            column_names=_get_column_names(self.accumulator_objects),
+            **loader_kwargs)
+
+    def _get_windows(self, working_date_index):
+        """Finds date window for each climatology type.
+
+        :param working_date_index: Array index for the day currently being
+            worked on.
+        :return: date_indices_by_type: Dictionary, where each key is a
+            climatology type and each value is a tuple of date indices.
+        """
+
+        num_spc_dates = len(self.spc_date_strings)
+        return dict([
+            (t, tuple(utils._get_dates_needed(
+                working_date_index, num_spc_dates, t)))
+            for t in self.climatology_types])
+
+    def process_working_date(self, working_date_index, accumulator_objects,
+                             next_working_date_index=None,
+                             next_accumulator_objects=None):
+        """Feeds one working date to the given accumulators.
+
+        :param working_date_index: Array index for the day currently being
+            worked on.
+        :param accumulator_objects: 1-D list of `Accumulator` objects.
+        :param next_working_date_index: Array index for the next working date
+            (its dates are prefetched).  May be None.
+        :param next_accumulator_objects: 1-D list of accumulators that will be
+            fed the next working date (only their windows are prefetched).  If
+            None, will prefetch windows of all climatology types.
+        """
+
+        this_spc_date_string = self.spc_date_strings[working_date_index]
+        print('Working on SPC date "{0:s}"...'.format(this_spc_date_string))
+        profiling.set_spc_date(this_spc_date_string)
+
+        with profiling.stage(profiling.WORKING_DATE_STAGE):
+            these_date_indices_by_type = self._get_windows(working_date_index)
+            this_table_by_window = {}
+
+            for this_accumulator_object in accumulator_objects:
+                this_window = these_date_indices_by_type[
+                    this_accumulator_object.climatology_type]
+                if this_window not in this_table_by_window:
+                    this_table_by_window[this_window] = (
+                        self.day_loader_object.get_multiday_table(this_window))
+
+            if next_working_date_index is not None:
+                these_next_windows = self._get_windows(next_working_date_index)
+                if next_accumulator_objects is None:
+                    these_next_windows = these_next_windows.values()
+                else:
+                    these_next_windows = [
+                        these_next_windows[a.climatology_type]
+                        for a in next_accumulator_objects]
+
+                self.day_loader_object.prefetch(
+                    sorted(set(i for w in these_next_windows for i in w)))
+
+            for this_accumulator_object in accumulator_objects:
+                this_window = these_date_indices_by_type[
+                    this_accumulator_object.climatology_type]
+                this_accumulator_object.process_window(
+                    this_table_by_window[this_window], working_date_index)
+
+    def run(self, working_date_indices=None):
+        """Runs all accumulators over the given working dates.
+
+        :param working_date_indices: 1-D list of working-date indices.  If
+            None, will use all dates.
+        :return: accumulator_objects: 1-D list of `Accumulator` objects, with
+            results filled in.
+        """
+
+        if working_date_indices is None:
+            working_date_indices = range(len(self.spc_date_strings))
+        working_date_indices = list(working_date_indices)
+
+        for this_accumulator_object in self.accumulator_objects:
+            this_accumulator_object.start(self.spc_date_strings)
+
+        for k, this_working_date_index in enumerate(working_date_indices):
+            if k + 1 < len(working_date_indices):
+                this_next_index = working_date_indices[k + 1]
+            else:
+                this_next_index = None
+
+            self.process_working_date(
+                this_working_date_index, self.accumulator_objects,
+                next_working_date_index=this_next_index)
+
+        for this_accumulator_object in self.accumulator_objects:
+            this_accumulator_object.finish()
+
+        self.day_loader_object.clear()
+        return self.accumulator_objects
+
+    def _restore_checkpoint(self, checkpoint_dict):
+        """Restores accumulators from a checkpoint.
+
+        :param checkpoint_dict: Dictionary created by
+            `checkpoint.read_checkpoint`.
+        :return: num_completed_dates: Number of working dates already done.
+        :return: redo_accumulator_indices: 1-D list with indices of
+            accumulators (death climatologies) whose last working date must be
+            redone, because new dates were appended after it.
+        :raises: ValueError: if the checkpoint does not match this run.  This
+            includes the case where the run has a storm-ID encoder and the
+            checkpoint does not.
+        """
+
+        completed_spc_date_strings = checkpoint_dict[checkpoint.SPC_DATES_KEY]
+        num_completed_dates = len(completed_spc_date_strings)
+        if (self.spc_date_strings[:num_completed_dates] !=
+                list(completed_spc_date_strings)):
+            raise ValueError(
+                'Dates in checkpoint ({0:s}...{1:s}) are not the first dates '
+                'of this run.'.format(completed_spc_date_strings[0],
+                                      completed_spc_date_strings[-1]))
+
+        these_class_names = [
+            type(a).__name__ for a in self.accumulator_objects]
+        if these_class_names != checkpoint_dict[
+                checkpoint.ACCUMULATOR_CLASSES_KEY]:
+            raise ValueError(
+                'Accumulators in checkpoint ({0:s}) do not match those of '
+                'this run ({1:s}).'.format(
+                    str(checkpoint_dict[checkpoint.ACCUMULATOR_CLASSES_KEY]),
+                    str(these_class_names)))
+
+        for this_accumulator_object, this_state in zip(
+                self.accumulator_objects,
+                checkpoint_dict[checkpoint.ACCUMULATOR_STATES_KEY]):
+            this_accumulator_object.set_state(this_state)
+
+        # Storm-ID codes in the carry-over table and in accumulator states are
+        # those of the encoder that wrote the checkpoint, so the loader must
+        # keep encoding with it.
+        this_table = checkpoint_dict[checkpoint.CARRY_OVER_TABLE_KEY]
+        if isinstance(this_table, storm_table.StormTable):
+            self.day_loader_object.storm_id_encoder = (
+                this_table.storm_id_encoder)
+        elif (this_table is not None and
+              self.day_loader_object.storm_id_encoder is not None):
+            raise ValueError(
+                'Checkpoint was written without a storm-ID encoder, so this '
+                'run cannot use one.')
+
+        if this_table is not None:
+            self.day_loader_object.add_table(
+                num_completed_dates - 1, this_table)
+
+        redo_accumulator_indices = []
+        if num_completed_dates < len(self.spc_date_strings):
+            this_state_dict = checkpoint_dict[
+                checkpoint.PROVISIONAL_STATES_KEY]
+            for j in sorted(this_state_dict.keys()):
+                self.accumulator_objects[j].set_state(this_state_dict[j])
+                redo_accumulator_indices.append(j)
+
+        return num_completed_dates, redo_accumulator_indices
+
+    def _write_checkpoint(self, checkpoint_file_name, num_completed_dates,
+                          provisional_state_by_accumulator):
+        """Writes checkpoint after a working date.
+
+        :param checkpoint_file_name: Path to checkpoint file.
+        :param num_completed_dates: Number of working dates done.
+        :param provisional_state_by_accumulator: See doc for
+            `checkpoint.write_checkpoint`.
+        """
+
+        for this_accumulator_object in self.accumulator_objects:
+            this_accumulator_object.flush()
+
+        checkpoint.write_checkpoint({
+            checkpoint.SPC_DATES_KEY:
+                self.spc_date_strings[:num_completed_dates],
+            checkpoint.ACCUMULATOR_CLASSES_KEY:
+                [type(a).__name__ for a in self.accumulator_objects],
+            checkpoint.ACCUMULATOR_STATES_KEY:
+                [a.get_state() for a in self.accumulator_objects],
+            checkpoint.PROVISIONAL_STATES_KEY:
+                provisional_state_by_accumulator,
+            checkpoint.CARRY_OVER_TABLE_KEY:
+                self.day_loader_object.get_table(num_completed_dates - 1)
+        }, checkpoint_file_name)
+
+    def run_with_checkpoint(self, checkpoint_file_name):
+        """Runs all accumulators over all dates, with a checkpoint per date.
+
+        If the checkpoint file exists, the run resumes after the last completed
+        date.  If that run finished and this one has more dates, only the new
+        dates are read (plus the last death window, which is redone).
+
+        :param checkpoint_file_name: Path to checkpoint file.
+        :return: accumulator_objects: 1-D list of `Accumulator` objects, with
+            results filled in.
+        """
+
+        num_spc_dates = len(self.spc_date_strings)
+        for this_accumulator_object in self.accumulator_objects:
+            this_accumulator_object.start(self.spc_date_strings)
+
+        num_completed_dates = 0
+        redo_accumulator_indices = []
+        checkpoint_dict = checkpoint.read_checkpoint(checkpoint_file_name)
+        if checkpoint_dict is not None:
+            num_completed_dates, redo_accumulator_indices = (
+                self._restore_checkpoint(checkpoint_dict))
+            print('Resuming after SPC date "{0:s}"...'.format(
+                self.spc_date_strings[num_completed_dates - 1]))
+
+        if len(redo_accumulator_indices) > 0:
+            self.process_working_date(
+                num_completed_dates - 1,
+                [self.accumulator_objects[j]
+                 for j in redo_accumulator_indices])
+
+        for this_working_date_index in range(
+                num_completed_dates, num_spc_dates):
+            provisional_state_by_accumulator = {}
+            if this_working_date_index == num_spc_dates - 1:
+                this_next_index = None
+                provisional_state_by_accumulator = dict([
+                    (j, a.get_state())
+                    for j, a in enumerate(self.accumulator_objects)
+                    if a.climatology_type == utils.DEATH_CLIMATOLOGY_TYPE])
+            else:
+                this_next_index = this_working_date_index + 1
+
+            self.process_working_date(
+                this_working_date_index, self.accumulator_objects,
+                next_working_date_index=this_next_index)
+            self._write_checkpoint(
+                checkpoint_file_name, this_working_date_index + 1,
+                provisional_state_by_accumulator)
+
+        for this_accumulator_object in self.accumulator_objects:
+            this_accumulator_object.finish()
+
+        self.day_loader_object.clear()
+        return self.accumulator_objects
+
+
+def _run_one_chunk(argument_dict):
+    """Runs empty copies of the accumulators over one chunk of dates.
+
+    :param argument_dict: Dictionary created by `run_climatologies`.
+    :return: accumulator_objects: 1-D list of `Accumulator` objects.
+    """
+
+    engine_object = ClimatologyEngine(
+        spc_date_strings=argument_dict['spc_date_strings'],
+        accumulator_objects=[
+            a.copy_empty() for a in argument_dict['accumulator_objects']],
+        **argument_dict['loader_kwargs'])
+    return engine_object.run(argument_dict['working_date_indices'])
+
+
+def run_climatologies(spc_date_strings, accumulator_objects,
+                      num_processes=1, checkpoint_file_name=None,
+                      **loader_kwargs):
+    """Runs accumulators over all dates, in one pass, maybe in parallel.
+
+    With more than one process, working dates are split into contiguous chunks
+    (see `parallel_driver.split_into_chunks`), which run in a pool of processes
+    (see `parallel_driver.run_chunks`), and the per-chunk accumulators are
+    merged, in date order, into `accumulator_objects`.  If there is a
+    storm-ID encoder, each chunk gets a new, empty one, so storm-ID codes are
+    local to a chunk and never compared across chunks (results of mergeable
+    accumulators hold no codes).  When resuming from a checkpoint, the loader
+    uses the encoder saved in the checkpoint.
+
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    :param accumulator_objects: 1-D list of `Accumulator` objects.
+    :param num_processes: Number of processes.  If None, will use one per CPU.
+    :param checkpoint_file_name: Path to checkpoint file (see
+        `ClimatologyEngine.run_with_checkpoint`).  If None, there is no
+        checkpoint.  Checkpoints are available only for serial runs.
+    :param loader_kwargs: See doc for `ClimatologyEngine.__init__`.
+    :return: accumulator_objects: Same as input, with results filled in.
+    :raises: ValueError: if a checkpoint is requested for a parallel run.
+    :raises: ValueError: if a parallel run has accumulators that cannot be
+        merged (see `check_mergeable`).
+    """
+
+    if num_processes is None:
+        num_processes = multiprocessing.cpu_count()
+    if num_processes != 1:
+        check_mergeable(accumulator_objects)
+
+    if checkpoint_file_name is not None:
+        if num_processes != 1:
+            raise ValueError('Checkpoints are available only with 1 process.')
+
+        return ClimatologyEngine(
+            spc_date_strings, accumulator_objects,
+            **loader_kwargs).run_with_checkpoint(checkpoint_file_name)
+
+    if num_processes == 1:
+        return ClimatologyEngine(
+            spc_date_strings, accumulator_objects, **loader_kwargs).run()
+
+    argument_dicts = []
+    for these_indices in parallel_driver.split_into_chunks(
+            len(spc_date_strings), num_processes):
+        these_loader_kwargs = dict(loader_kwargs)
+        if loader_kwargs.get('storm_id_encoder') is not None:
+            these_loader_kwargs['storm_id_encoder'] = (
+                storm_table.StormIdEncoder())
+
+        argument_dicts.append({
+            'spc_date_strings': spc_date_strings,
+            'accumulator_objects': accumulator_objects,
+            'working_date_indices': these_indices,
+            'loader_kwargs': these_loader_kwargs
+        })
+
+    accumulator_objects_by_chunk = parallel_driver.run_chunks(
+        _run_one_chunk, argument_dicts, num_processes)
+
+    for these_accumulator_objects in accumulator_objects_by_chunk:
+        for i, this_accumulator_object in enumerate(accumulator_objects):
+            this_accumulator_object.merge(these_accumulator_objects[i])
+
+    return accumulator_objects
+
+
+def _get_batch_windows(spc_date_string, spc_date_strings_by_run,
+                       accumulator_objects_by_run, date_index_by_string):
+    """Finds window of every accumulator, in every run, for one working date.
+
+    :param spc_date_string: Working date (format "yyyymmdd").
+    :param spc_date_strings_by_run: See doc for `run_batch`.
+    :param accumulator_objects_by_run: Same.
+    :param date_index_by_string: Dictionary, where each key is an SPC date and
+        each value is its index in the shared loader.
+    :return: window_tuples: 1-D list of tuples, each with (accumulator,
+        working-date index within its run, window as tuple of indices in the
+        shared loader).
+    """
+
+    window_tuples = []
+    for these_spc_date_strings, these_accumulator_objects in zip(
+            spc_date_strings_by_run, accumulator_objects_by_run):
+        if spc_date_string not in these_spc_date_strings:
+            continue
+
+        this_working_date_index = these_spc_date_strings.index(
+            spc_date_string)
+        for this_accumulator_object in these_accumulator_objects:
+            this_window = tuple(
+                date_index_by_string[these_spc_date_strings[i]]
+                for i in utils._get_dates_needed(
+                    this_working_date_index, len(these_spc_date_strings),
+                    this_accumulator_object.climatology_type))
+            window_tuples.append(
+                (this_accumulator_object, this_working_date_index,
+                 this_window))
+
+    return window_tuples
+
+
+def run_batch(spc_date_strings_by_run, accumulator_objects_by_run,
+              **loader_kwargs):
+    """Runs several sets of accumulators, each over its own dates, in one pass.
+
+    Runs may overlap (e.g., a season and the year that contains it).  The union
+    of dates is visited once, in order, through one shared
+    `day_loader.DayLoader`, so a date needed by several runs is read once.
+    Windows are still found within each run (see `utils._get_dates_needed`),
+    so every run gets the same result as `run_climatologies` on its own dates.
+
+    :param spc_date_strings_by_run: 1-D list, where each element is a 1-D list
+        of SPC dates (format "yyyymmdd") in one run.
+    :param accumulator_objects_by_run: 1-D list, where each element is a 1-D
+        list of `Accumulator` objects for one run.  An accumulator object may
+        be in only one run.
+    :param loader_kwargs: See doc for `ClimatologyEngine.__init__`.
+    :return: accumulator_objects_by_run: Same as input, with results filled in.
+    """
+
+    spc_date_strings_by_run = [list(d) for d in spc_date_strings_by_run]
+    accumulator_objects_by_run = [list(a) for a in accumulator_objects_by_run]
+
+    all_spc_date_strings = sorted(set(
+        d for these_spc_date_strings in spc_date_strings_by_run
+        for d in these_spc_date_strings))
+    date_index_by_string = dict(
+        [(d, i) for i, d in enumerate(all_spc_date_strings)])
+
+    day_loader_object = day_loader.DayLoader(
+        spc_date_strings=all_spc_date_strings,
+        column_names=_get_column_names(
+            [a for these_accumulator_objects in accumulator_objects_by_run
+             for a in these_accumulator_objects]),
+        **loader_kwargs)
+
+    for these_spc_date_strings, these_accumulator_objects in zip(
+            spc_date_strings_by_run, accumulator_objects_by_run):
+        for this_accumulator_object in these_accumulator_objects:
+            this_accumulator_object.start(these_spc_date_strings)
+
+    these_window_tuples = None
+    for k, this_spc_date_string in enumerate(all_spc_date_strings):
+        print('Working on SPC date "{0:s}"...'.format(this_spc_date_string))
+        profiling.set_spc_date(this_spc_date_string)
+
+        with profiling.stage(profiling.WORKING_DATE_STAGE):
+            if these_window_tuples is None:
+                these_window_tuples = _get_batch_windows(
+                    this_spc_date_string, spc_date_strings_by_run,
+                    accumulator_objects_by_run, date_index_by_string)
+
+            this_table_by_window = {}
+            for _, _, this_window in these_window_tuples:
+                if this_window not in this_table_by_window:
+                    this_table_by_window[this_window] = (
+                        day_loader_object.get_multiday_table(this_window))
+
+            if k + 1 < len(all_spc_date_strings):
+                these_next_window_tuples = _get_batch_windows(
+                    all_spc_date_strings[k + 1], spc_date_strings_by_run,
+                    accumulator_objects_by_run, date_index_by_string)
+                day_loader_object.prefetch(sorted(set(
+                    i for _, _, w in these_next_window_tuples for i in w)))
+            else:
+                these_next_window_tuples = None
+
+            for this_window_tuple in these_window_tuples:
+                this_accumulator_object = this_window_tuple[0]
+                this_accumulator_object.process_window(
+                    this_table_by_window[this_window_tuple[2]],
+                    this_window_tuple[1])
+
+        these_window_tuples = these_next_window_tuples
+
+    for these_accumulator_objects in accumulator_objects_by_run:
+        for this_accumulator_object in these_accumulator_objects:
+            this_accumulator_object.finish()
+
+    day_loader_object.clear()
+    return accumulator_objects_by_run
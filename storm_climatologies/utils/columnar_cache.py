@@ -0,0 +1,411 @@
+"""Columnar on-disk cache of storm-object tables.
+
+Each SPC date is stored as one directory with a numpy file per column, so that
+a date can be memory-mapped and only the columns needed by a climatology are
+read.  The cache is keyed on data source and tracking scale:
+
+{top_cache_dir_name}/{data_source}/scale_{tracking_scale_metres2}m2/{yyyy}/
+{yyyymmdd}/{column_name}.npy
+
+Polygons are stored as flattened vertex arrays (see
+`polygon_areas.flatten_polygons`), with one offset per ring, the storm object
+of each ring and a flag for exterior rings, so that holes and multi-polygons
+survive the round trip.  They are turned back into shapely objects only when
+the polygon column is asked for by name.  Area columns (see
+`day_loader.AREA_COLUMN_BY_METHOD`) are computed straight from the vertex
+arrays, so climatologies that need areas never pay for geometry.
+"""
+
+import os
+import json
+import shutil
+import tempfile
+import numpy
+import pandas
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import polygon_areas
+
+STORM_ID_COLUMN = 'storm_id'
+TIME_COLUMN = 'unix_time_sec'
+AGE_COLUMN = 'age_sec'
+CENTROID_LAT_COLUMN = 'centroid_lat_deg'
+CENTROID_LNG_COLUMN = 'centroid_lng_deg'
+EAST_VELOCITY_COLUMN = 'east_velocity_m_s01'
+NORTH_VELOCITY_COLUMN = 'north_velocity_m_s01'
+POLYGON_COLUMN = day_loader.POLYGON_COLUMN
+
+SCALAR_COLUMNS = [
+    STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN, CENTROID_LAT_COLUMN,
+    CENTROID_LNG_COLUMN, EAST_VELOCITY_COLUMN, NORTH_VELOCITY_COLUMN]
+COLUMN_DTYPE_DICT = {
+    TIME_COLUMN: numpy.int64,
+    AGE_COLUMN: numpy.int64,
+    CENTROID_LAT_COLUMN: numpy.float64,
+    CENTROID_LNG_COLUMN: numpy.float64,
+    EAST_VELOCITY_COLUMN: numpy.float64,
+    NORTH_VELOCITY_COLUMN: numpy.float64
+}
+
+MULTIPART_FLAGS_KEY = 'multipart_flags'
+VERTEX_FILE_NAME_DICT = {
+    polygon_areas.LATITUDES_KEY: 'polygon_vertex_latitudes_deg.npy',
+    polygon_areas.LONGITUDES_KEY: 'polygon_vertex_longitudes_deg.npy',
+    polygon_areas.RING_OFFSETS_KEY: 'polygon_ring_offsets.npy',
+    polygon_areas.RING_TO_POLYGON_KEY: 'polygon_index_by_ring.npy',
+    polygon_areas.EXTERIOR_FLAGS_KEY: 'polygon_exterior_ring_flags.npy',
+    MULTIPART_FLAGS_KEY: 'polygon_multipart_flags.npy'
+}
+METADATA_FILE_NAME = 'metadata.json'
+
+# Version 1 kept only the exterior ring of each polygon.
+CACHE_FORMAT_VERSION = 2
+
+
+def find_spc_date_dir_name(spc_date_string, top_cache_dir_name,
+                           tracking_scale_metres2,
+                           data_source=day_loader.SEGMOTION_SOURCE_NAME):
+    """Finds cache directory for one SPC date.
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :param top_cache_dir_name: Name of top-level cache directory.
+    :param tracking_scale_metres2: Tracking scale (minimum storm area).
+    :param data_source: Source of tracking data (e.g., "segmotion").
+    :return: spc_date_dir_name: Path to directory (may not exist yet).
+    """
+
+    return os.path.join(
+        top_cache_dir_name, data_source,
+        'scale_{0:d}m2'.format(int(tracking_scale_metres2)),
+        spc_date_string[:4], spc_date_string)
+
+
+def cache_exists(spc_date_string, top_cache_dir_name, tracking_scale_metres2,
+                 data_source=day_loader.SEGMOTION_SOURCE_NAME):
+    """Determines whether or not one SPC date has been cached.
+
+    :param spc_date_string: See doc for `find_spc_date_dir_name`.
+    :param top_cache_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :param data_source: Same.
+    :return: cache_exists: Boolean flag.  False if the date was cached in an
+        older format.
+    """
+
+    metadata_file_name = os.path.join(
+        find_spc_date_dir_name(spc_date_string, top_cache_dir_name,
+                               tracking_scale_metres2, data_source),
+        METADATA_FILE_NAME)
+    if not os.path.isfile(metadata_file_name):
+        return False
+
+    with open(metadata_file_name) as f:
+        return json.load(f).get('format_version') == CACHE_FORMAT_VERSION
+
+
+def get_polygon_vertex_arrays(polygon_objects_latlng):
+    """Flattens all rings of many polygons into a few arrays.
+
+    N = number of polygons
+
+    :param polygon_objects_latlng: length-N list of shapely polygons or
+        multi-polygons, with x = longitude and y = latitude.
+    :return: vertex_dict: Dictionary created by
+        `polygon_areas.flatten_polygons`, with one more key.
+    vertex_dict['multipart_flags']: length-N Boolean numpy array, True for
+        multi-polygons.
+    """
+
+    import shapely
+
+    polygon_objects_latlng = numpy.array(
+        list(polygon_objects_latlng), dtype=object)
+    vertex_dict = polygon_areas.flatten_polygons(polygon_objects_latlng)
+    vertex_dict[MULTIPART_FLAGS_KEY] = (
+        shapely.get_type_id(polygon_objects_latlng) ==
+        shapely.GeometryType.MULTIPOLYGON)
+
+    return vertex_dict
+
+
+def polygons_from_vertex_arrays(vertex_dict):
+    """Turns flattened vertex arrays back into shapely polygons.
+
+    This is the inverse of `get_polygon_vertex_arrays`.  All polygons are
+    built at once, with `shapely.polygons`.
+
+    :param vertex_dict: Dictionary created by `get_polygon_vertex_arrays`.
+    :return: polygon_objects_latlng: 1-D numpy array of shapely polygons and
+        multi-polygons.
+    """
+
+    import shapely
+
+    polygon_objects_latlng = numpy.full(
+        vertex_dict[polygon_areas.NUM_POLYGONS_KEY], shapely.Polygon(),
+        dtype=object)
+    ring_offsets = numpy.asarray(vertex_dict[polygon_areas.RING_OFFSETS_KEY])
+    num_rings = len(ring_offsets) - 1
+    if num_rings == 0:
+        return polygon_objects_latlng
+
+    ring_objects = shapely.linearrings(
+        numpy.stack((vertex_dict[polygon_areas.LONGITUDES_KEY],
+                     vertex_dict[polygon_areas.LATITUDES_KEY]), axis=1),
+        indices=numpy.repeat(numpy.arange(num_rings),
+                             numpy.diff(ring_offsets)))
+
+    # Each exterior ring starts a new part, and the interior rings after it
+    # are its holes.
+    exterior_flags = numpy.asarray(
+        vertex_dict[polygon_areas.EXTERIOR_FLAGS_KEY])
+    part_objects = shapely.polygons(
+        ring_objects, indices=numpy.cumsum(exterior_flags) - 1)
+    polygon_index_by_part = numpy.asarray(
+        vertex_dict[polygon_areas.RING_TO_POLYGON_KEY])[exterior_flags]
+    multipart_flags = numpy.asarray(
+        vertex_dict[MULTIPART_FLAGS_KEY])[polygon_index_by_part]
+
+    polygon_objects_latlng[polygon_index_by_part[~multipart_flags]] = (
+        part_objects[~multipart_flags])
+    if numpy.any(multipart_flags):
+        shapely.multipolygons(
+            part_objects[multipart_flags],
+            indices=polygon_index_by_part[multipart_flags],
+            out=polygon_objects_latlng)
+
+    return polygon_objects_latlng
+
+
+def write_storm_object_table(
+        storm_object_table, spc_date_string, top_cache_dir_name,
+        tracking_scale_metres2, data_source=day_loader.SEGMOTION_SOURCE_NAME,
+        include_polygons=True):
+    """Writes storm-object table for one SPC date to the cache.
+
+    Files are written to a temporary directory, which is then renamed, so that
+    a crash never leaves a partial date in the cache.
+
+    :param storm_object_table: pandas DataFrame created by
+        `storm_tracking_io.read_many_processed_files`.
+    :param spc_date_string: See doc for `find_spc_date_dir_name`.
+    :param top_cache_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :param data_source: Same.
+    :param include_polygons: Boolean flag.  If True, will also write polygon
+        vertices.
+    """
+
+    spc_date_dir_name = find_spc_date_dir_name(
+        spc_date_string, top_cache_dir_name, tracking_scale_metres2,
+        data_source)
+    parent_dir_name = os.path.dirname(spc_date_dir_name)
+    if not os.path.isdir(parent_dir_name):
+        os.makedirs(parent_dir_name)
+
+    temp_dir_name = tempfile.mkdtemp(dir=parent_dir_name)
+    column_names = []
+
+    for this_column in SCALAR_COLUMNS:
+        if this_column not in storm_object_table:
+            continue
+
+        these_values = storm_object_table[this_column].values
+        if this_column == STORM_ID_COLUMN:
+            these_values = numpy.array(
+                [s.encode('utf-8') for s in these_values], dtype=bytes)
+        else:
+            these_values = these_values.astype(COLUMN_DTYPE_DICT[this_column])
+
+        numpy.save(os.path.join(temp_dir_name, this_column + '.npy'),
+                   these_values)
+        column_names.append(this_column)
+
+    if include_polygons and POLYGON_COLUMN in storm_object_table:
+        vertex_dict = get_polygon_vertex_arrays(
+            storm_object_table[POLYGON_COLUMN].values)
+        for this_key, this_file_name in VERTEX_FILE_NAME_DICT.items():
+            numpy.save(os.path.join(temp_dir_name, this_file_name),
+                       vertex_dict[this_key])
+        column_names.append(POLYGON_COLUMN)
+
+    metadata_dict = {
+        'format_version': CACHE_FORMAT_VERSION,
+        'spc_date_string': spc_date_string,
+        'data_source': data_source,
+        'tracking_scale_metres2': int(tracking_scale_metres2),
+        'num_storm_objects': len(storm_object_table.index),
+        'column_names': column_names
+    }
+    with open(os.path.join(temp_dir_name, METADATA_FILE_NAME), 'w') as f:
+        json.dump(metadata_dict, f)
+
+    if os.path.isdir(spc_date_dir_name):
+        shutil.rmtree(spc_date_dir_name)
+    os.rename(temp_dir_name, spc_date_dir_name)
+
+
+def read_column(spc_date_dir_name, column_name):
+    """Memory-maps one scalar column for one SPC date.
+
+    :param spc_date_dir_name: Path to directory (see `find_spc_date_dir_name`).
+    :param column_name: Name of column.
+    :return: column_values: Read-only, memory-mapped numpy array.
+    """
+
+    return numpy.load(os.path.join(spc_date_dir_name, column_name + '.npy'),
+                      mmap_mode='r')
+
+
+def read_polygon_vertices(spc_date_dir_name):
+    """Memory-maps polygon vertices for one SPC date.
+
+    :param spc_date_dir_name: Path to directory (see `find_spc_date_dir_name`).
+    :return: vertex_dict: See doc for `get_polygon_vertex_arrays`.  Arrays are
+        read-only and memory-mapped.
+    """
+
+    with open(os.path.join(spc_date_dir_name, METADATA_FILE_NAME)) as f:
+        num_polygons = json.load(f)['num_storm_objects']
+
+    vertex_dict = dict([
+        (k, numpy.load(os.path.join(spc_date_dir_name, f), mmap_mode='r'))
+        for k, f in VERTEX_FILE_NAME_DICT.items()])
+    vertex_dict[polygon_areas.NUM_POLYGONS_KEY] = num_polygons
+    return vertex_dict
+
+
+def read_storm_object_table(
+        spc_date_string, top_cache_dir_name, tracking_scale_metres2,
+        data_source=day_loader.SEGMOTION_SOURCE_NAME, column_names=None):
+    """Reads storm-object table for one SPC date from the cache.
+
+    :param spc_date_string: See doc for `find_spc_date_dir_name`.
+    :param top_cache_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :param data_source: Same.
+    :param column_names: 1-D list of columns to read.  If None, will read all
+        scalar columns in the cache.  Polygons are rebuilt only if
+        `POLYGON_COLUMN` is in this list.  Area columns (see
+        `day_loader.AREA_COLUMN_BY_METHOD`) are computed from the vertex
+        arrays, without rebuilding polygons.
+    :return: storm_object_table: pandas DataFrame.
+    :raises: ValueError: if the date was cached in an older format.
+    """
+
+    spc_date_dir_name = find_spc_date_dir_name(
+        spc_date_string, top_cache_dir_name, tracking_scale_metres2,
+        data_source)
+    with open(os.path.join(spc_date_dir_name, METADATA_FILE_NAME)) as f:
+        metadata_dict = json.load(f)
+
+    if metadata_dict.get('format_version') != CACHE_FORMAT_VERSION:
+        raise ValueError(
+            'Cache directory "{0:s}" has an older format.  Convert the date '
+            'again.'.format(spc_date_dir_name))
+
+    if column_names is None:
+        column_names = [c for c in metadata_dict['column_names']
+                        if c != POLYGON_COLUMN]
+
+    vertex_dict = None
+    column_dict = {}
+    for this_column in column_names:
+        if (vertex_dict is None and (
+                this_column == POLYGON_COLUMN or
+                this_column in day_loader.AREA_METHOD_BY_COLUMN)):
+            vertex_dict = read_polygon_vertices(spc_date_dir_name)
+
+        if this_column == POLYGON_COLUMN:
+            column_dict[this_column] = polygons_from_vertex_arrays(vertex_dict)
+        elif this_column in day_loader.AREA_METHOD_BY_COLUMN:
+            column_dict[this_column] = polygon_areas.get_areas_m2(
+                vertex_dict,
+                method=day_loader.AREA_METHOD_BY_COLUMN[this_column]
+            ) / polygon_areas.SQUARE_METRES_PER_KM2
+        elif this_column == STORM_ID_COLUMN:
+            column_dict[this_column] = numpy.char.decode(
+                read_column(spc_date_dir_name, this_column), 'utf-8'
+            ).astype(object)
+        else:
+            column_dict[this_column] = numpy.asarray(
+                read_column(spc_date_dir_name, this_column))
+
+    return pandas.DataFrame(column_dict, columns=column_names,
+                            index=numpy.arange(
+                                metadata_dict['num_storm_objects']))
+
+
+def convert_spc_date(
+        spc_date_string, top_processed_dir_name, top_cache_dir_name,
+        tracking_scale_metres2, data_source=day_loader.SEGMOTION_SOURCE_NAME,
+        include_polygons=True):
+    """Reads processed tracking files for one SPC date and caches them.
+
+    :param spc_date_string: See doc for `find_spc_date_dir_name`.
+    :param top_processed_dir_name: Name of top-level directory with processed
+        tracking files.
+    :param top_cache_dir_name: See doc for `find_spc_date_dir_name`.
+    :param tracking_scale_metres2: Same.
+    :param data_source: Same.
+    :param include_polygons: See doc for `write_storm_object_table`.
+    """
+
+    storm_object_table = day_loader.read_storm_object_table(
+        spc_date_string=spc_date_string,
+        top_processed_dir_name=top_processed_dir_name,
+        tracking_scale_metres2=tracking_scale_metres2, data_source=data_source)
+
+    write_storm_object_table(
+        storm_object_table=storm_object_table, spc_date_string=spc_date_string,
+        top_cache_dir_name=top_cache_dir_name,
+        tracking_scale_metres2=tracking_scale_metres2, data_source=data_source,
+        include_polygons=include_polygons)
+
+
+class CachedTableReader(object):
+    """Read function for `day_loader.DayLoader` that uses the cache.
+
+    Dates missing from the cache are converted from processed tracking files
+    first, if `top_processed_dir_name` is given.
+    """
+
+    def __init__(self, top_cache_dir_name, tracking_scale_metres2,
+                 data_source=day_loader.SEGMOTION_SOURCE_NAME,
+                 top_processed_dir_name=None, column_names=None):
+        """Creates new reader.
+
+        :param top_cache_dir_name: See doc for `read_storm_object_table`.
+        :param tracking_scale_metres2: Same.
+        :param data_source: Same.
+        :param top_processed_dir_name: See doc for `convert_spc_date`.
+        :param column_names: See doc for `read_storm_object_table`.
+        """
+
+        self.top_cache_dir_name = top_cache_dir_name
+        self.tracking_scale_metres2 = tracking_scale_metres2
+        self.data_source = data_source
+        self.top_processed_dir_name = top_processed_dir_name
+        self.column_names = column_names
+
+    def __call__(self, spc_date_string):
+        """Reads storm-object table for one SPC date.
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :return: storm_object_table: pandas DataFrame.
+        """
+
+        if (self.top_processed_dir_name is not None and not cache_exists(
+                spc_date_string, self.top_cache_dir_name,
+                self.tracking_scale_metres2, self.data_source)):
+            convert_spc_date(
+                spc_date_string=spc_date_string,
+                top_processed_dir_name=self.top_processed_dir_name,
+                top_cache_dir_name=self.top_cache_dir_name,
+                tracking_scale_metres2=self.tracking_scale_metres2,
+                data_source=self.data_source)
+
+        return read_storm_object_table(
+            spc_date_string=spc_date_string,
+            top_cache_dir_name=self.top_cache_dir_name,
+            tracking_scale_metres2=self.tracking_scale_metres2,
+            data_source=self.data_source, column_names=self.column_names)
@@ -0,0 +1,380 @@
+"""Command-line entry points (installed by setup.py).
+
+storm-climatologies: runs every season in a job (see `job_config`) and writes
+    the products of each.  Seasons are run together, in one pass over the
+    union of their dates, so a date shared by several seasons is read once.
+storm-climatologies-write-partials: writes per-day partial files (see
+    `partials`) for one job's share of every season.
+storm-climatologies-merge-partials: merges partial files into the products of
+    each season.
+
+Settings come from a JSON file (--config_file) and may be overridden by
+arguments.  With --profile_log_file, every stage of every date is timed (see
+`profiling`) and a report is printed at the end of the run.  For example, the
+following runs one season with all defaults:
+
+storm-climatologies --first_spc_date_string=20110601
+    --last_spc_date_string=20110831 --output_dir_name=/home/aodhan/MATRIX
+"""
+
+import argparse
+import os
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import job_config
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import partials
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import storm_table
+
+CONFIG_FILE_ARG_NAME = 'config_file'
+FIRST_DATE_ARG_NAME = 'first_spc_date_string'
+LAST_DATE_ARG_NAME = 'last_spc_date_string'
+SEASON_NAME_ARG_NAME = 'season_name'
+PRODUCTS_ARG_NAME = 'products'
+JOB_INDEX_ARG_NAME = 'job_index'
+NUM_JOBS_ARG_NAME = 'num_jobs'
+PROFILE_LOG_ARG_NAME = 'profile_log_file'
+
+OVERRIDE_ARG_NAMES = [
+    job_config.TOP_PROCESSED_DIR_KEY, job_config.TRACKING_SCALE_KEY,
+    job_config.OUTPUT_DIR_KEY, job_config.NUM_PROCESSES_KEY,
+    job_config.CHECKPOINT_DIR_KEY, job_config.TOP_PARTIAL_DIR_KEY,
+    job_config.GRID_CACHE_DIR_KEY, job_config.COMPACT_TABLES_KEY
+]
+OVERRIDE_ARG_TYPES = {
+    job_config.TRACKING_SCALE_KEY: int,
+    job_config.NUM_PROCESSES_KEY: int,
+    job_config.COMPACT_TABLES_KEY: int
+}
+BOOLEAN_OVERRIDE_ARG_NAMES = [job_config.COMPACT_TABLES_KEY]
+
+
+def _get_arg_parser(description, include_job_args=False):
+    """Creates parser for command-line arguments.
+
+    :param description: Description of program.
+    :param include_job_args: Boolean flag.  If True, will add arguments that
+        split dates among jobs.
+    :return: arg_parser_object: Instance of `argparse.ArgumentParser`.
+    """
+
+    arg_parser_object = argparse.ArgumentParser(description=description)
+    arg_parser_object.add_argument(
+        '--' + CONFIG_FILE_ARG_NAME, type=str, required=False, default=None,
+        help='Path to JSON job config (see job_config.py).')
+    arg_parser_object.add_argument(
+        '--' + FIRST_DATE_ARG_NAME, type=str, required=False, default=None,
+        help='First SPC date (format "yyyymmdd").  If given, replaces the '
+             'seasons in the config file with one season.')
+    arg_parser_object.add_argument(
+        '--' + LAST_DATE_ARG_NAME, type=str, required=False, default=None,
+        help='Last SPC date (format "yyyymmdd").  Needed with --{0:s}.'.format(
+            FIRST_DATE_ARG_NAME))
+    arg_parser_object.add_argument(
+        '--' + SEASON_NAME_ARG_NAME, type=str, required=False, default=None,
+        help='Name of season given by --{0:s} and --{1:s}.'.format(
+            FIRST_DATE_ARG_NAME, LAST_DATE_ARG_NAME))
+    arg_parser_object.add_argument(
+        '--' + PRODUCTS_ARG_NAME, type=str, nargs='+', required=False,
+        default=None, help='Products to make (default is all).')
+    arg_parser_object.add_argument(
+        '--' + PROFILE_LOG_ARG_NAME, type=str, required=False, default=None,
+        help='Path to profiling log (one JSON record per stage per date).  If '
+             'given, a report is printed at the end.  Only the main process '
+             'is profiled.')
+
+    for this_arg_name in OVERRIDE_ARG_NAMES:
+        this_help_string = 'Overrides "{0:s}" in the config file.'.format(
+            this_arg_name)
+        if this_arg_name in BOOLEAN_OVERRIDE_ARG_NAMES:
+            this_help_string += '  Use 1 for true, 0 for false.'
+
+        arg_parser_object.add_argument(
+            '--' + this_arg_name,
+            type=OVERRIDE_ARG_TYPES.get(this_arg_name, str), required=False,
+            default=None, help=this_help_string)
+
+    if include_job_args:
+        arg_parser_object.add_argument(
+            '--' + JOB_INDEX_ARG_NAME, type=int, required=False, default=0,
+            help='Index of this job (0...[num_jobs - 1]).')
+        arg_parser_object.add_argument(
+            '--' + NUM_JOBS_ARG_NAME, type=int, required=False, default=1,
+            help='Number of jobs.  Each job does one contiguous chunk of '
+                 'dates in each season.')
+
+    return arg_parser_object
+
+
+def _get_config(input_arg_object):
+    """Creates job configuration from command-line arguments.
+
+    :param input_arg_object: Object created by `argparse` (see
+        `_get_arg_parser`).
+    :return: config_dict: Dictionary created by `job_config.get_config`.
+    :raises: ValueError: if only one of the first and last dates is given.
+    """
+
+    override_dict = dict([
+        (a, getattr(input_arg_object, a)) for a in OVERRIDE_ARG_NAMES])
+    for this_arg_name in BOOLEAN_OVERRIDE_ARG_NAMES:
+        if override_dict[this_arg_name] is not None:
+            override_dict[this_arg_name] = bool(override_dict[this_arg_name])
+    override_dict[job_config.PRODUCTS_KEY] = getattr(
+        input_arg_object, PRODUCTS_ARG_NAME)
+
+    first_spc_date_string = getattr(input_arg_object, FIRST_DATE_ARG_NAME)
+    last_spc_date_string = getattr(input_arg_object, LAST_DATE_ARG_NAME)
+    if (first_spc_date_string is None) != (last_spc_date_string is None):
+        raise ValueError('--{0:s} and --{1:s} must be given together.'.format(
+            FIRST_DATE_ARG_NAME, LAST_DATE_ARG_NAME))
+
+    if first_spc_date_string is not None:
+        override_dict[job_config.SEASONS_KEY] = [job_config.make_season(
+            first_spc_date_string, last_spc_date_string,
+            name=getattr(input_arg_object, SEASON_NAME_ARG_NAME))]
+
+    return job_config.get_config(
+        config_file_name=getattr(input_arg_object, CONFIG_FILE_ARG_NAME),
+        override_dict=override_dict)
+
+
+def _get_loader_kwargs(config_dict):
+    """Returns arguments for `day_loader.DayLoader`.
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :return: loader_kwargs: Dictionary of keyword arguments.
+    """
+
+    loader_kwargs = {
+        'top_processed_dir_name':
+            config_dict[job_config.TOP_PROCESSED_DIR_KEY],
+        'tracking_scale_metres2': config_dict[job_config.TRACKING_SCALE_KEY]
+    }
+    if config_dict[job_config.COMPACT_TABLES_KEY]:
+        loader_kwargs['storm_id_encoder'] = storm_table.StormIdEncoder()
+
+    return loader_kwargs
+
+
+def _check_partial_dir(config_dict):
+    """Ensures that job has a directory for partial files.
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :raises: ValueError: if there is no directory for partial files.
+    """
+
+    if config_dict[job_config.TOP_PARTIAL_DIR_KEY] is None:
+        raise ValueError('"{0:s}" is needed for partial files.'.format(
+            job_config.TOP_PARTIAL_DIR_KEY))
+
+
+def run_job(config_dict, **loader_kwargs):
+    """Makes every product for every season in the job.
+
+    Serial runs without checkpoints do all seasons in one pass (see
+    `climatology_engine.run_batch`).  Otherwise, seasons are run one at a
+    time, with checkpoint "{checkpoint_dir_name}/{season}.p".
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :param loader_kwargs: Keyword arguments passed to `day_loader.DayLoader`,
+        in addition to those in the config (e.g., read_function).
+    :return: accumulator_dict_by_season: Dictionary, where each key is a season
+        name and each value is a dictionary created by
+        `job_config.make_accumulators`, with results filled in.
+    :raises: ValueError: if a parallel job has products that cannot be merged
+        (see `climatology_engine.check_mergeable`).
+    """
+
+    these_loader_kwargs = _get_loader_kwargs(config_dict)
+    these_loader_kwargs.update(loader_kwargs)
+
+    grid_spec_object = job_config.get_grid_spec(config_dict)
+    season_dicts = config_dict[job_config.SEASONS_KEY]
+    accumulator_dicts = [
+        job_config.make_accumulators(
+            config_dict, s, grid_spec_object=grid_spec_object)
+        for s in season_dicts]
+    product_names = sorted(accumulator_dicts[0].keys())
+
+    if config_dict[job_config.NUM_PROCESSES_KEY] != 1:
+        climatology_engine.check_mergeable(
+            [d[p] for d in accumulator_dicts for p in product_names])
+
+    if (config_dict[job_config.NUM_PROCESSES_KEY] == 1 and
+            config_dict[job_config.CHECKPOINT_DIR_KEY] is None):
+        climatology_engine.run_batch(
+            [job_config.get_spc_date_strings(s) for s in season_dicts],
+            [[d[p] for p in product_names] for d in accumulator_dicts],
+            **these_loader_kwargs)
+    else:
+        for this_season_dict, this_accumulator_dict in zip(
+                season_dicts, accumulator_dicts):
+            if config_dict[job_config.CHECKPOINT_DIR_KEY] is None:
+                this_checkpoint_file_name = None
+            else:
+                this_checkpoint_file_name = os.path.join(
+                    config_dict[job_config.CHECKPOINT_DIR_KEY],
+                    '{0:s}.p'.format(
+                        this_season_dict[job_config.SEASON_NAME_KEY]))
+
+            climatology_engine.run_climatologies(
+                job_config.get_spc_date_strings(this_season_dict),
+                [this_accumulator_dict[p] for p in product_names],
+                num_processes=config_dict[job_config.NUM_PROCESSES_KEY],
+                checkpoint_file_name=this_checkpoint_file_name,
+                **these_loader_kwargs)
+
+    return dict([
+        (s[job_config.SEASON_NAME_KEY], d)
+        for s, d in zip(season_dicts, accumulator_dicts)])
+
+
+def write_job_partials(config_dict, job_index=0, num_jobs=1, **loader_kwargs):
+    """Writes one job's share of partial files for every season.
+
+    Partial files of interior dates do not depend on the season, so seasons
+    that overlap share them.
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :param job_index: Index of this job (0...[num_jobs - 1]).
+    :param num_jobs: Number of jobs.  Each job does one contiguous chunk of
+        dates in each season (see `parallel_driver.split_into_chunks`).
+    :param loader_kwargs: See doc for `run_job`.
+    :return: partial_file_names: 1-D list of files written.
+    """
+
+    _check_partial_dir(config_dict)
+    these_loader_kwargs = _get_loader_kwargs(config_dict)
+    these_loader_kwargs.update(loader_kwargs)
+
+    config_dict = config_dict.copy()
+    config_dict[job_config.WRITE_RAW_VALUES_KEY] = False
+    grid_spec_object = job_config.get_grid_spec(config_dict)
+    partial_file_names = []
+
+    for this_season_dict in config_dict[job_config.SEASONS_KEY]:
+        these_spc_date_strings = job_config.get_spc_date_strings(
+            this_season_dict)
+        this_accumulator_dict = job_config.make_accumulators(
+            config_dict, this_season_dict, grid_spec_object=grid_spec_object)
+
+        partial_file_names += partials.write_daily_partials(
+            these_spc_date_strings,
+            [this_accumulator_dict[p] for p in sorted(this_accumulator_dict)],
+            config_dict[job_config.TOP_PARTIAL_DIR_KEY],
+            working_date_indices=parallel_driver.split_into_chunks(
+                len(these_spc_date_strings), num_jobs)[job_index],
+            **these_loader_kwargs)
+
+    return partial_file_names
+
+
+def merge_job_partials(config_dict):
+    """Merges partial files into every product for every season.
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :return: accumulator_dict_by_season: See doc for `run_job`.
+    """
+
+    _check_partial_dir(config_dict)
+    config_dict = config_dict.copy()
+    config_dict[job_config.WRITE_RAW_VALUES_KEY] = False
+    grid_spec_object = job_config.get_grid_spec(config_dict)
+    accumulator_dict_by_season = {}
+
+    for this_season_dict in config_dict[job_config.SEASONS_KEY]:
+        this_accumulator_dict = job_config.make_accumulators(
+            config_dict, this_season_dict, grid_spec_object=grid_spec_object)
+        partials.merge_daily_partials(
+            job_config.get_spc_date_strings(this_season_dict),
+            [this_accumulator_dict[p] for p in sorted(this_accumulator_dict)],
+            config_dict[job_config.TOP_PARTIAL_DIR_KEY])
+
+        accumulator_dict_by_season[
+            this_season_dict[job_config.SEASON_NAME_KEY]
+        ] = this_accumulator_dict
+
+    return accumulator_dict_by_season
+
+
+def _write_job_results(config_dict, accumulator_dict_by_season):
+    """Writes products of every season.
+
+    :param config_dict: Dictionary created by `job_config.get_config`.
+    :param accumulator_dict_by_season: See doc for `run_job`.
+    """
+
+    for this_season_dict in config_dict[job_config.SEASONS_KEY]:
+        job_config.write_results(
+            accumulator_dict_by_season[
+                this_season_dict[job_config.SEASON_NAME_KEY]],
+            config_dict, this_season_dict)
+
+
+def _start_profiling(input_arg_object):
+    """Turns on profiling if a log file is given.
+
+    :param input_arg_object: See doc for `_get_config`.
+    """
+
+    profile_log_file_name = getattr(input_arg_object, PROFILE_LOG_ARG_NAME)
+    if profile_log_file_name is not None:
+        profiling.enable(log_file_name=profile_log_file_name)
+
+
+def _finish_profiling():
+    """Turns off profiling and prints the report, if profiling is on."""
+
+    profiler_object = profiling.disable()
+    if profiler_object is not None:
+        print(profiler_object.get_report())
+
+
+def run_main(argv=None):
+    """Entry point for storm-climatologies.
+
+    :param argv: 1-D list of command-line arguments.  If None, will use
+        `sys.argv`.
+    """
+
+    input_arg_object = _get_arg_parser(
+        'Makes climatologies for a batch of seasons.').parse_args(argv)
+    config_dict = _get_config(input_arg_object)
+
+    _start_profiling(input_arg_object)
+    _write_job_results(config_dict, run_job(config_dict))
+    _finish_profiling()
+
+
+def write_partials_main(argv=None):
+    """Entry point for storm-climatologies-write-partials.
+
+    :param argv: See doc for `run_main`.
+    """
+
+    input_arg_object = _get_arg_parser(
+        'Writes per-day partial files for a batch of seasons.',
+        include_job_args=True).parse_args(argv)
+
+    config_dict = _get_config(input_arg_object)
+
+    _start_profiling(input_arg_object)
+    partial_file_names = write_job_partials(
+        config_dict, job_index=getattr(input_arg_object, JOB_INDEX_ARG_NAME),
+        num_jobs=getattr(input_arg_object, NUM_JOBS_ARG_NAME))
+    print('Wrote {0:d} partial files.'.format(len(partial_file_names)))
+    _finish_profiling()
+
+
+def merge_partials_main(argv=None):
+    """Entry point for storm-climatologies-merge-partials.
+
+    :param argv: See doc for `run_main`.
+    """
+
+    input_arg_object = _get_arg_parser(
+        'Merges per-day partial files for a batch of seasons.'
+    ).parse_args(argv)
+    config_dict = _get_config(input_arg_object)
+    _write_job_results(config_dict, merge_job_partials(config_dict))
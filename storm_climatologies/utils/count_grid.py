@@ -0,0 +1,351 @@
+"""Compact, mergeable count grids for high-resolution spatial climatologies.
+
+The spatial scripts keep a dense int64 matrix over the whole x-y grid, and
+`numpy.ma.masked_where` makes another dense copy at the end.  Birth and death
+counts are mostly zero, so at 1-2 km, and with one grid per month or hour,
+this runs to gigabytes.  A `CountGrid` stores the nonzero cells only (sorted
+flat indices and uint32 counts, 12 bytes per cell) while the grid is sparse,
+and switches to a dense uint32 array (4 bytes per cell) once more than
+`dense_fill_ratio` of the cells are nonzero.  Grids merge without densifying
+when both are sparse, and become dense or masked arrays only on request.
+
+The grid may have leading dimensions (e.g., month and hour, from
+`temporal_bins`) ahead of y and x.  Grids of weighted sums (e.g., of storm
+velocity) use the same storage with a float dtype.
+"""
+
+import numpy
+
+COUNT_DTYPE = numpy.uint32
+INDEX_DTYPE = numpy.int64
+
+# A sparse cell costs 12 bytes and a dense cell 4, so dense storage is smaller
+# above a fill ratio of 1/3.  Switch earlier, since merging sparse grids makes
+# temporary copies.
+DEFAULT_DENSE_FILL_RATIO = 0.25
+
+SHAPE_KEY = 'shape'
+FLAT_INDICES_KEY = 'flat_indices'
+COUNTS_KEY = 'counts'
+
+
+def _sum_duplicates(flat_indices, counts):
+    """Sorts flat indices and adds counts of duplicate indices.
+
+    :param flat_indices: 1-D numpy array of flat indices.
+    :param counts: 1-D numpy array of counts (same length).
+    :return: unique_flat_indices: Sorted 1-D numpy array of unique indices.
+    :return: unique_counts: 1-D numpy array of summed counts (same dtype as
+        `counts`).
+    """
+
+    if len(flat_indices) == 0:
+        return (numpy.array([], dtype=INDEX_DTYPE),
+                numpy.array([], dtype=counts.dtype))
+
+    sort_indices = numpy.argsort(flat_indices, kind='mergesort')
+    flat_indices = flat_indices[sort_indices]
+    first_flags = numpy.concatenate((
+        numpy.array([True]), flat_indices[1:] != flat_indices[:-1]))
+    first_indices = numpy.where(first_flags)[0]
+
+    return (flat_indices[first_indices],
+            numpy.add.reduceat(counts[sort_indices], first_indices).astype(
+                counts.dtype))
+
+
+def _merge_sorted(flat_indices, counts, new_flat_indices, new_counts):
+    """Adds counts at sorted, unique flat indices to those at other indices.
+
+    The new indices are found in the old by binary search, so the cost is
+    linear in the old cells, not the sort of old and new together.  Counts are
+    added in place where indices match.
+
+    :param flat_indices: Sorted 1-D numpy array of unique flat indices.
+    :param counts: 1-D numpy array of counts (same length).
+    :param new_flat_indices: Sorted 1-D numpy array of unique flat indices.
+    :param new_counts: 1-D numpy array of counts (same length).
+    :return: flat_indices: Sorted 1-D numpy array of unique indices.
+    :return: counts: 1-D numpy array of summed counts (same dtype as input
+        `counts`).
+    """
+
+    insert_indices = numpy.searchsorted(flat_indices, new_flat_indices)
+    found_flags = numpy.full(len(new_flat_indices), False, dtype=bool)
+    these_flags = insert_indices < len(flat_indices)
+    found_flags[these_flags] = (
+        flat_indices[insert_indices[these_flags]] ==
+        new_flat_indices[these_flags])
+
+    counts[insert_indices[found_flags]] += new_counts[found_flags].astype(
+        counts.dtype)
+    if numpy.all(found_flags):
+        return flat_indices, counts
+
+    new_flags = numpy.invert(found_flags)
+    return (
+        numpy.insert(flat_indices, insert_indices[new_flags],
+                     new_flat_indices[new_flags]),
+        numpy.insert(counts, insert_indices[new_flags],
+                     new_counts[new_flags].astype(counts.dtype)))
+
+
+class CountGrid(object):
+    """Count grid with sparse or dense storage, chosen by fill ratio."""
+
+    def __init__(self, shape, dense_fill_ratio=DEFAULT_DENSE_FILL_RATIO,
+                 dtype=COUNT_DTYPE):
+        """Creates empty (sparse) grid.
+
+        :param shape: Tuple with number of cells along each dimension (the last
+            two are usually y and x).
+        :param dense_fill_ratio: Fraction of nonzero cells above which storage
+            becomes dense.  Use 0 for always dense.
+        :param dtype: Data type of counts (or weighted sums).
+        """
+
+        self.shape = tuple([int(n) for n in shape])
+        self.num_cells = int(numpy.prod(self.shape))
+        self.dense_fill_ratio = dense_fill_ratio
+        self.dtype = numpy.dtype(dtype)
+
+        self.dense_counts = None
+        self.flat_indices = numpy.array([], dtype=INDEX_DTYPE)
+        self.counts = numpy.array([], dtype=self.dtype)
+        if dense_fill_ratio <= 0:
+            self._make_dense()
+
+    def is_sparse(self):
+        """Returns True if storage is sparse.
+
+        :return: sparse_flag: Boolean flag.
+        """
+
+        return self.dense_counts is None
+
+    def get_num_nonzero(self):
+        """Returns number of nonzero cells.
+
+        :return: num_nonzero: Integer.
+        """
+
+        if self.is_sparse():
+            return len(self.flat_indices)
+        return int(numpy.count_nonzero(self.dense_counts))
+
+    def get_nbytes(self):
+        """Returns memory used by counts (and indices, if sparse).
+
+        :return: num_bytes: Integer.
+        """
+
+        if self.is_sparse():
+            return self.flat_indices.nbytes + self.counts.nbytes
+        return self.dense_counts.nbytes
+
+    def _make_dense(self):
+        """Switches to dense storage."""
+
+        self.dense_counts = numpy.zeros(self.num_cells, dtype=self.dtype)
+        self.dense_counts[self.flat_indices] = self.counts
+        self.flat_indices = None
+        self.counts = None
+
+    def _add_unique(self, flat_indices, counts):
+        """Adds counts at unique, sorted flat indices.
+
+        :param flat_indices: Sorted 1-D numpy array of unique flat indices.
+        :param counts: 1-D numpy array of counts (same length).
+        """
+
+        if self.is_sparse():
+            self.flat_indices, self.counts = _merge_sorted(
+                self.flat_indices, self.counts, flat_indices, counts)
+
+            if len(self.flat_indices) > self.dense_fill_ratio * self.num_cells:
+                self._make_dense()
+            return
+
+        self.dense_counts[flat_indices] += counts.astype(self.dtype)
+
+    def add(self, index_arrays, counts=None):
+        """Adds to cells given by one index array per dimension.
+
+        N = number of items to add
+
+        :param index_arrays: Tuple of length-N numpy arrays of integers, one
+            per dimension (e.g., rows and columns).
+        :param counts: length-N numpy array of counts (or weights).  If None,
+            each item adds 1 to its cell.
+        """
+
+        flat_indices = numpy.ravel_multi_index(
+            tuple([numpy.asarray(a, dtype=INDEX_DTYPE) for a in index_arrays]),
+            self.shape).astype(INDEX_DTYPE)
+        if counts is None:
+            counts = numpy.ones(len(flat_indices), dtype=self.dtype)
+
+        self._add_unique(*_sum_duplicates(
+            flat_indices, numpy.asarray(counts, dtype=self.dtype)))
+
+    def merge(self, other_count_grid_object):
+        """Adds counts from another grid of the same shape, in place.
+
+        :param other_count_grid_object: Instance of `CountGrid`.
+        :raises: ValueError: if shapes differ.
+        """
+
+        if other_count_grid_object.shape != self.shape:
+            raise ValueError(
+                'Shapes of count grids ({0:s} and {1:s}) differ.'.format(
+                    str(self.shape), str(other_count_grid_object.shape)))
+
+        if other_count_grid_object.is_sparse():
+            self._add_unique(other_count_grid_object.flat_indices,
+                             other_count_grid_object.counts)
+            return
+
+        if self.is_sparse():
+            these_flat_indices = self.flat_indices
+            these_counts = self.counts
+            self.dense_counts = other_count_grid_object.dense_counts.copy()
+            self.flat_indices = None
+            self.counts = None
+            self.dense_counts[these_flat_indices] += these_counts
+            return
+
+        self.dense_counts += other_count_grid_object.dense_counts
+
+    def copy(self):
+        """Returns deep copy.
+
+        :return: count_grid_object: Instance of `CountGrid`.
+        """
+
+        count_grid_object = CountGrid(
+            self.shape, dense_fill_ratio=self.dense_fill_ratio,
+            dtype=self.dtype)
+        if self.is_sparse():
+            count_grid_object.dense_counts = None
+            count_grid_object.flat_indices = self.flat_indices.copy()
+            count_grid_object.counts = self.counts.copy()
+        else:
+            count_grid_object.dense_counts = self.dense_counts.copy()
+            count_grid_object.flat_indices = None
+            count_grid_object.counts = None
+
+        return count_grid_object
+
+    def to_dense(self, dtype=None):
+        """Returns dense array of counts.
+
+        :param dtype: Data type of array.  If None, will use `self.dtype`.
+        :return: count_matrix: numpy array with shape `self.shape`.
+        """
+
+        if dtype is None:
+            dtype = self.dtype
+
+        if self.is_sparse():
+            count_matrix = numpy.zeros(self.num_cells, dtype=dtype)
+            count_matrix[self.flat_indices] = self.counts
+        else:
+            count_matrix = self.dense_counts.astype(dtype)
+
+        return count_matrix.reshape(self.shape)
+
+    def to_masked(self, dtype=None):
+        """Returns dense array of counts, with empty cells masked.
+
+        :param dtype: See doc for `to_dense`.
+        :return: count_matrix: numpy masked array with shape `self.shape`.
+        """
+
+        count_matrix = self.to_dense(dtype=dtype)
+        return numpy.ma.masked_array(count_matrix, mask=count_matrix == 0)
+
+    def get_dense_slice(self, leading_indices=None, dtype=None):
+        """Returns dense array over the last two dimensions (usually y and x).
+
+        Only the slice is made dense, so this is cheap even when the full grid
+        (e.g., month x hour x y x x) would not fit in memory.
+
+        :param leading_indices: Tuple with one index for each dimension but
+            the last two (e.g., month and hour).  If None, will sum over all
+            leading dimensions.
+        :param dtype: See doc for `to_dense`.
+        :return: count_matrix: 2-D numpy array.
+        """
+
+        if dtype is None:
+            dtype = self.dtype
+
+        slice_shape = self.shape[-2:]
+        num_slice_cells = slice_shape[0] * slice_shape[1]
+        if leading_indices is not None:
+            slice_index = numpy.ravel_multi_index(
+                tuple(leading_indices), self.shape[:-2])
+
+        if not self.is_sparse():
+            count_matrix = numpy.reshape(
+                self.dense_counts, (-1, num_slice_cells))
+            if leading_indices is None:
+                count_matrix = numpy.sum(count_matrix, axis=0)
+            else:
+                count_matrix = count_matrix[slice_index]
+
+            return count_matrix.astype(dtype).reshape(slice_shape)
+
+        flat_indices = self.flat_indices
+        counts = self.counts
+        if leading_indices is not None:
+            these_flags = flat_indices // num_slice_cells == slice_index
+            flat_indices = flat_indices[these_flags]
+            counts = counts[these_flags]
+
+        count_matrix = numpy.zeros(num_slice_cells, dtype=dtype)
+        numpy.add.at(count_matrix, flat_indices % num_slice_cells, counts)
+        return count_matrix.reshape(slice_shape)
+
+    def to_dict(self):
+        """Returns sparse form of grid, for writing with `numpy.savez`.
+
+        :return: count_grid_dict: Dictionary with keys `SHAPE_KEY`,
+            `FLAT_INDICES_KEY` and `COUNTS_KEY`.
+        """
+
+        if self.is_sparse():
+            flat_indices = self.flat_indices
+            counts = self.counts
+        else:
+            flat_indices = numpy.where(self.dense_counts != 0)[0].astype(
+                INDEX_DTYPE)
+            counts = self.dense_counts[flat_indices]
+
+        return {
+            SHAPE_KEY: numpy.array(self.shape, dtype=INDEX_DTYPE),
+            FLAT_INDICES_KEY: flat_indices,
+            COUNTS_KEY: counts
+        }
+
+    @classmethod
+    def from_dict(cls, count_grid_dict,
+                  dense_fill_ratio=DEFAULT_DENSE_FILL_RATIO):
+        """Creates grid from the output of `to_dict`.
+
+        :param count_grid_dict: Dictionary created by `to_dict` (or the result
+            of `numpy.load` on an .npz file written from it).
+        :param dense_fill_ratio: See doc for `__init__`.
+        :return: count_grid_object: Instance of `CountGrid`, with the dtype of
+            the counts in `count_grid_dict`.
+        """
+
+        counts = numpy.asarray(count_grid_dict[COUNTS_KEY])
+        count_grid_object = cls(
+            tuple(count_grid_dict[SHAPE_KEY]),
+            dense_fill_ratio=dense_fill_ratio, dtype=counts.dtype)
+        count_grid_object._add_unique(
+            numpy.asarray(count_grid_dict[FLAT_INDICES_KEY],
+                          dtype=INDEX_DTYPE),
+            counts)
+        return count_grid_object
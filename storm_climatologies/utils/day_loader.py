@@ -0,0 +1,381 @@
+"""Loads storm-object tables one SPC date at a time.
+
+Tables are kept in a least-recently-used cache with a memory budget, and the
+dates needed for the next working date can be read on a background thread
+while the current working date is being processed.
+"""
+
+import collections
+import threading
+import pandas
+from storm_climatologies.utils import polygon_areas
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import storm_table
+
+SEGMOTION_SOURCE_NAME = 'segmotion'
+DEFAULT_MAX_MEMORY_BYTES = 4 * 1024 ** 3
+
+POLYGON_COLUMN = 'polygon_object_latlng'
+
+# Derived columns with the area of each storm object (km^2), for consumers
+# that need areas but not geometry.
+AREA_COLUMN_BY_METHOD = {
+    polygon_areas.EQUAL_AREA_METHOD: 'polygon_area_km2',
+    polygon_areas.GEODESIC_METHOD: 'polygon_geodesic_area_km2'
+}
+AREA_METHOD_BY_COLUMN = dict([
+    (c, m) for m, c in AREA_COLUMN_BY_METHOD.items()])
+
+
+def read_storm_object_table(spc_date_string, top_processed_dir_name,
+                            tracking_scale_metres2,
+                            data_source=SEGMOTION_SOURCE_NAME,
+                            column_names=None, tracking_io_module=None):
+    """Reads storm-object table for one SPC date from processed tracking files.
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :param top_processed_dir_name: Name of top-level directory with processed
+        tracking files.
+    :param tracking_scale_metres2: Tracking scale (minimum storm area).
+    :param data_source: Source of tracking data (e.g., "segmotion").
+    :param column_names: 1-D list of columns to keep.  If None, will keep all
+        columns.
+    :param tracking_io_module: Module with `find_processed_files_one_spc_date`
+        and `read_many_processed_files` (e.g., `local_tracking_io`).  If None,
+        will use `gewittergefahr.gg_io.storm_tracking_io`.
+    :return: storm_object_table: pandas DataFrame created by
+        `storm_tracking_io.read_many_processed_files`.
+    """
+
+    if tracking_io_module is None:
+        from gewittergefahr.gg_io import storm_tracking_io as tracking_io
+    else:
+        tracking_io = tracking_io_module
+
+    with profiling.stage(profiling.FILE_DISCOVERY_STAGE,
+                         spc_date_string=spc_date_string):
+        these_tracking_file_names = (
+            tracking_io.find_processed_files_one_spc_date(
+                spc_date_string=spc_date_string, data_source=data_source,
+                top_processed_dir_name=top_processed_dir_name,
+                tracking_scale_metres2=tracking_scale_metres2))
+
+    with profiling.stage(profiling.READ_STAGE,
+                         spc_date_string=spc_date_string) as this_stage:
+        storm_object_table = project_columns(
+            tracking_io.read_many_processed_files(these_tracking_file_names),
+            column_names)
+        this_stage.set_num_objects(len(storm_object_table))
+
+    return storm_object_table
+
+
+def project_columns(storm_object_table, column_names):
+    """Keeps only the given columns of a storm-object table.
+
+    Dropping unused columns right after reading (polygons in particular) keeps
+    them out of the cache and out of every `align` and `concat`.  Area columns
+    (see `AREA_COLUMN_BY_METHOD`) that are asked for but missing are computed
+    from the polygons before these are dropped.
+
+    :param storm_object_table: pandas DataFrame.
+    :param column_names: 1-D list of columns to keep.  If None, will keep all
+        columns.
+    :return: storm_object_table: Same as input, maybe with fewer columns.
+    """
+
+    if column_names is None or list(storm_object_table) == list(column_names):
+        return storm_object_table
+
+    for this_column in column_names:
+        if (this_column not in AREA_METHOD_BY_COLUMN or
+                this_column in storm_object_table or
+                POLYGON_COLUMN not in storm_object_table):
+            continue
+
+        storm_object_table = storm_object_table.assign(**{
+            this_column: polygon_areas.get_polygon_areas_km2(
+                storm_object_table[POLYGON_COLUMN].values,
+                method=AREA_METHOD_BY_COLUMN[this_column])
+        })
+
+    return storm_object_table[list(column_names)]
+
+
+def get_table_memory_bytes(storm_object_table):
+    """Estimates memory used by a storm-object table.
+
+    :param storm_object_table: pandas DataFrame or `storm_table.StormTable`.
+    :return: num_bytes: Estimated memory usage.
+    """
+
+    if isinstance(storm_object_table, storm_table.StormTable):
+        return storm_object_table.memory_bytes
+    return int(storm_object_table.memory_usage(index=True, deep=True).sum())
+
+
+class _PrefetchThread(threading.Thread):
+    """Reads one SPC date in the background and hands it to the loader."""
+
+    def __init__(self, day_loader_object, date_index):
+        super(_PrefetchThread, self).__init__()
+        self.daemon = True
+        self.day_loader_object = day_loader_object
+        self.date_index = date_index
+        self.exception = None
+
+    def run(self):
+        try:
+            storm_object_table = self.day_loader_object.read_one_date(
+                self.date_index)
+            self.day_loader_object.add_table(
+                self.date_index, storm_object_table)
+        except Exception as this_exception:
+            self.exception = this_exception
+
+
+class DayLoader(object):
+    """Bounded LRU cache of storm-object tables, indexed by SPC date.
+
+    Dates are referred to by their index in `spc_date_strings`, the same way
+    as in `utils._get_dates_needed`.
+    """
+
+    def __init__(self, spc_date_strings, top_processed_dir_name=None,
+                 tracking_scale_metres2=None,
+                 data_source=SEGMOTION_SOURCE_NAME,
+                 max_memory_bytes=DEFAULT_MAX_MEMORY_BYTES,
+                 read_function=None, column_names=None, storm_id_encoder=None,
+                 tracking_io_module=None):
+        """Creates new loader.
+
+        :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+        :param top_processed_dir_name: See doc for `read_storm_object_table`.
+        :param tracking_scale_metres2: Same.
+        :param data_source: Same.
+        :param max_memory_bytes: Memory budget for cached tables.  Once the
+            budget is exceeded, least recently used tables are dropped.  Tables
+            in the current window are never dropped.
+        :param read_function: Function that takes an SPC date string and
+            returns the storm-object table for that date.  If None, will use
+            `read_storm_object_table`.
+        :param column_names: 1-D list of columns to keep for each date.  If
+            None, will keep all columns.
+        :param storm_id_encoder: Instance of `storm_table.StormIdEncoder`.  If
+            given, each date is converted to a compact `storm_table.StormTable`
+            using this encoder.  If None, dates are kept as pandas DataFrames.
+        :param tracking_io_module: See doc for `read_storm_object_table`.
+        """
+
+        self.spc_date_strings = list(spc_date_strings)
+        self.top_processed_dir_name = top_processed_dir_name
+        self.tracking_scale_metres2 = tracking_scale_metres2
+        self.data_source = data_source
+        self.max_memory_bytes = max_memory_bytes
+        self.read_function = read_function
+        self.column_names = column_names
+        self.storm_id_encoder = storm_id_encoder
+        self.tracking_io_module = tracking_io_module
+
+        self._lock = threading.Lock()
+        self._table_by_date_index = collections.OrderedDict()
+        self._num_bytes_by_date_index = {}
+        self._pinned_date_indices = set()
+        self._prefetch_thread_by_date_index = {}
+
+    def read_one_date(self, date_index):
+        """Reads storm-object table for one date, bypassing the cache.
+
+        :param date_index: Index into `spc_date_strings`.
+        :return: storm_object_table: pandas DataFrame, or
+            `storm_table.StormTable` if the loader has a storm-ID encoder.
+        """
+
+        this_spc_date_string = self.spc_date_strings[date_index]
+        if self.read_function is not None:
+            with profiling.stage(profiling.READ_STAGE,
+                                 spc_date_string=this_spc_date_string
+                                 ) as this_stage:
+                storm_object_table = project_columns(
+                    self.read_function(this_spc_date_string),
+                    self.column_names)
+                this_stage.set_num_objects(len(storm_object_table))
+        else:
+            storm_object_table = read_storm_object_table(
+                spc_date_string=this_spc_date_string,
+                top_processed_dir_name=self.top_processed_dir_name,
+                tracking_scale_metres2=self.tracking_scale_metres2,
+                data_source=self.data_source, column_names=self.column_names,
+                tracking_io_module=self.tracking_io_module)
+
+        if self.storm_id_encoder is None:
+            return storm_object_table
+
+        with profiling.stage(profiling.ALIGN_STAGE,
+                             spc_date_string=this_spc_date_string):
+            return storm_table.StormTable.from_data_frame(
+                storm_object_table, self.storm_id_encoder)
+
+    def add_table(self, date_index, storm_object_table):
+        """Adds table to the cache, then drops old tables if over budget.
+
+        :param date_index: Index into `spc_date_strings`.
+        :param storm_object_table: pandas DataFrame.
+        """
+
+        with self._lock:
+            self._table_by_date_index.pop(date_index, None)
+            self._table_by_date_index[date_index] = storm_object_table
+            self._num_bytes_by_date_index[date_index] = (
+                get_table_memory_bytes(storm_object_table))
+            self._evict_if_needed()
+
+    def _evict_if_needed(self):
+        """Drops least recently used tables until the budget is met.
+
+        Must be called with `_lock` held.
+        """
+
+        total_num_bytes = sum(self._num_bytes_by_date_index.values())
+        for this_date_index in list(self._table_by_date_index.keys()):
+            if total_num_bytes <= self.max_memory_bytes:
+                break
+            if this_date_index in self._pinned_date_indices:
+                continue
+
+            print('Clearing data for SPC date "{0:s}"...'.format(
+                self.spc_date_strings[this_date_index]))
+            del self._table_by_date_index[this_date_index]
+            total_num_bytes -= self._num_bytes_by_date_index.pop(
+                this_date_index)
+
+    def get_table(self, date_index):
+        """Returns storm-object table for one date, reading it if necessary.
+
+        If the date is being prefetched, this method waits for the background
+        read instead of starting a second one.
+
+        :param date_index: Index into `spc_date_strings`.
+        :return: storm_object_table: pandas DataFrame.
+        """
+
+        while True:
+            with self._lock:
+                if date_index in self._table_by_date_index:
+                    storm_object_table = self._table_by_date_index.pop(
+                        date_index)
+                    self._table_by_date_index[date_index] = storm_object_table
+                    return storm_object_table
+
+                this_thread = self._prefetch_thread_by_date_index.pop(
+                    date_index, None)
+
+            if this_thread is None:
+                break
+
+            this_thread.join()
+            if this_thread.exception is not None:
+                raise this_thread.exception
+
+        storm_object_table = self.read_one_date(date_index)
+        self.add_table(date_index, storm_object_table)
+        return storm_object_table
+
+    def prefetch(self, date_indices):
+        """Starts reading the given dates in the background.
+
+        Dates that are already cached or being read are skipped.
+
+        :param date_indices: 1-D list or numpy array of indices into
+            `spc_date_strings`.
+        """
+
+        with self._lock:
+            for this_date_index in date_indices:
+                this_date_index = int(this_date_index)
+                if this_date_index in self._table_by_date_index:
+                    continue
+                if this_date_index in self._prefetch_thread_by_date_index:
+                    continue
+
+                this_thread = _PrefetchThread(self, this_date_index)
+                self._prefetch_thread_by_date_index[this_date_index] = (
+                    this_thread)
+                this_thread.start()
+
+    def get_multiday_table(self, date_indices, prefetch_date_indices=None):
+        """Returns one table with storm objects from all the given dates.
+
+        Tables from later dates are aligned with the first before being
+        concatenated.
+
+        :param date_indices: 1-D list or numpy array of indices into
+            `spc_date_strings`.
+        :param prefetch_date_indices: Dates to read in the background after
+            `date_indices` have been loaded (usually the dates needed for the
+            next working date).  May be None.
+        :return: multiday_storm_object_table: pandas DataFrame, or
+            `storm_table.StormTable` if the loader has a storm-ID encoder.
+        """
+
+        date_indices = [int(i) for i in date_indices]
+        with self._lock:
+            self._pinned_date_indices = set(date_indices)
+
+        storm_object_tables_to_concat = [
+            self.get_table(i) for i in date_indices]
+
+        if prefetch_date_indices is not None:
+            self.prefetch(prefetch_date_indices)
+
+        if self.storm_id_encoder is not None:
+            with profiling.stage(profiling.CONCAT_STAGE):
+                return storm_table.StormTable.concat(
+                    storm_object_tables_to_concat)
+
+        with profiling.stage(profiling.ALIGN_STAGE):
+            for j in range(1, len(storm_object_tables_to_concat)):
+                storm_object_tables_to_concat[j], _ = (
+                    storm_object_tables_to_concat[j].align(
+                        storm_object_tables_to_concat[0], axis=1))
+
+        with profiling.stage(profiling.CONCAT_STAGE):
+            return pandas.concat(
+                storm_object_tables_to_concat, axis=0, ignore_index=True)
+
+    def clear(self):
+        """Waits for background reads and drops all cached tables.
+
+        Errors in background reads are raised when the date is asked for (see
+        `get_table`).  Errors for dates that were never asked for are printed
+        here, so that they are not lost.
+
+        :return: exception_by_date_index: Dictionary, where each key is the
+            index of a date that was never asked for and each value is the
+            exception raised while reading it in the background.
+        """
+
+        with self._lock:
+            these_threads = list(self._prefetch_thread_by_date_index.values())
+            self._prefetch_thread_by_date_index = {}
+
+        exception_by_date_index = {}
+        for this_thread in these_threads:
+            this_thread.join()
+            if this_thread.exception is None:
+                continue
+
+            exception_by_date_index[this_thread.date_index] = (
+                this_thread.exception)
+            print((
+                'WARNING: Background read of SPC date "{0:s}" failed, and the '
+                'date was never used: {1:s}'
+            ).format(self.spc_date_strings[this_thread.date_index],
+                     repr(this_thread.exception)))
+
+        with self._lock:
+            self._table_by_date_index.clear()
+            self._num_bytes_by_date_index.clear()
+            self._pinned_date_indices = set()
+
+        return exception_by_date_index
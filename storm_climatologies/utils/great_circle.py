@@ -0,0 +1,87 @@
+"""Vectorized great-circle distances for storm tracks.
+
+Distances use the haversine formula on a sphere with radius 6371 km, the same
+as the scalar `distance_from_latlng` in Storm_Distance_Traveled.py, but on
+whole arrays.  Per-storm displacement (first to last centroid) and path length
+(sum of distances between consecutive centroids) are computed for every storm
+in a table at once, using a `track_index.TrackIndex`.
+"""
+
+import numpy
+
+EARTH_RADIUS_KM = 6371.
+
+
+def get_distances_km(start_latitudes_deg, start_longitudes_deg,
+                     end_latitudes_deg, end_longitudes_deg):
+    """Computes great-circle distance between each pair of points.
+
+    N = number of pairs
+
+    :param start_latitudes_deg: length-N numpy array of latitudes (deg N).
+    :param start_longitudes_deg: length-N numpy array of longitudes (deg E).
+    :param end_latitudes_deg: Same as `start_latitudes_deg`.
+    :param end_longitudes_deg: Same as `start_longitudes_deg`.
+    :return: distances_km: length-N numpy array of distances.
+    """
+
+    start_latitudes_rad = numpy.radians(
+        numpy.asarray(start_latitudes_deg, dtype=float))
+    end_latitudes_rad = numpy.radians(
+        numpy.asarray(end_latitudes_deg, dtype=float))
+    latitude_diffs_rad = end_latitudes_rad - start_latitudes_rad
+    longitude_diffs_rad = numpy.radians(
+        numpy.asarray(end_longitudes_deg, dtype=float) -
+        numpy.asarray(start_longitudes_deg, dtype=float))
+
+    haversines = (
+        numpy.sin(latitude_diffs_rad / 2) ** 2 +
+        numpy.cos(start_latitudes_rad) * numpy.cos(end_latitudes_rad) *
+        numpy.sin(longitude_diffs_rad / 2) ** 2)
+
+    return 2 * EARTH_RADIUS_KM * numpy.arcsin(
+        numpy.sqrt(numpy.minimum(haversines, 1.)))
+
+
+def get_displacements_km(track_index_object, latitudes_deg, longitudes_deg):
+    """Computes distance from first to last position of each storm.
+
+    :param track_index_object: Instance of `track_index.TrackIndex`.
+    :param latitudes_deg: 1-D numpy array with latitude of each storm object.
+    :param longitudes_deg: Same but for longitude.
+    :return: displacements_km: 1-D numpy array with one value per storm.
+    """
+
+    return get_distances_km(
+        track_index_object.first(latitudes_deg),
+        track_index_object.first(longitudes_deg),
+        track_index_object.last(latitudes_deg),
+        track_index_object.last(longitudes_deg))
+
+
+def get_path_lengths_km(track_index_object, latitudes_deg, longitudes_deg):
+    """Computes length of each storm's track, summed over consecutive objects.
+
+    :param track_index_object: Instance of `track_index.TrackIndex`.
+    :param latitudes_deg: 1-D numpy array with latitude of each storm object.
+    :param longitudes_deg: Same but for longitude.
+    :return: path_lengths_km: 1-D numpy array with one value per storm.
+    """
+
+    sorted_latitudes_deg = track_index_object.sort(latitudes_deg)
+    sorted_longitudes_deg = track_index_object.sort(longitudes_deg)
+    sorted_storm_indices = track_index_object.sort(
+        track_index_object.storm_index_by_row)
+
+    segment_lengths_km = get_distances_km(
+        sorted_latitudes_deg[:-1], sorted_longitudes_deg[:-1],
+        sorted_latitudes_deg[1:], sorted_longitudes_deg[1:])
+
+    # Segments that join the end of one track to the start of the next are not
+    # part of either track.
+    segment_lengths_km[
+        sorted_storm_indices[:-1] != sorted_storm_indices[1:]] = 0.
+
+    return numpy.bincount(
+        sorted_storm_indices[:-1], weights=segment_lengths_km,
+        minlength=len(track_index_object))
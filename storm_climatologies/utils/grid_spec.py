@@ -0,0 +1,244 @@
+"""Specification of the projected x-y grid used by spatial climatologies.
+
+A `GridSpec` holds the lat-long bounds and spacing of the grid, the centre of
+the azimuthal equidistant projection and the x-y spacing.  The x-y grid points
+are found the same way the spatial scripts used to find them (project the
+lat-long grid, round its corners to the x-y spacing), but only once: the result
+is kept in memory for the process and in a small .npz file keyed by a hash of
+the spec, so later runs and worker processes just read it.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy
+from gewittergefahr.gg_utils import grids
+from gewittergefahr.gg_utils import projections
+from gewittergefahr.gg_utils import number_rounding
+from storm_climatologies.utils import utils
+
+DEFAULT_MIN_LATITUDE_DEG = 20.
+DEFAULT_MAX_LATITUDE_DEG = 55.
+DEFAULT_MIN_LONGITUDE_DEG = 230.
+DEFAULT_MAX_LONGITUDE_DEG = 300.
+DEFAULT_LATLNG_SPACING_DEG = 0.1
+DEFAULT_XY_SPACING_METRES = 10000.
+
+X_COORDS_KEY = 'unique_grid_point_x_metres'
+Y_COORDS_KEY = 'unique_grid_point_y_metres'
+
+_xy_grid_by_key = {}
+_projection_object_by_key = {}
+
+
+class GridSpec(object):
+    """Hashable description of a projected x-y grid."""
+
+    def __init__(self, min_latitude_deg=DEFAULT_MIN_LATITUDE_DEG,
+                 max_latitude_deg=DEFAULT_MAX_LATITUDE_DEG,
+                 min_longitude_deg=DEFAULT_MIN_LONGITUDE_DEG,
+                 max_longitude_deg=DEFAULT_MAX_LONGITUDE_DEG,
+                 lat_spacing_deg=DEFAULT_LATLNG_SPACING_DEG,
+                 lng_spacing_deg=DEFAULT_LATLNG_SPACING_DEG,
+                 central_latitude_deg=None, central_longitude_deg=None,
+                 x_spacing_metres=DEFAULT_XY_SPACING_METRES,
+                 y_spacing_metres=DEFAULT_XY_SPACING_METRES):
+        """Creates new grid spec.
+
+        :param min_latitude_deg: Minimum latitude of lat-long grid.
+        :param max_latitude_deg: Max latitude of lat-long grid.
+        :param min_longitude_deg: Minimum longitude of lat-long grid.
+        :param max_longitude_deg: Max longitude of lat-long grid.
+        :param lat_spacing_deg: Spacing between adjacent rows of lat-long grid.
+        :param lng_spacing_deg: Spacing between adjacent columns of lat-long
+            grid.
+        :param central_latitude_deg: Latitude at centre of projection.  If
+            None, will use the middle of the latitude bounds.
+        :param central_longitude_deg: Same but for longitude.
+        :param x_spacing_metres: Spacing between adjacent columns of x-y grid.
+        :param y_spacing_metres: Spacing between adjacent rows of x-y grid.
+        """
+
+        if central_latitude_deg is None:
+            central_latitude_deg = numpy.mean(
+                numpy.array([min_latitude_deg, max_latitude_deg]))
+        if central_longitude_deg is None:
+            central_longitude_deg = numpy.mean(
+                numpy.array([min_longitude_deg, max_longitude_deg]))
+
+        self.min_latitude_deg = float(min_latitude_deg)
+        self.max_latitude_deg = float(max_latitude_deg)
+        self.min_longitude_deg = float(min_longitude_deg)
+        self.max_longitude_deg = float(max_longitude_deg)
+        self.lat_spacing_deg = float(lat_spacing_deg)
+        self.lng_spacing_deg = float(lng_spacing_deg)
+        self.central_latitude_deg = float(central_latitude_deg)
+        self.central_longitude_deg = float(central_longitude_deg)
+        self.x_spacing_metres = float(x_spacing_metres)
+        self.y_spacing_metres = float(y_spacing_metres)
+
+    def _get_parameter_dict(self):
+        """Returns dictionary of all parameters (see `__init__`)."""
+        return dict(self.__dict__)
+
+    def __eq__(self, other):
+        return (isinstance(other, GridSpec) and
+                self._get_parameter_dict() == other._get_parameter_dict())
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(tuple(sorted(self._get_parameter_dict().items())))
+
+    def __repr__(self):
+        return 'GridSpec({0:s})'.format(', '.join([
+            '{0:s}={1:s}'.format(k, repr(v))
+            for k, v in sorted(self._get_parameter_dict().items())]))
+
+    @property
+    def num_latlng_rows(self):
+        """Number of rows in lat-long grid."""
+        return 1 + int(numpy.round(
+            (self.max_latitude_deg - self.min_latitude_deg) /
+            self.lat_spacing_deg))
+
+    @property
+    def num_latlng_columns(self):
+        """Number of columns in lat-long grid."""
+        return 1 + int(numpy.round(
+            (self.max_longitude_deg - self.min_longitude_deg) /
+            self.lng_spacing_deg))
+
+    def get_key(self):
+        """Returns hash that identifies the spec across runs.
+
+        :return: key_string: Hexadecimal MD5 hash of the parameters.
+        """
+
+        return hashlib.md5(json.dumps(
+            self._get_parameter_dict(), sort_keys=True).encode('utf-8')
+        ).hexdigest()
+
+    def get_projection(self):
+        """Returns azimuthal equidistant projection, created once per process.
+
+        :return: projection_object: Projection object from
+            `projections.init_azimuthal_equidistant_projection`.
+        """
+
+        this_key = self.get_key()
+        if this_key not in _projection_object_by_key:
+            _projection_object_by_key[this_key] = (
+                projections.init_azimuthal_equidistant_projection(
+                    central_latitude_deg=self.central_latitude_deg,
+                    central_longitude_deg=self.central_longitude_deg))
+
+        return _projection_object_by_key[this_key]
+
+    def _compute_xy_grid(self):
+        """Finds x-y grid points by projecting the lat-long grid.
+
+        :return: unique_grid_point_x_metres: Sorted 1-D numpy array of
+            grid-point x-coordinates.
+        :return: unique_grid_point_y_metres: Same but for y.
+        """
+
+        grid_point_lat_, grid_point_long = utils.get_latlng_grid_points(
+            min_latitude_deg=self.min_latitude_deg,
+            min_longitude_deg=self.min_longitude_deg,
+            lat_spacing_deg=self.lat_spacing_deg,
+            lng_spacing_deg=self.lng_spacing_deg,
+            num_rows=self.num_latlng_rows, num_columns=self.num_latlng_columns)
+
+        grid_point_lat = numpy.flip(grid_point_lat_, -1)
+        lats, lons = utils.latlng_vectors_to_matrices(
+            grid_point_lat, grid_point_long)
+
+        # Project lat-long grid points to x-y.
+        (grid_point_x_matrix_metres, grid_point_y_matrix_metres) = (
+            projections.project_latlng_to_xy(
+                latitudes_deg=lats, longitudes_deg=lons,
+                projection_object=self.get_projection()))
+
+        # Round corners to nearest grid spacing.  These will become the corners
+        # of the actual x-y grid.
+        x_min_metres = number_rounding.floor_to_nearest(
+            numpy.min(grid_point_x_matrix_metres), self.x_spacing_metres)
+        x_max_metres = number_rounding.ceiling_to_nearest(
+            numpy.max(grid_point_x_matrix_metres), self.x_spacing_metres)
+        y_min_metres = number_rounding.floor_to_nearest(
+            numpy.min(grid_point_y_matrix_metres), self.y_spacing_metres)
+        y_max_metres = number_rounding.ceiling_to_nearest(
+            numpy.max(grid_point_y_matrix_metres), self.y_spacing_metres)
+
+        num_grid_rows = 1 + int(numpy.round(
+            (y_max_metres - y_min_metres) / self.y_spacing_metres))
+        num_grid_columns = 1 + int(numpy.round(
+            (x_max_metres - x_min_metres) / self.x_spacing_metres))
+
+        return grids.get_xy_grid_points(
+            x_min_metres=x_min_metres, y_min_metres=y_min_metres,
+            x_spacing_metres=self.x_spacing_metres,
+            y_spacing_metres=self.y_spacing_metres,
+            num_rows=num_grid_rows, num_columns=num_grid_columns)
+
+    def find_cache_file_name(self, cache_dir_name):
+        """Finds .npz file with x-y grid points for this spec.
+
+        :param cache_dir_name: Name of cache directory.
+        :return: cache_file_name: Path to .npz file.
+        """
+
+        return os.path.join(
+            cache_dir_name, 'xy_grid_{0:s}.npz'.format(self.get_key()))
+
+    def get_xy_grid(self, cache_dir_name=None):
+        """Returns x-y grid points, computing them only if not cached.
+
+        :param cache_dir_name: Name of cache directory.  If None, grid points
+            are cached only in memory.
+        :return: unique_grid_point_x_metres: Sorted 1-D numpy array of
+            grid-point x-coordinates.
+        :return: unique_grid_point_y_metres: Same but for y.
+        """
+
+        this_key = self.get_key()
+        if this_key in _xy_grid_by_key:
+            return _xy_grid_by_key[this_key]
+
+        cache_file_name = None
+        if cache_dir_name is not None:
+            cache_file_name = self.find_cache_file_name(cache_dir_name)
+
+        if cache_file_name is not None and os.path.isfile(cache_file_name):
+            this_dict = numpy.load(cache_file_name)
+            xy_grid_tuple = (this_dict[X_COORDS_KEY], this_dict[Y_COORDS_KEY])
+        else:
+            xy_grid_tuple = self._compute_xy_grid()
+
+            if cache_file_name is not None:
+                if not os.path.isdir(cache_dir_name):
+                    os.makedirs(cache_dir_name)
+
+                # Write to temporary file, then rename, so that other processes
+                # never see a partial file.
+                file_handle, temp_file_name = tempfile.mkstemp(
+                    dir=cache_dir_name, suffix='.npz')
+                os.close(file_handle)
+                numpy.savez(temp_file_name, **{
+                    X_COORDS_KEY: xy_grid_tuple[0],
+                    Y_COORDS_KEY: xy_grid_tuple[1]
+                })
+                os.rename(temp_file_name, cache_file_name)
+
+        _xy_grid_by_key[this_key] = xy_grid_tuple
+        return xy_grid_tuple
+
+
+def clear_memory_cache():
+    """Forgets grids and projections cached in memory (not on disk)."""
+
+    _xy_grid_by_key.clear()
+    _projection_object_by_key.clear()
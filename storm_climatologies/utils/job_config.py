@@ -0,0 +1,325 @@
+"""Job configuration for command-line runs (see `command_line`).
+
+A job is a batch of seasons (or any other date ranges), each of which gets the
+same set of products.  It is described by a JSON file like the following, in
+which every key but "seasons" is optional:
+
+{
+    "top_processed_dir_name": "/condo/.../final_tracks/reanalyzed/",
+    "tracking_scale_metres2": 314159265,
+    "output_dir_name": "/home/aodhan/MATRIX/",
+    "products": ["spatial_birth", "speed"],
+    "write_raw_values": true,
+    "num_processes": 1,
+    "checkpoint_dir_name": null,
+    "top_partial_dir_name": null,
+    "grid_cache_dir_name": null,
+    "spatial_bin_types": null,
+    "lookup_spacing_deg": null,
+    "compact_tables": false,
+    "grid": {"min_latitude_deg": 20.0, "max_latitude_deg": 55.0},
+    "seasons": [
+        {"name": "Summer_2011", "first_spc_date_string": "20110601",
+         "last_spc_date_string": "20110831"}
+    ]
+}
+
+Keys of "grid" are arguments to `grid_spec.GridSpec`.  If "spatial_bin_types"
+is a list (e.g., ["month", "hour"]), spatial products are stratified by those
+temporal bins (year bins are not allowed) and kept as compact count grids (see
+`count_grid`).  If "lookup_spacing_deg" is a number, spatial products map
+centroids to x-y with a lookup table of that spacing (see `latlng_lookup`),
+cached in "grid_cache_dir_name".  If "compact_tables" is true, dates are kept
+in memory as compact tables with integer storm IDs (see `storm_table`).
+Output for each season goes in its own subdirectory of "output_dir_name" (see
+`get_output_prefix`).
+"""
+
+import copy
+import json
+import os
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import count_grid
+from storm_climatologies.utils import grid_spec
+from storm_climatologies.utils import profiling
+from storm_climatologies.utils import streaming_stats
+from storm_climatologies.utils import temporal_bins
+from storm_climatologies.utils import utils
+
+TOP_PROCESSED_DIR_KEY = 'top_processed_dir_name'
+TRACKING_SCALE_KEY = 'tracking_scale_metres2'
+OUTPUT_DIR_KEY = 'output_dir_name'
+PRODUCTS_KEY = 'products'
+WRITE_RAW_VALUES_KEY = 'write_raw_values'
+NUM_PROCESSES_KEY = 'num_processes'
+CHECKPOINT_DIR_KEY = 'checkpoint_dir_name'
+TOP_PARTIAL_DIR_KEY = 'top_partial_dir_name'
+GRID_CACHE_DIR_KEY = 'grid_cache_dir_name'
+SPATIAL_BIN_TYPES_KEY = 'spatial_bin_types'
+LOOKUP_SPACING_KEY = 'lookup_spacing_deg'
+COMPACT_TABLES_KEY = 'compact_tables'
+GRID_KEY = 'grid'
+SEASONS_KEY = 'seasons'
+
+SEASON_NAME_KEY = 'name'
+FIRST_DATE_KEY = 'first_spc_date_string'
+LAST_DATE_KEY = 'last_spc_date_string'
+
+DEFAULT_CONFIG_DICT = {
+    TOP_PROCESSED_DIR_KEY: utils.TOP_PROCESSED_DIR_NAME,
+    TRACKING_SCALE_KEY: utils.TRACKING_SCALE_METRES2,
+    OUTPUT_DIR_KEY: '.',
+    PRODUCTS_KEY: None,
+    WRITE_RAW_VALUES_KEY: True,
+    NUM_PROCESSES_KEY: 1,
+    CHECKPOINT_DIR_KEY: None,
+    TOP_PARTIAL_DIR_KEY: None,
+    GRID_CACHE_DIR_KEY: None,
+    SPATIAL_BIN_TYPES_KEY: None,
+    LOOKUP_SPACING_KEY: None,
+    COMPACT_TABLES_KEY: False,
+    GRID_KEY: {},
+    SEASONS_KEY: []
+}
+
+GRID_ARG_NAMES = [
+    'min_latitude_deg', 'max_latitude_deg', 'min_longitude_deg',
+    'max_longitude_deg', 'lat_spacing_deg', 'lng_spacing_deg',
+    'central_latitude_deg', 'central_longitude_deg', 'x_spacing_metres',
+    'y_spacing_metres'
+]
+
+
+def check_config(config_dict):
+    """Error-checks job configuration.
+
+    :param config_dict: Dictionary with keys listed in `DEFAULT_CONFIG_DICT`.
+    :raises: ValueError: if any key or value is invalid.
+    """
+
+    unknown_keys = set(config_dict.keys()) - set(DEFAULT_CONFIG_DICT.keys())
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown keys in job config: {0:s}'.format(
+            str(sorted(unknown_keys))))
+
+    unknown_keys = set(config_dict[GRID_KEY].keys()) - set(GRID_ARG_NAMES)
+    if len(unknown_keys) > 0:
+        raise ValueError('Unknown grid arguments in job config: {0:s}'.format(
+            str(sorted(unknown_keys))))
+
+    if config_dict[PRODUCTS_KEY] is not None:
+        unknown_products = (
+            set(config_dict[PRODUCTS_KEY]) -
+            set(accumulators.VALID_PRODUCT_NAMES))
+        if len(unknown_products) > 0:
+            raise ValueError(
+                'Products ({0:s}) must be in the following list:\n{1:s}'
+                .format(
+                    str(sorted(unknown_products)),
+                    str(accumulators.VALID_PRODUCT_NAMES)))
+
+    if config_dict[SPATIAL_BIN_TYPES_KEY] is not None:
+        valid_bin_types = [
+            b for b in temporal_bins.VALID_BIN_TYPES
+            if b != temporal_bins.YEAR_BIN]
+        unknown_bin_types = (
+            set(config_dict[SPATIAL_BIN_TYPES_KEY]) - set(valid_bin_types))
+        if len(unknown_bin_types) > 0:
+            raise ValueError(
+                'Spatial bin types ({0:s}) must be in the following list:\n'
+                '{1:s}'.format(str(sorted(unknown_bin_types)),
+                               str(valid_bin_types)))
+
+    if len(config_dict[SEASONS_KEY]) == 0:
+        raise ValueError('Job config has no seasons.')
+
+    season_names = [s[SEASON_NAME_KEY] for s in config_dict[SEASONS_KEY]]
+    if len(set(season_names)) != len(season_names):
+        raise ValueError('Season names ({0:s}) are not unique.'.format(
+            str(season_names)))
+
+    for this_season_dict in config_dict[SEASONS_KEY]:
+        if (this_season_dict[FIRST_DATE_KEY] >
+                this_season_dict[LAST_DATE_KEY]):
+            raise ValueError(
+                'Season "{0:s}" ends ({1:s}) before it starts ({2:s}).'.format(
+                    this_season_dict[SEASON_NAME_KEY],
+                    this_season_dict[LAST_DATE_KEY],
+                    this_season_dict[FIRST_DATE_KEY]))
+
+    if (config_dict[CHECKPOINT_DIR_KEY] is not None and
+            config_dict[NUM_PROCESSES_KEY] != 1):
+        raise ValueError('Checkpoints are available only with 1 process.')
+
+    if (config_dict[PRODUCTS_KEY] is not None and
+            config_dict[NUM_PROCESSES_KEY] != 1):
+        streaming_products = [
+            p for p in config_dict[PRODUCTS_KEY]
+            if p in accumulators.STREAMING_PRODUCT_NAMES]
+        if len(streaming_products) > 0:
+            raise ValueError(
+                'Streaming products ({0:s}) are available only with 1 '
+                'process.'.format(str(streaming_products)))
+
+
+def make_season(first_spc_date_string, last_spc_date_string, name=None):
+    """Creates dictionary for one season.
+
+    :param first_spc_date_string: First SPC date (format "yyyymmdd").
+    :param last_spc_date_string: Last SPC date (format "yyyymmdd").
+    :param name: Name of season (used for output directory).  If None, will
+        be "{first}_{last}".
+    :return: season_dict: Dictionary with keys "name", "first_spc_date_string"
+        and "last_spc_date_string".
+    """
+
+    if name is None:
+        name = '{0:s}_{1:s}'.format(
+            first_spc_date_string, last_spc_date_string)
+
+    return {
+        SEASON_NAME_KEY: name,
+        FIRST_DATE_KEY: first_spc_date_string,
+        LAST_DATE_KEY: last_spc_date_string
+    }
+
+
+def get_config(config_file_name=None, override_dict=None):
+    """Reads job configuration and applies defaults and overrides.
+
+    :param config_file_name: Path to JSON file (see the module docstring).  If
+        None, will use only defaults and overrides.
+    :param override_dict: Dictionary of values that replace those in the file
+        (e.g., from command-line arguments).  None values are ignored.
+    :return: config_dict: Dictionary with keys listed in `DEFAULT_CONFIG_DICT`.
+    :raises: ValueError: if the result is invalid (see `check_config`).
+    """
+
+    config_dict = copy.deepcopy(DEFAULT_CONFIG_DICT)
+    if config_file_name is not None:
+        with open(config_file_name, 'r') as this_file_handle:
+            config_dict.update(json.load(this_file_handle))
+
+    if override_dict is not None:
+        config_dict.update(dict([
+            (k, v) for k, v in override_dict.items() if v is not None]))
+
+    config_dict[SEASONS_KEY] = [
+        make_season(s[FIRST_DATE_KEY], s[LAST_DATE_KEY],
+                    name=s.get(SEASON_NAME_KEY))
+        for s in config_dict[SEASONS_KEY]]
+
+    check_config(config_dict)
+    return config_dict
+
+
+def get_spc_date_strings(season_dict):
+    """Returns all SPC dates in one season.
+
+    :param season_dict: Dictionary created by `make_season`.
+    :return: spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    """
+
+    return time_conversion.get_spc_dates_in_range(
+        first_spc_date_string=season_dict[FIRST_DATE_KEY],
+        last_spc_date_string=season_dict[LAST_DATE_KEY])
+
+
+def get_grid_spec(config_dict):
+    """Creates grid spec for job.
+
+    :param config_dict: Dictionary created by `get_config`.
+    :return: grid_spec_object: Instance of `grid_spec.GridSpec`.
+    """
+
+    return grid_spec.GridSpec(**config_dict[GRID_KEY])
+
+
+def get_output_prefix(config_dict, season_dict, product_name):
+    """Returns output path (without key or extension) for one product.
+
+    :param config_dict: Dictionary created by `get_config`.
+    :param season_dict: Dictionary created by `make_season`.
+    :param product_name: Product name.
+    :return: output_prefix: Path "{output_dir_name}/{season}/{product_name}".
+    """
+
+    return os.path.join(config_dict[OUTPUT_DIR_KEY],
+                        season_dict[SEASON_NAME_KEY], product_name)
+
+
+def make_accumulators(config_dict, season_dict, grid_spec_object=None):
+    """Creates one accumulator for each product in the job.
+
+    :param config_dict: Dictionary created by `get_config`.
+    :param season_dict: Dictionary created by `make_season`.
+    :param grid_spec_object: Instance of `grid_spec.GridSpec`.  If None, will
+        be created by `get_grid_spec`.
+    :return: accumulator_dict: Dictionary, where each key is a product name and
+        each value is an accumulator.
+    """
+
+    if grid_spec_object is None:
+        grid_spec_object = get_grid_spec(config_dict)
+
+    if config_dict[WRITE_RAW_VALUES_KEY]:
+        raw_output_dir_name_by_product = dict([
+            (p, get_output_prefix(config_dict, season_dict, p))
+            for p in accumulators.PER_STORM_PRODUCT_NAMES])
+    else:
+        raw_output_dir_name_by_product = None
+
+    return accumulators.make_product_set(
+        grid_spec_object,
+        grid_cache_dir_name=config_dict[GRID_CACHE_DIR_KEY],
+        raw_output_dir_name_by_product=raw_output_dir_name_by_product,
+        product_names=config_dict[PRODUCTS_KEY],
+        spatial_bin_types=config_dict[SPATIAL_BIN_TYPES_KEY],
+        lookup_spacing_deg=config_dict[LOOKUP_SPACING_KEY])
+
+
+def write_results(accumulator_dict, config_dict, season_dict):
+    """Writes result of each accumulator to numpy files.
+
+    Arrays are written to "{output_prefix}_{key}.npy" and summaries (see
+    `streaming_stats.SummaryStatistics.to_dict`) and count grids (see
+    `count_grid.CountGrid.to_dict`) to "{output_prefix}_{key}.npz".
+
+    :param accumulator_dict: Dictionary created by `make_accumulators`, with
+        results filled in.
+    :param config_dict: Dictionary created by `get_config`.
+    :param season_dict: Dictionary created by `make_season`.
+    :return: output_file_names: 1-D list of files written.
+    """
+
+    output_file_names = []
+
+    for this_product_name in sorted(accumulator_dict.keys()):
+        this_output_prefix = get_output_prefix(
+            config_dict, season_dict, this_product_name)
+        this_directory_name = os.path.dirname(this_output_prefix)
+        if not os.path.isdir(this_directory_name):
+            os.makedirs(this_directory_name)
+
+        this_result_dict = accumulator_dict[this_product_name].get_result()
+        for this_key in sorted(this_result_dict.keys()):
+            this_value = this_result_dict[this_key]
+            this_file_name = '{0:s}_{1:s}'.format(this_output_prefix, this_key)
+
+            with profiling.stage(profiling.OUTPUT_STAGE):
+                if isinstance(this_value, (streaming_stats.SummaryStatistics,
+                                           count_grid.CountGrid)):
+                    this_file_name += '.npz'
+                    numpy.savez(this_file_name, **dict([
+                        (k, v) for k, v in this_value.to_dict().items()
+                        if v is not None]))
+                else:
+                    this_file_name += '.npy'
+                    numpy.save(this_file_name, this_value)
+
+            print('Wrote "{0:s}".'.format(this_file_name))
+            output_file_names.append(this_file_name)
+
+    return output_file_names
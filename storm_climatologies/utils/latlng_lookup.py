@@ -0,0 +1,300 @@
+"""Lookup table from lat-long to projected x-y, so binning can skip pyproj.
+
+Spatial climatologies project every storm centroid with
+`projections.project_latlng_to_xy` and then find the nearest x-y grid point.
+MYRORSS centroids stay inside the lat-long bounds of the `GridSpec`, so the
+projection can be tabulated once, at a fine lat-long spacing, and read back by
+bilinear interpolation.
+
+The table holds x and y (not the grid cell) at each node, so a centroid lands
+in the same cell as with the exact projection unless it is within
+`max_error_metres` of a cell edge.  This bound is measured when the table is
+built, by projecting the centre of every table cell exactly (where bilinear
+interpolation is least accurate).  At the default spacing of 0.05 deg it is
+well under a metre for the CONUS grid.
+
+Tables are .npy files keyed by the grid spec and spacing, written next to the
+cached x-y grid (see `grid_spec`) and memory-mapped when read, so worker
+processes share the pages.  Centroids outside the table are projected exactly.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import numpy
+from gewittergefahr.gg_utils import projections
+
+DEFAULT_SPACING_DEG = 0.05
+
+MIN_LATITUDE_KEY = 'min_latitude_deg'
+MIN_LONGITUDE_KEY = 'min_longitude_deg'
+SPACING_KEY = 'spacing_deg'
+MAX_ERROR_KEY = 'max_error_metres'
+GRID_SPEC_KEY = 'grid_spec_key'
+
+_lookup_table_by_key = {}
+
+
+def _get_key(grid_spec_object, spacing_deg):
+    """Returns hash that identifies a lookup table across runs.
+
+    :param grid_spec_object: Instance of `grid_spec.GridSpec`.
+    :param spacing_deg: Spacing between adjacent table nodes.
+    :return: key_string: Hexadecimal MD5 hash.
+    """
+
+    return hashlib.md5(json.dumps(
+        [grid_spec_object.get_key(), float(spacing_deg)]).encode('utf-8')
+    ).hexdigest()
+
+
+def find_table_file_names(grid_spec_object, cache_dir_name,
+                          spacing_deg=DEFAULT_SPACING_DEG):
+    """Finds files with lookup table for the given grid spec.
+
+    :param grid_spec_object: Instance of `grid_spec.GridSpec`.
+    :param cache_dir_name: Name of cache directory.
+    :param spacing_deg: Spacing between adjacent table nodes.
+    :return: table_file_name: Path to .npy file with x-y coordinates.
+    :return: metadata_file_name: Path to .json file with bounds, spacing and
+        error bound.
+    """
+
+    this_prefix = os.path.join(cache_dir_name, 'latlng_lookup_{0:s}'.format(
+        _get_key(grid_spec_object, spacing_deg)))
+    return this_prefix + '.npy', this_prefix + '.json'
+
+
+class LookupTable(object):
+    """Projected x-y coordinates at the nodes of a regular lat-long grid."""
+
+    def __init__(self, xy_matrix_metres, metadata_dict, grid_spec_object,
+                 table_file_name=None):
+        """Creates lookup table.
+
+        M = number of node rows (latitudes)
+        N = number of node columns (longitudes)
+
+        :param xy_matrix_metres: 2-by-M-by-N numpy array, with x in the first
+            slice and y in the second.
+        :param metadata_dict: Dictionary with keys `MIN_LATITUDE_KEY`,
+            `MIN_LONGITUDE_KEY`, `SPACING_KEY`, `MAX_ERROR_KEY` and
+            `GRID_SPEC_KEY`.
+        :param grid_spec_object: Instance of `grid_spec.GridSpec`, whose
+            projection is used for centroids outside the table.
+        :param table_file_name: Path to .npy file with `xy_matrix_metres`.  If
+            given, the table is memory-mapped again (not copied) when the
+            object is unpickled in another process.
+        """
+
+        self.xy_matrix_metres = xy_matrix_metres
+        self.metadata_dict = metadata_dict
+        self.grid_spec_object = grid_spec_object
+        self.table_file_name = table_file_name
+
+    def __getstate__(self):
+        state_dict = dict(self.__dict__)
+        if self.table_file_name is not None:
+            state_dict['xy_matrix_metres'] = None
+        return state_dict
+
+    def __setstate__(self, state_dict):
+        self.__dict__.update(state_dict)
+        if self.xy_matrix_metres is None:
+            self.xy_matrix_metres = numpy.load(
+                self.table_file_name, mmap_mode='r')
+
+    @property
+    def max_error_metres(self):
+        """Max distance between interpolated and exact x-y coordinates."""
+        return self.metadata_dict[MAX_ERROR_KEY]
+
+    def project(self, latitudes_deg, longitudes_deg):
+        """Converts lat-long to x-y, by bilinear interpolation in the table.
+
+        :param latitudes_deg: 1-D numpy array of latitudes.
+        :param longitudes_deg: 1-D numpy array of longitudes (deg E).
+        :return: x_coords_metres: 1-D numpy array of x-coordinates.
+        :return: y_coords_metres: Same but for y.
+        """
+
+        latitudes_deg = numpy.asarray(latitudes_deg, dtype=float)
+        longitudes_deg = numpy.mod(
+            numpy.asarray(longitudes_deg, dtype=float), 360.)
+        num_rows = self.xy_matrix_metres.shape[1]
+        num_columns = self.xy_matrix_metres.shape[2]
+
+        row_coords = (
+            latitudes_deg - self.metadata_dict[MIN_LATITUDE_KEY]
+        ) / self.metadata_dict[SPACING_KEY]
+        column_coords = (
+            longitudes_deg - self.metadata_dict[MIN_LONGITUDE_KEY]
+        ) / self.metadata_dict[SPACING_KEY]
+
+        inside_flags = numpy.logical_and(
+            numpy.logical_and(row_coords >= 0, row_coords <= num_rows - 1),
+            numpy.logical_and(
+                column_coords >= 0, column_coords <= num_columns - 1))
+
+        first_rows = numpy.minimum(
+            numpy.floor(numpy.where(inside_flags, row_coords, 0)),
+            num_rows - 2).astype(numpy.int64)
+        first_columns = numpy.minimum(
+            numpy.floor(numpy.where(inside_flags, column_coords, 0)),
+            num_columns - 2).astype(numpy.int64)
+        row_weights = numpy.where(inside_flags, row_coords - first_rows, 0.)
+        column_weights = numpy.where(
+            inside_flags, column_coords - first_columns, 0.)
+
+        first_flat_indices = first_rows * num_columns + first_columns
+        corner_weights_and_offsets = [
+            ((1. - row_weights) * (1. - column_weights), 0),
+            (row_weights * (1. - column_weights), num_columns),
+            ((1. - row_weights) * column_weights, 1),
+            (row_weights * column_weights, num_columns + 1)
+        ]
+
+        coords_by_axis = []
+        for k in range(2):
+            this_flat_matrix = numpy.reshape(self.xy_matrix_metres[k], -1)
+            coords_by_axis.append(sum([
+                w * numpy.take(this_flat_matrix, first_flat_indices + j)
+                for w, j in corner_weights_and_offsets]))
+
+        x_coords_metres, y_coords_metres = coords_by_axis
+        outside_indices = numpy.where(numpy.invert(inside_flags))[0]
+        if len(outside_indices) > 0:
+            x_coords_metres[outside_indices], y_coords_metres[
+                outside_indices] = projections.project_latlng_to_xy(
+                    latitudes_deg=latitudes_deg[outside_indices],
+                    longitudes_deg=longitudes_deg[outside_indices],
+                    projection_object=self.grid_spec_object.get_projection())
+
+        return x_coords_metres, y_coords_metres
+
+
+def build_table(grid_spec_object, spacing_deg=DEFAULT_SPACING_DEG):
+    """Projects the nodes of the table, and measures its error.
+
+    :param grid_spec_object: Instance of `grid_spec.GridSpec`.
+    :param spacing_deg: Spacing between adjacent table nodes.
+    :return: xy_matrix_metres: See doc for `LookupTable.__init__`.
+    :return: metadata_dict: Same.
+    """
+
+    projection_object = grid_spec_object.get_projection()
+    num_rows = 1 + int(numpy.ceil(
+        (grid_spec_object.max_latitude_deg -
+         grid_spec_object.min_latitude_deg) / spacing_deg - 1e-6))
+    num_columns = 1 + int(numpy.ceil(
+        (grid_spec_object.max_longitude_deg -
+         grid_spec_object.min_longitude_deg) / spacing_deg - 1e-6))
+
+    node_latitudes_deg = (
+        grid_spec_object.min_latitude_deg +
+        spacing_deg * numpy.arange(num_rows))
+    node_longitudes_deg = (
+        grid_spec_object.min_longitude_deg +
+        spacing_deg * numpy.arange(num_columns))
+    longitude_matrix_deg, latitude_matrix_deg = numpy.meshgrid(
+        node_longitudes_deg, node_latitudes_deg)
+
+    x_matrix_metres, y_matrix_metres = projections.project_latlng_to_xy(
+        latitudes_deg=latitude_matrix_deg.ravel(),
+        longitudes_deg=longitude_matrix_deg.ravel(),
+        projection_object=projection_object)
+    xy_matrix_metres = numpy.stack((
+        numpy.reshape(x_matrix_metres, (num_rows, num_columns)),
+        numpy.reshape(y_matrix_metres, (num_rows, num_columns))))
+
+    metadata_dict = {
+        MIN_LATITUDE_KEY: grid_spec_object.min_latitude_deg,
+        MIN_LONGITUDE_KEY: grid_spec_object.min_longitude_deg,
+        SPACING_KEY: float(spacing_deg),
+        MAX_ERROR_KEY: 0.,
+        GRID_SPEC_KEY: grid_spec_object.get_key()
+    }
+
+    # Interpolation error is largest at the centre of each table cell.
+    centre_latitudes_deg = (
+        latitude_matrix_deg[:-1, :-1] + 0.5 * spacing_deg).ravel()
+    centre_longitudes_deg = (
+        longitude_matrix_deg[:-1, :-1] + 0.5 * spacing_deg).ravel()
+    exact_x_metres, exact_y_metres = projections.project_latlng_to_xy(
+        latitudes_deg=centre_latitudes_deg,
+        longitudes_deg=centre_longitudes_deg,
+        projection_object=projection_object)
+    interp_x_metres, interp_y_metres = LookupTable(
+        xy_matrix_metres, metadata_dict, grid_spec_object
+    ).project(centre_latitudes_deg, centre_longitudes_deg)
+
+    metadata_dict[MAX_ERROR_KEY] = float(numpy.max(numpy.sqrt(
+        (interp_x_metres - exact_x_metres) ** 2 +
+        (interp_y_metres - exact_y_metres) ** 2)))
+
+    return xy_matrix_metres, metadata_dict
+
+
+def get_table(grid_spec_object, cache_dir_name=None,
+              spacing_deg=DEFAULT_SPACING_DEG):
+    """Returns lookup table, building it only if not cached.
+
+    :param grid_spec_object: Instance of `grid_spec.GridSpec`.
+    :param cache_dir_name: Name of cache directory.  If None, the table is
+        cached only in memory.
+    :param spacing_deg: Spacing between adjacent table nodes.
+    :return: lookup_table_object: Instance of `LookupTable`.
+    """
+
+    this_key = _get_key(grid_spec_object, spacing_deg)
+    if this_key in _lookup_table_by_key:
+        return _lookup_table_by_key[this_key]
+
+    table_file_name = None
+    metadata_file_name = None
+    if cache_dir_name is not None:
+        table_file_name, metadata_file_name = find_table_file_names(
+            grid_spec_object, cache_dir_name, spacing_deg=spacing_deg)
+
+    if table_file_name is not None and os.path.isfile(metadata_file_name):
+        with open(metadata_file_name) as metadata_file_handle:
+            metadata_dict = json.load(metadata_file_handle)
+        xy_matrix_metres = numpy.load(table_file_name, mmap_mode='r')
+    else:
+        xy_matrix_metres, metadata_dict = build_table(
+            grid_spec_object, spacing_deg=spacing_deg)
+
+        if table_file_name is not None:
+            if not os.path.isdir(cache_dir_name):
+                os.makedirs(cache_dir_name)
+
+            # Write to temporary files, then rename, so that other processes
+            # never see a partial table.  The metadata file goes last, since
+            # its presence means that the table is complete.
+            file_handle, temp_file_name = tempfile.mkstemp(
+                dir=cache_dir_name, suffix='.npy')
+            os.close(file_handle)
+            numpy.save(temp_file_name, xy_matrix_metres)
+            os.rename(temp_file_name, table_file_name)
+
+            file_handle, temp_file_name = tempfile.mkstemp(
+                dir=cache_dir_name, suffix='.json')
+            os.close(file_handle)
+            with open(temp_file_name, 'w') as metadata_file_handle:
+                json.dump(metadata_dict, metadata_file_handle)
+            os.rename(temp_file_name, metadata_file_name)
+
+            xy_matrix_metres = numpy.load(table_file_name, mmap_mode='r')
+
+    lookup_table_object = LookupTable(
+        xy_matrix_metres, metadata_dict, grid_spec_object,
+        table_file_name=table_file_name)
+    _lookup_table_by_key[this_key] = lookup_table_object
+    return lookup_table_object
+
+
+def clear_memory_cache():
+    """Forgets tables cached in memory (not on disk)."""
+
+    _lookup_table_by_key.clear()
@@ -0,0 +1,171 @@
+"""Local stand-in for `gewittergefahr.gg_io.storm_tracking_io`.
+
+Has the two functions used by `day_loader.read_storm_object_table`
+(`find_processed_files_one_spc_date` and `read_many_processed_files`), with the
+same arguments, plus a writer.  Processed files are Pickle files with one
+pandas DataFrame per valid time:
+
+{top_processed_dir_name}/{yyyy}/{yyyymmdd}/scale_{tracking_scale_metres2}m2/
+storm-tracking_{data_source}_{yyyy-mm-dd-HHMMSS}.p
+
+Pass this module as `tracking_io_module` to `day_loader.DayLoader` to run any
+climatology on files written here (e.g., by
+`synthetic_tracks.SyntheticTrackGenerator.write_spc_date`), without
+gewittergefahr.
+"""
+
+import glob
+import os
+import pickle
+import time
+import numpy
+import pandas
+
+SEGMOTION_SOURCE_NAME = 'segmotion'
+FILE_NAME_PREFIX = 'storm-tracking'
+FILE_TIME_FORMAT = '%Y-%m-%d-%H%M%S'
+TIME_COLUMN = 'unix_time_sec'
+
+
+def _find_spc_date_dir_name(spc_date_string, data_source,
+                            top_processed_dir_name, tracking_scale_metres2):
+    """Returns directory with processed files for one SPC date.
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :param data_source: Source of tracking data (e.g., "segmotion").
+    :param top_processed_dir_name: Name of top-level directory.
+    :param tracking_scale_metres2: Tracking scale (minimum storm area).
+    :return: directory_name: Path to directory.
+    """
+
+    return os.path.join(
+        top_processed_dir_name, spc_date_string[:4], spc_date_string,
+        'scale_{0:d}m2'.format(int(tracking_scale_metres2)))
+
+
+def find_processed_file(unix_time_sec, spc_date_string, data_source,
+                        top_processed_dir_name, tracking_scale_metres2):
+    """Finds processed file for one valid time.
+
+    :param unix_time_sec: Valid time.
+    :param spc_date_string: See doc for `_find_spc_date_dir_name`.
+    :param data_source: Same.
+    :param top_processed_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :return: processed_file_name: Path to file (may not exist).
+    """
+
+    return os.path.join(
+        _find_spc_date_dir_name(
+            spc_date_string, data_source, top_processed_dir_name,
+            tracking_scale_metres2),
+        '{0:s}_{1:s}_{2:s}.p'.format(
+            FILE_NAME_PREFIX, data_source,
+            time.strftime(FILE_TIME_FORMAT, time.gmtime(unix_time_sec))))
+
+
+def find_processed_files_one_spc_date(
+        spc_date_string, data_source, top_processed_dir_name,
+        tracking_scale_metres2, raise_error_if_missing=True):
+    """Finds all processed files for one SPC date.
+
+    :param spc_date_string: See doc for `_find_spc_date_dir_name`.
+    :param data_source: Same.
+    :param top_processed_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :param raise_error_if_missing: Boolean flag.  If True and there are no
+        files, will raise an error.
+    :return: processed_file_names: 1-D list of paths, sorted by time.
+    :raises: ValueError: if there are no files and raise_error_if_missing =
+        True.
+    """
+
+    processed_file_names = sorted(glob.glob(os.path.join(
+        _find_spc_date_dir_name(
+            spc_date_string, data_source, top_processed_dir_name,
+            tracking_scale_metres2),
+        '{0:s}_{1:s}_*.p'.format(FILE_NAME_PREFIX, data_source))))
+
+    if raise_error_if_missing and len(processed_file_names) == 0:
+        raise ValueError(
+            'Cannot find processed files for SPC date "{0:s}" in "{1:s}".'
+            .format(spc_date_string, top_processed_dir_name))
+
+    return processed_file_names
+
+
+def write_processed_file(storm_object_table, pickle_file_name):
+    """Writes storm objects (usually for one valid time) to a Pickle file.
+
+    :param storm_object_table: pandas DataFrame.
+    :param pickle_file_name: Path to output file.
+    """
+
+    directory_name = os.path.dirname(pickle_file_name)
+    if not os.path.isdir(directory_name):
+        os.makedirs(directory_name)
+
+    with open(pickle_file_name, 'wb') as this_file_handle:
+        pickle.dump(storm_object_table, this_file_handle,
+                    pickle.HIGHEST_PROTOCOL)
+
+
+def write_processed_files_one_spc_date(
+        storm_object_table, spc_date_string, top_processed_dir_name,
+        tracking_scale_metres2, data_source=SEGMOTION_SOURCE_NAME):
+    """Writes storm objects for one SPC date, one file per valid time.
+
+    :param storm_object_table: pandas DataFrame with column "unix_time_sec".
+    :param spc_date_string: See doc for `_find_spc_date_dir_name`.
+    :param top_processed_dir_name: Same.
+    :param tracking_scale_metres2: Same.
+    :param data_source: Same.
+    :return: processed_file_names: 1-D list of files written, sorted by time.
+    """
+
+    sort_indices = numpy.argsort(
+        storm_object_table[TIME_COLUMN].values, kind='mergesort')
+    sorted_times_unix_sec = storm_object_table[TIME_COLUMN].values[
+        sort_indices]
+    first_indices = numpy.concatenate((
+        numpy.array([0], dtype=int),
+        1 + numpy.where(numpy.diff(sorted_times_unix_sec) != 0)[0]))
+    last_indices = numpy.append(first_indices[1:], len(sort_indices))
+    if len(sort_indices) == 0:
+        first_indices = last_indices = numpy.array([], dtype=int)
+
+    processed_file_names = []
+    for this_first_index, this_last_index in zip(first_indices, last_indices):
+        this_file_name = find_processed_file(
+            int(sorted_times_unix_sec[this_first_index]), spc_date_string,
+            data_source, top_processed_dir_name, tracking_scale_metres2)
+        write_processed_file(
+            storm_object_table.iloc[
+                sort_indices[this_first_index:this_last_index]
+            ].reset_index(drop=True), this_file_name)
+        processed_file_names.append(this_file_name)
+
+    return processed_file_names
+
+
+def read_processed_file(pickle_file_name):
+    """Reads storm objects from a Pickle file.
+
+    :param pickle_file_name: Path to input file.
+    :return: storm_object_table: pandas DataFrame.
+    """
+
+    with open(pickle_file_name, 'rb') as this_file_handle:
+        return pickle.load(this_file_handle)
+
+
+def read_many_processed_files(pickle_file_names):
+    """Reads storm objects from many Pickle files.
+
+    :param pickle_file_names: 1-D list of paths to input files.
+    :return: storm_object_table: pandas DataFrame with all storm objects.
+    """
+
+    return pandas.concat(
+        [read_processed_file(f) for f in pickle_file_names],
+        axis=0, ignore_index=True)
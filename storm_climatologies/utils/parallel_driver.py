@@ -0,0 +1,184 @@
+"""Runs a climatology over a range of SPC dates in a pool of processes.
+
+The range of working dates is split into contiguous chunks (see
+`split_into_chunks`).  Each chunk is handled by one process (see `run_chunks`),
+which also reads the extra date that birth and death windows need at either
+end of the chunk (see `utils._get_dates_needed`).  Date indices always refer to
+the full range, so every window is exactly the same as in a serial run.
+`run_climatology` runs one function for each working date, and
+`climatology_engine.run_climatologies` runs a set of accumulators, with the
+same chunks and pool.  `partials` uses the chunks for separate jobs.
+
+Partial results are dictionaries, and each entry is reduced over chunks (or
+dates) in one of the following ways:
+
+- SUM_MERGE_TYPE: arrays are added (count grids, hourly histograms).
+- CONCAT_MERGE_TYPE: 1-D arrays are concatenated in date order (per-storm
+  values).
+- SUMMARY_MERGE_TYPE: `streaming_stats.SummaryStatistics` objects are merged.
+- COUNT_GRID_MERGE_TYPE: `count_grid.CountGrid` objects are merged.
+"""
+
+import multiprocessing
+import numpy
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import utils
+
+SUM_MERGE_TYPE = 'sum'
+CONCAT_MERGE_TYPE = 'concat'
+SUMMARY_MERGE_TYPE = 'summary'
+COUNT_GRID_MERGE_TYPE = 'count_grid'
+
+
+def split_into_chunks(num_spc_dates, num_chunks):
+    """Splits working dates into contiguous chunks.
+
+    :param num_spc_dates: Number of dates total.
+    :param num_chunks: Number of chunks wanted.  Will be decreased if greater
+        than `num_spc_dates`.
+    :return: working_date_indices_by_chunk: 1-D list, where each item is a 1-D
+        numpy array of working-date indices.
+    """
+
+    num_chunks = max([1, min([num_chunks, num_spc_dates])])
+    return [c for c in numpy.array_split(
+        numpy.arange(num_spc_dates), num_chunks) if len(c) > 0]
+
+
+def merge_results(result_dicts, merge_type_dict):
+    """Reduces partial results, in order.
+
+    :param result_dicts: 1-D list of result dictionaries, one per chunk or
+        working date (or created by `merge_results` itself).  None entries are
+        skipped.
+    :param merge_type_dict: Dictionary, where each key is a key in the result
+        dictionaries and each value is `SUM_MERGE_TYPE`, `CONCAT_MERGE_TYPE`,
+        `SUMMARY_MERGE_TYPE` or `COUNT_GRID_MERGE_TYPE`.
+    :return: merged_result_dict: Dictionary with the same keys.
+    """
+
+    merged_result_dict = {}
+    for this_key, this_merge_type in merge_type_dict.items():
+        these_values = [
+            d[this_key] for d in result_dicts
+            if d is not None and d[this_key] is not None]
+        if len(these_values) == 0:
+            merged_result_dict[this_key] = None
+            continue
+
+        if this_merge_type == SUM_MERGE_TYPE:
+            merged_result_dict[this_key] = numpy.sum(
+                numpy.stack(these_values), axis=0)
+        elif this_merge_type == CONCAT_MERGE_TYPE:
+            merged_result_dict[this_key] = numpy.concatenate(
+                [numpy.asarray(v) for v in these_values])
+        elif this_merge_type in [SUMMARY_MERGE_TYPE, COUNT_GRID_MERGE_TYPE]:
+            merged_result_dict[this_key] = these_values[0].copy()
+            for this_value in these_values[1:]:
+                merged_result_dict[this_key].merge(this_value)
+        else:
+            raise ValueError('Merge type "{0:s}" is not recognized.'.format(
+                this_merge_type))
+
+    return merged_result_dict
+
+
+def run_chunks(chunk_function, argument_dicts, num_processes):
+    """Runs a function for each chunk of working dates, in a pool of processes.
+
+    :param chunk_function: Function run for each chunk.  Must be defined at the
+        top level of a module, so that it can be pickled.  Takes one item of
+        `argument_dicts`.
+    :param argument_dicts: 1-D list of arguments, one per chunk.
+    :param num_processes: Number of processes.  If 1, will run serially in
+        this process.
+    :return: chunk_results: 1-D list with the return value of `chunk_function`
+        for each chunk, in order.
+    """
+
+    if num_processes == 1:
+        return [chunk_function(d) for d in argument_dicts]
+
+    pool_object = multiprocessing.Pool(processes=num_processes)
+    try:
+        return pool_object.map(chunk_function, argument_dicts, chunksize=1)
+    finally:
+        pool_object.close()
+        pool_object.join()
+
+
+def _run_one_chunk(argument_dict):
+    """Runs the climatology for one chunk of working dates.
+
+    :param argument_dict: Dictionary created by `run_climatology`.
+    :return: merged_result_dict: Partial results for the chunk, merged with
+        `merge_results`.
+    """
+
+    spc_date_strings = argument_dict['spc_date_strings']
+    working_date_indices = argument_dict['working_date_indices']
+    climatology_type = argument_dict['climatology_type']
+    process_function = argument_dict['process_function']
+    num_spc_dates = len(spc_date_strings)
+
+    day_loader_object = day_loader.DayLoader(
+        spc_date_strings=spc_date_strings, **argument_dict['loader_kwargs'])
+    result_dicts = []
+
+    for k, this_working_date_index in enumerate(working_date_indices):
+        these_date_indices = utils._get_dates_needed(
+            this_working_date_index, num_spc_dates, climatology_type)
+
+        next_date_indices = None
+        if k + 1 < len(working_date_indices):
+            next_date_indices = utils._get_dates_needed(
+                working_date_indices[k + 1], num_spc_dates, climatology_type)
+
+        multiday_storm_object_table = day_loader_object.get_multiday_table(
+            these_date_indices, prefetch_date_indices=next_date_indices)
+        result_dicts.append(process_function(
+            multiday_storm_object_table, this_working_date_index))
+
+    day_loader_object.clear()
+    return merge_results(result_dicts, argument_dict['merge_type_dict'])
+
+
+def run_climatology(
+        spc_date_strings, climatology_type, process_function, merge_type_dict,
+        num_processes=None, num_chunks=None, **loader_kwargs):
+    """Runs a climatology over all working dates, in parallel.
+
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    :param climatology_type: Climatology type (birth, death or passage).
+    :param process_function: Function run for each working date.  Must be
+        defined at the top level of a module, so that it can be pickled.  Takes
+        the multiday storm-object table and the working-date index, and returns
+        a dictionary of partial results.
+    :param merge_type_dict: See doc for `merge_results`.
+    :param num_processes: Number of processes.  If None, will use one per CPU.
+        If 1, will run serially in this process.
+    :param num_chunks: Number of chunks.  If None, will use one per process.
+    :param loader_kwargs: Keyword arguments passed to `day_loader.DayLoader`
+        in each process (e.g., top_processed_dir_name, tracking_scale_metres2,
+        read_function).
+    :return: merged_result_dict: See doc for `merge_results`.
+    """
+
+    if num_processes is None:
+        num_processes = multiprocessing.cpu_count()
+    if num_chunks is None:
+        num_chunks = num_processes
+
+    argument_dicts = [{
+        'spc_date_strings': spc_date_strings,
+        'working_date_indices': these_indices,
+        'climatology_type': climatology_type,
+        'process_function': process_function,
+        'merge_type_dict': merge_type_dict,
+        'loader_kwargs': loader_kwargs
+    } for these_indices in split_into_chunks(
+        len(spc_date_strings), num_chunks)]
+
+    return merge_results(
+        run_chunks(_run_one_chunk, argument_dicts, num_processes),
+        merge_type_dict)
@@ -0,0 +1,310 @@
+"""Per-day partial results, for map-reduce runs.
+
+Count grids, temporal histograms and per-storm summaries all add up across
+working dates.  Here the contribution of each working date to each
+accumulator is written as a small Pickle file, and any set of those files is
+merged into a final product (see `merge_partials`).  Days can therefore be
+spread over many nodes by a plain job scheduler, and seasons that overlap
+share the same files.
+
+Each file is named by a content hash of everything that determines it: the
+accumulator class, climatology type and settings (`Accumulator.get_config`),
+the working date,
+the dates in its window (which depend on whether the date has neighbours in
+the run; see `utils._get_dates_needed`), the partial-file version and,
+optionally, a fingerprint of each input date.  A file that exists is
+therefore always valid, and changing any input (e.g., reprocessed tracking
+files with a new fingerprint) leads to a new name, so only the affected days
+are recomputed.  Files are kept in one directory per class and date:
+
+{top_partial_dir_name}/{class_name}/{yyyymmdd}/{hash}.p
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from storm_climatologies.utils import climatology_engine
+from storm_climatologies.utils import parallel_driver
+from storm_climatologies.utils import utils
+
+PARTIAL_FORMAT_VERSION = 1
+
+CLASS_NAME_KEY = 'class_name'
+CLIMATOLOGY_TYPE_KEY = 'climatology_type'
+CONFIG_KEY = 'config'
+WORKING_DATE_KEY = 'working_spc_date_string'
+WINDOW_DATES_KEY = 'window_spc_date_strings'
+RESULT_KEY = 'result_dict'
+
+
+def _get_window_date_strings(accumulator_object, spc_date_strings,
+                             working_date_index):
+    """Returns dates in the window of one working date.
+
+    :param accumulator_object: Instance of `climatology_engine.Accumulator`.
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd") in the
+        run.
+    :param working_date_index: Index into `spc_date_strings`.
+    :return: window_spc_date_strings: 1-D list of SPC dates.
+    """
+
+    return [spc_date_strings[i] for i in utils._get_dates_needed(
+        working_date_index, len(spc_date_strings),
+        accumulator_object.climatology_type)]
+
+
+def find_partial_file(top_partial_dir_name, accumulator_object,
+                      spc_date_strings, working_date_index,
+                      input_fingerprint_function=None):
+    """Finds partial file for one accumulator and working date.
+
+    :param top_partial_dir_name: Name of top-level directory.
+    :param accumulator_object: Instance of `climatology_engine.Accumulator`.
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd") in the
+        run.
+    :param working_date_index: Index into `spc_date_strings`.
+    :param input_fingerprint_function: Function that takes an SPC date string
+        and returns a string that changes whenever the input for that date does
+        (e.g., file sizes and modification times).  If None, inputs are assumed
+        never to change.
+    :return: partial_file_name: Path to partial file (may not exist).
+    """
+
+    window_spc_date_strings = _get_window_date_strings(
+        accumulator_object, spc_date_strings, working_date_index)
+    if input_fingerprint_function is None:
+        these_fingerprints = None
+    else:
+        these_fingerprints = [
+            input_fingerprint_function(d) for d in window_spc_date_strings]
+
+    class_name = type(accumulator_object).__name__
+    working_spc_date_string = spc_date_strings[working_date_index]
+    key_string = hashlib.md5(json.dumps({
+        'version': PARTIAL_FORMAT_VERSION,
+        CLASS_NAME_KEY: class_name,
+        CLIMATOLOGY_TYPE_KEY: accumulator_object.climatology_type,
+        CONFIG_KEY: accumulator_object.get_config(),
+        WORKING_DATE_KEY: working_spc_date_string,
+        WINDOW_DATES_KEY: window_spc_date_strings,
+        'input_fingerprints': these_fingerprints
+    }, sort_keys=True).encode('utf-8')).hexdigest()
+
+    return os.path.join(top_partial_dir_name, class_name,
+                        working_spc_date_string, '{0:s}.p'.format(key_string))
+
+
+def write_partial(accumulator_object, working_spc_date_string,
+                  window_spc_date_strings, pickle_file_name):
+    """Writes result of one accumulator for one working date, atomically.
+
+    :param accumulator_object: Instance of `climatology_engine.Accumulator`,
+        with the result for one working date only.
+    :param working_spc_date_string: Working date (format "yyyymmdd").
+    :param window_spc_date_strings: 1-D list of dates in the window.
+    :param pickle_file_name: Path to output file.
+    """
+
+    directory_name = os.path.dirname(pickle_file_name)
+    if not os.path.isdir(directory_name):
+        try:
+            os.makedirs(directory_name)
+        except OSError:
+            if not os.path.isdir(directory_name):
+                raise
+
+    file_handle, temp_file_name = tempfile.mkstemp(
+        dir=directory_name, suffix='.tmp')
+    with os.fdopen(file_handle, 'wb') as this_file_handle:
+        pickle.dump({
+            CLASS_NAME_KEY: type(accumulator_object).__name__,
+            CLIMATOLOGY_TYPE_KEY: accumulator_object.climatology_type,
+            CONFIG_KEY: accumulator_object.get_config(),
+            WORKING_DATE_KEY: working_spc_date_string,
+            WINDOW_DATES_KEY: window_spc_date_strings,
+            RESULT_KEY: accumulator_object.get_result()
+        }, this_file_handle, pickle.HIGHEST_PROTOCOL)
+
+    os.rename(temp_file_name, pickle_file_name)
+
+
+def read_partial(pickle_file_name):
+    """Reads partial file.
+
+    :param pickle_file_name: Path to input file.
+    :return: partial_dict: Dictionary with keys listed in `write_partial`.
+    """
+
+    with open(pickle_file_name, 'rb') as this_file_handle:
+        return pickle.load(this_file_handle)
+
+
+def write_daily_partials(spc_date_strings, accumulator_objects,
+                         top_partial_dir_name, working_date_indices=None,
+                         input_fingerprint_function=None, **loader_kwargs):
+    """Writes partial files that do not yet exist.
+
+    Dates for which all partial files exist are not read.
+
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd") in the
+        run.
+    :param accumulator_objects: 1-D list of `climatology_engine.Accumulator`
+        objects (only their settings are used).
+    :param top_partial_dir_name: See doc for `find_partial_file`.
+    :param working_date_indices: 1-D list of working dates to do (e.g., one
+        job's share, from `parallel_driver.split_into_chunks`).  If None, will
+        do all dates.
+    :param input_fingerprint_function: See doc for `find_partial_file`.
+    :param loader_kwargs: See doc for
+        `climatology_engine.ClimatologyEngine.__init__`.
+    :return: partial_file_names: 1-D list of files written.
+    :raises: ValueError: if any accumulator cannot be merged (see
+        `climatology_engine.check_mergeable`), since each partial file is a
+        chunk of one date.
+    """
+
+    climatology_engine.check_mergeable(accumulator_objects)
+    spc_date_strings = list(spc_date_strings)
+    if working_date_indices is None:
+        working_date_indices = range(len(spc_date_strings))
+    working_date_indices = list(working_date_indices)
+
+    engine_object = climatology_engine.ClimatologyEngine(
+        spc_date_strings, accumulator_objects, **loader_kwargs)
+    partial_file_names = []
+
+    file_names_by_date = []
+    missing_indices_by_date = []
+    for this_working_date_index in working_date_indices:
+        these_file_names = [
+            find_partial_file(
+                top_partial_dir_name, a, spc_date_strings,
+                this_working_date_index,
+                input_fingerprint_function=input_fingerprint_function)
+            for a in accumulator_objects]
+
+        file_names_by_date.append(these_file_names)
+        missing_indices_by_date.append([
+            j for j in range(len(accumulator_objects))
+            if not os.path.isfile(these_file_names[j])])
+
+    todo_indices = [k for k in range(len(working_date_indices))
+                    if len(missing_indices_by_date[k]) > 0]
+
+    for m, k in enumerate(todo_indices):
+        this_working_date_index = working_date_indices[k]
+        these_daily_accumulator_objects = [
+            accumulator_objects[j].copy_empty()
+            for j in missing_indices_by_date[k]]
+        for this_accumulator_object in these_daily_accumulator_objects:
+            this_accumulator_object.start(spc_date_strings)
+
+        if m + 1 < len(todo_indices):
+            this_next_index = working_date_indices[todo_indices[m + 1]]
+            these_next_accumulator_objects = [
+                accumulator_objects[j]
+                for j in missing_indices_by_date[todo_indices[m + 1]]]
+        else:
+            this_next_index = None
+            these_next_accumulator_objects = None
+
+        engine_object.process_working_date(
+            this_working_date_index, these_daily_accumulator_objects,
+            next_working_date_index=this_next_index,
+            next_accumulator_objects=these_next_accumulator_objects)
+
+        for j, this_accumulator_object in zip(
+                missing_indices_by_date[k], these_daily_accumulator_objects):
+            this_accumulator_object.finish()
+            write_partial(
+                this_accumulator_object,
+                spc_date_strings[this_working_date_index],
+                _get_window_date_strings(
+                    this_accumulator_object, spc_date_strings,
+                    this_working_date_index),
+                file_names_by_date[k][j])
+            partial_file_names.append(file_names_by_date[k][j])
+
+    engine_object.day_loader_object.clear()
+    return partial_file_names
+
+
+def merge_partials(accumulator_object, partial_file_names):
+    """Adds partial results to an accumulator.
+
+    Partials are merged in order of working date, so that any subset gives
+    the same result as a run over those dates.
+
+    :param accumulator_object: Instance of `climatology_engine.Accumulator`.
+    :param partial_file_names: 1-D list of partial files for the same class and
+        settings.
+    :return: accumulator_object: Same as input, with partials added.
+    :raises: ValueError: if the accumulator cannot be merged (see
+        `climatology_engine.check_mergeable`).
+    :raises: ValueError: if a partial file has another class or settings.
+    """
+
+    climatology_engine.check_mergeable([accumulator_object])
+    class_name = type(accumulator_object).__name__
+    config_dict = json.loads(json.dumps(accumulator_object.get_config()))
+
+    file_name_dict_pairs = [(f, read_partial(f)) for f in partial_file_names]
+    file_name_dict_pairs.sort(key=lambda p: p[1][WORKING_DATE_KEY])
+
+    result_dicts = [accumulator_object.get_result()]
+    for this_file_name, this_partial_dict in file_name_dict_pairs:
+        if (this_partial_dict[CLASS_NAME_KEY] != class_name or
+                this_partial_dict[CLIMATOLOGY_TYPE_KEY] !=
+                accumulator_object.climatology_type or
+                json.loads(json.dumps(this_partial_dict[CONFIG_KEY])) !=
+                config_dict):
+            raise ValueError(
+                'Partial file "{0:s}" is for another accumulator ({1:s}).'
+                .format(this_file_name, this_partial_dict[CLASS_NAME_KEY]))
+
+        result_dicts.append(this_partial_dict[RESULT_KEY])
+
+    accumulator_object.result_dict = parallel_driver.merge_results(
+        result_dicts, accumulator_object.merge_type_dict)
+    return accumulator_object
+
+
+def merge_daily_partials(spc_date_strings, accumulator_objects,
+                         top_partial_dir_name,
+                         input_fingerprint_function=None):
+    """Merges partial files for every working date into each accumulator.
+
+    :param spc_date_strings: 1-D list of SPC dates (format "yyyymmdd") in the
+        run.
+    :param accumulator_objects: 1-D list of `climatology_engine.Accumulator`
+        objects.
+    :param top_partial_dir_name: See doc for `find_partial_file`.
+    :param input_fingerprint_function: Same.
+    :return: accumulator_objects: Same as input, with results filled in.
+    :raises: ValueError: if any partial file is missing.
+    """
+
+    spc_date_strings = list(spc_date_strings)
+    file_names_by_accumulator = [
+        [find_partial_file(
+            top_partial_dir_name, a, spc_date_strings, i,
+            input_fingerprint_function=input_fingerprint_function)
+         for i in range(len(spc_date_strings))]
+        for a in accumulator_objects]
+
+    missing_file_names = [
+        f for these_file_names in file_names_by_accumulator
+        for f in these_file_names if not os.path.isfile(f)]
+    if len(missing_file_names) > 0:
+        raise ValueError(
+            '{0:d} partial files are missing, e.g., "{1:s}".'.format(
+                len(missing_file_names), missing_file_names[0]))
+
+    for this_accumulator_object, these_file_names in zip(
+            accumulator_objects, file_names_by_accumulator):
+        merge_partials(this_accumulator_object, these_file_names)
+
+    return accumulator_objects
+
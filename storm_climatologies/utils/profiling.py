@@ -0,0 +1,366 @@
+"""Per-stage timing and memory of climatology runs.
+
+The pipeline is instrumented with named stages (see `STAGE_NAMES`), e.g.:
+
+with profiling.stage(profiling.READ_STAGE, spc_date_string=d):
+    storm_object_table = ...
+
+Profiling is off by default, in which case `stage` returns one shared object
+whose `__enter__` and `__exit__` do nothing, so the cost is a function call
+per stage.  After `enable`, every stage records its wall time, the increase
+in peak resident set size (RSS) and the number of storm objects (for reads),
+under the SPC date being worked on.  Each record is also written as one JSON
+line to the log file, if any, and `StageProfiler.get_report` summarizes the
+run: time per stage, I/O versus CPU, objects per second and the slowest
+dates.
+"""
+
+import json
+import resource
+import sys
+import threading
+import timeit
+
+FILE_DISCOVERY_STAGE = 'file_discovery'
+READ_STAGE = 'read'
+ALIGN_STAGE = 'align'
+CONCAT_STAGE = 'concat'
+MATURITY_FILTER_STAGE = 'maturity_filter'
+PROJECTION_STAGE = 'projection'
+EVENT_EXTRACTION_STAGE = 'event_extraction'
+BINNING_STAGE = 'binning'
+OUTPUT_STAGE = 'output'
+WORKING_DATE_STAGE = 'working_date'
+
+STAGE_NAMES = [
+    FILE_DISCOVERY_STAGE, READ_STAGE, ALIGN_STAGE, CONCAT_STAGE,
+    MATURITY_FILTER_STAGE, PROJECTION_STAGE, EVENT_EXTRACTION_STAGE,
+    BINNING_STAGE, OUTPUT_STAGE
+]
+IO_STAGE_NAMES = [FILE_DISCOVERY_STAGE, READ_STAGE, OUTPUT_STAGE]
+
+SPC_DATE_KEY = 'spc_date_string'
+STAGE_KEY = 'stage'
+SECONDS_KEY = 'seconds'
+RSS_INCREASE_KEY = 'peak_rss_increase_mb'
+NUM_OBJECTS_KEY = 'num_storm_objects'
+THREAD_KEY = 'thread'
+
+DEFAULT_NUM_SLOWEST_DATES = 5
+
+_profiler_object = None
+
+
+def get_peak_rss_mb():
+    """Returns peak resident set size of this process so far.
+
+    :return: peak_rss_mb: Peak RSS (megabytes).
+    """
+
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == 'darwin':
+        return peak_rss / 1024. ** 2
+    return peak_rss / 1024.
+
+
+class _NullStage(object):
+    """Stage that records nothing (used while profiling is off)."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        return False
+
+    def set_num_objects(self, num_objects):
+        """Does nothing.
+
+        :param num_objects: Number of storm objects.
+        """
+
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+class _Stage(object):
+    """Times one stage and sends the record to a profiler."""
+
+    def __init__(self, profiler_object, stage_name, spc_date_string,
+                 num_objects):
+        self.profiler_object = profiler_object
+        self.stage_name = stage_name
+        self.spc_date_string = spc_date_string
+        self.num_objects = num_objects
+        self._start_time_sec = None
+        self._start_rss_mb = None
+
+    def __enter__(self):
+        self._start_rss_mb = get_peak_rss_mb()
+        self._start_time_sec = timeit.default_timer()
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        elapsed_time_sec = timeit.default_timer() - self._start_time_sec
+        self.profiler_object.record(
+            self.stage_name, elapsed_time_sec,
+            spc_date_string=self.spc_date_string,
+            rss_increase_mb=get_peak_rss_mb() - self._start_rss_mb,
+            num_objects=self.num_objects)
+        return False
+
+    def set_num_objects(self, num_objects):
+        """Sets number of storm objects handled by the stage.
+
+        :param num_objects: Number of storm objects.
+        """
+
+        self.num_objects = num_objects
+
+
+class StageProfiler(object):
+    """Collects stage records for one run."""
+
+    def __init__(self, log_file_name=None):
+        """Creates new profiler.
+
+        :param log_file_name: Path to log file, with one JSON record per line.
+            If None, records are kept only in memory.
+        """
+
+        self.log_file_name = log_file_name
+        self.spc_date_string = None
+        self.records = []
+        self._lock = threading.Lock()
+        self._log_file_handle = None
+        if log_file_name is not None:
+            self._log_file_handle = open(log_file_name, 'a')
+
+    def stage(self, stage_name, spc_date_string=None, num_objects=None):
+        """Returns context manager that times one stage.
+
+        :param stage_name: Stage name (usually in `STAGE_NAMES`).
+        :param spc_date_string: SPC date for the record.  If None, will use
+            the date being worked on (see `set_spc_date`).
+        :param num_objects: Number of storm objects handled by the stage (may
+            be None, or set later with `set_num_objects`).
+        :return: stage_object: Context manager.
+        """
+
+        if spc_date_string is None:
+            spc_date_string = self.spc_date_string
+        return _Stage(self, stage_name, spc_date_string, num_objects)
+
+    def record(self, stage_name, elapsed_time_sec, spc_date_string=None,
+               rss_increase_mb=0., num_objects=None):
+        """Adds one record.
+
+        :param stage_name: Stage name.
+        :param elapsed_time_sec: Wall time.
+        :param spc_date_string: See doc for `stage`.
+        :param rss_increase_mb: Increase in peak RSS (megabytes).
+        :param num_objects: See doc for `stage`.
+        """
+
+        if spc_date_string is None:
+            spc_date_string = self.spc_date_string
+
+        record_dict = {
+            SPC_DATE_KEY: spc_date_string,
+            STAGE_KEY: stage_name,
+            SECONDS_KEY: elapsed_time_sec,
+            RSS_INCREASE_KEY: rss_increase_mb,
+            NUM_OBJECTS_KEY: num_objects,
+            THREAD_KEY: threading.current_thread().name
+        }
+
+        with self._lock:
+            self.records.append(record_dict)
+            if self._log_file_handle is not None:
+                self._log_file_handle.write(json.dumps(record_dict) + '\n')
+
+    def close(self):
+        """Closes log file."""
+
+        with self._lock:
+            if self._log_file_handle is not None:
+                self._log_file_handle.close()
+                self._log_file_handle = None
+
+    def get_summary(self):
+        """Sums records by stage and by date.
+
+        :return: summary_dict: Dictionary with the following keys.
+        summary_dict['seconds_by_stage']: Dictionary of total time per stage
+            (excluding "working_date").
+        summary_dict['seconds_by_date']: Dictionary of total time per SPC
+            date, from "working_date" records.
+        summary_dict['num_objects_by_date']: Dictionary of storm objects read
+            per SPC date.
+        summary_dict['rss_increase_mb_by_stage']: Dictionary of the largest
+            increase in peak RSS per stage.
+        """
+
+        seconds_by_stage = {}
+        seconds_by_date = {}
+        num_objects_by_date = {}
+        rss_increase_mb_by_stage = {}
+
+        with self._lock:
+            these_records = list(self.records)
+
+        for this_record_dict in these_records:
+            this_stage_name = this_record_dict[STAGE_KEY]
+            this_spc_date_string = this_record_dict[SPC_DATE_KEY]
+
+            if this_stage_name == WORKING_DATE_STAGE:
+                seconds_by_date[this_spc_date_string] = (
+                    seconds_by_date.get(this_spc_date_string, 0.) +
+                    this_record_dict[SECONDS_KEY])
+                continue
+
+            seconds_by_stage[this_stage_name] = (
+                seconds_by_stage.get(this_stage_name, 0.) +
+                this_record_dict[SECONDS_KEY])
+            rss_increase_mb_by_stage[this_stage_name] = max([
+                rss_increase_mb_by_stage.get(this_stage_name, 0.),
+                this_record_dict[RSS_INCREASE_KEY]])
+
+            if (this_stage_name == READ_STAGE and
+                    this_record_dict[NUM_OBJECTS_KEY] is not None):
+                num_objects_by_date[this_spc_date_string] = (
+                    num_objects_by_date.get(this_spc_date_string, 0) +
+                    this_record_dict[NUM_OBJECTS_KEY])
+
+        return {
+            'seconds_by_stage': seconds_by_stage,
+            'seconds_by_date': seconds_by_date,
+            'num_objects_by_date': num_objects_by_date,
+            'rss_increase_mb_by_stage': rss_increase_mb_by_stage
+        }
+
+    def get_report(self, num_slowest_dates=DEFAULT_NUM_SLOWEST_DATES):
+        """Returns end-of-run report.
+
+        Reads on the prefetch thread overlap with work on the main thread, so
+        stage times may add up to more than the run time.
+
+        :param num_slowest_dates: Number of slowest dates to list.
+        :return: report_string: Multi-line string.
+        """
+
+        summary_dict = self.get_summary()
+        seconds_by_stage = summary_dict['seconds_by_stage']
+        seconds_by_date = summary_dict['seconds_by_date']
+        num_objects_by_date = summary_dict['num_objects_by_date']
+
+        total_stage_time_sec = max([sum(seconds_by_stage.values()), 1e-9])
+        run_time_sec = sum(seconds_by_date.values())
+        num_objects = sum(num_objects_by_date.values())
+
+        stage_names = (
+            [s for s in STAGE_NAMES if s in seconds_by_stage] +
+            sorted([s for s in seconds_by_stage if s not in STAGE_NAMES]))
+        report_lines = ['{0:<18s}{1:>12s}{2:>9s}{3:>16s}'.format(
+            'Stage', 'Seconds', '%', 'Peak RSS (MB)')]
+
+        for this_stage_name in stage_names:
+            report_lines.append(
+                '{0:<18s}{1:>12.3f}{2:>9.1f}{3:>16.1f}'.format(
+                    this_stage_name, seconds_by_stage[this_stage_name],
+                    100 * seconds_by_stage[this_stage_name] /
+                    total_stage_time_sec,
+                    summary_dict['rss_increase_mb_by_stage'][
+                        this_stage_name]))
+
+        io_time_sec = sum([
+            seconds_by_stage.get(s, 0.) for s in IO_STAGE_NAMES])
+        report_lines.append(
+            'I/O: {0:.3f} s ({1:.1f}%); CPU: {2:.3f} s ({3:.1f}%)'.format(
+                io_time_sec, 100 * io_time_sec / total_stage_time_sec,
+                total_stage_time_sec - io_time_sec,
+                100 * (1. - io_time_sec / total_stage_time_sec)))
+
+        if run_time_sec > 0:
+            report_lines.append(
+                '{0:d} storm objects in {1:d} dates, {2:.3f} s '
+                '({3:.0f} objects/s)'.format(
+                    num_objects, len(seconds_by_date), run_time_sec,
+                    num_objects / run_time_sec))
+
+        slowest_dates = sorted(
+            seconds_by_date.keys(), key=lambda d: -seconds_by_date[d]
+        )[:num_slowest_dates]
+        if len(slowest_dates) > 0:
+            report_lines.append('Slowest dates:')
+        for this_spc_date_string in slowest_dates:
+            report_lines.append('  {0:s}: {1:.3f} s ({2:d} objects)'.format(
+                this_spc_date_string, seconds_by_date[this_spc_date_string],
+                num_objects_by_date.get(this_spc_date_string, 0)))
+
+        return '\n'.join(report_lines)
+
+
+def enable(log_file_name=None):
+    """Turns profiling on for this process.
+
+    :param log_file_name: See doc for `StageProfiler.__init__`.
+    :return: profiler_object: Instance of `StageProfiler`.
+    """
+
+    global _profiler_object
+    disable()
+    _profiler_object = StageProfiler(log_file_name=log_file_name)
+    return _profiler_object
+
+
+def disable():
+    """Turns profiling off and closes the log file.
+
+    :return: profiler_object: The `StageProfiler` that was on (None if
+        profiling was off).
+    """
+
+    global _profiler_object
+    profiler_object = _profiler_object
+    _profiler_object = None
+    if profiler_object is not None:
+        profiler_object.close()
+
+    return profiler_object
+
+
+def get_profiler():
+    """Returns the active profiler.
+
+    :return: profiler_object: Instance of `StageProfiler`, or None if
+        profiling is off.
+    """
+
+    return _profiler_object
+
+
+def stage(stage_name, spc_date_string=None, num_objects=None):
+    """Returns context manager that times one stage, if profiling is on.
+
+    :param stage_name: See doc for `StageProfiler.stage`.
+    :param spc_date_string: Same.
+    :param num_objects: Same.
+    :return: stage_object: Context manager.
+    """
+
+    if _profiler_object is None:
+        return _NULL_STAGE
+    return _profiler_object.stage(
+        stage_name, spc_date_string=spc_date_string, num_objects=num_objects)
+
+
+def set_spc_date(spc_date_string):
+    """Sets SPC date for records that do not give one.
+
+    :param spc_date_string: SPC date (format "yyyymmdd") being worked on.
+    """
+
+    if _profiler_object is not None:
+        _profiler_object.spc_date_string = spc_date_string
@@ -0,0 +1,646 @@
+"""Per-storm catalog, built once from the archive.
+
+Lifetime, area, distance, speed, velocity and birth/death times are all
+per-storm summaries, which the climatologies recompute from storm objects on
+every run.  The catalog has one row per storm, built by streaming the archive
+one SPC date at a time (each date is read once, and storms that cross date
+boundaries are followed as in `storm_registry`):
+
+- storm ID;
+- birth (first object) time, latitude and longitude;
+- death (last object) time, latitude and longitude;
+- lifetime (age of the last object);
+- time of the first object >= `min_age_sec` old (-1 if there is none);
+- number of storm objects;
+- mean east and north velocity, and mean speed, over all objects;
+- displacement (first to last centroid) and path length;
+- maximum polygon area (NaN if polygons are not read).
+
+The catalog is written as one numpy file per column (memory-mapped when read),
+with rows sorted by birth time, so that any period is one contiguous slice,
+plus a permutation that sorts rows by storm ID:
+
+{catalog_dir_name}/{column_name}.npy
+{catalog_dir_name}/storm_id_order.npy
+{catalog_dir_name}/metadata.json
+
+`get_product_result` then makes the per-storm and temporal birth/death
+products for a period in milliseconds.  Per-storm products have one value per
+storm, so they are kept under catalog column names, not the keys of
+`accumulators` (see doc for `get_product_result`).
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import numpy
+from gewittergefahr.gg_utils import time_conversion
+from storm_climatologies.utils import accumulators
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import great_circle
+from storm_climatologies.utils import polygon_areas
+from storm_climatologies.utils import storm_registry
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import streaming_stats
+from storm_climatologies.utils import temporal_bins
+from storm_climatologies.utils import track_index
+
+MIN_AGE_SEC = storm_registry.MIN_AGE_SEC
+DEFAULT_MAX_GAP_SEC = storm_registry.DEFAULT_MAX_GAP_SEC
+
+STORM_ID_COLUMN = storm_table.STORM_ID_COLUMN
+TIME_COLUMN = storm_table.TIME_COLUMN
+AGE_COLUMN = storm_table.AGE_COLUMN
+CENTROID_LAT_COLUMN = storm_table.CENTROID_LAT_COLUMN
+CENTROID_LNG_COLUMN = storm_table.CENTROID_LNG_COLUMN
+EAST_VELOCITY_COLUMN = storm_table.EAST_VELOCITY_COLUMN
+NORTH_VELOCITY_COLUMN = storm_table.NORTH_VELOCITY_COLUMN
+POLYGON_COLUMN = accumulators.POLYGON_COLUMN
+
+BIRTH_TIME_COLUMN = 'birth_time_unix_sec'
+BIRTH_LAT_COLUMN = 'birth_lat_deg'
+BIRTH_LNG_COLUMN = 'birth_lng_deg'
+DEATH_TIME_COLUMN = 'death_time_unix_sec'
+DEATH_LAT_COLUMN = 'death_lat_deg'
+DEATH_LNG_COLUMN = 'death_lng_deg'
+LIFETIME_COLUMN = 'lifetime_sec'
+MATURE_TIME_COLUMN = 'first_mature_time_unix_sec'
+NUM_OBJECTS_COLUMN = 'num_storm_objects'
+MEAN_EAST_VELOCITY_COLUMN = 'mean_east_velocity_m_s01'
+MEAN_NORTH_VELOCITY_COLUMN = 'mean_north_velocity_m_s01'
+MEAN_SPEED_COLUMN = 'mean_speed_m_s01'
+DISPLACEMENT_COLUMN = 'displacement_km'
+PATH_LENGTH_COLUMN = 'path_length_km'
+MAX_AREA_COLUMN = 'max_area_km2'
+
+CATALOG_COLUMNS = [
+    STORM_ID_COLUMN, BIRTH_TIME_COLUMN, BIRTH_LAT_COLUMN, BIRTH_LNG_COLUMN,
+    DEATH_TIME_COLUMN, DEATH_LAT_COLUMN, DEATH_LNG_COLUMN, LIFETIME_COLUMN,
+    MATURE_TIME_COLUMN, NUM_OBJECTS_COLUMN, MEAN_EAST_VELOCITY_COLUMN,
+    MEAN_NORTH_VELOCITY_COLUMN, MEAN_SPEED_COLUMN, DISPLACEMENT_COLUMN,
+    PATH_LENGTH_COLUMN, MAX_AREA_COLUMN
+]
+
+# Running sums kept for open storms only.
+EAST_VELOCITY_SUM_KEY = 'east_velocity_sum_m_s01'
+NORTH_VELOCITY_SUM_KEY = 'north_velocity_sum_m_s01'
+SPEED_SUM_KEY = 'speed_sum_m_s01'
+
+STORM_ID_ORDER_FILE_NAME = 'storm_id_order.npy'
+METADATA_FILE_NAME = 'metadata.json'
+
+PRODUCT_NAMES = accumulators.PER_STORM_PRODUCT_NAMES + [
+    'temporal_birth', 'temporal_death']
+
+
+class CatalogBuilder(object):
+    """Builds catalog rows from SPC dates fed in order."""
+
+    def __init__(self, min_age_sec=MIN_AGE_SEC,
+                 max_gap_sec=DEFAULT_MAX_GAP_SEC,
+                 area_method=polygon_areas.EQUAL_AREA_METHOD,
+                 storm_id_encoder=None):
+        """Creates new builder.
+
+        :param min_age_sec: Minimum age of a mature storm object.
+        :param max_gap_sec: See doc for `storm_registry.StormRegistry`.
+        :param area_method: See doc for `polygon_areas.get_areas_m2`.
+        :param storm_id_encoder: Instance of `storm_table.StormIdEncoder` that
+            encoded storm IDs in the tables, or None if IDs are strings.  Codes
+            are decoded in `get_catalog`, since they mean nothing outside this
+            process.
+        """
+
+        self.min_age_sec = min_age_sec
+        self.max_gap_sec = max_gap_sec
+        self.area_method = area_method
+        self.storm_id_encoder = storm_id_encoder
+        self.clock_unix_time_sec = None
+        self.open_storm_dict = None
+        self._closed_storm_dicts = []
+
+    def __len__(self):
+        if self.open_storm_dict is None:
+            return 0
+        return len(self.open_storm_dict[STORM_ID_COLUMN])
+
+    def _get_storms_one_date(self, storm_object_table):
+        """Summarizes each storm in one date's table.
+
+        :param storm_object_table: pandas DataFrame or
+            `storm_table.StormTable`.
+        :return: storm_dict: Dictionary in the format of `open_storm_dict`.
+        """
+
+        track_index_object = track_index.TrackIndex.from_table(
+            storm_object_table)
+        num_storms = len(track_index_object)
+
+        unix_times_sec = storm_table.get_column(
+            storm_object_table, TIME_COLUMN)
+        ages_sec = storm_table.get_column(storm_object_table, AGE_COLUMN)
+        latitudes_deg = storm_table.get_column(
+            storm_object_table, CENTROID_LAT_COLUMN)
+        longitudes_deg = storm_table.get_column(
+            storm_object_table, CENTROID_LNG_COLUMN)
+
+        mature_times_unix_sec = numpy.where(
+            ages_sec >= self.min_age_sec, unix_times_sec, numpy.iinfo(int).max)
+        first_mature_times_unix_sec = track_index_object.reduce(
+            mature_times_unix_sec, numpy.minimum)
+
+        storm_dict = {
+            STORM_ID_COLUMN: track_index_object.unique_storm_ids,
+            BIRTH_TIME_COLUMN: track_index_object.first(unix_times_sec),
+            BIRTH_LAT_COLUMN: track_index_object.first(latitudes_deg),
+            BIRTH_LNG_COLUMN: track_index_object.first(longitudes_deg),
+            DEATH_TIME_COLUMN: track_index_object.last(unix_times_sec),
+            DEATH_LAT_COLUMN: track_index_object.last(latitudes_deg),
+            DEATH_LNG_COLUMN: track_index_object.last(longitudes_deg),
+            LIFETIME_COLUMN: track_index_object.last(ages_sec),
+            MATURE_TIME_COLUMN: numpy.where(
+                first_mature_times_unix_sec == numpy.iinfo(int).max, -1,
+                first_mature_times_unix_sec),
+            NUM_OBJECTS_COLUMN: track_index_object.num_objects_by_storm,
+            PATH_LENGTH_COLUMN: great_circle.get_path_lengths_km(
+                track_index_object, latitudes_deg, longitudes_deg)
+        }
+
+        if (EAST_VELOCITY_COLUMN in storm_object_table and
+                NORTH_VELOCITY_COLUMN in storm_object_table):
+            east_velocities_m_s01 = storm_table.get_column(
+                storm_object_table, EAST_VELOCITY_COLUMN).astype(float)
+            north_velocities_m_s01 = storm_table.get_column(
+                storm_object_table, NORTH_VELOCITY_COLUMN).astype(float)
+
+            storm_dict[EAST_VELOCITY_SUM_KEY] = track_index_object.reduce(
+                east_velocities_m_s01, numpy.add)
+            storm_dict[NORTH_VELOCITY_SUM_KEY] = track_index_object.reduce(
+                north_velocities_m_s01, numpy.add)
+            storm_dict[SPEED_SUM_KEY] = track_index_object.reduce(
+                numpy.sqrt(east_velocities_m_s01 ** 2 +
+                           north_velocities_m_s01 ** 2), numpy.add)
+        else:
+            for this_key in [EAST_VELOCITY_SUM_KEY, NORTH_VELOCITY_SUM_KEY,
+                             SPEED_SUM_KEY]:
+                storm_dict[this_key] = numpy.full(num_storms, numpy.nan)
+
+        if POLYGON_COLUMN in storm_object_table:
+            storm_dict[MAX_AREA_COLUMN] = track_index_object.reduce(
+                polygon_areas.get_polygon_areas_km2(
+                    storm_table.get_column(storm_object_table, POLYGON_COLUMN),
+                    method=self.area_method),
+                numpy.maximum)
+        else:
+            storm_dict[MAX_AREA_COLUMN] = numpy.full(num_storms, numpy.nan)
+
+        return storm_dict
+
+    def update(self, storm_object_table):
+        """Adds one SPC date.
+
+        Dates must be added in order, each exactly once.
+
+        :param storm_object_table: pandas DataFrame or
+            `storm_table.StormTable` with storm objects from one date.
+        """
+
+        if len(storm_table.get_column(storm_object_table, TIME_COLUMN)) == 0:
+            self._close()
+            return
+
+        new_storm_dict = self._get_storms_one_date(storm_object_table)
+        this_max_time_unix_sec = numpy.max(new_storm_dict[DEATH_TIME_COLUMN])
+        if (self.clock_unix_time_sec is None or
+                this_max_time_unix_sec > self.clock_unix_time_sec):
+            self.clock_unix_time_sec = this_max_time_unix_sec
+
+        if self.open_storm_dict is None:
+            self.open_storm_dict = storm_registry.select_storms(
+                new_storm_dict, numpy.array([], dtype=int))
+
+        open_storm_dict = self.open_storm_dict
+        open_indices, is_open = storm_registry.match_storm_ids(
+            open_storm_dict[STORM_ID_COLUMN], new_storm_dict[STORM_ID_COLUMN])
+        continuing_dict = storm_registry.select_storms(new_storm_dict, is_open)
+        open_indices = open_indices[is_open]
+
+        # The segment from the last object of the previous date to the first
+        # of this date belongs to the path.
+        open_storm_dict[PATH_LENGTH_COLUMN][open_indices] += (
+            continuing_dict[PATH_LENGTH_COLUMN] +
+            great_circle.get_distances_km(
+                open_storm_dict[DEATH_LAT_COLUMN][open_indices],
+                open_storm_dict[DEATH_LNG_COLUMN][open_indices],
+                continuing_dict[BIRTH_LAT_COLUMN],
+                continuing_dict[BIRTH_LNG_COLUMN]))
+
+        for this_key in [DEATH_TIME_COLUMN, DEATH_LAT_COLUMN, DEATH_LNG_COLUMN,
+                         LIFETIME_COLUMN]:
+            open_storm_dict[this_key][open_indices] = continuing_dict[this_key]
+
+        for this_key in [NUM_OBJECTS_COLUMN, EAST_VELOCITY_SUM_KEY,
+                         NORTH_VELOCITY_SUM_KEY, SPEED_SUM_KEY]:
+            open_storm_dict[this_key][open_indices] += (
+                continuing_dict[this_key])
+
+        open_storm_dict[MAX_AREA_COLUMN][open_indices] = numpy.fmax(
+            open_storm_dict[MAX_AREA_COLUMN][open_indices],
+            continuing_dict[MAX_AREA_COLUMN])
+
+        these_mature_times_unix_sec = open_storm_dict[MATURE_TIME_COLUMN][
+            open_indices]
+        open_storm_dict[MATURE_TIME_COLUMN][open_indices] = numpy.where(
+            these_mature_times_unix_sec < 0,
+            continuing_dict[MATURE_TIME_COLUMN], these_mature_times_unix_sec)
+
+        self.open_storm_dict = storm_registry.add_storms(
+            open_storm_dict, storm_registry.select_storms(
+                new_storm_dict, numpy.invert(is_open)))
+        self._close()
+
+    def _close(self, close_all=False):
+        """Moves storms not seen for more than `max_gap_sec` to the catalog.
+
+        :param close_all: Boolean flag.  If True, will close all storms.
+        """
+
+        if self.open_storm_dict is None:
+            return
+
+        if close_all:
+            close_flags = numpy.full(len(self), True, dtype=bool)
+        else:
+            close_flags = (
+                self.open_storm_dict[DEATH_TIME_COLUMN] <
+                self.clock_unix_time_sec - self.max_gap_sec)
+
+        if numpy.any(close_flags):
+            self._closed_storm_dicts.append(storm_registry.select_storms(
+                self.open_storm_dict, close_flags))
+            self.open_storm_dict = storm_registry.select_storms(
+                self.open_storm_dict, numpy.invert(close_flags))
+
+    def get_catalog(self):
+        """Closes all storms and returns the catalog.
+
+        :return: catalog_dict: Dictionary, where each key is in
+            `CATALOG_COLUMNS` and each value is a 1-D numpy array, with rows
+            sorted by birth time, then storm ID.  Storm IDs are strings.
+        """
+
+        self._close(close_all=True)
+        if len(self._closed_storm_dicts) == 0:
+            return dict([(c, numpy.array([])) for c in CATALOG_COLUMNS])
+
+        storm_dict = dict([
+            (k, numpy.concatenate([d[k] for d in self._closed_storm_dicts]))
+            for k in self._closed_storm_dicts[0]])
+        self._closed_storm_dicts = [storm_dict]
+
+        num_objects_by_storm = storm_dict[NUM_OBJECTS_COLUMN].astype(float)
+        storm_dict[MEAN_EAST_VELOCITY_COLUMN] = (
+            storm_dict[EAST_VELOCITY_SUM_KEY] / num_objects_by_storm)
+        storm_dict[MEAN_NORTH_VELOCITY_COLUMN] = (
+            storm_dict[NORTH_VELOCITY_SUM_KEY] / num_objects_by_storm)
+        storm_dict[MEAN_SPEED_COLUMN] = (
+            storm_dict[SPEED_SUM_KEY] / num_objects_by_storm)
+        storm_dict[DISPLACEMENT_COLUMN] = great_circle.get_distances_km(
+            storm_dict[BIRTH_LAT_COLUMN], storm_dict[BIRTH_LNG_COLUMN],
+            storm_dict[DEATH_LAT_COLUMN], storm_dict[DEATH_LNG_COLUMN])
+        if self.storm_id_encoder is not None:
+            storm_dict[STORM_ID_COLUMN] = self.storm_id_encoder.decode(
+                storm_dict[STORM_ID_COLUMN])
+
+        sort_indices = numpy.argsort(
+            storm_dict[STORM_ID_COLUMN], kind='mergesort')
+        sort_indices = sort_indices[numpy.argsort(
+            storm_dict[BIRTH_TIME_COLUMN][sort_indices], kind='mergesort')]
+        return dict([
+            (c, storm_dict[c][sort_indices]) for c in CATALOG_COLUMNS])
+
+
+def build_catalog(spc_date_strings, include_areas=True,
+                  min_age_sec=MIN_AGE_SEC, max_gap_sec=DEFAULT_MAX_GAP_SEC,
+                  area_method=polygon_areas.EQUAL_AREA_METHOD,
+                  **loader_kwargs):
+    """Builds the catalog by reading each SPC date once, in order.
+
+    :param spc_date_strings: 1-D list of consecutive SPC dates (format
+        "yyyymmdd").
+    :param include_areas: Boolean flag.  If True, will read polygons and fill
+        `MAX_AREA_COLUMN`.
+    :param min_age_sec: See doc for `CatalogBuilder.__init__`.
+    :param max_gap_sec: Same.
+    :param area_method: Same.
+    :param loader_kwargs: Keyword arguments passed to `day_loader.DayLoader`
+        (e.g., top_processed_dir_name, tracking_scale_metres2, read_function,
+        storm_id_encoder).
+    :return: catalog_dict: See doc for `CatalogBuilder.get_catalog`.
+    """
+
+    column_names = [STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN,
+                    CENTROID_LAT_COLUMN, CENTROID_LNG_COLUMN,
+                    EAST_VELOCITY_COLUMN, NORTH_VELOCITY_COLUMN]
+    if include_areas:
+        column_names.append(POLYGON_COLUMN)
+
+    day_loader_object = day_loader.DayLoader(
+        spc_date_strings=spc_date_strings, column_names=column_names,
+        **loader_kwargs)
+    catalog_builder_object = CatalogBuilder(
+        min_age_sec=min_age_sec, max_gap_sec=max_gap_sec,
+        area_method=area_method,
+        storm_id_encoder=loader_kwargs.get('storm_id_encoder'))
+
+    for i in range(len(spc_date_strings)):
+        print('Adding SPC date "{0:s}" to storm catalog...'.format(
+            spc_date_strings[i]))
+
+        if i + 1 < len(spc_date_strings):
+            these_prefetch_indices = [i + 1]
+        else:
+            these_prefetch_indices = None
+
+        catalog_builder_object.update(day_loader_object.get_multiday_table(
+            [i], prefetch_date_indices=these_prefetch_indices))
+
+    day_loader_object.clear()
+    return catalog_builder_object.get_catalog()
+
+
+def write_catalog(catalog_dict, catalog_dir_name, metadata_dict=None):
+    """Writes catalog to a directory, one numpy file per column.
+
+    Files are written to a temporary directory, which is then renamed, so that
+    a crash never leaves a partial catalog.
+
+    :param catalog_dict: Dictionary created by `CatalogBuilder.get_catalog`.
+    :param catalog_dir_name: Path to output directory.  An existing catalog
+        there is replaced.
+    :param metadata_dict: Dictionary of JSON-serializable settings to keep with
+        the catalog (e.g., dates and tracking scale).  May be None.
+    """
+
+    parent_dir_name = os.path.dirname(os.path.abspath(catalog_dir_name))
+    if not os.path.isdir(parent_dir_name):
+        os.makedirs(parent_dir_name)
+
+    temp_dir_name = tempfile.mkdtemp(dir=parent_dir_name)
+    storm_ids = numpy.array(
+        [s.encode('utf-8') for s in catalog_dict[STORM_ID_COLUMN]],
+        dtype=bytes)
+
+    for this_column in CATALOG_COLUMNS:
+        if this_column == STORM_ID_COLUMN:
+            these_values = storm_ids
+        else:
+            these_values = numpy.asarray(catalog_dict[this_column])
+
+        numpy.save(os.path.join(temp_dir_name, this_column + '.npy'),
+                   these_values)
+
+    numpy.save(os.path.join(temp_dir_name, STORM_ID_ORDER_FILE_NAME),
+               numpy.argsort(storm_ids, kind='mergesort'))
+
+    if metadata_dict is None:
+        metadata_dict = {}
+    metadata_dict = dict(metadata_dict)
+    metadata_dict['num_storms'] = len(storm_ids)
+    metadata_dict['column_names'] = CATALOG_COLUMNS
+    with open(os.path.join(temp_dir_name, METADATA_FILE_NAME), 'w') as f:
+        json.dump(metadata_dict, f)
+
+    if os.path.isdir(catalog_dir_name):
+        shutil.rmtree(catalog_dir_name)
+    os.rename(temp_dir_name, catalog_dir_name)
+
+
+def read_metadata(catalog_dir_name):
+    """Reads catalog metadata.
+
+    :param catalog_dir_name: Path to catalog directory.
+    :return: metadata_dict: Dictionary written by `write_catalog`.
+    """
+
+    with open(os.path.join(catalog_dir_name, METADATA_FILE_NAME)) as f:
+        return json.load(f)
+
+
+def read_catalog(catalog_dir_name, column_names=None):
+    """Memory-maps columns of the catalog.
+
+    :param catalog_dir_name: Path to catalog directory.
+    :param column_names: 1-D list of columns to read.  If None, will read all
+        columns except storm ID (decoding IDs is the slowest part of a read).
+    :return: catalog_dict: Dictionary, where each key is a column name.
+        Storm IDs are strings; other columns are read-only, memory-mapped
+        numpy arrays.
+    """
+
+    if column_names is None:
+        column_names = [c for c in CATALOG_COLUMNS if c != STORM_ID_COLUMN]
+
+    catalog_dict = {}
+    for this_column in column_names:
+        these_values = numpy.load(
+            os.path.join(catalog_dir_name, this_column + '.npy'),
+            mmap_mode='r')
+
+        if this_column == STORM_ID_COLUMN:
+            these_values = numpy.char.decode(
+                these_values, 'utf-8').astype(object)
+        catalog_dict[this_column] = these_values
+
+    return catalog_dict
+
+
+def find_storm(catalog_dir_name, storm_id):
+    """Finds the row of one storm.
+
+    :param catalog_dir_name: Path to catalog directory.
+    :param storm_id: Storm ID.
+    :return: row_index: Row index, or -1 if the storm is not in the catalog.
+    """
+
+    storm_ids = numpy.load(
+        os.path.join(catalog_dir_name, STORM_ID_COLUMN + '.npy'),
+        mmap_mode='r')
+    storm_id_order = numpy.load(
+        os.path.join(catalog_dir_name, STORM_ID_ORDER_FILE_NAME),
+        mmap_mode='r')
+
+    storm_id = storm_id.encode('utf-8')
+    sorted_index = numpy.searchsorted(
+        storm_ids, storm_id, sorter=storm_id_order)
+    if (sorted_index < len(storm_id_order) and
+            storm_ids[storm_id_order[sorted_index]] == storm_id):
+        return int(storm_id_order[sorted_index])
+    return -1
+
+
+def get_time_range(first_spc_date_string, last_spc_date_string):
+    """Returns first and last time in a range of SPC dates.
+
+    :param first_spc_date_string: First SPC date (format "yyyymmdd").
+    :param last_spc_date_string: Last SPC date (format "yyyymmdd").
+    :return: first_time_unix_sec: First time.
+    :return: last_time_unix_sec: Last time.
+    """
+
+    return (time_conversion.get_start_of_spc_date(first_spc_date_string),
+            time_conversion.get_end_of_spc_date(last_spc_date_string))
+
+
+def find_rows(catalog_dict, first_time_unix_sec=None, last_time_unix_sec=None,
+              time_column=BIRTH_TIME_COLUMN, mature_storms_only=True):
+    """Finds storms with an event in a period.
+
+    :param catalog_dict: Dictionary created by `read_catalog`, with
+        `time_column` (and `MATURE_TIME_COLUMN`, if `mature_storms_only`).
+    :param first_time_unix_sec: Start of period.  If None, there is no start.
+    :param last_time_unix_sec: End of period.  If None, there is no end.
+    :param time_column: Time column that must be in the period.  Rows are
+        sorted by birth time, so this is fastest with `BIRTH_TIME_COLUMN`.
+    :param mature_storms_only: Boolean flag.  If True, will keep only storms
+        that have an object >= `min_age_sec` old.
+    :return: row_indices: 1-D numpy array of row indices, sorted.
+    """
+
+    unix_times_sec = catalog_dict[time_column]
+    if time_column == BIRTH_TIME_COLUMN:
+        first_row = 0
+        last_row = len(unix_times_sec)
+        if first_time_unix_sec is not None:
+            first_row = numpy.searchsorted(
+                unix_times_sec, first_time_unix_sec, side='left')
+        if last_time_unix_sec is not None:
+            last_row = numpy.searchsorted(
+                unix_times_sec, last_time_unix_sec, side='right')
+
+        row_indices = numpy.arange(first_row, max([first_row, last_row]))
+    else:
+        keep_flags = numpy.full(len(unix_times_sec), True, dtype=bool)
+        if first_time_unix_sec is not None:
+            keep_flags = numpy.logical_and(
+                keep_flags, unix_times_sec >= first_time_unix_sec)
+        if last_time_unix_sec is not None:
+            keep_flags = numpy.logical_and(
+                keep_flags, unix_times_sec <= last_time_unix_sec)
+
+        row_indices = numpy.where(keep_flags)[0]
+
+    if mature_storms_only:
+        row_indices = row_indices[
+            catalog_dict[MATURE_TIME_COLUMN][row_indices] >= 0]
+
+    return row_indices
+
+
+def _get_summary(values, histogram_bin_edges):
+    """Summarizes values in the format of per-storm accumulators.
+
+    :param values: 1-D numpy array.
+    :param histogram_bin_edges: See doc for
+        `streaming_stats.SummaryStatistics`.
+    :return: summary_object: Instance of `streaming_stats.SummaryStatistics`.
+    """
+
+    summary_object = streaming_stats.SummaryStatistics(histogram_bin_edges)
+    values = numpy.asarray(values, dtype=float)
+    summary_object.update(values[numpy.invert(numpy.isnan(values))])
+    return summary_object
+
+
+def get_product_result(catalog_dict, product_name, first_time_unix_sec=None,
+                       last_time_unix_sec=None, bin_types=None):
+    """Makes one product for a period from the catalog.
+
+    Storms are those with an object >= `min_age_sec` old, selected by death
+    time for lifetime and temporal death, by first mature time for temporal
+    birth and by birth time otherwise.  Temporal products have the keys of the
+    matching accumulator.
+
+    Per-storm products are not those of the accumulators, so each key is the
+    catalog column with the values (e.g., `MEAN_SPEED_COLUMN`), not the key of
+    the accumulator.  They differ as follows:
+
+    - there is one value per storm, whereas `SpeedAccumulator` repeats each
+      storm's mean once per mature object and `VelocityAccumulator` once per
+      object of a mature storm, which weights long-lived storms more;
+    - a storm is mature if an object is >= `min_age_sec` old, whereas
+      `AreaAccumulator` and `DistanceAccumulator` need an object > 900 seconds
+      old;
+    - means are over all objects of a storm, mature or not, and every mature
+      storm has one, whereas `SpeedAccumulator` adds nothing for the objects
+      of a storm that are < 900 seconds old.
+
+    :param catalog_dict: Dictionary created by `read_catalog`.
+    :param product_name: Product name (in `PRODUCT_NAMES`).
+    :param first_time_unix_sec: See doc for `find_rows`.
+    :param last_time_unix_sec: Same.
+    :param bin_types: Temporal bins for "temporal_birth" and "temporal_death"
+        (see `temporal_bins.get_histogram`).  Default is hour of the day.
+    :return: result_dict: Dictionary with the product.
+    :raises: ValueError: if `product_name` is not in `PRODUCT_NAMES`.
+    """
+
+    if product_name not in PRODUCT_NAMES:
+        raise ValueError(
+            'Product ("{0:s}") must be in the following list:\n{1:s}'.format(
+                product_name, str(PRODUCT_NAMES)))
+
+    if product_name in ['lifetime', 'temporal_death']:
+        time_column = DEATH_TIME_COLUMN
+    elif product_name == 'temporal_birth':
+        time_column = MATURE_TIME_COLUMN
+    else:
+        time_column = BIRTH_TIME_COLUMN
+
+    row_indices = find_rows(
+        catalog_dict, first_time_unix_sec=first_time_unix_sec,
+        last_time_unix_sec=last_time_unix_sec, time_column=time_column)
+
+    if product_name in ['temporal_birth', 'temporal_death']:
+        if bin_types is None:
+            bin_types = [temporal_bins.HOUR_BIN]
+        if bin_types == [temporal_bins.HOUR_BIN]:
+            count_key = accumulators.HOURLY_COUNT_KEY
+        else:
+            count_key = accumulators.TEMPORAL_COUNT_KEY
+
+        return {count_key: temporal_bins.get_histogram(
+            numpy.asarray(catalog_dict[time_column])[row_indices], bin_types)}
+
+    column_by_key = {
+        'lifetime': {
+            accumulators.LifetimeAccumulator.LIFETIME_KEY: LIFETIME_COLUMN},
+        'area': {accumulators.AreaAccumulator.AREA_KEY: MAX_AREA_COLUMN},
+        'distance': {
+            accumulators.DistanceAccumulator.DISTANCE_KEY: DISPLACEMENT_COLUMN,
+            accumulators.DistanceAccumulator.PATH_LENGTH_KEY:
+                PATH_LENGTH_COLUMN
+        },
+        'speed': {accumulators.SpeedAccumulator.SPEED_KEY: MEAN_SPEED_COLUMN},
+        'velocity': {
+            accumulators.VelocityAccumulator.EAST_VELOCITY_KEY:
+                MEAN_EAST_VELOCITY_COLUMN,
+            accumulators.VelocityAccumulator.NORTH_VELOCITY_KEY:
+                MEAN_NORTH_VELOCITY_COLUMN
+        }
+    }[product_name]
+
+    accumulator_class = dict(zip(
+        accumulators.PER_STORM_PRODUCT_NAMES,
+        [accumulators.LifetimeAccumulator, accumulators.AreaAccumulator,
+         accumulators.DistanceAccumulator, accumulators.SpeedAccumulator,
+         accumulators.VelocityAccumulator]))[product_name]
+
+    # Histograms have the bins of the accumulator, but keys are catalog
+    # columns, since the values are not the same.
+    return dict([
+        (c, _get_summary(
+            numpy.asarray(catalog_dict[c])[row_indices],
+            accumulator_class.histogram_bin_edges_by_key.get(k)))
+        for k, c in column_by_key.items()])
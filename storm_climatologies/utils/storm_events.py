@@ -0,0 +1,123 @@
+"""Vectorized extraction of storm births and deaths.
+
+The birth of a storm is its first storm object in the table and the death is
+its last.  Both are found with one `numpy.unique` call, and the "last 24 hours"
+window used to avoid double-counting storms in overlapping date windows is one
+array comparison.  All functions work on a pandas DataFrame or a
+`storm_table.StormTable`.
+"""
+
+import numpy
+from storm_climatologies.utils import storm_table
+
+BIRTH_EVENT_TYPE = 'birth'
+DEATH_EVENT_TYPE = 'death'
+VALID_EVENT_TYPES = [BIRTH_EVENT_TYPE, DEATH_EVENT_TYPE]
+
+MIN_AGE_SEC = 900
+SECONDS_PER_DAY = 86400
+
+ROW_INDEX_KEY = 'row_indices'
+EVENT_COLUMNS = [
+    storm_table.STORM_ID_COLUMN, storm_table.TIME_COLUMN,
+    storm_table.AGE_COLUMN, storm_table.CENTROID_LAT_COLUMN,
+    storm_table.CENTROID_LNG_COLUMN
+]
+
+
+def find_first_rows(storm_ids):
+    """Finds first row of each storm.
+
+    :param storm_ids: 1-D numpy array of storm IDs.
+    :return: row_indices: 1-D numpy array of row indices, one per storm, in
+        order of sorted storm ID.
+    """
+
+    _, row_indices = numpy.unique(numpy.asarray(storm_ids), return_index=True)
+    return row_indices
+
+
+def find_last_rows(storm_ids):
+    """Finds last row of each storm.
+
+    :param storm_ids: 1-D numpy array of storm IDs.
+    :return: row_indices: 1-D numpy array of row indices, one per storm, in
+        order of sorted storm ID.
+    """
+
+    storm_ids = numpy.asarray(storm_ids)
+    _, reversed_row_indices = numpy.unique(storm_ids[::-1], return_index=True)
+    return len(storm_ids) - 1 - reversed_row_indices
+
+
+def get_events(storm_object_table, event_type, mature_storms_only=False,
+               min_age_sec=MIN_AGE_SEC):
+    """Finds birth or death of each storm.
+
+    E = number of events
+
+    :param storm_object_table: pandas DataFrame or `storm_table.StormTable`.
+    :param event_type: Either "birth" or "death".
+    :param mature_storms_only: Boolean flag.  If True, only storms with at
+        least one object >= `min_age_sec` old are kept.
+    :param min_age_sec: See above.
+    :return: event_dict: Dictionary with the following keys.
+    event_dict['row_indices']: length-E numpy array of rows in
+        `storm_object_table`.
+    event_dict[column_name]: length-E numpy array, for each column in
+        `EVENT_COLUMNS` that is in the table.
+    """
+
+    if event_type not in VALID_EVENT_TYPES:
+        raise ValueError(
+            'Event type ("{0:s}") must be in the following list:\n{1:s}'
+            .format(event_type, str(VALID_EVENT_TYPES)))
+
+    storm_ids = storm_table.get_column(
+        storm_object_table, storm_table.STORM_ID_COLUMN)
+
+    if event_type == BIRTH_EVENT_TYPE:
+        row_indices = find_first_rows(storm_ids)
+    else:
+        row_indices = find_last_rows(storm_ids)
+
+    if mature_storms_only:
+        # `numpy.isin` on string IDs compares every pair, so flag storms
+        # through their index in the sorted unique IDs instead.
+        storm_index_by_row = numpy.unique(
+            numpy.asarray(storm_ids), return_inverse=True)[1].ravel()
+        mature_flag_by_storm = numpy.bincount(
+            storm_index_by_row, weights=storm_table.get_column(
+                storm_object_table, storm_table.AGE_COLUMN) >= min_age_sec,
+            minlength=len(row_indices)) > 0
+        row_indices = row_indices[
+            mature_flag_by_storm[storm_index_by_row[row_indices]]]
+
+    event_dict = {ROW_INDEX_KEY: row_indices}
+    for this_column in EVENT_COLUMNS:
+        if this_column in storm_object_table:
+            event_dict[this_column] = storm_table.get_column(
+                storm_object_table, this_column)[row_indices]
+
+    return event_dict
+
+
+def select_last_day(event_dict, max_time_unix_sec=None):
+    """Keeps events in the 24 hours ending at `max_time_unix_sec`.
+
+    :param event_dict: Dictionary created by `get_events`.
+    :param max_time_unix_sec: End of window.  If None, will use latest event.
+    :return: event_dict: Same as input, but maybe with fewer events.
+    """
+
+    unix_times_sec = event_dict[storm_table.TIME_COLUMN]
+    if len(unix_times_sec) == 0:
+        return event_dict
+
+    if max_time_unix_sec is None:
+        max_time_unix_sec = numpy.max(unix_times_sec)
+
+    keep_flags = numpy.logical_and(
+        unix_times_sec >= max_time_unix_sec - SECONDS_PER_DAY,
+        unix_times_sec <= max_time_unix_sec)
+    return dict([(k, v[keep_flags]) for k, v in event_dict.items()])
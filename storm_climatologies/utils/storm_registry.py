@@ -0,0 +1,343 @@
+"""Streaming birth and death events over consecutive SPC dates.
+
+Birth and death climatologies normally see two dates at a time (see
+`utils._get_dates_needed`) and keep events in the last 24 hours, so every date
+is read twice and a storm that crosses more than one date boundary is seen only
+in part.  A `StormRegistry` is fed each date once, in order, and keeps one row
+for every open storm: its first object, first and last objects >= `min_age_sec`
+old, and the last time it was seen.
+
+Events use the same definitions as `storm_events.get_events`:
+
+- the birth of a storm is its first object (or, with
+  `birth_at_first_mature_object`, its first object >= `min_age_sec` old), and
+  is emitted once the storm has an object >= `min_age_sec` old;
+- the death of a storm is its last object >= `min_age_sec` old, and is emitted
+  once the storm has not been seen for `max_gap_sec`.
+
+Storms that never reach `min_age_sec` emit nothing.  Since each date covers 24
+hours, most storms are closed on the date they die, and memory is proportional
+to the number of storms alive near the end of the last date.
+"""
+
+import copy
+import numpy
+from storm_climatologies.utils import storm_events
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import track_index
+
+MIN_AGE_SEC = storm_events.MIN_AGE_SEC
+DEFAULT_MAX_GAP_SEC = 3600
+
+STORM_ID_COLUMN = storm_table.STORM_ID_COLUMN
+TIME_COLUMN = storm_table.TIME_COLUMN
+AGE_COLUMN = storm_table.AGE_COLUMN
+
+FIRST_PREFIX = 'first_'
+FIRST_MATURE_PREFIX = 'first_mature_'
+LAST_MATURE_PREFIX = 'last_mature_'
+LAST_TIME_KEY = 'last_unix_time_sec'
+MATURE_FLAG_KEY = 'is_mature'
+CLOCK_KEY = 'clock_unix_time_sec'
+OPEN_STORMS_KEY = 'open_storm_dict'
+EVENT_COLUMNS_KEY = 'event_columns'
+
+
+def select_storms(storm_dict, indices):
+    """Selects the same rows from every array in a dictionary.
+
+    :param storm_dict: Dictionary of equal-length numpy arrays (one row per
+        storm).
+    :param indices: 1-D numpy array of indices or Boolean flags.
+    :return: storm_dict: Same as input, with selected rows only.
+    """
+
+    return dict([(k, v[indices]) for k, v in storm_dict.items()])
+
+
+def match_storm_ids(open_storm_ids, new_storm_ids):
+    """Finds new storms that are already open.
+
+    :param open_storm_ids: 1-D numpy array of sorted storm IDs.
+    :param new_storm_ids: 1-D numpy array of storm IDs.
+    :return: open_indices: 1-D numpy array with index of each new storm in
+        `open_storm_ids` (meaningless where `is_open` is False).
+    :return: is_open: 1-D numpy array of Boolean flags.
+    """
+
+    if len(open_storm_ids) == 0:
+        return (numpy.full(len(new_storm_ids), 0, dtype=int),
+                numpy.full(len(new_storm_ids), False, dtype=bool))
+
+    open_indices = numpy.minimum(
+        numpy.searchsorted(open_storm_ids, new_storm_ids),
+        len(open_storm_ids) - 1)
+    return open_indices, open_storm_ids[open_indices] == new_storm_ids
+
+
+def add_storms(open_storm_dict, new_storm_dict):
+    """Adds rows for new storms, keeping rows sorted by storm ID.
+
+    :param open_storm_dict: Dictionary of equal-length numpy arrays, sorted by
+        storm ID.
+    :param new_storm_dict: Dictionary with the same keys, for storms not in
+        `open_storm_dict`.
+    :return: open_storm_dict: Dictionary with rows from both.
+    """
+
+    all_storm_dict = dict([
+        (k, numpy.concatenate((v, new_storm_dict[k])))
+        for k, v in open_storm_dict.items()])
+    return select_storms(all_storm_dict, numpy.argsort(
+        all_storm_dict[STORM_ID_COLUMN], kind='mergesort'))
+
+
+class StormRegistry(object):
+    """Open storms, updated one SPC date at a time."""
+
+    def __init__(self, min_age_sec=MIN_AGE_SEC,
+                 max_gap_sec=DEFAULT_MAX_GAP_SEC,
+                 birth_at_first_mature_object=False):
+        """Creates new registry.
+
+        :param min_age_sec: Minimum age of a mature storm object.  Storms with
+            no mature object emit no events.
+        :param max_gap_sec: A storm is closed (and its death emitted) once the
+            latest time seen is more than `max_gap_sec` after the storm's last
+            object.
+        :param birth_at_first_mature_object: Boolean flag.  If True, the birth
+            of each storm is its first mature object (as in
+            `accumulators.TemporalBirthAccumulator`).  If False, it is its
+            first object (as in `accumulators.SpatialBirthAccumulator`).
+        """
+
+        self.min_age_sec = min_age_sec
+        self.max_gap_sec = max_gap_sec
+        self.birth_at_first_mature_object = birth_at_first_mature_object
+        self.event_columns = None
+        self.clock_unix_time_sec = None
+        self.open_storm_dict = None
+
+    def __len__(self):
+        if self.open_storm_dict is None:
+            return 0
+        return len(self.open_storm_dict[STORM_ID_COLUMN])
+
+    def _get_events(self, storm_dict, prefix):
+        """Converts rows of the registry to an event dictionary.
+
+        :param storm_dict: Dictionary with a subset of `open_storm_dict`.
+        :param prefix: Prefix of the object to use (e.g.,
+            `LAST_MATURE_PREFIX`).
+        :return: event_dict: Dictionary in the format of
+            `storm_events.get_events`, without row indices.
+        """
+
+        event_dict = {STORM_ID_COLUMN: storm_dict[STORM_ID_COLUMN]}
+        for this_column in self.event_columns:
+            event_dict[this_column] = storm_dict[prefix + this_column]
+
+        return event_dict
+
+    def _get_empty_events(self):
+        """Returns event dictionary with no events.
+
+        :return: event_dict: See doc for `_get_events`.
+        """
+
+        event_columns = self.event_columns
+        if event_columns is None:
+            event_columns = [
+                c for c in storm_events.EVENT_COLUMNS if c != STORM_ID_COLUMN]
+
+        event_dict = {STORM_ID_COLUMN: numpy.array([], dtype=object)}
+        for this_column in event_columns:
+            if this_column in [TIME_COLUMN, AGE_COLUMN]:
+                event_dict[this_column] = numpy.array([], dtype=int)
+            else:
+                event_dict[this_column] = numpy.array([], dtype=float)
+
+        return event_dict
+
+    def _get_storms_one_date(self, storm_object_table):
+        """Summarizes each storm in one date's table.
+
+        :param storm_object_table: pandas DataFrame or
+            `storm_table.StormTable`.
+        :return: storm_dict: Dictionary in the format of `open_storm_dict`,
+            with one row per storm in the table.
+        """
+
+        if self.event_columns is None:
+            self.event_columns = [
+                c for c in storm_events.EVENT_COLUMNS
+                if c != STORM_ID_COLUMN and c in storm_object_table]
+
+        unix_times_sec = storm_table.get_column(
+            storm_object_table, TIME_COLUMN)
+        track_index_object = track_index.TrackIndex(
+            storm_table.get_column(storm_object_table, STORM_ID_COLUMN),
+            unix_times_sec)
+
+        num_objects = len(unix_times_sec)
+        first_positions = track_index_object.track_offsets[:-1]
+        sorted_positions = numpy.arange(num_objects)
+        mature_flags = track_index_object.sort(storm_table.get_column(
+            storm_object_table, AGE_COLUMN)) >= self.min_age_sec
+
+        first_mature_positions = numpy.minimum.reduceat(
+            numpy.where(mature_flags, sorted_positions, num_objects),
+            first_positions)
+        last_mature_positions = numpy.maximum.reduceat(
+            numpy.where(mature_flags, sorted_positions, -1), first_positions)
+        is_mature = first_mature_positions < num_objects
+
+        first_rows = track_index_object.sort_indices[first_positions]
+        first_mature_rows = track_index_object.sort_indices[
+            numpy.minimum(first_mature_positions, num_objects - 1)]
+        last_mature_rows = track_index_object.sort_indices[
+            numpy.maximum(last_mature_positions, 0)]
+
+        storm_dict = {
+            STORM_ID_COLUMN: track_index_object.unique_storm_ids,
+            LAST_TIME_KEY: track_index_object.last(unix_times_sec),
+            MATURE_FLAG_KEY: is_mature
+        }
+
+        for this_column in self.event_columns:
+            these_values = storm_table.get_column(
+                storm_object_table, this_column)
+            storm_dict[FIRST_PREFIX + this_column] = these_values[first_rows]
+            storm_dict[FIRST_MATURE_PREFIX + this_column] = these_values[
+                first_mature_rows]
+            storm_dict[LAST_MATURE_PREFIX + this_column] = these_values[
+                last_mature_rows]
+
+        return storm_dict
+
+    def update(self, storm_object_table):
+        """Adds one SPC date.
+
+        Dates must be added in order, each exactly once.
+
+        :param storm_object_table: pandas DataFrame or
+            `storm_table.StormTable` with storm objects from one date.
+        :return: birth_event_dict: Dictionary with births found in this date
+            (see `_get_events`).
+        :return: death_event_dict: Dictionary with deaths of storms closed
+            after this date.
+        """
+
+        if len(storm_table.get_column(storm_object_table, TIME_COLUMN)) == 0:
+            return self._get_empty_events(), self._close()
+
+        new_storm_dict = self._get_storms_one_date(storm_object_table)
+        this_max_time_unix_sec = numpy.max(new_storm_dict[LAST_TIME_KEY])
+        if (self.clock_unix_time_sec is None or
+                this_max_time_unix_sec > self.clock_unix_time_sec):
+            self.clock_unix_time_sec = this_max_time_unix_sec
+
+        if self.open_storm_dict is None:
+            self.open_storm_dict = select_storms(
+                new_storm_dict, numpy.array([], dtype=int))
+
+        open_storm_dict = self.open_storm_dict
+        open_indices, is_open = match_storm_ids(
+            open_storm_dict[STORM_ID_COLUMN], new_storm_dict[STORM_ID_COLUMN])
+
+        # Storms continuing from earlier dates keep their first object.
+        continuing_dict = select_storms(new_storm_dict, is_open)
+        open_indices = open_indices[is_open]
+        was_mature = open_storm_dict[MATURE_FLAG_KEY][open_indices]
+        is_new_birth = numpy.logical_and(
+            continuing_dict[MATURE_FLAG_KEY], numpy.invert(was_mature))
+        is_now_mature = continuing_dict[MATURE_FLAG_KEY]
+
+        open_storm_dict[LAST_TIME_KEY][open_indices] = continuing_dict[
+            LAST_TIME_KEY]
+        open_storm_dict[MATURE_FLAG_KEY][open_indices] = numpy.logical_or(
+            was_mature, is_now_mature)
+
+        for this_column in self.event_columns:
+            this_key = FIRST_MATURE_PREFIX + this_column
+            open_storm_dict[this_key][open_indices[is_new_birth]] = (
+                continuing_dict[this_key][is_new_birth])
+
+            this_key = LAST_MATURE_PREFIX + this_column
+            open_storm_dict[this_key][open_indices[is_now_mature]] = (
+                continuing_dict[this_key][is_now_mature])
+
+        birth_storm_indices = open_indices[is_new_birth]
+        birth_storm_dict = select_storms(open_storm_dict, birth_storm_indices)
+
+        starting_dict = select_storms(new_storm_dict, numpy.invert(is_open))
+        birth_storm_dict = dict([
+            (k, numpy.concatenate((
+                birth_storm_dict[k], v[starting_dict[MATURE_FLAG_KEY]])))
+            for k, v in starting_dict.items()])
+
+        self.open_storm_dict = add_storms(open_storm_dict, starting_dict)
+
+        if self.birth_at_first_mature_object:
+            birth_prefix = FIRST_MATURE_PREFIX
+        else:
+            birth_prefix = FIRST_PREFIX
+
+        return self._get_events(birth_storm_dict, birth_prefix), self._close()
+
+    def _close(self, close_all=False):
+        """Closes storms not seen for more than `max_gap_sec`.
+
+        :param close_all: Boolean flag.  If True, will close all storms.
+        :return: death_event_dict: Dictionary with deaths of mature storms
+            closed (see `_get_events`).
+        """
+
+        if self.open_storm_dict is None:
+            return self._get_empty_events()
+
+        if close_all:
+            close_flags = numpy.full(len(self), True, dtype=bool)
+        else:
+            close_flags = (
+                self.open_storm_dict[LAST_TIME_KEY] <
+                self.clock_unix_time_sec - self.max_gap_sec)
+
+        closed_storm_dict = select_storms(
+            self.open_storm_dict, numpy.logical_and(
+                close_flags, self.open_storm_dict[MATURE_FLAG_KEY]))
+        self.open_storm_dict = select_storms(
+            self.open_storm_dict, numpy.invert(close_flags))
+
+        return self._get_events(closed_storm_dict, LAST_MATURE_PREFIX)
+
+    def close_all(self):
+        """Closes all open storms (at the end of the last date).
+
+        :return: death_event_dict: See doc for `_close`.
+        """
+
+        return self._close(close_all=True)
+
+    def get_state(self):
+        """Returns copy of the registry, for checkpoints.
+
+        :return: state_dict: Dictionary.
+        """
+
+        return copy.deepcopy({
+            CLOCK_KEY: self.clock_unix_time_sec,
+            OPEN_STORMS_KEY: self.open_storm_dict,
+            EVENT_COLUMNS_KEY: self.event_columns
+        })
+
+    def set_state(self, state_dict):
+        """Restores registry from `get_state`.
+
+        :param state_dict: Dictionary created by `get_state`.
+        """
+
+        state_dict = copy.deepcopy(state_dict)
+        self.clock_unix_time_sec = state_dict[CLOCK_KEY]
+        self.open_storm_dict = state_dict[OPEN_STORMS_KEY]
+        self.event_columns = state_dict[EVENT_COLUMNS_KEY]
@@ -0,0 +1,280 @@
+"""Compact in-memory representation of storm-object tables.
+
+A `StormTable` holds one numpy array per column.  Storm IDs are dictionary-
+encoded to int32 codes by a `StormIdEncoder`, which is shared by all SPC dates
+in a run, so the same storm has the same code on every date and comparing IDs
+is an integer operation.  Times are int64, ages int32 and coordinates and
+velocities float32.
+
+The helper functions `get_column` and `select_rows` work on both a
+`StormTable` and a pandas DataFrame, so code written against them does not care
+which one the loader returned.
+"""
+
+import threading
+import numpy
+import pandas
+
+STORM_ID_COLUMN = 'storm_id'
+TIME_COLUMN = 'unix_time_sec'
+AGE_COLUMN = 'age_sec'
+CENTROID_LAT_COLUMN = 'centroid_lat_deg'
+CENTROID_LNG_COLUMN = 'centroid_lng_deg'
+EAST_VELOCITY_COLUMN = 'east_velocity_m_s01'
+NORTH_VELOCITY_COLUMN = 'north_velocity_m_s01'
+
+COLUMN_DTYPE_DICT = {
+    STORM_ID_COLUMN: numpy.int32,
+    TIME_COLUMN: numpy.int64,
+    AGE_COLUMN: numpy.int32,
+    CENTROID_LAT_COLUMN: numpy.float32,
+    CENTROID_LNG_COLUMN: numpy.float32,
+    EAST_VELOCITY_COLUMN: numpy.float32,
+    NORTH_VELOCITY_COLUMN: numpy.float32
+}
+
+
+class StormIdEncoder(object):
+    """Maps storm-ID strings to int32 codes, stable across SPC dates.
+
+    Codes are assigned in order of first appearance, so they are stable only
+    within one encoder.  A pickled encoder (e.g., in a checkpoint) keeps its
+    codes, but encoders in different processes assign codes independently, so
+    codes from different encoders must not be compared.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._code_by_storm_id = {}
+        self._storm_ids = []
+
+    def __len__(self):
+        return len(self._storm_ids)
+
+    def __getstate__(self):
+        with self._lock:
+            return {
+                'code_by_storm_id': dict(self._code_by_storm_id),
+                'storm_ids': list(self._storm_ids)
+            }
+
+    def __setstate__(self, state):
+        self._lock = threading.Lock()
+        self._code_by_storm_id = state['code_by_storm_id']
+        self._storm_ids = state['storm_ids']
+
+    def encode(self, storm_ids):
+        """Turns storm IDs into codes, adding unseen IDs to the dictionary.
+
+        :param storm_ids: 1-D list or numpy array of storm IDs (strings).
+        :return: storm_id_codes: 1-D numpy array of codes (int32).
+        """
+
+        unique_storm_ids, inverse_indices = numpy.unique(
+            numpy.asarray(storm_ids), return_inverse=True)
+
+        with self._lock:
+            unique_codes = numpy.full(len(unique_storm_ids), -1,
+                                      dtype=numpy.int32)
+            for i, this_storm_id in enumerate(unique_storm_ids):
+                this_code = self._code_by_storm_id.get(this_storm_id)
+                if this_code is None:
+                    this_code = len(self._storm_ids)
+                    self._code_by_storm_id[this_storm_id] = this_code
+                    self._storm_ids.append(this_storm_id)
+                unique_codes[i] = this_code
+
+        return unique_codes[inverse_indices.ravel()]
+
+    def decode(self, storm_id_codes):
+        """Turns codes back into storm IDs.
+
+        :param storm_id_codes: 1-D numpy array of codes.
+        :return: storm_ids: 1-D numpy array of storm IDs (strings).
+        """
+
+        with self._lock:
+            storm_id_array = numpy.array(self._storm_ids, dtype=object)
+        return storm_id_array[numpy.asarray(storm_id_codes, dtype=int)]
+
+
+class StormObjectRow(object):
+    """Read-only view of one row in a `StormTable`.
+
+    Columns can be read as attributes (row.unix_time_sec) or by name
+    (row['unix_time_sec']).
+    """
+
+    __slots__ = ('_storm_table', '_row_index')
+
+    def __init__(self, storm_table, row_index):
+        self._storm_table = storm_table
+        self._row_index = row_index
+
+    def __getitem__(self, column_name):
+        return self._storm_table[column_name][self._row_index]
+
+    def __getattr__(self, column_name):
+        try:
+            return self[column_name]
+        except KeyError:
+            raise AttributeError(column_name)
+
+
+class StormTable(object):
+    """Storm-object table stored as one narrowed numpy array per column."""
+
+    def __init__(self, column_dict, storm_id_encoder, column_names=None):
+        """Creates new table.
+
+        :param column_dict: Dictionary, where each key is a column name and
+            each value is a 1-D numpy array.  All arrays must have the same
+            length.  Storm IDs must already be encoded.
+        :param storm_id_encoder: Instance of `StormIdEncoder` used to encode
+            storm IDs.
+        :param column_names: Order of columns.  If None, will use sorted keys
+            of `column_dict`.
+        """
+
+        if column_names is None:
+            column_names = sorted(column_dict.keys())
+
+        self._column_dict = column_dict
+        self._column_names = list(column_names)
+        self.storm_id_encoder = storm_id_encoder
+
+        lengths = set(len(v) for v in column_dict.values())
+        if len(lengths) > 1:
+            raise ValueError('All columns must have the same length.')
+        self._num_rows = lengths.pop() if lengths else 0
+
+    @classmethod
+    def from_data_frame(cls, storm_object_table, storm_id_encoder):
+        """Converts pandas DataFrame to compact table.
+
+        Columns without a narrowed type (e.g., polygons) are kept as they are.
+
+        :param storm_object_table: pandas DataFrame.
+        :param storm_id_encoder: Instance of `StormIdEncoder`.
+        :return: storm_table: Instance of `StormTable`.
+        """
+
+        column_dict = {}
+        for this_column in list(storm_object_table):
+            these_values = storm_object_table[this_column].values
+
+            if this_column == STORM_ID_COLUMN:
+                these_values = storm_id_encoder.encode(these_values)
+            elif this_column in COLUMN_DTYPE_DICT:
+                these_values = these_values.astype(
+                    COLUMN_DTYPE_DICT[this_column])
+
+            column_dict[this_column] = these_values
+
+        return cls(column_dict, storm_id_encoder,
+                   column_names=list(storm_object_table))
+
+    @classmethod
+    def concat(cls, storm_tables):
+        """Concatenates tables along rows.
+
+        :param storm_tables: 1-D list of `StormTable` objects with the same
+            encoder.  Columns are taken from the first table.
+        :return: storm_table: Instance of `StormTable`.
+        """
+
+        column_names = storm_tables[0].columns
+        column_dict = dict([
+            (c, numpy.concatenate([t[c] for t in storm_tables]))
+            for c in column_names])
+
+        return cls(column_dict, storm_tables[0].storm_id_encoder,
+                   column_names=column_names)
+
+    def __len__(self):
+        return self._num_rows
+
+    def __contains__(self, column_name):
+        return column_name in self._column_dict
+
+    def __getitem__(self, column_name):
+        return self._column_dict[column_name]
+
+    @property
+    def columns(self):
+        """List of column names."""
+        return list(self._column_names)
+
+    @property
+    def memory_bytes(self):
+        """Memory used by columns (object columns count 8 bytes per row)."""
+        return int(sum(v.nbytes for v in self._column_dict.values()))
+
+    def get_storm_id_strings(self):
+        """Returns decoded storm IDs.
+
+        :return: storm_ids: 1-D numpy array of storm IDs (strings).
+        """
+
+        return self.storm_id_encoder.decode(self[STORM_ID_COLUMN])
+
+    def select(self, rows):
+        """Returns a new table with only the given rows.
+
+        :param rows: Boolean mask or 1-D numpy array of row indices.
+        :return: storm_table: Instance of `StormTable`.
+        """
+
+        column_dict = dict([(c, v[rows]) for c, v in
+                            self._column_dict.items()])
+        return StormTable(column_dict, self.storm_id_encoder,
+                          column_names=self._column_names)
+
+    def row(self, row_index):
+        """Returns view of one row.
+
+        :param row_index: Row index.
+        :return: storm_object_row: Instance of `StormObjectRow`.
+        """
+
+        return StormObjectRow(self, row_index)
+
+    def to_data_frame(self, decode_storm_ids=True):
+        """Converts to pandas DataFrame.
+
+        :param decode_storm_ids: Boolean flag.  If True, storm IDs will be
+            strings; if False, they will be the integer codes.
+        :return: storm_object_table: pandas DataFrame.
+        """
+
+        column_dict = dict(self._column_dict)
+        if decode_storm_ids and STORM_ID_COLUMN in column_dict:
+            column_dict[STORM_ID_COLUMN] = self.get_storm_id_strings()
+
+        return pandas.DataFrame(column_dict, columns=self._column_names)
+
+
+def get_column(storm_object_table, column_name):
+    """Returns one column as a numpy array.
+
+    :param storm_object_table: pandas DataFrame or `StormTable`.
+    :param column_name: Name of column.
+    :return: column_values: 1-D numpy array.
+    """
+
+    if isinstance(storm_object_table, StormTable):
+        return storm_object_table[column_name]
+    return storm_object_table[column_name].values
+
+
+def select_rows(storm_object_table, rows):
+    """Returns table with only the given rows, re-indexed from zero.
+
+    :param storm_object_table: pandas DataFrame or `StormTable`.
+    :param rows: Boolean mask or 1-D numpy array of row indices.
+    :return: storm_object_table: Same type as input.
+    """
+
+    if isinstance(storm_object_table, StormTable):
+        return storm_object_table.select(rows)
+    return storm_object_table.iloc[rows].reset_index(drop=True)
@@ -0,0 +1,276 @@
+"""Streaming, mergeable summaries of per-storm values.
+
+Per-storm climatologies (speeds, velocities, lifetimes, areas, distances) used
+to grow one Python list per season and save it at the end.  Here each product
+is a `SummaryStatistics` (count, mean, variance, min, max and a fixed-bin
+histogram), whose memory does not grow with the number of storms.  Summaries
+from different days or processes merge exactly, using the pairwise update of
+Chan et al. (1979) for mean and variance.
+
+Raw values are opt-in, through a `ChunkedArrayWriter`, which buffers values
+and writes them as a directory of .npy chunks, each named by the SPC date of
+its first value.  Chunks sort in date order, so writers in different processes
+can share one directory, and `read_chunked_array` gives back one array.
+"""
+
+import copy
+import glob
+import os
+import tempfile
+import numpy
+
+DEFAULT_CHUNK_SIZE = 100000
+CHUNK_FILE_PREFIX = 'chunk_'
+
+
+class SummaryStatistics(object):
+    """Mergeable summary of a stream of values."""
+
+    def __init__(self, histogram_bin_edges=None):
+        """Creates empty summary.
+
+        :param histogram_bin_edges: Sorted 1-D numpy array of bin edges.
+            Values below the first edge or above the last are counted in
+            `num_below_histogram` and `num_above_histogram`.  If None, no
+            histogram is kept.
+        """
+
+        self.histogram_bin_edges = None
+        self.histogram_counts = None
+        if histogram_bin_edges is not None:
+            self.histogram_bin_edges = numpy.asarray(
+                histogram_bin_edges, dtype=float)
+            self.histogram_counts = numpy.full(
+                len(self.histogram_bin_edges) - 1, 0, dtype=numpy.int64)
+
+        self.count = 0
+        self.mean = 0.
+        self.sum_squared_deviations = 0.
+        self.min_value = numpy.inf
+        self.max_value = -numpy.inf
+        self.num_below_histogram = 0
+        self.num_above_histogram = 0
+
+    def __len__(self):
+        return self.count
+
+    def __str__(self):
+        summary_dict = self.to_dict()
+        return ('count = {0:d} ... mean = {1:.4g} ... standard deviation = '
+                '{2:.4g} ... min = {3:.4g} ... max = {4:.4g}').format(
+                    summary_dict['count'], summary_dict['mean'],
+                    self.standard_deviation, summary_dict['min_value'],
+                    summary_dict['max_value'])
+
+    @property
+    def variance(self):
+        """Sample variance (NaN if fewer than 2 values)."""
+        if self.count < 2:
+            return numpy.nan
+        return self.sum_squared_deviations / (self.count - 1)
+
+    @property
+    def standard_deviation(self):
+        """Sample standard deviation (NaN if fewer than 2 values)."""
+        return numpy.sqrt(self.variance)
+
+    def _combine_moments(self, count, mean, sum_squared_deviations):
+        """Adds count, mean and sum of squared deviations of another sample.
+
+        :param count: Number of values in other sample.
+        :param mean: Mean of other sample.
+        :param sum_squared_deviations: Sum of squared deviations from the mean
+            in other sample.
+        """
+
+        if count == 0:
+            return
+
+        new_count = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / new_count
+        self.sum_squared_deviations += (
+            sum_squared_deviations +
+            delta ** 2 * self.count * count / new_count)
+        self.count = new_count
+
+    def update(self, values):
+        """Adds a batch of values.
+
+        :param values: 1-D numpy array.  NaN values are ignored.
+        """
+
+        values = numpy.asarray(values, dtype=float).ravel()
+        values = values[numpy.invert(numpy.isnan(values))]
+        if len(values) == 0:
+            return
+
+        this_mean = numpy.mean(values)
+        self._combine_moments(
+            len(values), this_mean, numpy.sum((values - this_mean) ** 2))
+        self.min_value = min([self.min_value, numpy.min(values)])
+        self.max_value = max([self.max_value, numpy.max(values)])
+
+        if self.histogram_bin_edges is None:
+            return
+
+        below_flags = values < self.histogram_bin_edges[0]
+        above_flags = values > self.histogram_bin_edges[-1]
+        self.num_below_histogram += int(numpy.sum(below_flags))
+        self.num_above_histogram += int(numpy.sum(above_flags))
+        self.histogram_counts += numpy.histogram(
+            values[numpy.invert(numpy.logical_or(below_flags, above_flags))],
+            bins=self.histogram_bin_edges)[0]
+
+    def merge(self, other_summary_object):
+        """Adds another summary to this one.
+
+        :param other_summary_object: Instance of `SummaryStatistics` with the
+            same histogram bins.
+        """
+
+        self._combine_moments(
+            other_summary_object.count, other_summary_object.mean,
+            other_summary_object.sum_squared_deviations)
+        self.min_value = min([self.min_value, other_summary_object.min_value])
+        self.max_value = max([self.max_value, other_summary_object.max_value])
+
+        if self.histogram_bin_edges is None:
+            return
+
+        if not numpy.array_equal(self.histogram_bin_edges,
+                                 other_summary_object.histogram_bin_edges):
+            raise ValueError('Cannot merge summaries with different bins.')
+
+        self.histogram_counts += other_summary_object.histogram_counts
+        self.num_below_histogram += other_summary_object.num_below_histogram
+        self.num_above_histogram += other_summary_object.num_above_histogram
+
+    def copy(self):
+        """Returns deep copy of this summary."""
+        return copy.deepcopy(self)
+
+    def to_dict(self):
+        """Converts summary to dictionary (e.g., for saving).
+
+        :return: summary_dict: Dictionary with count, mean, variance, min, max
+            and histogram.
+        """
+
+        return {
+            'count': self.count,
+            'mean': self.mean if self.count > 0 else numpy.nan,
+            'variance': self.variance,
+            'min_value': self.min_value if self.count > 0 else numpy.nan,
+            'max_value': self.max_value if self.count > 0 else numpy.nan,
+            'histogram_bin_edges': self.histogram_bin_edges,
+            'histogram_counts': self.histogram_counts,
+            'num_below_histogram': self.num_below_histogram,
+            'num_above_histogram': self.num_above_histogram
+        }
+
+
+class ChunkedArrayWriter(object):
+    """Writes a stream of values as a directory of .npy chunks."""
+
+    def __init__(self, directory_name, chunk_size=DEFAULT_CHUNK_SIZE):
+        """Creates new writer.
+
+        :param directory_name: Name of directory for chunks (created if
+            needed).
+        :param chunk_size: Number of buffered values that triggers a write.
+        """
+
+        self.directory_name = directory_name
+        self.chunk_size = chunk_size
+        self._buffered_arrays = []
+        self._num_buffered_values = 0
+        self._chunk_key = None
+
+    def __getstate__(self):
+        if self._num_buffered_values > 0:
+            raise ValueError('Flush writer before pickling it.')
+        return self.__dict__
+
+    def append(self, values, chunk_key):
+        """Adds values to the buffer, writing a chunk if it is full.
+
+        :param values: 1-D numpy array.
+        :param chunk_key: Key of the values (e.g., SPC date "yyyymmdd").  A
+            chunk is named by the key of its first values, so keys must
+            increase within a writer and be unique across writers sharing the
+            directory.
+        """
+
+        values = numpy.asarray(values).ravel()
+        if len(values) == 0:
+            return
+
+        if self._chunk_key is None:
+            self._chunk_key = chunk_key
+
+        self._buffered_arrays.append(values)
+        self._num_buffered_values += len(values)
+        if self._num_buffered_values >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Writes buffered values, if any, as one chunk."""
+
+        if self._num_buffered_values == 0:
+            return
+
+        if not os.path.isdir(self.directory_name):
+            try:
+                os.makedirs(self.directory_name)
+            except OSError:
+                if not os.path.isdir(self.directory_name):
+                    raise
+
+        chunk_file_name = os.path.join(
+            self.directory_name,
+            '{0:s}{1:s}.npy'.format(CHUNK_FILE_PREFIX, str(self._chunk_key)))
+
+        # Write to temporary file, then rename, so that readers never see a
+        # partial chunk.
+        file_handle, temp_file_name = tempfile.mkstemp(
+            dir=self.directory_name, suffix='.tmp')
+        with os.fdopen(file_handle, 'wb') as this_file_handle:
+            numpy.save(this_file_handle,
+                       numpy.concatenate(self._buffered_arrays))
+        os.rename(temp_file_name, chunk_file_name)
+
+        self._buffered_arrays = []
+        self._num_buffered_values = 0
+        self._chunk_key = None
+
+
+def find_chunk_files(directory_name):
+    """Finds chunks written by `ChunkedArrayWriter`, in order.
+
+    :param directory_name: Name of directory.
+    :return: chunk_file_names: 1-D list of paths, sorted by chunk key.
+    """
+
+    return sorted(glob.glob(os.path.join(
+        directory_name, '{0:s}*.npy'.format(CHUNK_FILE_PREFIX))))
+
+
+def read_chunked_array(directory_name, mmap_mode=None):
+    """Reads all chunks written by `ChunkedArrayWriter`.
+
+    :param directory_name: Name of directory.
+    :param mmap_mode: Passed to `numpy.load`.  If set, chunks are
+        memory-mapped and returned as a list instead of one array.
+    :return: values: 1-D numpy array with all values, in chunk order (or list
+        of arrays, if `mmap_mode` is set).
+    """
+
+    these_arrays = [numpy.load(f, mmap_mode=mmap_mode)
+                    for f in find_chunk_files(directory_name)]
+    if mmap_mode is not None:
+        return these_arrays
+    if len(these_arrays) == 0:
+        return numpy.array([])
+
+    return numpy.concatenate(these_arrays)
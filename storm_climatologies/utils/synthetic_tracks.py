@@ -0,0 +1,369 @@
+"""Synthetic segmotion storm tracks, for tests and benchmarks.
+
+`SyntheticTrackGenerator` makes storm-object tables with the same columns as
+`storm_tracking_io.read_many_processed_files` (storm ID, valid time, age,
+centroid, velocity and polygon) at any scale, without the MYRORSS archive.
+Storms are drawn for each SPC date from a random generator seeded by the date,
+so every date can be made on its own, in any order, and always comes out the
+same.  Storms start more often in the afternoon and evening (UTC), drift with
+a westerly mean flow and may live past the end of their SPC date, in which
+case the rest of the track is in the table for the next date.
+
+A generator is a read function for `day_loader.DayLoader`.  It can also write
+an archive of processed files, to be read back through
+`local_tracking_io` (see `write_spc_date`).
+"""
+
+import numpy
+import pandas
+import shapely
+from shapely.geometry import Polygon
+from storm_climatologies.utils import local_tracking_io
+from storm_climatologies.utils import storm_table
+from storm_climatologies.utils import temporal_bins
+
+STORM_ID_COLUMN = storm_table.STORM_ID_COLUMN
+TIME_COLUMN = storm_table.TIME_COLUMN
+AGE_COLUMN = storm_table.AGE_COLUMN
+CENTROID_LAT_COLUMN = storm_table.CENTROID_LAT_COLUMN
+CENTROID_LNG_COLUMN = storm_table.CENTROID_LNG_COLUMN
+EAST_VELOCITY_COLUMN = storm_table.EAST_VELOCITY_COLUMN
+NORTH_VELOCITY_COLUMN = storm_table.NORTH_VELOCITY_COLUMN
+POLYGON_COLUMN = 'polygon_object_latlng'
+
+SECONDS_PER_DAY = 86400
+SPC_DATE_START_HOUR = 12
+METRES_PER_DEGREE_LAT = 111195.
+PEAK_HOUR_UTC = 22
+
+DEFAULT_NUM_STORMS_PER_DAY = 1000
+DEFAULT_TIME_STEP_SEC = 300
+DEFAULT_MEAN_LIFETIME_SEC = 3600
+DEFAULT_MAX_LIFETIME_SEC = 43200
+DEFAULT_MIN_LATITUDE_DEG = 25.
+DEFAULT_MAX_LATITUDE_DEG = 50.
+DEFAULT_MIN_LONGITUDE_DEG = 235.
+DEFAULT_MAX_LONGITUDE_DEG = 295.
+DEFAULT_MEAN_EAST_VELOCITY_M_S01 = 10.
+DEFAULT_MEAN_NORTH_VELOCITY_M_S01 = 3.
+DEFAULT_VELOCITY_STDEV_M_S01 = 5.
+DEFAULT_MEAN_RADIUS_METRES = 10000.
+DEFAULT_NUM_VERTICES = 12
+
+
+def get_spc_date_start_time(spc_date_string):
+    """Returns first time in an SPC date (1200 UTC on the calendar date).
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :return: start_time_unix_sec: Start time.
+    """
+
+    days_since_epoch = temporal_bins._civil_to_days(
+        numpy.array([int(spc_date_string[:4])]),
+        numpy.array([int(spc_date_string[4:6])]),
+        numpy.array([int(spc_date_string[6:])]))[0]
+    return int(days_since_epoch * SECONDS_PER_DAY +
+               SPC_DATE_START_HOUR * 3600)
+
+
+def _get_previous_spc_date(spc_date_string):
+    """Returns SPC date before the given one.
+
+    :param spc_date_string: SPC date (format "yyyymmdd").
+    :return: previous_spc_date_string: Previous SPC date.
+    """
+
+    days_since_epoch = (
+        get_spc_date_start_time(spc_date_string) // SECONDS_PER_DAY - 1)
+    years, months, days_of_month = temporal_bins._days_to_civil(
+        numpy.array([days_since_epoch]))
+    return '{0:04d}{1:02d}{2:02d}'.format(
+        int(years[0]), int(months[0]), int(days_of_month[0]))
+
+
+def make_polygons(centroid_latitudes_deg, centroid_longitudes_deg,
+                  radii_metres, num_vertices=DEFAULT_NUM_VERTICES):
+    """Makes a regular polygon around each centroid.
+
+    :param centroid_latitudes_deg: length-N numpy array of latitudes.
+    :param centroid_longitudes_deg: length-N numpy array of longitudes.
+    :param radii_metres: length-N numpy array of radii.
+    :param num_vertices: Number of vertices per polygon.
+    :return: polygon_objects_latlng: length-N numpy array of shapely
+        polygons, with x = longitude and y = latitude.
+    """
+
+    angles_rad = numpy.linspace(0., 2 * numpy.pi, num=num_vertices + 1)[:-1]
+    latitude_radii_deg = radii_metres / METRES_PER_DEGREE_LAT
+    longitude_radii_deg = latitude_radii_deg / numpy.cos(
+        numpy.radians(centroid_latitudes_deg))
+
+    vertex_coords = numpy.stack((
+        centroid_longitudes_deg[:, numpy.newaxis] +
+        longitude_radii_deg[:, numpy.newaxis] * numpy.cos(angles_rad),
+        centroid_latitudes_deg[:, numpy.newaxis] +
+        latitude_radii_deg[:, numpy.newaxis] * numpy.sin(angles_rad)
+    ), axis=-1)
+
+    if hasattr(shapely, 'polygons'):
+        return shapely.polygons(vertex_coords)
+
+    polygon_objects_latlng = numpy.empty(len(vertex_coords), dtype=object)
+    for i in range(len(vertex_coords)):
+        polygon_objects_latlng[i] = Polygon(vertex_coords[i])
+    return polygon_objects_latlng
+
+
+class SyntheticTrackGenerator(object):
+    """Makes realistic storm-object tables for any SPC date."""
+
+    def __init__(self, num_storms_per_day=DEFAULT_NUM_STORMS_PER_DAY,
+                 seed=0, time_step_sec=DEFAULT_TIME_STEP_SEC,
+                 mean_lifetime_sec=DEFAULT_MEAN_LIFETIME_SEC,
+                 max_lifetime_sec=DEFAULT_MAX_LIFETIME_SEC,
+                 min_latitude_deg=DEFAULT_MIN_LATITUDE_DEG,
+                 max_latitude_deg=DEFAULT_MAX_LATITUDE_DEG,
+                 min_longitude_deg=DEFAULT_MIN_LONGITUDE_DEG,
+                 max_longitude_deg=DEFAULT_MAX_LONGITUDE_DEG,
+                 mean_east_velocity_m_s01=DEFAULT_MEAN_EAST_VELOCITY_M_S01,
+                 mean_north_velocity_m_s01=DEFAULT_MEAN_NORTH_VELOCITY_M_S01,
+                 velocity_stdev_m_s01=DEFAULT_VELOCITY_STDEV_M_S01,
+                 mean_radius_metres=DEFAULT_MEAN_RADIUS_METRES,
+                 num_vertices=DEFAULT_NUM_VERTICES, include_polygons=True):
+        """Creates new generator.
+
+        Objects per day are about num_storms_per_day * (mean_lifetime_sec /
+        time_step_sec + 1), e.g., 13 000 with the defaults and 10^6 with
+        num_storms_per_day = 77 000.
+
+        :param num_storms_per_day: Number of storms that start in each SPC
+            date.
+        :param seed: Seed for random numbers.  Generators with the same
+            arguments make the same tables.
+        :param time_step_sec: Time between storm objects (tracking interval).
+        :param mean_lifetime_sec: Mean storm lifetime (lifetimes are
+            exponential).
+        :param max_lifetime_sec: Max storm lifetime (< 1 day, so that a storm
+            is in at most two SPC dates).
+        :param min_latitude_deg: Minimum latitude of storm starts.
+        :param max_latitude_deg: Max latitude of storm starts.
+        :param min_longitude_deg: Minimum longitude of storm starts (deg E).
+        :param max_longitude_deg: Max longitude of storm starts (deg E).
+        :param mean_east_velocity_m_s01: Mean eastward storm motion.
+        :param mean_north_velocity_m_s01: Mean northward storm motion.
+        :param velocity_stdev_m_s01: Standard deviation of each velocity
+            component, among storms.
+        :param mean_radius_metres: Mean storm radius.
+        :param num_vertices: Number of vertices in each storm polygon.
+        :param include_polygons: Boolean flag.  If False, tables will have no
+            polygon column (much faster for large tables).
+        :raises: ValueError: if max_lifetime_sec >= 1 day.
+        """
+
+        if max_lifetime_sec >= SECONDS_PER_DAY:
+            raise ValueError(
+                'max_lifetime_sec ({0:d}) must be < {1:d}.'.format(
+                    max_lifetime_sec, SECONDS_PER_DAY))
+
+        self.num_storms_per_day = num_storms_per_day
+        self.seed = seed
+        self.time_step_sec = time_step_sec
+        self.mean_lifetime_sec = mean_lifetime_sec
+        self.max_lifetime_sec = max_lifetime_sec
+        self.min_latitude_deg = min_latitude_deg
+        self.max_latitude_deg = max_latitude_deg
+        self.min_longitude_deg = min_longitude_deg
+        self.max_longitude_deg = max_longitude_deg
+        self.mean_east_velocity_m_s01 = mean_east_velocity_m_s01
+        self.mean_north_velocity_m_s01 = mean_north_velocity_m_s01
+        self.velocity_stdev_m_s01 = velocity_stdev_m_s01
+        self.mean_radius_metres = mean_radius_metres
+        self.num_vertices = num_vertices
+        self.include_polygons = include_polygons
+
+    def _get_random_state(self, spc_date_string, stream_index):
+        """Returns random generator for one date and purpose.
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :param stream_index: 0 for storms started in the date, 1 for
+            per-object noise in the table for the date.
+        :return: random_state_object: Instance of `numpy.random.RandomState`.
+        """
+
+        return numpy.random.RandomState(
+            [self.seed, int(spc_date_string), stream_index])
+
+    def get_storms(self, spc_date_string):
+        """Makes storms that start in one SPC date.
+
+        S = number of storms
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :return: storm_dict: Dictionary with the following keys.
+        storm_dict['storm_ids']: length-S numpy array of storm IDs.
+        storm_dict['start_times_unix_sec']: length-S numpy array of start
+            times.
+        storm_dict['lifetimes_sec']: length-S numpy array of lifetimes (time
+            between first and last objects).
+        storm_dict['start_latitudes_deg']: length-S numpy array.
+        storm_dict['start_longitudes_deg']: length-S numpy array.
+        storm_dict['east_velocities_m_s01']: length-S numpy array.
+        storm_dict['north_velocities_m_s01']: length-S numpy array.
+        storm_dict['radii_metres']: length-S numpy array.
+        """
+
+        random_state_object = self._get_random_state(spc_date_string, 0)
+        num_storms = self.num_storms_per_day
+        num_steps_per_day = SECONDS_PER_DAY // self.time_step_sec
+
+        hours_since_start = numpy.arange(24)
+        hour_weights = 1. + 0.8 * numpy.cos(2 * numpy.pi * (
+            hours_since_start + SPC_DATE_START_HOUR - PEAK_HOUR_UTC) / 24.)
+        start_hours = random_state_object.choice(
+            24, size=num_storms, p=hour_weights / numpy.sum(hour_weights))
+        start_steps = numpy.minimum(
+            (start_hours * 3600 + random_state_object.randint(
+                0, 3600, size=num_storms)) // self.time_step_sec,
+            num_steps_per_day - 1)
+
+        lifetimes_sec = self.time_step_sec * numpy.round(
+            random_state_object.exponential(
+                self.mean_lifetime_sec, size=num_storms) / self.time_step_sec
+        ).astype(numpy.int64)
+        lifetimes_sec = numpy.minimum(lifetimes_sec, self.max_lifetime_sec)
+
+        sort_indices = numpy.argsort(start_steps, kind='mergesort')
+        return {
+            'storm_ids': numpy.array([
+                '{0:s}_{1:06d}'.format(spc_date_string, i)
+                for i in range(num_storms)], dtype=object),
+            'start_times_unix_sec': (
+                get_spc_date_start_time(spc_date_string) +
+                self.time_step_sec * start_steps[sort_indices]),
+            'lifetimes_sec': lifetimes_sec[sort_indices],
+            'start_latitudes_deg': random_state_object.uniform(
+                self.min_latitude_deg, self.max_latitude_deg,
+                size=num_storms),
+            'start_longitudes_deg': random_state_object.uniform(
+                self.min_longitude_deg, self.max_longitude_deg,
+                size=num_storms),
+            'east_velocities_m_s01': random_state_object.normal(
+                self.mean_east_velocity_m_s01, self.velocity_stdev_m_s01,
+                size=num_storms),
+            'north_velocities_m_s01': random_state_object.normal(
+                self.mean_north_velocity_m_s01, self.velocity_stdev_m_s01,
+                size=num_storms),
+            'radii_metres': self.mean_radius_metres *
+                            random_state_object.lognormal(
+                                0., 0.3, size=num_storms)
+        }
+
+    def get_storm_object_table(self, spc_date_string):
+        """Makes storm-object table for one SPC date.
+
+        The table has every object of storms that start in this date or the
+        previous one, with valid time in this date.
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :return: storm_object_table: pandas DataFrame with columns listed in
+            `storm_tracking_io.read_many_processed_files`, sorted by time.
+        """
+
+        storm_dicts = [
+            self.get_storms(_get_previous_spc_date(spc_date_string)),
+            self.get_storms(spc_date_string)]
+        storm_dict = dict([
+            (k, numpy.concatenate([d[k] for d in storm_dicts]))
+            for k in storm_dicts[0]])
+
+        num_objects_by_storm = (
+            storm_dict['lifetimes_sec'] // self.time_step_sec + 1)
+        storm_index_by_object = numpy.repeat(
+            numpy.arange(len(num_objects_by_storm)), num_objects_by_storm)
+        ages_sec = self.time_step_sec * (
+            numpy.arange(len(storm_index_by_object)) - numpy.repeat(
+                numpy.cumsum(num_objects_by_storm) - num_objects_by_storm,
+                num_objects_by_storm))
+        unix_times_sec = (
+            storm_dict['start_times_unix_sec'][storm_index_by_object] +
+            ages_sec)
+
+        start_time_unix_sec = get_spc_date_start_time(spc_date_string)
+        keep_indices = numpy.where(numpy.logical_and(
+            unix_times_sec >= start_time_unix_sec,
+            unix_times_sec < start_time_unix_sec + SECONDS_PER_DAY))[0]
+        keep_indices = keep_indices[numpy.argsort(
+            unix_times_sec[keep_indices], kind='mergesort')]
+
+        storm_index_by_object = storm_index_by_object[keep_indices]
+        ages_sec = ages_sec[keep_indices]
+        unix_times_sec = unix_times_sec[keep_indices]
+        num_objects = len(keep_indices)
+
+        random_state_object = self._get_random_state(spc_date_string, 1)
+        east_velocities_m_s01 = (
+            storm_dict['east_velocities_m_s01'][storm_index_by_object] +
+            random_state_object.normal(0., 1., size=num_objects))
+        north_velocities_m_s01 = (
+            storm_dict['north_velocities_m_s01'][storm_index_by_object] +
+            random_state_object.normal(0., 1., size=num_objects))
+
+        centroid_latitudes_deg = (
+            storm_dict['start_latitudes_deg'][storm_index_by_object] +
+            storm_dict['north_velocities_m_s01'][storm_index_by_object] *
+            ages_sec / METRES_PER_DEGREE_LAT)
+        centroid_longitudes_deg = (
+            storm_dict['start_longitudes_deg'][storm_index_by_object] +
+            storm_dict['east_velocities_m_s01'][storm_index_by_object] *
+            ages_sec / (METRES_PER_DEGREE_LAT * numpy.cos(
+                numpy.radians(centroid_latitudes_deg))))
+
+        storm_object_dict = {
+            STORM_ID_COLUMN: storm_dict['storm_ids'][storm_index_by_object],
+            TIME_COLUMN: unix_times_sec,
+            AGE_COLUMN: ages_sec,
+            CENTROID_LAT_COLUMN: centroid_latitudes_deg,
+            CENTROID_LNG_COLUMN: centroid_longitudes_deg,
+            EAST_VELOCITY_COLUMN: east_velocities_m_s01,
+            NORTH_VELOCITY_COLUMN: north_velocities_m_s01
+        }
+        column_names = [
+            STORM_ID_COLUMN, TIME_COLUMN, AGE_COLUMN, CENTROID_LAT_COLUMN,
+            CENTROID_LNG_COLUMN, EAST_VELOCITY_COLUMN, NORTH_VELOCITY_COLUMN]
+
+        if self.include_polygons:
+            storm_object_dict[POLYGON_COLUMN] = make_polygons(
+                centroid_latitudes_deg, centroid_longitudes_deg,
+                storm_dict['radii_metres'][storm_index_by_object],
+                num_vertices=self.num_vertices)
+            column_names.append(POLYGON_COLUMN)
+
+        return pandas.DataFrame(storm_object_dict, columns=column_names)
+
+    def __call__(self, spc_date_string):
+        """Read function for `day_loader.DayLoader`.
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :return: storm_object_table: See doc for `get_storm_object_table`.
+        """
+
+        return self.get_storm_object_table(spc_date_string)
+
+    def write_spc_date(self, spc_date_string, top_processed_dir_name,
+                       tracking_scale_metres2,
+                       data_source=local_tracking_io.SEGMOTION_SOURCE_NAME):
+        """Writes one SPC date as processed tracking files.
+
+        :param spc_date_string: SPC date (format "yyyymmdd").
+        :param top_processed_dir_name: See doc for
+            `local_tracking_io.write_processed_files_one_spc_date`.
+        :param tracking_scale_metres2: Same.
+        :param data_source: Same.
+        :return: processed_file_names: Same.
+        """
+
+        return local_tracking_io.write_processed_files_one_spc_date(
+            self.get_storm_object_table(spc_date_string), spc_date_string,
+            top_processed_dir_name=top_processed_dir_name,
+            tracking_scale_metres2=tracking_scale_metres2,
+            data_source=data_source)
@@ -0,0 +1,210 @@
+"""Vectorized temporal binning of storm objects.
+
+The temporal scripts used to turn every valid time into a string
+(`time_conversion.unix_sec_to_string(t, '%H')`) and parse it back, and the
+passage climatology built one "{storm_id}_{hour}" string per object and a
+Python set, just to count each storm once per hour.
+
+Here hour, 15-minute slot, day of year, month and year come from the integer
+times by arithmetic (UTC, proleptic Gregorian calendar).  Storm-bin pairs are
+de-duplicated by packing the storm number and the flat bin index into one
+int64 key, and histograms over any combination of bins (e.g., 96 quarter-hours
+x 12 months) are one `numpy.bincount` call.
+"""
+
+import numpy
+
+SECONDS_PER_MINUTE = 60
+SECONDS_PER_HOUR = 3600
+SECONDS_PER_DAY = 86400
+
+HOUR_BIN = 'hour'
+QUARTER_HOUR_BIN = 'quarter_hour'
+DAY_OF_YEAR_BIN = 'day_of_year'
+MONTH_BIN = 'month'
+YEAR_BIN = 'year'
+VALID_BIN_TYPES = [
+    HOUR_BIN, QUARTER_HOUR_BIN, DAY_OF_YEAR_BIN, MONTH_BIN, YEAR_BIN
+]
+
+NUM_BINS_BY_TYPE = {
+    HOUR_BIN: 24,
+    QUARTER_HOUR_BIN: 96,
+    DAY_OF_YEAR_BIN: 366,
+    MONTH_BIN: 12
+}
+
+
+def _check_bin_type(bin_type):
+    """Error-checks bin type.
+
+    :param bin_type: Bin type.
+    :raises: ValueError: if `bin_type not in VALID_BIN_TYPES`.
+    """
+
+    if bin_type not in VALID_BIN_TYPES:
+        raise ValueError(
+            'Bin type ("{0:s}") must be in the following list:\n{1:s}'.format(
+                bin_type, str(VALID_BIN_TYPES)))
+
+
+def _days_to_civil(days_since_epoch):
+    """Converts days since 1 Jan 1970 to year, month and day of month.
+
+    This is the `civil_from_days` algorithm of Howard Hinnant, which works on
+    whole arrays with integer arithmetic only.
+
+    :param days_since_epoch: numpy array of integers.
+    :return: years: numpy array of years.
+    :return: months: numpy array of months (1...12).
+    :return: days_of_month: numpy array of days (1...31).
+    """
+
+    shifted_days = days_since_epoch + 719468
+    eras = numpy.floor_divide(shifted_days, 146097)
+    day_of_era = shifted_days - eras * 146097
+    year_of_era = (day_of_era - day_of_era // 1460 + day_of_era // 36524 -
+                   day_of_era // 146096) // 365
+    day_of_year = day_of_era - (
+        365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+    shifted_months = (5 * day_of_year + 2) // 153
+
+    days_of_month = day_of_year - (153 * shifted_months + 2) // 5 + 1
+    months = numpy.where(shifted_months < 10, shifted_months + 3,
+                         shifted_months - 9)
+    years = year_of_era + eras * 400 + (months <= 2)
+    return years, months, days_of_month
+
+
+def _civil_to_days(years, months, days_of_month):
+    """Converts year, month and day of month to days since 1 Jan 1970.
+
+    This is the `days_from_civil` algorithm of Howard Hinnant (inverse of
+    `_days_to_civil`).
+
+    :param years: numpy array of years.
+    :param months: numpy array of months (1...12).
+    :param days_of_month: numpy array of days (1...31).
+    :return: days_since_epoch: numpy array of integers.
+    """
+
+    years = years - (months <= 2)
+    eras = numpy.floor_divide(years, 400)
+    year_of_era = years - eras * 400
+    shifted_months = numpy.where(months > 2, months - 3, months + 9)
+    day_of_year = (153 * shifted_months + 2) // 5 + days_of_month - 1
+    day_of_era = (year_of_era * 365 + year_of_era // 4 - year_of_era // 100 +
+                  day_of_year)
+    return eras * 146097 + day_of_era - 719468
+
+
+def get_bin_indices(unix_times_sec, bin_type):
+    """Finds temporal bin of each time.
+
+    :param unix_times_sec: 1-D numpy array of valid times.
+    :param bin_type: Bin type (string in `VALID_BIN_TYPES`).
+    :return: bin_indices: 1-D numpy array of int64.  Hour is 0...23,
+        quarter-hour 0...95, day of year 0...365, month 0...11 and year is the
+        calendar year.
+    """
+
+    _check_bin_type(bin_type)
+    unix_times_sec = numpy.asarray(unix_times_sec).astype(numpy.int64)
+    seconds_of_day = numpy.mod(unix_times_sec, SECONDS_PER_DAY)
+
+    if bin_type == HOUR_BIN:
+        return seconds_of_day // SECONDS_PER_HOUR
+    if bin_type == QUARTER_HOUR_BIN:
+        return seconds_of_day // (15 * SECONDS_PER_MINUTE)
+
+    days_since_epoch = numpy.floor_divide(unix_times_sec, SECONDS_PER_DAY)
+    years, months, _ = _days_to_civil(days_since_epoch)
+
+    if bin_type == MONTH_BIN:
+        return months - 1
+    if bin_type == YEAR_BIN:
+        return years
+
+    return days_since_epoch - _civil_to_days(
+        years, numpy.ones_like(years), numpy.ones_like(years))
+
+
+def get_flat_bin_indices(unix_times_sec, bin_types, first_year=None,
+                         num_years=None):
+    """Finds flat index into a multi-dimensional temporal histogram.
+
+    :param unix_times_sec: 1-D numpy array of valid times.
+    :param bin_types: 1-D list of bin types (one per histogram dimension).
+    :param first_year: First year in histogram (needed only for year bins).
+    :param num_years: Number of years in histogram (needed only for year bins).
+    :return: flat_bin_indices: 1-D numpy array of int64, with -1 for times
+        outside the year range.
+    :return: histogram_shape: Tuple with number of bins in each dimension.
+    """
+
+    histogram_shape = []
+    bin_index_arrays = []
+    valid_flags = numpy.full(len(unix_times_sec), True, dtype=bool)
+
+    for this_bin_type in bin_types:
+        these_bin_indices = get_bin_indices(unix_times_sec, this_bin_type)
+
+        if this_bin_type == YEAR_BIN:
+            if first_year is None or num_years is None:
+                raise ValueError(
+                    'first_year and num_years are needed for year bins.')
+
+            these_bin_indices = these_bin_indices - first_year
+            valid_flags = numpy.logical_and(valid_flags, numpy.logical_and(
+                these_bin_indices >= 0, these_bin_indices < num_years))
+            histogram_shape.append(num_years)
+        else:
+            histogram_shape.append(NUM_BINS_BY_TYPE[this_bin_type])
+
+        bin_index_arrays.append(these_bin_indices)
+
+    histogram_shape = tuple(histogram_shape)
+    flat_bin_indices = numpy.full(len(unix_times_sec), -1, dtype=numpy.int64)
+    flat_bin_indices[valid_flags] = numpy.ravel_multi_index(
+        tuple([a[valid_flags] for a in bin_index_arrays]), histogram_shape)
+
+    return flat_bin_indices, histogram_shape
+
+
+def get_histogram(unix_times_sec, bin_types, storm_ids=None, first_year=None,
+                  num_years=None):
+    """Counts storm objects, or storms, in each temporal bin.
+
+    :param unix_times_sec: 1-D numpy array of valid times.
+    :param bin_types: See doc for `get_flat_bin_indices`.
+    :param storm_ids: 1-D numpy array of storm IDs (strings or integer codes),
+        one per time.  If given, each storm is counted at most once per bin;
+        if None, each time is counted.
+    :param first_year: See doc for `get_flat_bin_indices`.
+    :param num_years: Same.
+    :return: histogram_matrix: numpy array of counts, with one dimension per
+        bin type.
+    """
+
+    unix_times_sec = numpy.asarray(unix_times_sec)
+    flat_bin_indices, histogram_shape = get_flat_bin_indices(
+        unix_times_sec, bin_types, first_year=first_year, num_years=num_years)
+    num_flat_bins = int(numpy.prod(histogram_shape))
+
+    valid_flags = flat_bin_indices >= 0
+    flat_bin_indices = flat_bin_indices[valid_flags]
+
+    if storm_ids is not None:
+        storm_numbers = numpy.unique(
+            numpy.asarray(storm_ids)[valid_flags],
+            return_inverse=True)[1].ravel().astype(numpy.int64)
+        storm_bin_keys = numpy.sort(
+            storm_numbers * num_flat_bins + flat_bin_indices)
+        first_flags = numpy.concatenate((
+            numpy.array([True]), numpy.diff(storm_bin_keys) != 0))[
+                :len(storm_bin_keys)]
+        flat_bin_indices = numpy.mod(
+            storm_bin_keys[first_flags], num_flat_bins)
+
+    return numpy.bincount(
+        flat_bin_indices, minlength=num_flat_bins).reshape(histogram_shape)
@@ -0,0 +1,213 @@
+"""Per-storm index into a storm-object table.
+
+A `TrackIndex` sorts the rows of a table by storm ID, then by time, and keeps
+the offset where each storm's track starts in that order (compressed sparse
+row layout).  The track of any storm is then one slice, and per-storm
+reductions (mean, max, first, last) are one `numpy.ufunc.reduceat` call over
+the whole table, instead of one boolean mask per storm.
+"""
+
+import collections
+import weakref
+import numpy
+from storm_climatologies.utils import storm_table
+
+MAX_CACHED_INDICES = 3
+
+_track_index_cache = collections.OrderedDict()
+
+
+class TrackIndex(object):
+    """Rows of a storm-object table grouped by storm.
+
+    Storms are numbered 0...(S - 1) in the order of `unique_storm_ids`, which
+    is sorted (as from `numpy.unique`).
+    """
+
+    def __init__(self, storm_ids, unix_times_sec=None):
+        """Creates new index.
+
+        N = number of storm objects
+
+        :param storm_ids: length-N numpy array of storm IDs (strings or integer
+            codes).
+        :param unix_times_sec: length-N numpy array of valid times.  Within
+            each storm, rows are sorted by time, with ties kept in table order.
+            If None, rows are kept in table order.
+        """
+
+        self.unique_storm_ids, self.storm_index_by_row = numpy.unique(
+            numpy.asarray(storm_ids), return_inverse=True)
+        self.storm_index_by_row = self.storm_index_by_row.ravel()
+
+        if unix_times_sec is None:
+            self.sort_indices = numpy.argsort(
+                self.storm_index_by_row, kind='mergesort')
+        else:
+            self.sort_indices = numpy.lexsort(
+                (numpy.asarray(unix_times_sec), self.storm_index_by_row))
+
+        num_objects_by_storm = numpy.bincount(
+            self.storm_index_by_row, minlength=len(self.unique_storm_ids))
+        self.track_offsets = numpy.concatenate((
+            numpy.array([0], dtype=int),
+            numpy.cumsum(num_objects_by_storm)))
+
+    @classmethod
+    def from_table(cls, storm_object_table, sort_by_time=True):
+        """Creates index for a storm-object table.
+
+        :param storm_object_table: pandas DataFrame or
+            `storm_table.StormTable`.
+        :param sort_by_time: Boolean flag.  If True, each track is sorted by
+            time; if False (or the table has no time column), it is kept in
+            table order.
+        :return: track_index_object: Instance of `TrackIndex`.
+        """
+
+        unix_times_sec = None
+        if sort_by_time and storm_table.TIME_COLUMN in storm_object_table:
+            unix_times_sec = storm_table.get_column(
+                storm_object_table, storm_table.TIME_COLUMN)
+
+        return cls(storm_table.get_column(
+            storm_object_table, storm_table.STORM_ID_COLUMN), unix_times_sec)
+
+    def __len__(self):
+        return len(self.unique_storm_ids)
+
+    @property
+    def num_objects_by_storm(self):
+        """Number of storm objects in each track."""
+        return numpy.diff(self.track_offsets)
+
+    def find_storm_index(self, storm_id):
+        """Finds index of one storm.
+
+        :param storm_id: Storm ID.
+        :return: storm_index: Index of storm, or -1 if it is not in the table.
+        """
+
+        storm_index = numpy.searchsorted(self.unique_storm_ids, storm_id)
+        if (storm_index < len(self.unique_storm_ids) and
+                self.unique_storm_ids[storm_index] == storm_id):
+            return int(storm_index)
+        return -1
+
+    def get_track_rows(self, storm_index):
+        """Returns table rows in one storm's track.
+
+        :param storm_index: Index of storm.
+        :return: row_indices: 1-D numpy array of row indices, in track order.
+        """
+
+        first_position = self.track_offsets[storm_index]
+        last_position = self.track_offsets[storm_index + 1]
+        return self.sort_indices[first_position:last_position]
+
+    def get_track(self, values, storm_index):
+        """Returns one column for one storm's track.
+
+        :param values: 1-D numpy array with one value per row of the table.
+        :param storm_index: Index of storm.
+        :return: track_values: 1-D numpy array, in track order.
+        """
+
+        return numpy.asarray(values)[self.get_track_rows(storm_index)]
+
+    def sort(self, values):
+        """Puts one column in track order (all tracks back to back).
+
+        :param values: 1-D numpy array with one value per row of the table.
+        :return: sorted_values: 1-D numpy array.
+        """
+
+        return numpy.asarray(values)[self.sort_indices]
+
+    def reduce(self, values, reduction_function):
+        """Reduces one column over each track.
+
+        :param values: 1-D numpy array with one value per row of the table.
+        :param reduction_function: numpy ufunc (e.g., `numpy.add`,
+            `numpy.maximum`).
+        :return: values_by_storm: length-S numpy array.
+        """
+
+        sorted_values = self.sort(values)
+        if len(sorted_values) == 0:
+            return sorted_values
+
+        return reduction_function.reduceat(
+            sorted_values, self.track_offsets[:-1])
+
+    def mean(self, values):
+        """Computes mean of one column over each track.
+
+        :param values: See doc for `reduce`.
+        :return: mean_by_storm: length-S numpy array.
+        """
+
+        return (self.reduce(numpy.asarray(values, dtype=float), numpy.add) /
+                self.num_objects_by_storm)
+
+    def first(self, values):
+        """Returns first value of one column in each track.
+
+        :param values: See doc for `reduce`.
+        :return: first_value_by_storm: length-S numpy array.
+        """
+
+        return numpy.asarray(values)[
+            self.sort_indices[self.track_offsets[:-1]]]
+
+    def last(self, values):
+        """Returns last value of one column in each track.
+
+        :param values: See doc for `reduce`.
+        :return: last_value_by_storm: length-S numpy array.
+        """
+
+        return numpy.asarray(values)[
+            self.sort_indices[self.track_offsets[1:] - 1]]
+
+    def broadcast(self, values_by_storm):
+        """Spreads per-storm values back to the rows of the table.
+
+        :param values_by_storm: length-S numpy array.
+        :return: values: 1-D numpy array with one value per row of the table.
+        """
+
+        return numpy.asarray(values_by_storm)[self.storm_index_by_row]
+
+
+def get_track_index(storm_object_table):
+    """Returns time-sorted `TrackIndex` for a table, building it only once.
+
+    The last few indices are cached by table identity, so that accumulators fed
+    the same window by `climatology_engine` share one index.  The cache holds
+    only weak references to tables, and an index is dropped as soon as its
+    table is, so the cache never keeps a window in memory.
+
+    :param storm_object_table: pandas DataFrame or `storm_table.StormTable`.
+    :return: track_index_object: Instance of `TrackIndex`.
+    """
+
+    this_key = id(storm_object_table)
+    if this_key in _track_index_cache:
+        this_table_reference, track_index_object = _track_index_cache[
+            this_key]
+        if this_table_reference() is storm_object_table:
+            return track_index_object
+
+    def _drop_index(table_reference):
+        if (this_key in _track_index_cache and
+                _track_index_cache[this_key][0] is table_reference):
+            del _track_index_cache[this_key]
+
+    track_index_object = TrackIndex.from_table(storm_object_table)
+    _track_index_cache[this_key] = (
+        weakref.ref(storm_object_table, _drop_index), track_index_object)
+    while len(_track_index_cache) > MAX_CACHED_INDICES:
+        _track_index_cache.popitem(last=False)
+
+    return track_index_object
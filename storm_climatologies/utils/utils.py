@@ -1,9 +1,12 @@
 """This module gets specified dates for files that should be read and written in. This also developes the 
 concatonated storm object table"""
+import math
 import numpy
-import pandas
+from gewittergefahr.gg_utils import error_checking
+from gewittergefahr.gg_utils import longitude_conversion as lng_conversion
 from gewittergefahr.gg_utils import time_conversion
-from gewittergefahr.gg_io import storm_tracking_io as tracking_io
+from storm_climatologies.utils import day_loader
+from storm_climatologies.utils import columnar_cache
 
 
 #sample dates for one day of April 15th 2011
@@ -12,15 +15,33 @@ LAST_SPC_DATE_STRING = '20110415'
 #wherever the data is stored
 TOP_PROCESSED_DIR_NAME = '/Users/reu/Downloads/'
 TRACKING_SCALE_METRES2 = 314159265
+#columnar cache of tracking data (see columnar_cache.py), None to read
+#tracking files directly
+TOP_CACHE_DIR_NAME = None
 
 BIRTH_CLIMATOLOGY_TYPE = 'birth'
 DEATH_CLIMATOLOGY_TYPE = 'death'
 PASSAGE_CLIMATOLOGY_TYPE = 'passage'
 
-spc_date_strings = time_conversion.get_spc_dates_in_range(first_spc_date_string=FIRST_SPC_DATE_STRING,
-                                                          last_spc_date_string=LAST_SPC_DATE_STRING)
-num_spc_dates = len(spc_date_strings)
-storm_object_table_by_spc_date = [None] * num_spc_dates
+_spc_date_strings = None
+_day_loader_object_by_columns = {}
+
+
+def get_default_spc_date_strings():
+    """Returns SPC dates from FIRST_SPC_DATE_STRING to LAST_SPC_DATE_STRING.
+
+    Dates are computed on the first call, not when the module is imported.
+
+    :return: spc_date_strings: 1-D list of SPC dates (format "yyyymmdd").
+    """
+
+    global _spc_date_strings
+    if _spc_date_strings is None:
+        _spc_date_strings = time_conversion.get_spc_dates_in_range(
+            first_spc_date_string=FIRST_SPC_DATE_STRING,
+            last_spc_date_string=LAST_SPC_DATE_STRING)
+    return _spc_date_strings
+
 
 
 def _get_dates_needed(working_date_index, num_dates, climatology_type):
@@ -51,28 +72,70 @@ def _get_dates_needed(working_date_index, num_dates, climatology_type):
     
     return numpy.array(date_needed_indices, dtype=int)
 
-def get_storm_object_table(num_spc_dates, climatology_type, working_date_index):
-    date_in_memory_indices = _get_dates_needed(working_date_index, num_spc_dates, climatology_type)
-    for i in range(num_spc_dates):
-        if i in date_in_memory_indices:
-            if storm_object_table_by_spc_date[i] is None:
-                these_tracking_file_names = (tracking_io.find_processed_files_one_spc_date(
-                                                spc_date_string=spc_date_strings[i],
-                                                data_source='segmotion',
-                                                top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
-                                                tracking_scale_metres2=TRACKING_SCALE_METRES2))
-                storm_object_table_by_spc_date[i] = (tracking_io.read_many_processed_files(
-                                                    these_tracking_file_names))
+def _get_default_day_loader(column_names=None):
+    """Returns day loader shared by all calls to `get_storm_object_table`.
 
-        else:
-            print 'Clearing data for SPC date "{0:s}"...'.format(spc_date_strings[i])
-            storm_object_table_by_spc_date[i] = None
-
-    for j in date_in_memory_indices[1:]:
-        storm_object_table_by_spc_date[j], _ = (storm_object_table_by_spc_date[j].align(
-                                                storm_object_table_by_spc_date[date_in_memory_indices[0]], axis=1))
-    storm_object_tables_to_concat = [storm_object_table_by_spc_date[j] for j in date_in_memory_indices]
-    multiday_storm_object_table = pandas.concat(storm_object_tables_to_concat, axis=0, ignore_index=True)
+    :param column_names: 1-D list of columns to keep (None for all columns).
+        Calls with different columns get different loaders.
+    :return: day_loader_object: Instance of `day_loader.DayLoader`.
+    """
+
+    loader_key = None if column_names is None else tuple(column_names)
+    if loader_key not in _day_loader_object_by_columns:
+        read_function = None
+        if TOP_CACHE_DIR_NAME is not None:
+            read_function = columnar_cache.CachedTableReader(
+                top_cache_dir_name=TOP_CACHE_DIR_NAME,
+                tracking_scale_metres2=TRACKING_SCALE_METRES2,
+                top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+                column_names=column_names)
+
+        _day_loader_object_by_columns[loader_key] = day_loader.DayLoader(
+            spc_date_strings=get_default_spc_date_strings(),
+            top_processed_dir_name=TOP_PROCESSED_DIR_NAME,
+            tracking_scale_metres2=TRACKING_SCALE_METRES2,
+            read_function=read_function, column_names=column_names)
+    return _day_loader_object_by_columns[loader_key]
+
+def get_storm_object_table(num_spc_dates, climatology_type,
+                           working_date_index, day_loader_object=None,
+                           column_names=None):
+    """Returns table with mature storm objects needed for given working date.
+
+    While the caller works on this table, dates needed for the next working
+    date are read in the background.
+
+    :param num_spc_dates: Number of dates total.
+    :param climatology_type: Climatology type (birth, death or passage).
+    :param working_date_index: Array index for the day currently being worked
+        on.
+    :param day_loader_object: Instance of `day_loader.DayLoader`.  If None,
+        will use one shared loader for `get_default_spc_date_strings`.
+    :param column_names: 1-D list of columns needed by the caller.  If None,
+        will keep all columns of the tracking files (including polygons, which
+        are expensive), or all scalar columns of the columnar cache.  Callers
+        that need only areas should ask for an area column (see
+        `day_loader.AREA_COLUMN_BY_METHOD`) instead of polygons.  "age_sec" is
+        always kept.
+    :return: multiday_storm_object_table: pandas DataFrame with storm objects
+        that are >= 900 seconds old.
+    """
+    if column_names is not None and 'age_sec' not in column_names:
+        column_names = list(column_names) + ['age_sec']
+    if day_loader_object is None:
+        day_loader_object = _get_default_day_loader(column_names)
+
+    date_in_memory_indices = _get_dates_needed(
+        working_date_index, num_spc_dates, climatology_type)
+    next_date_indices = None
+    if working_date_index + 1 < num_spc_dates:
+        next_date_indices = _get_dates_needed(
+            working_date_index + 1, num_spc_dates, climatology_type)
+
+    multiday_storm_object_table = day_loader_object.get_multiday_table(
+        date_in_memory_indices, prefetch_date_indices=next_date_indices)
+    multiday_storm_object_table = day_loader.project_columns(
+        multiday_storm_object_table, column_names)
     multiday_storm_object_table = multiday_storm_object_table[multiday_storm_object_table['age_sec']>= 900]
     return multiday_storm_object_table
 
@@ -161,8 +224,8 @@ def latlng_vectors_to_matrices(unique_latitudes_deg, unique_longitudes_deg):
     (longitude_matrix_deg, latitude_matrix_deg) = numpy.meshgrid(
         unique_longitudes_deg, unique_latitudes_deg)
     return latitude_matrix_deg, longitude_matrix_deg
-  
-  def _find_nearest_value(sorted_input_values, test_value):
+
+def _find_nearest_value(sorted_input_values, test_value):
     """Finds nearest value in array to test value.
 
     This method is based on the following:
@@ -189,28 +252,145 @@ def latlng_vectors_to_matrices(unique_latitudes_deg, unique_longitudes_deg):
 
     return sorted_input_values[nearest_index], nearest_index
 
+def _is_regular(sorted_values):
+    """Determines whether values are equally spaced.
+
+    :param sorted_values: 1-D numpy array, sorted in ascending order.
+    :return: is_regular: Boolean flag.
+    """
+
+    if len(sorted_values) < 3:
+        return True
+
+    spacings = numpy.diff(sorted_values)
+    return numpy.allclose(
+        spacings, spacings[0], rtol=0.,
+        atol=1e-6 * numpy.absolute(spacings[0]))
+
+
+def find_nearest_indices(sorted_input_values, test_values):
+    """Finds nearest value in array to each test value.
+
+    This is a vectorized version of `_find_nearest_value`, with the same answer
+    (including ties, which go to the higher index, and test values outside the
+    array, which go to the nearest end).  If `sorted_input_values` is equally
+    spaced, the index is computed arithmetically and then checked against the
+    two neighbouring values, so the cost is O(1) per test value.
+
+    :param sorted_input_values: 1-D numpy array.  Must be sorted in ascending
+        order.
+    :param test_values: 1-D numpy array of test values.
+    :return: nearest_indices: 1-D numpy array of array indices.
+    """
+
+    sorted_input_values = numpy.asarray(sorted_input_values, dtype=float)
+    test_values = numpy.asarray(test_values, dtype=float)
+    num_values = len(sorted_input_values)
+
+    if not _is_regular(sorted_input_values):
+        nearest_indices = numpy.searchsorted(
+            sorted_input_values, test_values, side='left')
+        previous_indices = numpy.maximum(nearest_indices - 1, 0)
+        clipped_indices = numpy.minimum(nearest_indices, num_values - 1)
+
+        previous_distances = numpy.absolute(
+            test_values - sorted_input_values[previous_indices])
+        these_distances = numpy.absolute(
+            test_values - sorted_input_values[clipped_indices])
+        subtract_one_flags = numpy.logical_and(
+            nearest_indices > 0, numpy.logical_or(
+                nearest_indices == num_values,
+                previous_distances < these_distances))
+        return numpy.where(
+            subtract_one_flags, nearest_indices - 1, nearest_indices)
+
+    spacing = 1. if num_values == 1 else (
+        sorted_input_values[1] - sorted_input_values[0])
+    nearest_indices = numpy.floor(
+        (test_values - sorted_input_values[0]) / spacing + 0.5)
+    nearest_indices = numpy.clip(
+        numpy.nan_to_num(nearest_indices), 0, num_values - 1).astype(int)
+
+    # Arithmetic rounding can be off by one, so compare with both neighbours,
+    # sending ties to the higher index as `_find_nearest_value` does.
+    these_distances = numpy.absolute(
+        test_values - sorted_input_values[nearest_indices])
+    next_indices = numpy.minimum(nearest_indices + 1, num_values - 1)
+    next_distances = numpy.absolute(
+        test_values - sorted_input_values[next_indices])
+    move_up_flags = numpy.logical_and(
+        next_indices > nearest_indices, next_distances <= these_distances)
+    nearest_indices[move_up_flags] += 1
+    these_distances[move_up_flags] = next_distances[move_up_flags]
+
+    previous_indices = numpy.maximum(nearest_indices - 1, 0)
+    previous_distances = numpy.absolute(
+        test_values - sorted_input_values[previous_indices])
+    move_down_flags = numpy.logical_and(
+        previous_indices < nearest_indices,
+        previous_distances < these_distances)
+    nearest_indices[move_down_flags] -= 1
+
+    return nearest_indices
+
+
+def bin_storm_objects(
+        storm_centroids_x_metres, storm_centroids_y_metres,
+        unique_grid_point_x_metres, unique_grid_point_y_metres,
+        grid_cell_count_matrix=None, weights=None):
+    """Adds storm objects to the nearest grid cell, all at once.
+
+    N = number of storm objects
+
+    :param storm_centroids_x_metres: length-N numpy array of x-coordinates.
+    :param storm_centroids_y_metres: length-N numpy array of y-coordinates.
+    :param unique_grid_point_x_metres: Sorted 1-D numpy array of grid-point
+        x-coordinates.
+    :param unique_grid_point_y_metres: Same but for y.
+    :param grid_cell_count_matrix: numpy array (rows = y, columns = x) to add
+        to, in place.  If None, will start from zeros.
+    :param weights: length-N numpy array of weights.  If None, each storm
+        object adds 1 to its grid cell (count mode); otherwise it adds its
+        weight (weighted-sum mode).
+    :return: grid_cell_count_matrix: numpy array with counts or weighted sums.
+    """
+
+    grid_shape = (len(unique_grid_point_y_metres),
+                  len(unique_grid_point_x_metres))
+
+    these_rows = find_nearest_indices(
+        unique_grid_point_y_metres, storm_centroids_y_metres)
+    these_columns = find_nearest_indices(
+        unique_grid_point_x_metres, storm_centroids_x_metres)
+    these_sums = numpy.bincount(
+        numpy.ravel_multi_index((these_rows, these_columns), grid_shape),
+        weights=weights, minlength=grid_shape[0] * grid_shape[1]
+    ).reshape(grid_shape)
+
+    if grid_cell_count_matrix is None:
+        return these_sums
+
+    grid_cell_count_matrix += these_sums
+    return grid_cell_count_matrix
+
+
 def _bin_storm_objects_one_for_loop(
         storm_centroids_x_metres, storm_centroids_y_metres,
         unique_grid_point_x_metres, unique_grid_point_y_metres, grid_cell_count_matrix):
-    """Counts number of storm objects in each grid cell, using single for-loop.
+    """Counts number of storm objects in each grid cell.
 
-    :param storm_centroids_x_metres: See doc for
-        `_bin_storm_objects_triple_for_loop`.
+    Kept for scripts written against the old loop; the work is now done by
+    `bin_storm_objects`.
+
+    :param storm_centroids_x_metres: See doc for `bin_storm_objects`.
     :param storm_centroids_y_metres: Same.
     :param unique_grid_point_x_metres: Same.
     :param unique_grid_point_y_metres: Same.
+    :param grid_cell_count_matrix: Same.
     :return: grid_cell_count_matrix: Same.
     """
 
-    num_storm_objects = len(storm_centroids_x_metres)
-    num_grid_rows = len(unique_grid_point_y_metres)
-    num_grid_columns = len(unique_grid_point_x_metres)
-
-    for i in range(num_storm_objects):
-        _, this_row = _find_nearest_value(
-            unique_grid_point_y_metres, storm_centroids_y_metres[i])
-        _, this_column = _find_nearest_value(
-            unique_grid_point_x_metres, storm_centroids_x_metres[i])
-        grid_cell_count_matrix[this_row, this_column] += 1
-
-    return grid_cell_count_matrix
+    return bin_storm_objects(
+        storm_centroids_x_metres, storm_centroids_y_metres,
+        unique_grid_point_x_metres, unique_grid_point_y_metres,
+        grid_cell_count_matrix=grid_cell_count_matrix)